@@ -0,0 +1,417 @@
+"""
+Columnar in-memory analytics engine.
+
+An alternative to the rating cube for /api/analytics/trends (and other
+rating rollups), selected with ANALYTICS_ENGINE=columnar. Each MAT's
+assessments are held as parallel NumPy arrays - school index, standard index,
+term ordinal and an int8 rating (0 = unrated) - sorted by a packed
+(school, standard, term) key. A rollup is a boolean mask for the filters and
+one bincount over (group, rating), so it never goes back to MySQL.
+
+Freshness:
+- Every call reads a change marker for the MAT: the school_term_scores row
+  count, revisions and assessment total (kept by the assessment triggers),
+  and mats.catalogue_version. If the scores moved, assessments with
+  last_updated inside the look-back window are re-read and merged by key.
+- The window covers writes that committed after a later timestamp was
+  already seen.
+- A merge can't see rows that went away, so the MAT is reloaded in full when
+  the catalogue_version moves (archive-renames, deletes, dimension changes) or
+  when the merged row count no longer matches the assessment total (deleted
+  assessments). A full reload every ANALYTICS_RELOAD_SECONDS catches anything
+  else.
+
+Loads stream the MAT's assessments from an unbuffered cursor in batches of
+ANALYTICS_LOAD_BATCH_ROWS straight into the arrays. The engine is blocking:
+the API calls it on a worker thread. Each MAT has its own lock, so a cold load
+of one MAT never holds up reads of another.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pymysql
+
+from school_scores import CUBE_COUNTER_COLUMNS, RATINGS
+
+ANALYTICS_ENGINE = os.getenv('ANALYTICS_ENGINE', 'sql')  # 'sql' (rating cube) or 'columnar'
+ANALYTICS_RELOAD_SECONDS = int(os.getenv('ANALYTICS_RELOAD_SECONDS', '3600'))
+ANALYTICS_CHANGE_WINDOW_SECONDS = int(os.getenv('ANALYTICS_CHANGE_WINDOW_SECONDS', '300'))
+ANALYTICS_MAX_MATS = int(os.getenv('ANALYTICS_MAX_MATS', '20'))
+ANALYTICS_LOAD_BATCH_ROWS = int(os.getenv('ANALYTICS_LOAD_BATCH_ROWS', '50000'))
+
+# Dimensions rollup() can group by
+DIMENSIONS = (
+    'school_id', 'mat_standard_id', 'mat_aspect_id', 'aspect_category',
+    'standard_type', 'unique_term_id', 'academic_year'
+)
+
+# Packed row key: school << 38 | standard << 16 | term
+_STANDARD_SHIFT = 16
+_SCHOOL_SHIFT = 38
+
+CHANGE_MARKER_SQL = """
+    SELECT
+        sts.score_rows,
+        sts.revisions,
+        sts.assessment_rows,
+        m.catalogue_version
+    FROM mats m
+    CROSS JOIN (
+        SELECT COUNT(*) as score_rows,
+               CAST(COALESCE(SUM(revision), 0) AS SIGNED) as revisions,
+               CAST(COALESCE(SUM(total_count), 0) AS SIGNED) as assessment_rows
+        FROM school_term_scores
+        WHERE mat_id = %s
+    ) sts
+    WHERE m.mat_id = %s
+"""
+
+STANDARDS_SQL = """
+    SELECT ms.mat_standard_id, ms.mat_aspect_id, ms.standard_type,
+           ma.aspect_code, ma.aspect_category
+    FROM mat_standards ms
+    JOIN mat_aspects ma ON ms.mat_aspect_id = ma.mat_aspect_id
+    WHERE ms.mat_id = %s
+"""
+
+# Column order is relied on by MatColumns.load_assessments()
+ASSESSMENTS_SQL = """
+    SELECT a.school_id, a.mat_standard_id, a.unique_term_id, a.rating, a.last_updated
+    FROM assessments a
+    JOIN schools s ON a.school_id = s.school_id
+    WHERE s.mat_id = %s
+    {since}
+"""
+
+class _Labels:
+    """Append-only list of labels with a reverse index"""
+
+    def __init__(self, labels: Iterable[str] = ()):
+        self.labels: List[str] = []
+        self.index: Dict[str, int] = {}
+        for label in labels:
+            self.code(label)
+
+    def code(self, label: str) -> int:
+        code = self.index.get(label)
+        if code is None:
+            code = self.index[label] = len(self.labels)
+            self.labels.append(label)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+class MatColumns:
+    """
+    One MAT's assessments as sorted parallel arrays, plus the per-standard
+    dimension arrays (aspect, category, type) rows are joined to by index.
+    """
+
+    def __init__(self, terms: List[dict]):
+        # Term ordinals are positions in this snapshot of the term calendar
+        self.terms = _Labels(term['unique_term_id'] for term in terms)
+        self.years = _Labels()
+        self.term_year = np.array([self.years.code(term['academic_year']) for term in terms], dtype=np.int16)
+
+        self.schools = _Labels()
+        self.standards = _Labels()
+        self.aspects = _Labels()
+        self.categories = _Labels()
+        self.types = _Labels()
+        self.aspect_codes: Dict[int, str] = {}
+        self.standard_aspect = np.zeros(0, dtype=np.int32)
+        self.standard_category = np.zeros(0, dtype=np.int16)
+        self.standard_type = np.zeros(0, dtype=np.int16)
+
+        self.key = np.zeros(0, dtype=np.int64)
+        self.school = np.zeros(0, dtype=np.int32)
+        self.standard = np.zeros(0, dtype=np.int32)
+        self.term = np.zeros(0, dtype=np.int16)
+        self.rating = np.zeros(0, dtype=np.int8)
+
+        self.last_seen = None
+        self.marker = None
+        self.loaded_at = time.time()
+
+    def __len__(self) -> int:
+        return len(self.key)
+
+    def load_standards(self, rows: Iterable[dict]) -> None:
+        """(Re)build the per-standard dimension arrays. Standard codes are kept stable."""
+        rows = list(rows)
+        for row in rows:
+            self.standards.code(row['mat_standard_id'])
+
+        aspect = np.zeros(len(self.standards), dtype=np.int32)
+        category = np.zeros(len(self.standards), dtype=np.int16)
+        standard_type = np.zeros(len(self.standards), dtype=np.int16)
+        for row in rows:
+            code = self.standards.index[row['mat_standard_id']]
+            aspect[code] = self.aspects.code(row['mat_aspect_id'])
+            self.aspect_codes[aspect[code]] = row['aspect_code']
+            category[code] = self.categories.code(row['aspect_category'] or '')
+            standard_type[code] = self.types.code(row['standard_type'] or '')
+        self.standard_aspect, self.standard_category, self.standard_type = aspect, category, standard_type
+
+    def load_assessments(self, batches: Iterable[List[tuple]]) -> None:
+        """
+        Build the row arrays from batches of (school_id, mat_standard_id,
+        unique_term_id, rating, last_updated) tuples. Each batch is coded into
+        typed arrays as it arrives; the arrays are sorted once at the end.
+
+        Raises:
+            KeyError: A row's term or standard is not in this snapshot
+        """
+        parts = []
+        for batch in batches:
+            count = len(batch)
+            parts.append((
+                np.fromiter((self.schools.code(row[0]) for row in batch), dtype=np.int32, count=count),
+                np.fromiter((self.standards.index[row[1]] for row in batch), dtype=np.int32, count=count),
+                np.fromiter((self.terms.index[row[2]] for row in batch), dtype=np.int16, count=count),
+                np.fromiter((row[3] or 0 for row in batch), dtype=np.int8, count=count),
+            ))
+            latest = max((row[4] for row in batch if row[4] is not None), default=None)
+            if latest is not None and (self.last_seen is None or latest > self.last_seen):
+                self.last_seen = latest
+        if not parts:
+            return
+
+        school, standard, term, rating = (np.concatenate(arrays) for arrays in zip(*parts))
+        key = (school.astype(np.int64) << _SCHOOL_SHIFT) | (standard.astype(np.int64) << _STANDARD_SHIFT) | term
+        order = np.argsort(key, kind='stable')
+        self.key, self.school, self.standard, self.term, self.rating = (
+            key[order], school[order], standard[order], term[order], rating[order]
+        )
+
+    def merge(self, rows: Iterable[dict]) -> None:
+        """
+        Upsert assessment rows (school_id, mat_standard_id, unique_term_id,
+        rating, last_updated) by their (school, standard, term) key.
+
+        Raises:
+            KeyError: A row's term or standard is not in this snapshot - the
+            caller reloads the MAT
+        """
+        school, standard, term, rating = [], [], [], []
+        for row in rows:
+            school.append(self.schools.code(row['school_id']))
+            standard.append(self.standards.index[row['mat_standard_id']])
+            term.append(self.terms.index[row['unique_term_id']])
+            rating.append(row['rating'] or 0)
+            if row.get('last_updated') and (self.last_seen is None or row['last_updated'] > self.last_seen):
+                self.last_seen = row['last_updated']
+        if not school:
+            return
+
+        school = np.array(school, dtype=np.int32)
+        standard = np.array(standard, dtype=np.int32)
+        term = np.array(term, dtype=np.int16)
+        rating = np.array(rating, dtype=np.int8)
+        key = (school.astype(np.int64) << _SCHOOL_SHIFT) | (standard.astype(np.int64) << _STANDARD_SHIFT) | term
+
+        # Existing rows: overwrite the rating in place
+        position = np.searchsorted(self.key, key)
+        found = position < len(self.key)
+        found[found] = self.key[position[found]] == key[found]
+        self.rating[position[found]] = rating[found]
+
+        # New rows: append and restore key order
+        new = ~found
+        if new.any():
+            self.key = np.concatenate([self.key, key[new]])
+            self.school = np.concatenate([self.school, school[new]])
+            self.standard = np.concatenate([self.standard, standard[new]])
+            self.term = np.concatenate([self.term, term[new]])
+            self.rating = np.concatenate([self.rating, rating[new]])
+            order = np.argsort(self.key, kind='stable')
+            self.key, self.school, self.standard, self.term, self.rating = (
+                self.key[order], self.school[order], self.standard[order], self.term[order], self.rating[order]
+            )
+
+    def _codes(self, dimension: str, rows: np.ndarray) -> Tuple[np.ndarray, List[str]]:
+        """Per-row codes and labels for a dimension, for the selected rows"""
+        if dimension == 'school_id':
+            return self.school[rows], self.schools.labels
+        if dimension == 'mat_standard_id':
+            return self.standard[rows], self.standards.labels
+        if dimension == 'mat_aspect_id':
+            return self.standard_aspect[self.standard[rows]], self.aspects.labels
+        if dimension == 'aspect_category':
+            return self.standard_category[self.standard[rows]], self.categories.labels
+        if dimension == 'standard_type':
+            return self.standard_type[self.standard[rows]], self.types.labels
+        if dimension == 'unique_term_id':
+            return self.term[rows], self.terms.labels
+        if dimension == 'academic_year':
+            return self.term_year[self.term[rows]], self.years.labels
+        raise ValueError(f"Unknown dimension: {dimension}")
+
+    def rollup(self, dimensions: Tuple[str, ...], school_id: Optional[str] = None,
+               aspect_code: Optional[str] = None, aspect_category: Optional[str] = None,
+               standard_type: Optional[str] = None,
+               term_ids: Optional[List[str]] = None) -> Dict[tuple, dict]:
+        """
+        Same result as rollup_cube_cells(fetch_cube_cells(...), dimensions):
+        dimension values -> {total_count, rating_1_count .. rating_4_count}.
+        Groups with no rows are omitted.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        if school_id is not None:
+            if school_id not in self.schools.index:
+                return {}
+            mask &= self.school == self.schools.index[school_id]
+
+        standard_ok = np.ones(len(self.standards), dtype=bool)
+        if aspect_code is not None:
+            aspects = [code for code, aspect in self.aspect_codes.items() if aspect == aspect_code]
+            standard_ok &= np.isin(self.standard_aspect, aspects)
+        if aspect_category is not None:
+            standard_ok &= self.standard_category == self.categories.index.get(aspect_category, -1)
+        if standard_type is not None:
+            standard_ok &= self.standard_type == self.types.index.get(standard_type, -1)
+        if not standard_ok.all():
+            mask &= standard_ok[self.standard]
+
+        if term_ids is not None:
+            ordinals = [self.terms.index[term_id] for term_id in term_ids if term_id in self.terms.index]
+            mask &= np.isin(self.term, ordinals)
+
+        rows = np.flatnonzero(mask)
+        group = np.zeros(len(rows), dtype=np.int64)
+        shape = []
+        labels = []
+        for dimension in dimensions:
+            codes, dimension_labels = self._codes(dimension, rows)
+            group = group * len(dimension_labels) + codes
+            shape.append(len(dimension_labels))
+            labels.append(dimension_labels)
+
+        # One bincount over (group, rating); column 0 holds unrated rows
+        group_count = int(np.prod(shape)) if shape else 1
+        counts = np.bincount(group * 5 + self.rating[rows], minlength=group_count * 5).reshape(group_count, 5)
+
+        result = {}
+        for flat_group in np.flatnonzero(counts.sum(axis=1)):
+            codes = np.unravel_index(flat_group, shape) if shape else ()
+            key = tuple(labels[i][code] for i, code in enumerate(codes))
+            group_counts = counts[flat_group]
+            totals = {'total_count': int(group_counts.sum())}
+            for rating in RATINGS:
+                totals[f'rating_{rating}_count'] = int(group_counts[rating])
+            result[key] = totals
+        return result
+
+class AnalyticsEngine:
+    """
+    Per-worker cache of MatColumns, least recently used MAT evicted first.
+
+    self._lock only guards the cache itself; loading, refreshing and rolling
+    up a MAT hold that MAT's own lock.
+    """
+
+    def __init__(self, max_mats: int = ANALYTICS_MAX_MATS, reload_seconds: int = ANALYTICS_RELOAD_SECONDS,
+                 change_window_seconds: int = ANALYTICS_CHANGE_WINDOW_SECONDS,
+                 batch_rows: int = ANALYTICS_LOAD_BATCH_ROWS):
+        self.max_mats = max_mats
+        self.reload_seconds = reload_seconds
+        self.change_window = timedelta(seconds=change_window_seconds)
+        self.batch_rows = batch_rows
+        self._lock = threading.Lock()
+        self._mats: "OrderedDict[str, MatColumns]" = OrderedDict()
+        self._mat_locks: Dict[str, threading.Lock] = {}
+
+    def _mat_lock(self, mat_id: str) -> threading.Lock:
+        with self._lock:
+            return self._mat_locks.setdefault(mat_id, threading.Lock())
+
+    def _stream_assessments(self, connection, mat_id: str) -> Iterable[List[tuple]]:
+        cursor = connection.cursor(pymysql.cursors.SSCursor)
+        try:
+            cursor.execute(ASSESSMENTS_SQL.format(since=""), (mat_id,))
+            while True:
+                rows = cursor.fetchmany(self.batch_rows)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+    def _load(self, connection, mat_id: str, terms: List[dict], marker: tuple) -> MatColumns:
+        columns = MatColumns(terms)
+        cursor = connection.cursor()
+        cursor.execute(STANDARDS_SQL, (mat_id,))
+        columns.load_standards(cursor.fetchall())
+        columns.load_assessments(self._stream_assessments(connection, mat_id))
+        columns.marker = marker
+        return columns
+
+    def _refresh(self, connection, mat_id: str, columns: MatColumns, marker: tuple) -> bool:
+        """
+        Merge recently written rows. Returns False when the columns can't be
+        brought up to date this way and the MAT must be reloaded.
+        """
+        score_rows, revisions, assessment_rows, catalogue_version = marker
+        if catalogue_version != columns.marker[3] or columns.last_seen is None:
+            return False
+        if (score_rows, revisions) != columns.marker[:2]:
+            cursor = connection.cursor()
+            cursor.execute(ASSESSMENTS_SQL.format(since="AND a.last_updated >= %s"),
+                           (mat_id, columns.last_seen - self.change_window))
+            try:
+                columns.merge(cursor.fetchall())
+            except KeyError:
+                return False  # A term or standard outside the snapshot
+        if len(columns) != assessment_rows:
+            return False  # Assessments were deleted
+        columns.marker = marker
+        return True
+
+    def _current(self, connection, mat_id: str, terms: List[dict]) -> MatColumns:
+        """The MAT's up-to-date columns. Caller holds the MAT's lock."""
+        cursor = connection.cursor()
+        cursor.execute(CHANGE_MARKER_SQL, (mat_id, mat_id))
+        row = cursor.fetchone()
+        marker = (row['score_rows'], row['revisions'], row['assessment_rows'], row['catalogue_version']) \
+            if row else (0, 0, 0, None)
+
+        with self._lock:
+            columns = self._mats.get(mat_id)
+        term_ids = [term['unique_term_id'] for term in terms]
+        if columns is not None and (
+            time.time() - columns.loaded_at >= self.reload_seconds
+            or columns.terms.labels != term_ids
+            or (columns.marker != marker and not self._refresh(connection, mat_id, columns, marker))
+        ):
+            columns = None
+
+        if columns is None:
+            columns = self._load(connection, mat_id, terms, marker)
+
+        with self._lock:
+            self._mats[mat_id] = columns
+            self._mats.move_to_end(mat_id)
+            while len(self._mats) > self.max_mats:
+                self._mats.popitem(last=False)
+        return columns
+
+    def columns(self, connection, mat_id: str, terms: List[dict]) -> MatColumns:
+        """The MAT's columns, loaded or brought up to date as needed"""
+        with self._mat_lock(mat_id):
+            return self._current(connection, mat_id, terms)
+
+    def rollup(self, connection, mat_id: str, terms: List[dict], dimensions: Tuple[str, ...],
+               **filters) -> Dict[tuple, dict]:
+        """MatColumns.rollup() on the MAT's up-to-date columns. Blocking - run off the event loop."""
+        with self._mat_lock(mat_id):
+            return self._current(connection, mat_id, terms).rollup(dimensions, **filters)
+
+# Shared instance used by the API
+analytics_engine = AnalyticsEngine()
@@ -0,0 +1,426 @@
+"""
+Full assessment export for a MAT, as CSV, Parquet or Arrow.
+
+Rows are read through an unbuffered server-side cursor (SSDictCursor) in
+batches of EXPORT_BATCH_ROWS and written out batch by batch, so memory use is
+one batch whatever the size of the trust's history:
+
+- CSV can be streamed straight to the client (csv_chunks).
+- Any format can run as a background job (ExportJobs). The file is written
+  under EXPORT_DIR, then copied to export storage (EXPORT_STORAGE: 'gcs' in
+  production, 'local' for development) for later download.
+
+Job state lives in the export_jobs table, so any worker or instance can
+report on a job and serve its download. A running job refreshes heartbeat_at
+after every batch; once the heartbeat of a queued or running job is
+EXPORT_STALE_SECONDS old its worker is gone, and the job is marked failed -
+at startup, and whenever it is read.
+
+Parquet and Arrow need pyarrow; without it only CSV is offered.
+"""
+
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+import uuid
+from datetime import date, datetime
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+import pymysql
+
+from evidence_storage import EVIDENCE_CHUNK_BYTES, GCSEvidenceStorage, LocalEvidenceStorage
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # CSV only
+    pa = None
+
+EXPORT_DIR = os.getenv('EXPORT_DIR', os.path.join(tempfile.gettempdir(), 'assurly-exports'))
+EXPORT_BATCH_ROWS = int(os.getenv('EXPORT_BATCH_ROWS', '5000'))
+EXPORT_RETENTION_SECONDS = int(os.getenv('EXPORT_RETENTION_SECONDS', '86400'))
+EXPORT_STALE_SECONDS = int(os.getenv('EXPORT_STALE_SECONDS', '900'))
+EXPORT_STORAGE = os.getenv('EXPORT_STORAGE', 'local')
+EXPORT_BUCKET = os.getenv('EXPORT_BUCKET')
+
+EXPORT_FORMATS = {'csv': 'text/csv', 'parquet': 'application/vnd.apache.parquet',
+                  'arrow': 'application/vnd.apache.arrow.file'}
+
+# Same fields as GET /api/assessments/{assessment_id}
+EXPORT_COLUMNS = (
+    'id', 'assessment_id', 'school_id', 'school_name',
+    'mat_standard_id', 'standard_code', 'standard_name', 'standard_description',
+    'mat_aspect_id', 'aspect_code', 'aspect_name', 'version_id', 'version_number',
+    'unique_term_id', 'academic_year', 'rating', 'evidence_comments', 'status', 'due_date',
+    'assigned_to', 'assigned_to_name', 'submitted_at', 'submitted_by', 'submitted_by_name',
+    'last_updated', 'updated_by'
+)
+
+EXPORT_QUERY = """
+    SELECT
+        a.id, a.assessment_id, a.school_id, s.school_name,
+        a.mat_standard_id, ms.standard_code, ms.standard_name, ms.standard_description,
+        ma.mat_aspect_id, ma.aspect_code, ma.aspect_name, a.version_id, sv.version_number,
+        a.unique_term_id, a.academic_year, a.rating, a.evidence_comments, a.status, a.due_date,
+        a.assigned_to, u_assigned.full_name as assigned_to_name,
+        a.submitted_at, a.submitted_by, u_submitted.full_name as submitted_by_name,
+        a.last_updated, a.updated_by
+    FROM assessments a
+    JOIN schools s ON a.school_id = s.school_id
+    JOIN mat_standards ms ON a.mat_standard_id = ms.mat_standard_id
+    JOIN mat_aspects ma ON ms.mat_aspect_id = ma.mat_aspect_id
+    LEFT JOIN standard_versions sv ON a.version_id = sv.version_id
+    LEFT JOIN users u_assigned ON a.assigned_to = u_assigned.user_id
+    LEFT JOIN users u_submitted ON a.submitted_by = u_submitted.user_id
+    WHERE s.mat_id = %s
+    {where}
+    ORDER BY a.academic_year, a.unique_term_id, a.school_id, ma.sort_order, ms.sort_order
+"""
+
+CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS export_jobs (
+        job_id          CHAR(32)     NOT NULL,
+        mat_id          CHAR(36)     NOT NULL,
+        requested_by    CHAR(36)     NOT NULL,
+        export_format   VARCHAR(10)  NOT NULL,
+        filters         TEXT         NOT NULL,  -- JSON object
+        status          ENUM('queued', 'running', 'completed', 'failed') NOT NULL DEFAULT 'queued',
+        row_count       INT          NULL,
+        size_bytes      BIGINT       NULL,
+        error           TEXT         NULL,
+        created_at      TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        heartbeat_at    TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        completed_at    TIMESTAMP    NULL,
+        PRIMARY KEY (job_id),
+        KEY idx_export_jobs_mat (mat_id, created_at),
+        KEY idx_export_jobs_stale (status, heartbeat_at),
+        KEY idx_export_jobs_created (created_at)
+    )
+"""
+
+INSERT_JOB_SQL = """
+    INSERT INTO export_jobs (job_id, mat_id, requested_by, export_format, filters, status)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+# Assignments apply left to right, so completed_at sees the new status
+SAVE_JOB_SQL = """
+    UPDATE export_jobs
+    SET status = %s, row_count = %s, size_bytes = %s, error = %s, heartbeat_at = NOW(),
+        completed_at = IF(status IN ('completed', 'failed'), NOW(), NULL)
+    WHERE job_id = %s
+"""
+
+HEARTBEAT_SQL = "UPDATE export_jobs SET heartbeat_at = NOW() WHERE job_id = %s"
+
+GET_JOB_SQL = "SELECT * FROM export_jobs WHERE job_id = %s AND mat_id = %s"
+
+# Queued or running jobs whose worker stopped refreshing the heartbeat
+FAIL_STALE_SQL = """
+    UPDATE export_jobs
+    SET status = 'failed',
+        error = 'The export stopped responding before it finished, most likely because the server restarted',
+        completed_at = NOW()
+    WHERE status IN ('queued', 'running') AND heartbeat_at < NOW() - INTERVAL %s SECOND
+    {where}
+"""
+
+EXPIRED_JOBS_SQL = """
+    SELECT job_id, mat_id, export_format FROM export_jobs
+    WHERE created_at < NOW() - INTERVAL %s SECOND
+    LIMIT 100
+"""
+
+def export_query(mat_id: str, unique_term_id: Optional[str] = None,
+                 academic_year: Optional[str] = None) -> Tuple[str, list]:
+    where, params = [], [mat_id]
+    if unique_term_id:
+        where.append("AND a.unique_term_id = %s")
+        params.append(unique_term_id)
+    if academic_year:
+        where.append("AND a.academic_year = %s")
+        params.append(academic_year)
+    return EXPORT_QUERY.format(where=' '.join(where)), params
+
+def iter_export_batches(connection, query: str, params: list,
+                        batch_rows: int = EXPORT_BATCH_ROWS) -> Iterator[List[dict]]:
+    """
+    Rows in batches from an unbuffered cursor. The connection can't run other
+    queries until the generator is exhausted or closed.
+    """
+    cursor = connection.cursor(pymysql.cursors.SSDictCursor)
+    try:
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_rows)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%dT%H:%M:%SZ')
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+def csv_chunks(batches: Iterable[List[dict]]) -> Iterator[bytes]:
+    """UTF-8 CSV, one chunk for the header and one per batch"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for batch in batches:
+        for row in batch:
+            writer.writerow([_csv_value(row[column]) for column in EXPORT_COLUMNS])
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+def arrow_schema():
+    types = {
+        'version_number': pa.int32(), 'rating': pa.int8(), 'due_date': pa.date32(),
+        'submitted_at': pa.timestamp('s'), 'last_updated': pa.timestamp('s')
+    }
+    return pa.schema([(column, types.get(column, pa.string())) for column in EXPORT_COLUMNS])
+
+def write_export(batches: Iterable[List[dict]], export_format: str, fileobj) -> int:
+    """
+    Write batches to a binary file object in the given format.
+
+    Returns:
+        int: Number of rows written
+    """
+    row_count = 0
+
+    def counted():
+        nonlocal row_count
+        for batch in batches:
+            row_count += len(batch)
+            yield batch
+
+    if export_format == 'csv':
+        for chunk in csv_chunks(counted()):
+            fileobj.write(chunk)
+        return row_count
+
+    schema = arrow_schema()
+    writer = pq.ParquetWriter(fileobj, schema) if export_format == 'parquet' else pa.ipc.new_file(fileobj, schema)
+    try:
+        for batch in counted():
+            writer.write_batch(pa.RecordBatch.from_pylist(batch, schema=schema))
+    finally:
+        writer.close()
+    return row_count
+
+def available_formats() -> List[str]:
+    return list(EXPORT_FORMATS) if pa is not None else ['csv']
+
+def _timestamp(value) -> Optional[str]:
+    return value.strftime('%Y-%m-%dT%H:%M:%SZ') if value else None
+
+def export_key(job: dict) -> str:
+    """Storage key of a job's output"""
+    return f"{job['mat_id']}/{job['job_id']}.{job['format']}"
+
+def make_export_storage(backend: str = EXPORT_STORAGE):
+    if backend == 'gcs':
+        if not EXPORT_BUCKET:
+            raise RuntimeError("EXPORT_STORAGE=gcs needs EXPORT_BUCKET")
+        return GCSEvidenceStorage(EXPORT_BUCKET)
+    if backend == 'local':
+        return LocalEvidenceStorage(EXPORT_DIR)
+    raise ValueError(f"Unknown EXPORT_STORAGE: {backend}")
+
+class ExportJobs:
+    """
+    Background export jobs. Each job is an export_jobs row plus its output in
+    storage under export_key(job). The output is first written to
+    <job_id>.<format>.part under export_dir, then copied to storage and
+    removed. connect() opens a database connection for the export and the
+    job state; it is set by the API.
+    """
+
+    def __init__(self, export_dir: str = EXPORT_DIR, retention_seconds: int = EXPORT_RETENTION_SECONDS,
+                 connect: Optional[Callable[[], object]] = None, storage=None,
+                 stale_seconds: int = EXPORT_STALE_SECONDS):
+        self.export_dir = export_dir
+        self.retention_seconds = retention_seconds
+        self.connect = connect
+        self.storage = storage if storage is not None else make_export_storage()
+        self.stale_seconds = stale_seconds
+
+    def _save(self, connection, job: dict) -> None:
+        cursor = connection.cursor()
+        cursor.execute(SAVE_JOB_SQL, (job['status'], job['row_count'], job['size_bytes'], job['error'],
+                                      job['job_id']))
+        connection.commit()
+
+    def fail_stale(self) -> int:
+        """Mark queued or running jobs with an expired heartbeat as failed; returns how many"""
+        connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(FAIL_STALE_SQL.format(where=""), (self.stale_seconds,))
+            connection.commit()
+            return cursor.rowcount
+        finally:
+            connection.close()
+
+    def get(self, job_id: str, mat_id: str) -> Optional[dict]:
+        """Job state, or None if it doesn't exist or belongs to another MAT"""
+        if not job_id.isalnum():
+            return None
+        connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(GET_JOB_SQL, (job_id, mat_id))
+            row = cursor.fetchone()
+            if row and row['status'] in ('queued', 'running'):
+                cursor.execute(FAIL_STALE_SQL.format(where="AND job_id = %s"), (self.stale_seconds, job_id))
+                connection.commit()
+                if cursor.rowcount:
+                    cursor.execute(GET_JOB_SQL, (job_id, mat_id))
+                    row = cursor.fetchone()
+        finally:
+            connection.close()
+        if row is None:
+            return None
+        return {
+            'job_id': row['job_id'],
+            'mat_id': row['mat_id'],
+            'requested_by': row['requested_by'],
+            'format': row['export_format'],
+            'filters': json.loads(row['filters']),
+            'status': row['status'],
+            'row_count': row['row_count'],
+            'size_bytes': row['size_bytes'],
+            'error': row['error'],
+            'created_at': _timestamp(row['created_at']),
+            'completed_at': _timestamp(row['completed_at'])
+        }
+
+    def purge_expired(self) -> int:
+        """Delete jobs (row and output) older than the retention period"""
+        connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(EXPIRED_JOBS_SQL, (self.retention_seconds,))
+            expired = cursor.fetchall()
+            for row in expired:
+                self.storage.delete(export_key({**row, 'format': row['export_format']}))
+            if expired:
+                cursor.execute(
+                    f"DELETE FROM export_jobs WHERE job_id IN ({','.join(['%s'] * len(expired))})",
+                    [row['job_id'] for row in expired]
+                )
+            connection.commit()
+            return len(expired)
+        finally:
+            connection.close()
+
+    def start(self, mat_id: str, requested_by: str, export_format: str, filters: dict) -> dict:
+        """Record a queued job and run it on a background thread. Blocking - run off the event loop."""
+        self.purge_expired()
+
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'mat_id': mat_id,
+            'requested_by': requested_by,
+            'format': export_format,
+            'filters': filters,
+            'status': 'queued',
+            'row_count': None,
+            'size_bytes': None,
+            'error': None,
+            'created_at': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'completed_at': None
+        }
+        connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(INSERT_JOB_SQL, (job['job_id'], mat_id, requested_by, export_format,
+                                            json.dumps(filters), job['status']))
+            connection.commit()
+        finally:
+            connection.close()
+        threading.Thread(target=self.run, args=(dict(job),), daemon=True).start()
+        return job
+
+    def _upload(self, path: str, job: dict, heartbeat: Callable[[], None]) -> None:
+        """Copy the finished file to storage a chunk at a time"""
+        writer = self.storage.open_writer(export_key(job), EXPORT_FORMATS[job['format']])
+        try:
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(EVIDENCE_CHUNK_BYTES), b''):
+                    writer.write(chunk)
+                    heartbeat()
+            writer.commit()
+        except BaseException:
+            writer.abort()
+            raise
+
+    def run(self, job: dict) -> dict:
+        """
+        Write the export file and copy it to storage, updating the job state
+        as it goes. Job state is written on its own connection, as the
+        export's connection is busy streaming rows.
+        """
+        output = os.path.join(self.export_dir, f"{job['job_id']}.{job['format']}.part")
+        state = connection = None
+        try:
+            state = self.connect()
+            job['status'] = 'running'
+            self._save(state, job)
+            state_cursor = state.cursor()
+
+            def heartbeat():
+                state_cursor.execute(HEARTBEAT_SQL, (job['job_id'],))
+                state.commit()
+
+            def batches(rows):
+                for batch in rows:
+                    yield batch
+                    heartbeat()
+
+            os.makedirs(self.export_dir, exist_ok=True)
+            connection = self.connect()
+            query, params = export_query(job['mat_id'], **job['filters'])
+            with open(output, 'wb') as f:
+                job['row_count'] = write_export(batches(iter_export_batches(connection, query, params)),
+                                                job['format'], f)
+            job['size_bytes'] = os.path.getsize(output)
+            self._upload(output, job, heartbeat)
+            job['status'] = 'completed'
+        except Exception as e:
+            job['status'] = 'failed'
+            job['error'] = str(e)
+        finally:
+            if connection is not None:
+                connection.close()
+            if os.path.exists(output):
+                os.remove(output)
+            job['completed_at'] = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+            try:
+                if state is None:
+                    state = self.connect()
+                self._save(state, job)
+            except Exception as e:
+                # Left queued/running, so the heartbeat check fails it later
+                print(f"⚠️ Export {job['job_id']}: job state not saved: {e}")
+            finally:
+                if state is not None:
+                    state.close()
+        return job
+
+# Shared instance used by the API
+export_jobs = ExportJobs()
@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""
+Performance benchmarks for the Assurly API
+Run against a scratch database (same DB_* environment variables as the API).
+
+Usage:
+    python benchmarks.py write-latency [--iterations 200]
+    python benchmarks.py dashboard-history [--years 6] [--schools 12] [--standards 40] [--iterations 50]
+    python benchmarks.py trends [--years 1 3 6] [--schools 12] [--standards 40] [--iterations 50]
+    python benchmarks.py analytics-engine [--years 8] [--schools 200] [--standards 210] [--iterations 20]
+    python benchmarks.py onboarding [--iterations 20]
+"""
+
+import argparse
+import random
+import statistics
+import time
+import uuid
+
+import pymysql
+
+from main import DB_CONFIG, db_transaction, fetch_previous_term_scores
+from school_scores import (
+    install_triggers,
+    rebuild_school_term_scores,
+    rebuild_rating_cube,
+    fetch_cube_cells,
+    rollup_cube_cells,
+    summarise_ratings
+)
+from term_calendar import term_calendar
+from analytics_engine import AnalyticsEngine
+from onboarding import INSERT_STATEMENTS, catalogue_rows, copy_default_catalogue, plan_catalogue_copy
+
+def _report(label: str, samples_ms: list) -> None:
+    """Print a one-line latency summary for a list of millisecond samples"""
+    samples = sorted(samples_ms)
+    p95 = samples[max(0, int(len(samples) * 0.95) - 1)]
+    print(f"  {label:<28} mean={statistics.mean(samples):7.2f}ms  "
+          f"p50={statistics.median(samples):7.2f}ms  p95={p95:7.2f}ms  n={len(samples)}")
+
+# ================================
+# WRITE LATENCY (autocommit vs unit of work)
+# ================================
+
+BENCH_TABLE = "bench_write_latency"
+
+def _write_unit(cursor, row_id: str) -> None:
+    """
+    Mirrors the shape of update_standard: close a version, insert a version,
+    update the parent row and append a log entry (4 statements).
+    """
+    cursor.execute(f"UPDATE {BENCH_TABLE} SET effective_to = NOW() WHERE row_id = %s", (row_id,))
+    cursor.execute(f"INSERT INTO {BENCH_TABLE} (row_id, payload) VALUES (%s, %s)",
+                   (str(uuid.uuid4()), "version"))
+    cursor.execute(f"UPDATE {BENCH_TABLE} SET payload = %s WHERE row_id = %s", ("updated", row_id))
+    cursor.execute(f"INSERT INTO {BENCH_TABLE} (row_id, payload) VALUES (%s, %s)",
+                   (str(uuid.uuid4()), "log"))
+
+def bench_write_latency(iterations: int) -> None:
+    """Compare per-statement autocommit against one commit per logical operation"""
+    print(f"🔧 Write latency: {iterations} logical operations of 4 statements each")
+
+    setup = pymysql.connect(**{**DB_CONFIG, 'autocommit': True})
+    setup_cursor = setup.cursor()
+    setup_cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {BENCH_TABLE} (
+            row_id CHAR(36) PRIMARY KEY,
+            payload VARCHAR(100),
+            effective_to TIMESTAMP NULL
+        ) ENGINE=InnoDB
+    """)
+    anchor_id = str(uuid.uuid4())
+    setup_cursor.execute(f"INSERT INTO {BENCH_TABLE} (row_id, payload) VALUES (%s, 'anchor')", (anchor_id,))
+
+    try:
+        # Before: global autocommit, one commit (and redo-log flush) per statement
+        before = []
+        connection = pymysql.connect(**{**DB_CONFIG, 'autocommit': True})
+        cursor = connection.cursor()
+        for _ in range(iterations):
+            start = time.perf_counter()
+            _write_unit(cursor, anchor_id)
+            before.append((time.perf_counter() - start) * 1000)
+        connection.close()
+
+        # After: explicit transaction, one commit per logical operation
+        after = []
+        connection = pymysql.connect(**DB_CONFIG)
+        cursor = connection.cursor()
+        for _ in range(iterations):
+            start = time.perf_counter()
+            with db_transaction(connection):
+                _write_unit(cursor, anchor_id)
+            after.append((time.perf_counter() - start) * 1000)
+        connection.close()
+
+        _report("autocommit (before)", before)
+        _report("db_transaction (after)", after)
+        print(f"  speed-up: {statistics.mean(before) / statistics.mean(after):.2f}x")
+    finally:
+        setup_cursor.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+        setup.close()
+
+# ================================
+# DASHBOARD HISTORY (whole history vs term sequence + materialised scores)
+# ================================
+
+# The pre-rewrite previous-terms query: every earlier (school, term) in the
+# MAT's history, trimmed to 3 per school in Python
+UNBOUNDED_PREVIOUS_TERMS_QUERY = """
+    SELECT
+        a.school_id,
+        a.unique_term_id,
+        a.academic_year,
+        ROUND(AVG(a.rating), 2) as avg_score
+    FROM assessments a
+    JOIN schools s ON a.school_id = s.school_id
+    WHERE s.mat_id = %s
+        AND a.rating IS NOT NULL
+        AND (
+            a.academic_year < %s
+            OR
+            (a.academic_year = %s AND CAST(SUBSTRING(a.unique_term_id, 2, 1) AS UNSIGNED) < %s)
+        )
+    GROUP BY a.school_id, a.unique_term_id, a.academic_year
+    ORDER BY a.academic_year DESC,
+        FIELD(SUBSTRING(a.unique_term_id, 1, 2), 'T3', 'T2', 'T1') DESC
+"""
+
+TERM_NAMES = {1: ('Autumn Term', 9, 12), 2: ('Spring Term', 1, 4), 3: ('Summer Term', 4, 7)}
+
+def _unbounded_previous_terms(cursor, mat_id: str, unique_term_id: str) -> dict:
+    term_num = int(unique_term_id[1])
+    academic_year = unique_term_id.split('-', 1)[1]
+    cursor.execute(UNBOUNDED_PREVIOUS_TERMS_QUERY, (mat_id, academic_year, academic_year, term_num))
+    school_trends = {}
+    for row in cursor.fetchall():
+        trend = school_trends.setdefault(row['school_id'], [])
+        if len(trend) < 3:
+            trend.append(row['unique_term_id'])
+    return school_trends
+
+def _seed_dashboard_history(cursor, mat_id: str, years: int, schools: int, standards: int,
+                            unrated_terms: int = 0) -> tuple:
+    """
+    Insert a synthetic MAT with `years` academic years of rated assessments.
+    The `unrated_terms` terms before the latest are set up but not yet rated.
+    """
+    cursor.execute("INSERT INTO mats (mat_id, mat_name) VALUES (%s, %s)", (mat_id, "Benchmark MAT"))
+
+    school_ids = [f"{mat_id}-school-{i}" for i in range(schools)]
+    cursor.executemany(
+        "INSERT INTO schools (school_id, school_name, mat_id, is_central_office, is_active) VALUES (%s, %s, %s, 0, 1)",
+        [(school_id, f"Benchmark School {i}", mat_id) for i, school_id in enumerate(school_ids)]
+    )
+
+    mat_aspect_id = f"{mat_id}-BEN"
+    cursor.execute(
+        "INSERT INTO mat_aspects (mat_aspect_id, mat_id, aspect_code, aspect_name) VALUES (%s, %s, 'BEN', 'Benchmark')",
+        (mat_aspect_id, mat_id)
+    )
+    standard_ids = [f"{mat_id}-BEN{j}" for j in range(standards)]
+    cursor.executemany(
+        "INSERT INTO mat_standards (mat_standard_id, mat_id, mat_aspect_id, standard_code, standard_name) "
+        "VALUES (%s, %s, %s, %s, %s)",
+        [(standard_id, mat_id, mat_aspect_id, f"BEN{j}", f"Benchmark standard {j}")
+         for j, standard_id in enumerate(standard_ids)]
+    )
+
+    # Terms are shared reference data: only insert (and later delete) missing ones
+    created_terms = []
+    term_ids = []
+    last_year = 2025
+    for start_year in range(last_year - years + 1, last_year + 1):
+        academic_year = f"{start_year}-{str(start_year + 1)[2:]}"
+        for term_num, (term_name, start_month, end_month) in TERM_NAMES.items():
+            year = start_year if term_num == 1 else start_year + 1
+            unique_term_id = f"T{term_num}-{academic_year}"
+            cursor.execute(
+                "INSERT IGNORE INTO terms (unique_term_id, term_id, term_name, start_date, end_date, academic_year) "
+                "VALUES (%s, %s, %s, %s, %s, %s)",
+                (unique_term_id, f"T{term_num}", term_name, f"{year}-{start_month:02d}-01",
+                 f"{year}-{end_month:02d}-28", academic_year)
+            )
+            if cursor.rowcount:
+                created_terms.append(unique_term_id)
+            term_ids.append((unique_term_id, academic_year))
+
+    unrated = {unique_term_id for unique_term_id, _ in term_ids[-1 - unrated_terms:-1]} if unrated_terms else set()
+    rows = [
+        (str(uuid.uuid4()), school_id, standard_id, unique_term_id, academic_year,
+         None if unique_term_id in unrated else random.randint(1, 4),
+         'not_started' if unique_term_id in unrated else 'completed')
+        for unique_term_id, academic_year in term_ids
+        for school_id in school_ids
+        for standard_id in standard_ids
+    ]
+    for i in range(0, len(rows), 5000):
+        cursor.executemany(
+            "INSERT INTO assessments (id, school_id, mat_standard_id, unique_term_id, academic_year, rating, status) "
+            "VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            rows[i:i + 5000]
+        )
+
+    rebuild_school_term_scores(cursor, mat_id)
+    rebuild_rating_cube(cursor, mat_id)
+
+    return created_terms, term_ids[-1][0], len(rows)
+
+def _cleanup_dashboard_history(cursor, mat_id: str, created_terms: list) -> None:
+    cursor.execute("DELETE FROM school_term_scores WHERE mat_id = %s", (mat_id,))
+    cursor.execute("DELETE FROM assessment_rating_cube WHERE mat_id = %s", (mat_id,))
+    cursor.execute("""
+        DELETE a FROM assessments a
+        JOIN schools s ON a.school_id = s.school_id
+        WHERE s.mat_id = %s
+    """, (mat_id,))
+    cursor.execute("DELETE FROM mat_standards WHERE mat_id = %s", (mat_id,))
+    cursor.execute("DELETE FROM mat_aspects WHERE mat_id = %s", (mat_id,))
+    cursor.execute("DELETE FROM schools WHERE mat_id = %s", (mat_id,))
+    if created_terms:
+        placeholders = ','.join(['%s'] * len(created_terms))
+        cursor.execute(f"DELETE FROM terms WHERE unique_term_id IN ({placeholders})", created_terms)
+    cursor.execute("DELETE FROM mats WHERE mat_id = %s", (mat_id,))
+
+def bench_dashboard_history(years: int, schools: int, standards: int, iterations: int) -> None:
+    """Compare the whole-history previous-terms read with the bounded school_term_scores read"""
+    mat_id = f"BENCH-{uuid.uuid4().hex[:8]}"
+    connection = pymysql.connect(**{**DB_CONFIG, 'autocommit': True})
+    cursor = connection.cursor()
+
+    created_terms = []
+    try:
+        # Unrated terms just before the selected one must not take history slots
+        created_terms, latest_term_id, row_count = _seed_dashboard_history(
+            cursor, mat_id, years, schools, standards, unrated_terms=2
+        )
+        print(f"🔧 Dashboard history: {years} years, {schools} schools, {standards} standards "
+              f"({row_count} assessments), selected term {latest_term_id}")
+
+        # Pick up the seeded terms
+        term_calendar.refresh(cursor)
+
+        before, after = [], []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            unbounded = _unbounded_previous_terms(cursor, mat_id, latest_term_id)
+            before.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            bounded = fetch_previous_term_scores(cursor, mat_id, latest_term_id)
+            after.append((time.perf_counter() - start) * 1000)
+
+        # Both must pick the same 3 rated terms per school
+        assert unbounded == {k: [t['term_id'] for t in v] for k, v in bounded.items()}
+        assert all(len(trend) == min(3, years * 3 - 3) for trend in bounded.values())
+
+        _report("whole history (before)", before)
+        _report("term scores (after)", after)
+        print(f"  speed-up: {statistics.mean(before) / statistics.mean(after):.2f}x")
+    finally:
+        _cleanup_dashboard_history(cursor, mat_id, created_terms)
+        connection.close()
+
+# ================================
+# TRENDS (raw assessment join vs rating cube)
+# ================================
+
+# The pre-cube filtered trends query
+RAW_TRENDS_QUERY = """
+    SELECT
+        a.unique_term_id,
+        ROUND(AVG(a.rating), 2) as average_rating,
+        COUNT(*) as rated_count
+    FROM assessments a
+    JOIN schools s ON a.school_id = s.school_id
+    JOIN mat_standards ms ON a.mat_standard_id = ms.mat_standard_id
+    JOIN mat_aspects ma ON ms.mat_aspect_id = ma.mat_aspect_id
+    WHERE s.mat_id = %s
+      AND a.rating IS NOT NULL
+      AND ma.aspect_code = %s
+    GROUP BY a.unique_term_id, a.academic_year
+"""
+
+def bench_trends(year_counts: list, schools: int, standards: int, iterations: int) -> None:
+    """Filtered trends latency as history grows: raw join vs summing cube cells"""
+    for years in year_counts:
+        mat_id = f"BENCH-{uuid.uuid4().hex[:8]}"
+        connection = pymysql.connect(**{**DB_CONFIG, 'autocommit': True})
+        cursor = connection.cursor()
+
+        created_terms = []
+        try:
+            created_terms, _, row_count = _seed_dashboard_history(cursor, mat_id, years, schools, standards)
+            print(f"🔧 Trends: {years} years, {schools} schools, {standards} standards ({row_count} assessments)")
+
+            before, after = [], []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                cursor.execute(RAW_TRENDS_QUERY, (mat_id, 'BEN'))
+                raw = {row['unique_term_id']: float(row['average_rating']) for row in cursor.fetchall()}
+                before.append((time.perf_counter() - start) * 1000)
+
+                start = time.perf_counter()
+                cells = fetch_cube_cells(cursor, mat_id, aspect_code='BEN')
+                cube = {
+                    term_id: summarise_ratings(counts)['average_rating']
+                    for (term_id,), counts in rollup_cube_cells(cells, ('unique_term_id',)).items()
+                }
+                after.append((time.perf_counter() - start) * 1000)
+
+            assert raw == cube
+
+            _report("raw join (before)", before)
+            _report("rating cube (after)", after)
+            print(f"  speed-up: {statistics.mean(before) / statistics.mean(after):.2f}x")
+        finally:
+            _cleanup_dashboard_history(cursor, mat_id, created_terms)
+            connection.close()
+
+def bench_analytics_engine(years: int, schools: int, standards: int, iterations: int) -> None:
+    """Trends rollup on a large synthetic trust (defaults ~1M assessments): SQL vs columnar engine"""
+    mat_id = f"BENCH-{uuid.uuid4().hex[:8]}"
+    connection = pymysql.connect(**{**DB_CONFIG, 'autocommit': True})
+    cursor = connection.cursor()
+
+    created_terms = []
+    try:
+        # The refresh below relies on the triggers bumping school_term_scores.revision
+        install_triggers(cursor)
+        created_terms, latest_term_id, row_count = _seed_dashboard_history(cursor, mat_id, years, schools, standards)
+        term_calendar.refresh(cursor)
+        terms = term_calendar.terms()
+        print(f"🔧 Analytics engine: {years} years, {schools} schools, {standards} standards ({row_count} assessments)")
+
+        engine = AnalyticsEngine()
+        start = time.perf_counter()
+        engine.columns(connection, mat_id, terms)
+        print(f"  columnar cold load: {(time.perf_counter() - start) * 1000:.0f}ms")
+
+        dimensions = ('unique_term_id', 'academic_year')
+        raw_ms, cube_ms, engine_ms = [], [], []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            cursor.execute(RAW_TRENDS_QUERY, (mat_id, 'BEN'))
+            raw = {row['unique_term_id']: float(row['average_rating']) for row in cursor.fetchall()}
+            raw_ms.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            cube = rollup_cube_cells(fetch_cube_cells(cursor, mat_id, aspect_code='BEN'), dimensions)
+            cube_ms.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            columnar = engine.rollup(connection, mat_id, terms, dimensions, aspect_code='BEN')
+            engine_ms.append((time.perf_counter() - start) * 1000)
+
+        assert columnar == cube
+        assert raw == {
+            term_id: float(summarise_ratings(counts)['average_rating']) for (term_id, _), counts in columnar.items()
+        }
+
+        _report("raw join", raw_ms)
+        _report("rating cube", cube_ms)
+        _report("columnar engine (warm)", engine_ms)
+
+        # Incremental refresh after a burst of writes; the assessment triggers
+        # bump the school_term_scores revisions the engine's marker reads
+        cursor.execute(
+            "UPDATE assessments SET rating = 5 - rating, last_updated = NOW() "
+            "WHERE school_id = %s AND unique_term_id = %s",
+            (f"{mat_id}-school-0", latest_term_id)
+        )
+        changed = cursor.rowcount
+        start = time.perf_counter()
+        engine.rollup(connection, mat_id, terms, dimensions, aspect_code='BEN')
+        print(f"  columnar refresh after {changed} assessments changed: {(time.perf_counter() - start) * 1000:.0f}ms")
+    finally:
+        _cleanup_dashboard_history(cursor, mat_id, created_terms)
+        connection.close()
+
+# ================================
+# ONBOARDING (row-by-row vs multi-row catalogue copy)
+# ================================
+
+def _copy_row_by_row(cursor, mat_id: str) -> None:
+    """
+    The per-item path (create_aspect / create_standard shape): one INSERT per
+    aspect, and per standard an INSERT each for the standard, its version and
+    its log entry plus a pointer UPDATE.
+    """
+    aspects, standards = plan_catalogue_copy(cursor, mat_id)
+    rows = catalogue_rows(mat_id, None, aspects, standards)
+    for table in ('mat_aspects', 'mat_standards', 'standard_versions', 'standard_edit_log'):
+        prefix, row_template = INSERT_STATEMENTS[table]
+        for row in rows[table]:
+            cursor.execute(f"{prefix} VALUES {row_template}", row)
+            if table == 'standard_versions':
+                cursor.execute("UPDATE mat_standards SET current_version_id = %s WHERE mat_standard_id = %s",
+                               (row[0], row[1]))
+
+def _cleanup_onboarding(cursor, mat_id: str) -> None:
+    cursor.execute("DELETE FROM standard_edit_log WHERE mat_id = %s", (mat_id,))
+    cursor.execute("UPDATE mat_standards SET current_version_id = NULL WHERE mat_id = %s", (mat_id,))
+    cursor.execute("""
+        DELETE sv FROM standard_versions sv
+        JOIN mat_standards ms ON sv.mat_standard_id = ms.mat_standard_id
+        WHERE ms.mat_id = %s
+    """, (mat_id,))
+    cursor.execute("DELETE FROM mat_standards WHERE mat_id = %s", (mat_id,))
+    cursor.execute("DELETE FROM mat_aspects WHERE mat_id = %s", (mat_id,))
+    cursor.execute("DELETE FROM mats WHERE mat_id = %s", (mat_id,))
+
+def bench_onboarding(iterations: int) -> None:
+    """Full default catalogue copy into a fresh MAT, each run one transaction"""
+    connection = pymysql.connect(**DB_CONFIG)
+    cursor = connection.cursor()
+    mat_ids = []
+
+    def fresh_mat() -> str:
+        mat_id = f"BENCH-{uuid.uuid4().hex[:8]}"
+        with db_transaction(connection):
+            cursor.execute("INSERT INTO mats (mat_id, mat_name) VALUES (%s, %s)", (mat_id, "Benchmark MAT"))
+        mat_ids.append(mat_id)
+        return mat_id
+
+    try:
+        aspects, standards = plan_catalogue_copy(cursor, "BENCH-plan")
+        print(f"🔧 Onboarding: full default catalogue ({len(aspects)} aspects, {len(standards)} standards)")
+
+        before, after = [], []
+        for _ in range(iterations):
+            mat_id = fresh_mat()
+            start = time.perf_counter()
+            with db_transaction(connection):
+                _copy_row_by_row(cursor, mat_id)
+            before.append((time.perf_counter() - start) * 1000)
+
+            mat_id = fresh_mat()
+            start = time.perf_counter()
+            with db_transaction(connection):
+                copy_default_catalogue(cursor, mat_id, None)
+            after.append((time.perf_counter() - start) * 1000)
+
+        # Both paths must leave every standard pointing at its v1
+        cursor.execute(
+            "SELECT COUNT(*) as n FROM mat_standards WHERE mat_id = %s AND current_version_id = CONCAT(mat_standard_id, '-v1')",
+            (mat_ids[-1],)
+        )
+        assert cursor.fetchone()['n'] == len(standards)
+
+        _report("row by row (before)", before)
+        _report("multi-row copy (after)", after)
+        print(f"  speed-up: {statistics.mean(before) / statistics.mean(after):.2f}x")
+    finally:
+        with db_transaction(connection):
+            for mat_id in mat_ids:
+                _cleanup_onboarding(cursor, mat_id)
+        connection.close()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Assurly API benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    write_latency = subparsers.add_parser("write-latency", help="Autocommit vs unit-of-work write latency")
+    write_latency.add_argument("--iterations", type=int, default=200)
+
+    dashboard_history = subparsers.add_parser("dashboard-history", help="Dashboard previous-terms read over N years of history")
+    dashboard_history.add_argument("--years", type=int, default=6)
+    dashboard_history.add_argument("--schools", type=int, default=12)
+    dashboard_history.add_argument("--standards", type=int, default=40)
+    dashboard_history.add_argument("--iterations", type=int, default=50)
+
+    trends = subparsers.add_parser("trends", help="Filtered trends latency, raw join vs rating cube")
+    trends.add_argument("--years", type=int, nargs="+", default=[1, 3, 6])
+    trends.add_argument("--schools", type=int, default=12)
+    trends.add_argument("--standards", type=int, default=40)
+    trends.add_argument("--iterations", type=int, default=50)
+
+    analytics = subparsers.add_parser("analytics-engine", help="Trends rollup on ~1M assessments, SQL vs columnar engine")
+    analytics.add_argument("--years", type=int, default=8)
+    analytics.add_argument("--schools", type=int, default=200)
+    analytics.add_argument("--standards", type=int, default=210)
+    analytics.add_argument("--iterations", type=int, default=20)
+
+    onboarding = subparsers.add_parser("onboarding", help="Full default catalogue copy, row by row vs multi-row")
+    onboarding.add_argument("--iterations", type=int, default=20)
+
+    args = parser.parse_args()
+
+    if args.benchmark == "write-latency":
+        bench_write_latency(args.iterations)
+    elif args.benchmark == "dashboard-history":
+        bench_dashboard_history(args.years, args.schools, args.standards, args.iterations)
+    elif args.benchmark == "trends":
+        bench_trends(args.years, args.schools, args.standards, args.iterations)
+    elif args.benchmark == "analytics-engine":
+        bench_analytics_engine(args.years, args.schools, args.standards, args.iterations)
+    elif args.benchmark == "onboarding":
+        bench_onboarding(args.iterations)
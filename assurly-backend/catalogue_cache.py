@@ -0,0 +1,288 @@
+"""
+Per-MAT cache of the aspect and standard catalogue.
+
+Aspects and standards only change through the standards/aspects create,
+update, delete and reinstate endpoints, each of which bumps
+mats.catalogue_version in the same transaction (bump_catalogue_version).
+A read checks the MAT's version with one primary-key lookup and serves every
+filter variant of /api/aspects and /api/standards, and the single aspect and
+standard endpoints, from the cached tree while the version is unchanged.
+Because the version lives in the database, a write through one API worker is
+seen by the others on their next read.
+
+A standard's version history is loaded the first time it is asked for and
+kept with the catalogue it was read under. So is the MAT's version timeline
+(every standard's effective_from/effective_to intervals, sorted), which
+answers "which version was in force at time T" with a binary search instead
+of a query per lookup.
+"""
+
+import os
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+CATALOGUE_CACHE_MAX_MATS = int(os.getenv('CATALOGUE_CACHE_MAX_MATS', '50'))
+
+CATALOGUE_VERSION_SQL = "SELECT catalogue_version FROM mats WHERE mat_id = %s"
+
+BUMP_CATALOGUE_VERSION_SQL = "UPDATE mats SET catalogue_version = catalogue_version + 1 WHERE mat_id = %s"
+
+# Active standards per aspect for one MAT: one grouped pass over the MAT's
+# standards, joined to the aspect rows (no per-aspect subquery). Takes mat_id.
+STANDARD_COUNTS_JOIN = """
+    LEFT JOIN (
+        SELECT mat_aspect_id, COUNT(*) as standards_count
+        FROM mat_standards
+        WHERE mat_id = %s AND is_active = TRUE
+        GROUP BY mat_aspect_id
+    ) sc ON sc.mat_aspect_id = ma.mat_aspect_id
+"""
+
+# Active aspects with their active standard counts. Params: (mat_id, mat_id)
+ASPECTS_SQL = f"""
+    SELECT ma.mat_aspect_id,
+           ma.mat_id,
+           ma.aspect_code,
+           ma.aspect_name,
+           ma.aspect_description,
+           ma.aspect_category,
+           ma.sort_order,
+           ma.is_custom,
+           ma.source_aspect_id,
+           CASE WHEN ma.source_aspect_id IS NOT NULL AND
+                (ma.aspect_name != COALESCE(da.aspect_name, '') OR
+                 ma.aspect_description != COALESCE(da.aspect_description, ''))
+           THEN 1 ELSE 0 END as is_modified,
+           COALESCE(sc.standards_count, 0) as standards_count
+    FROM mat_aspects ma
+    LEFT JOIN aspects da ON ma.source_aspect_id = da.aspect_id
+    {STANDARD_COUNTS_JOIN}
+    WHERE ma.mat_id = %s AND ma.is_active = TRUE
+    ORDER BY ma.sort_order
+"""
+
+# All of the MAT's standards (active or not) with their current version
+STANDARDS_SQL = """
+    SELECT ms.mat_standard_id,
+           ms.mat_id,
+           ms.standard_code,
+           ms.standard_name,
+           ms.standard_description,
+           ms.standard_type,
+           ms.sort_order,
+           ms.is_custom,
+           ms.is_modified,
+           ms.is_active,
+           ms.current_version_id,
+           ms.created_at,
+           ms.updated_at,
+           ma.mat_aspect_id,
+           ma.aspect_code,
+           ma.aspect_name,
+           ma.aspect_category,
+           ma.is_active as aspect_is_active,
+           sv.version_number as current_version
+    FROM mat_standards ms
+    JOIN mat_aspects ma ON ms.mat_aspect_id = ma.mat_aspect_id
+    LEFT JOIN standard_versions sv ON ms.current_version_id = sv.version_id
+    WHERE ms.mat_id = %s
+    ORDER BY ma.sort_order, ms.sort_order
+"""
+
+VERSIONS_SQL = """
+    SELECT
+        version_id,
+        version_number,
+        standard_code,
+        standard_name,
+        standard_description,
+        standard_type,
+        effective_from,
+        effective_to,
+        change_reason,
+        created_by_user_id,
+        u.full_name as created_by_name
+    FROM standard_versions sv
+    LEFT JOIN users u ON sv.created_by_user_id = u.user_id
+    WHERE mat_standard_id = %s
+    ORDER BY version_number DESC
+"""
+
+# Every version of every one of the MAT's standards, in interval order
+VERSION_TIMELINE_SQL = """
+    SELECT
+        sv.mat_standard_id,
+        sv.version_id,
+        sv.version_number,
+        sv.standard_code,
+        sv.standard_name,
+        sv.standard_description,
+        sv.standard_type,
+        sv.effective_from,
+        sv.effective_to,
+        sv.created_by_user_id,
+        sv.change_reason
+    FROM standard_versions sv
+    JOIN mat_standards ms ON sv.mat_standard_id = ms.mat_standard_id
+    WHERE ms.mat_id = %s
+    ORDER BY sv.mat_standard_id, sv.effective_from, sv.version_number
+"""
+
+def bump_catalogue_version(cursor, mat_id: str) -> None:
+    """Call inside the transaction of every write to mat_aspects or mat_standards"""
+    cursor.execute(BUMP_CATALOGUE_VERSION_SQL, (mat_id,))
+
+def _version_number(value) -> Optional[int]:
+    """standard_versions.version_number as an int (older rows hold strings)"""
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+def as_naive_utc(at: datetime) -> datetime:
+    """Timestamps are stored as naive UTC; bring an aware datetime in line"""
+    if at.tzinfo is not None:
+        return at.astimezone(timezone.utc).replace(tzinfo=None)
+    return at
+
+class VersionTimeline:
+    """Per-standard version intervals, sorted by effective_from"""
+
+    def __init__(self, rows: List[dict]):
+        self._starts: Dict[str, List[datetime]] = {}
+        self._versions: Dict[str, List[dict]] = {}
+        for row in rows:
+            version = {**row, 'version_number': _version_number(row['version_number'])}
+            self._starts.setdefault(row['mat_standard_id'], []).append(row['effective_from'])
+            self._versions.setdefault(row['mat_standard_id'], []).append(version)
+
+    def standard_ids(self) -> List[str]:
+        return list(self._versions)
+
+    def as_of(self, mat_standard_id: str, at: datetime) -> Optional[dict]:
+        """
+        The version in force at `at`: the latest one that started at or before
+        it and had not been superseded by then. None before the first version
+        or after the last one was closed.
+        """
+        starts = self._starts.get(mat_standard_id)
+        if not starts:
+            return None
+        i = bisect_right(starts, as_naive_utc(at)) - 1
+        if i < 0:
+            return None
+        version = self._versions[mat_standard_id][i]
+        if version['effective_to'] is not None and version['effective_to'] <= as_naive_utc(at):
+            return None
+        return version
+
+class Catalogue:
+    """One MAT's aspects and standards as of one catalogue_version"""
+
+    def __init__(self, mat_id: str, version: int, aspects: List[dict], standards: List[dict]):
+        self.mat_id = mat_id
+        self.version = version
+        self.aspects = aspects
+        self.aspects_by_id = {aspect['mat_aspect_id']: aspect for aspect in aspects}
+        self.standards = []
+        for row in standards:
+            version_number = _version_number(row['current_version'])
+            self.standards.append({
+                **row,
+                'current_version': version_number,
+                'version_number': version_number,
+                'version_id': row['current_version_id']
+            })
+        self.standards_by_id = {standard['mat_standard_id']: standard for standard in self.standards}
+        self._versions: Dict[str, List[dict]] = {}
+        self._timeline: Optional[VersionTimeline] = None
+
+    def list_aspects(self, aspect_category: Optional[str] = None) -> List[dict]:
+        return [aspect for aspect in self.aspects
+                if not aspect_category or aspect['aspect_category'] == aspect_category]
+
+    def get_aspect(self, mat_aspect_id: str) -> Optional[dict]:
+        """Active aspect; standards_count here includes archived standards"""
+        aspect = self.aspects_by_id.get(mat_aspect_id)
+        if aspect is None:
+            return None
+        return {
+            **aspect,
+            'is_custom': 1 if aspect['source_aspect_id'] is None else 0,
+            'standards_count': sum(1 for standard in self.standards if standard['mat_aspect_id'] == mat_aspect_id)
+        }
+
+    def list_standards(self, aspect_code: Optional[str] = None, standard_type: Optional[str] = None,
+                       aspect_category: Optional[str] = None) -> List[dict]:
+        """Active standards of active aspects, in aspect then standard order"""
+        return [
+            standard for standard in self.standards
+            if standard['is_active'] and standard['aspect_is_active']
+            and (not aspect_code or standard['aspect_code'] == aspect_code)
+            and (not standard_type or standard['standard_type'] == standard_type)
+            and (not aspect_category or standard['aspect_category'] == aspect_category)
+        ]
+
+    def get_standard(self, mat_standard_id: str) -> Optional[dict]:
+        return self.standards_by_id.get(mat_standard_id)
+
+    def versions(self, cursor, mat_standard_id: str) -> List[dict]:
+        """Version history of one of this MAT's standards, newest first"""
+        versions = self._versions.get(mat_standard_id)
+        if versions is None:
+            cursor.execute(VERSIONS_SQL, (mat_standard_id,))
+            versions = self._versions[mat_standard_id] = cursor.fetchall()
+        return versions
+
+    def timeline(self, cursor) -> VersionTimeline:
+        """Version intervals of all the MAT's standards, loaded on first use"""
+        if self._timeline is None:
+            cursor.execute(VERSION_TIMELINE_SQL, (self.mat_id,))
+            self._timeline = VersionTimeline(cursor.fetchall())
+        return self._timeline
+
+class CatalogueCache:
+    """Per-worker catalogues, least recently used MAT evicted first"""
+
+    def __init__(self, max_mats: int = CATALOGUE_CACHE_MAX_MATS):
+        self.max_mats = max_mats
+        self._lock = threading.Lock()
+        self._catalogues: "OrderedDict[str, Catalogue]" = OrderedDict()
+
+    def get(self, cursor, mat_id: str) -> Catalogue:
+        """The MAT's catalogue, reloaded if its catalogue_version has moved"""
+        cursor.execute(CATALOGUE_VERSION_SQL, (mat_id,))
+        row = cursor.fetchone()
+        version = row['catalogue_version'] if row else 0
+
+        with self._lock:
+            catalogue = self._catalogues.get(mat_id)
+            if catalogue is not None and catalogue.version == version:
+                self._catalogues.move_to_end(mat_id)
+                return catalogue
+
+        # Read after the version: a write landing in between only costs an
+        # extra reload next time, never a stale catalogue
+        cursor.execute(ASPECTS_SQL, (mat_id, mat_id))
+        aspects = cursor.fetchall()
+        cursor.execute(STANDARDS_SQL, (mat_id,))
+        catalogue = Catalogue(mat_id, version, aspects, cursor.fetchall())
+
+        with self._lock:
+            self._catalogues[mat_id] = catalogue
+            self._catalogues.move_to_end(mat_id)
+            while len(self._catalogues) > self.max_mats:
+                self._catalogues.popitem(last=False)
+        return catalogue
+
+    def invalidate(self, mat_id: str) -> None:
+        with self._lock:
+            self._catalogues.pop(mat_id, None)
+
+# Shared instance used by the API
+catalogue_cache = CatalogueCache()
@@ -0,0 +1,105 @@
+"""
+Response cache for GET /api/dashboard/schools.
+
+Entries are keyed by (mat_id, unique_term_id). Each entry records the terms its
+payload was built from (the selected term and the previous terms shown as
+trends) and a revision token read from school_term_scores in the same snapshot
+as the payload.
+
+- Assessment writes call invalidate() after commit, which drops every entry of
+  that MAT built from one of the written terms.
+- Writes made by another worker are caught on the next hit: the caller compares
+  the entry's token with a fresh one (a single indexed read) before serving it.
+- A burst of misses for the same key shares one computation (single-flight).
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Iterable, Optional, Set, Tuple
+
+DASHBOARD_CACHE_TTL_SECONDS = int(os.getenv('DASHBOARD_CACHE_TTL_SECONDS', '300'))
+DASHBOARD_CACHE_MAX_ENTRIES = int(os.getenv('DASHBOARD_CACHE_MAX_ENTRIES', '500'))
+
+# compute() returns (payload, terms the payload depends on, revision token)
+DashboardBuild = Tuple[dict, Set[str], tuple]
+
+class DashboardCache:
+    """
+    In-memory, per-worker. Entries are guarded by a lock because invalidate()
+    is also called from the background draft flush thread; single-flight
+    bookkeeping only happens on the event loop.
+    """
+
+    def __init__(self, ttl_seconds: int = DASHBOARD_CACHE_TTL_SECONDS, max_entries: int = DASHBOARD_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], dict] = {}
+        self._in_flight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+    def get(self, mat_id: str, term_id: str) -> Optional[dict]:
+        """
+        Cached entry ({payload, depends_on, token}) or None. The caller must
+        check entry['token'] is still current before serving the payload.
+        """
+        with self._lock:
+            entry = self._entries.get((mat_id, term_id))
+            if entry and entry['expires_at'] <= time.time():
+                del self._entries[(mat_id, term_id)]
+                return None
+            return entry
+
+    def _put(self, key: Tuple[str, str], build: DashboardBuild) -> None:
+        payload, depends_on, token = build
+        with self._lock:
+            if len(self._entries) >= self.max_entries and key not in self._entries:
+                # Evict whichever entry expires soonest
+                oldest = min(self._entries, key=lambda k: self._entries[k]['expires_at'])
+                del self._entries[oldest]
+            self._entries[key] = {
+                'payload': payload,
+                'depends_on': depends_on,
+                'token': token,
+                'expires_at': time.time() + self.ttl_seconds
+            }
+
+    async def compute(self, mat_id: str, term_id: str, build: Callable[[], Awaitable[DashboardBuild]]) -> dict:
+        """
+        Build and cache the payload for a key. If a build for the same key is
+        already running, wait for it instead of starting another.
+        """
+        key = (mat_id, term_id)
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await build()
+            self._put(key, result)
+            future.set_result(result[0])
+            return result[0]
+        except Exception as e:
+            future.set_exception(e)
+            # Retrieve it so a build with no waiters doesn't log "never retrieved"
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    def invalidate(self, written_terms: Iterable[Tuple[str, str]]) -> None:
+        """Drop entries built from any of the (mat_id, unique_term_id) pairs written"""
+        written: Dict[str, Set[str]] = {}
+        for mat_id, unique_term_id in written_terms:
+            written.setdefault(mat_id, set()).add(unique_term_id)
+
+        with self._lock:
+            for key in [k for k, entry in self._entries.items()
+                        if k[0] in written and entry['depends_on'] & written[k[0]]]:
+                del self._entries[key]
+
+# Shared instance used by the API
+dashboard_cache = DashboardCache()
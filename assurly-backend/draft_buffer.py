@@ -0,0 +1,354 @@
+"""
+Write-coalescing buffer for assessment draft autosave.
+
+The assessment form autosaves on every field edit. Instead of turning each
+keystroke burst into an UPDATE, edits are held here per (MAT, user) and
+coalesced per assessment cell, so only the latest value of each field is
+written when the buffer is flushed (on a short interval or on explicit submit).
+
+Every accepted edit is also appended to a per-worker spill file. If a worker
+dies before flushing, the next worker to start replays its spill file, so
+buffered drafts survive restarts. The edits of one request are written with a
+single fsync, and record_many() is called on a worker thread so the fsync
+never blocks the event loop. When drafts are written or discarded the spill
+file is rewritten: a new file is written and fsynced beside it and renamed
+over it, so a crash mid-rewrite leaves the old file in place.
+
+Each worker has its own buffer: a user's edits land in the buffer of whichever
+worker served the autosave request. Every worker flushes its own buffer on the
+same interval, so an edit is written within DRAFT_FLUSH_INTERVAL_SECONDS
+whichever worker holds it.
+"""
+
+import fcntl
+import glob
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+# Fields a draft may carry - mirrors what PUT /api/assessments/{id} accepts
+DRAFT_FIELDS = ('rating', 'evidence_comments')
+
+DRAFT_FLUSH_INTERVAL_SECONDS = float(os.getenv('DRAFT_FLUSH_INTERVAL_SECONDS', '5'))
+DRAFT_SPILL_DIR = os.getenv('DRAFT_SPILL_DIR', os.path.join(tempfile.gettempdir(), 'assurly-drafts'))
+
+# (mat_id, user_id, assessment_id, draft)
+DraftEntry = Tuple[str, str, str, dict]
+
+class DraftBuffer:
+    """
+    In-memory draft store keyed by (mat_id, user_id) -> assessment_id -> draft.
+
+    A draft is {"changes": {field: value}, "base_last_updated": str | None,
+    "edited_at": float}. Thread-safe: the API handlers and the background
+    flusher (running in a worker thread) share one instance.
+
+    _lock guards the drafts in memory; _spill_lock guards the spill file and
+    is always taken first. Disk writes happen under _spill_lock only, so
+    handlers that just read the buffer never wait on the disk.
+    """
+
+    def __init__(self, spill_dir: Optional[str] = DRAFT_SPILL_DIR):
+        self.spill_dir = spill_dir
+        self._lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._drafts: Dict[Tuple[str, str], Dict[str, dict]] = {}
+        self._conflicts: Dict[Tuple[str, str], List[dict]] = {}
+        # Taken by a flush that has not finished yet - still kept in the spill
+        self._in_flight: List[DraftEntry] = []
+        self._spill_file = None
+
+    # ---------- durable spill ----------
+
+    def open_spill(self) -> int:
+        """
+        Open this worker's spill file and replay any spill files left behind by
+        workers that are no longer running. A live worker holds an exclusive
+        flock on its own file, so only orphaned files can be claimed.
+
+        Returns:
+            int: Number of draft edits recovered from orphaned spill files
+        """
+        if not self.spill_dir:
+            return 0
+
+        os.makedirs(self.spill_dir, exist_ok=True)
+        own_path = os.path.join(self.spill_dir, f"drafts-{os.getpid()}-{uuid.uuid4().hex[:8]}.jsonl")
+        self._spill_file = open(own_path, 'a+', encoding='utf-8')
+        fcntl.flock(self._spill_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        recovered = 0
+        for path in glob.glob(os.path.join(self.spill_dir, 'drafts-*.jsonl')):
+            if path == own_path:
+                continue
+            try:
+                orphan = open(path, 'r', encoding='utf-8')
+            except FileNotFoundError:
+                continue  # Claimed by another worker
+            with orphan:
+                try:
+                    fcntl.flock(orphan, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # Owned by a live worker
+                try:
+                    if os.stat(path).st_ino != os.fstat(orphan.fileno()).st_ino:
+                        continue  # Replaced by its owner's compaction while we opened it
+                except FileNotFoundError:
+                    continue
+
+                records = []
+                for line in orphan:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue  # Torn final line from a crash mid-write
+                with self._spill_lock:
+                    with self._lock:
+                        for record in records:
+                            self._buffer(
+                                record['mat_id'], record['user_id'], record['assessment_id'],
+                                record['changes'], record.get('base_last_updated')
+                            )
+                    self._append_spill(records)
+                    self._sync_spill()
+                recovered += len(records)
+
+                # Recovered edits are now durable in our own spill file
+                os.unlink(path)
+
+        return recovered
+
+    def _append_spill(self, records: List[dict]) -> None:
+        if self._spill_file is None or not records:
+            return
+        self._spill_file.write(''.join(json.dumps(record) + '\n' for record in records))
+        self._spill_file.flush()
+
+    def _sync_spill(self) -> None:
+        """fsync the spill file. Caller holds _spill_lock."""
+        spill_file = self._spill_file
+        if spill_file is None:
+            return
+        try:
+            os.fsync(spill_file.fileno())
+        except (ValueError, OSError):
+            pass  # Closed at shutdown
+
+    def _compact_spill(self) -> None:
+        """
+        Replace the spill file with one that only holds drafts that are not
+        yet written. The new file is fsynced and locked before it is renamed
+        over the old one, so a crash at any point leaves a complete file that
+        no other worker can claim while this one is alive. Caller holds
+        _spill_lock.
+        """
+        if self._spill_file is None:
+            return
+        path = self._spill_file.name
+        with self._lock:
+            entries = [
+                (mat_id, user_id, assessment_id, {**draft, 'changes': dict(draft['changes'])})
+                for (mat_id, user_id), cells in self._drafts.items()
+                for assessment_id, draft in cells.items()
+            ] + [(mat_id, user_id, assessment_id, {**draft, 'changes': dict(draft['changes'])})
+                 for mat_id, user_id, assessment_id, draft in self._in_flight]
+        compacted = open(f"{path}.tmp", 'w+', encoding='utf-8')
+        try:
+            fcntl.flock(compacted, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            compacted.write(''.join(json.dumps({
+                'mat_id': mat_id,
+                'user_id': user_id,
+                'assessment_id': assessment_id,
+                'changes': draft['changes'],
+                'base_last_updated': draft['base_last_updated']
+            }) + '\n' for mat_id, user_id, assessment_id, draft in entries))
+            compacted.flush()
+            os.fsync(compacted.fileno())
+            os.replace(f"{path}.tmp", path)
+        except BaseException:
+            compacted.close()
+            try:
+                os.unlink(f"{path}.tmp")
+            except FileNotFoundError:
+                pass
+            raise
+        self._spill_file.close()
+        self._spill_file = compacted
+        self._sync_dir()
+
+    def _sync_dir(self) -> None:
+        """fsync the spill directory so a rename survives a crash"""
+        directory = os.open(self.spill_dir, os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+    def close_spill(self) -> None:
+        with self._spill_lock:
+            if self._spill_file is not None:
+                self._spill_file.close()
+                self._spill_file = None
+
+    # ---------- buffering ----------
+
+    def _buffer(
+        self,
+        mat_id: str,
+        user_id: str,
+        assessment_id: str,
+        changes: dict,
+        base_last_updated: Optional[str]
+    ) -> None:
+        cells = self._drafts.setdefault((mat_id, user_id), {})
+        draft = cells.get(assessment_id)
+        if draft is None:
+            cells[assessment_id] = {
+                'changes': dict(changes),
+                'base_last_updated': base_last_updated,
+                'edited_at': time.time()
+            }
+        else:
+            draft['changes'].update(changes)
+            draft['base_last_updated'] = draft['base_last_updated'] or base_last_updated
+            draft['edited_at'] = time.time()
+
+    def record_many(
+        self,
+        mat_id: str,
+        user_id: str,
+        edits: List[Tuple[str, dict, Optional[str]]]
+    ) -> None:
+        """
+        Buffer (assessment_id, changes, base_last_updated) edits, coalescing
+        each with any pending edit to the same cell. Later values win per
+        field; the first base_last_updated seen for the cell is kept as the
+        optimistic-concurrency precondition for the flush.
+
+        The edits are spilled with one fsync, taken outside the memory lock;
+        call this off the event loop.
+        """
+        records = []
+        with self._spill_lock:
+            with self._lock:
+                for assessment_id, changes, base_last_updated in edits:
+                    changes = {k: v for k, v in changes.items() if k in DRAFT_FIELDS}
+                    if not changes:
+                        continue
+                    self._buffer(mat_id, user_id, assessment_id, changes, base_last_updated)
+                    records.append({
+                        'mat_id': mat_id,
+                        'user_id': user_id,
+                        'assessment_id': assessment_id,
+                        'changes': changes,
+                        'base_last_updated': base_last_updated
+                    })
+            if records:
+                self._append_spill(records)
+                self._sync_spill()
+
+    def record(
+        self,
+        mat_id: str,
+        user_id: str,
+        assessment_id: str,
+        changes: dict,
+        base_last_updated: Optional[str] = None
+    ) -> None:
+        """Buffer a single edit - see record_many()"""
+        self.record_many(mat_id, user_id, [(assessment_id, changes, base_last_updated)])
+
+    def pending(self, mat_id: str, user_id: str) -> Dict[str, dict]:
+        """Copy of a user's unflushed drafts, keyed by assessment_id"""
+        with self._lock:
+            cells = self._drafts.get((mat_id, user_id), {})
+            return {aid: {**draft, 'changes': dict(draft['changes'])} for aid, draft in cells.items()}
+
+    def pending_count(self) -> int:
+        with self._lock:
+            return sum(len(cells) for cells in self._drafts.values())
+
+    def discard_many(self, mat_id: str, user_id: str, assessment_ids: List[str]) -> None:
+        """
+        Drop pending drafts that have been superseded by a direct save, from
+        memory and from the spill file, so a restart can't replay them over
+        that save. Rewrites the spill file when anything was dropped; call
+        this off the event loop.
+        """
+        with self._spill_lock:
+            with self._lock:
+                cells = self._drafts.get((mat_id, user_id))
+                if not cells:
+                    return
+                dropped = [cells.pop(assessment_id) for assessment_id in assessment_ids if assessment_id in cells]
+                if not cells:
+                    del self._drafts[(mat_id, user_id)]
+            if dropped:
+                self._compact_spill()
+
+    def discard(self, mat_id: str, user_id: str, assessment_id: str) -> None:
+        """Drop a single draft - see discard_many()"""
+        self.discard_many(mat_id, user_id, [assessment_id])
+
+    def take(self, mat_id: Optional[str] = None, user_id: Optional[str] = None) -> List[DraftEntry]:
+        """
+        Remove and return pending drafts for flushing - all of them, or just
+        one user's when mat_id and user_id are given. Pass the result to
+        settle() once written, or restore() if the write failed.
+        """
+        with self._lock:
+            if mat_id is not None and user_id is not None:
+                keys = [(mat_id, user_id)] if (mat_id, user_id) in self._drafts else []
+            else:
+                keys = list(self._drafts.keys())
+
+            entries = []
+            for key in keys:
+                for assessment_id, draft in self._drafts.pop(key).items():
+                    entries.append((key[0], key[1], assessment_id, draft))
+            self._in_flight.extend(entries)
+            return entries
+
+    def _release(self, entries: List[DraftEntry]) -> None:
+        taken = {id(entry) for entry in entries}
+        self._in_flight = [entry for entry in self._in_flight if id(entry) not in taken]
+
+    def settle(self, entries: List[DraftEntry]) -> None:
+        """Mark drafts returned by take() as written and drop them from the spill"""
+        with self._spill_lock:
+            with self._lock:
+                self._release(entries)
+            self._compact_spill()
+
+    def restore(self, entries: List[DraftEntry]) -> None:
+        """
+        Put drafts back after a failed flush. Edits made while the flush was
+        running take precedence over the restored values.
+        """
+        with self._lock:
+            self._release(entries)
+            for mat_id, user_id, assessment_id, draft in entries:
+                cells = self._drafts.setdefault((mat_id, user_id), {})
+                newer = cells.get(assessment_id)
+                if newer is None:
+                    cells[assessment_id] = draft
+                else:
+                    newer['changes'] = {**draft['changes'], **newer['changes']}
+                    newer['base_last_updated'] = draft['base_last_updated'] or newer['base_last_updated']
+
+    # ---------- conflicts from background flushes ----------
+
+    def add_conflict(self, mat_id: str, user_id: str, state: dict) -> None:
+        with self._lock:
+            self._conflicts.setdefault((mat_id, user_id), []).append(state)
+
+    def pop_conflicts(self, mat_id: str, user_id: str) -> List[dict]:
+        with self._lock:
+            return self._conflicts.pop((mat_id, user_id), [])
+
+# Shared instance used by the API
+draft_buffer = DraftBuffer()
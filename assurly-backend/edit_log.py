@@ -0,0 +1,102 @@
+"""
+Trust-wide feed of standard_edit_log, newest first.
+
+Pages are fetched by keyset on (edited_at, log_id) rather than OFFSET, so the
+cost of a page does not grow with how far back an auditor has paged. Each
+page is a range read of the (mat_id, edited_at, log_id) index - or of
+(mat_standard_id, edited_at, log_id) when filtered to one standard - stopping
+after limit + 1 rows. The next_cursor token carries the last row's key.
+
+old_values / new_values are only decoded for rows on the page being returned,
+and not selected at all when the caller doesn't want them.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+EDIT_LOG_QUERY = """
+    SELECT
+        l.log_id,
+        l.mat_standard_id,
+        ms.standard_code,
+        ms.standard_name,
+        l.version_id,
+        l.action_type,
+        l.edited_by_user_id,
+        u.full_name as edited_by_name,
+        l.edited_at,
+        l.change_reason{value_columns}
+    FROM standard_edit_log l
+    LEFT JOIN mat_standards ms ON l.mat_standard_id = ms.mat_standard_id
+    LEFT JOIN users u ON l.edited_by_user_id = u.user_id
+    WHERE l.mat_id = %s
+    {where}
+    ORDER BY l.edited_at DESC, l.log_id DESC
+    LIMIT %s
+"""
+
+def encode_cursor(edited_at: datetime, log_id: str) -> str:
+    raw = f"{edited_at.strftime('%Y-%m-%dT%H:%M:%S')}|{log_id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_cursor(token: str) -> Tuple[datetime, str]:
+    """(edited_at, log_id) of the last row already seen; ValueError if malformed"""
+    try:
+        edited_at, log_id = base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8').split('|', 1)
+        return datetime.strptime(edited_at, '%Y-%m-%dT%H:%M:%S'), log_id
+    except (UnicodeError, ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {token}") from e
+
+def edit_log_query(mat_id: str, limit: int, cursor: Optional[str] = None,
+                   mat_standard_id: Optional[str] = None, user_id: Optional[str] = None,
+                   action_type: Optional[str] = None, edited_from: Optional[datetime] = None,
+                   edited_to: Optional[datetime] = None, include_values: bool = True) -> Tuple[str, list]:
+    """One page of the MAT's feed; fetches limit + 1 rows to tell if there is a next page"""
+    where, params = [], [mat_id]
+    if mat_standard_id:
+        where.append("AND l.mat_standard_id = %s")
+        params.append(mat_standard_id)
+    if user_id:
+        where.append("AND l.edited_by_user_id = %s")
+        params.append(user_id)
+    if action_type:
+        where.append("AND l.action_type = %s")
+        params.append(action_type)
+    if edited_from:
+        where.append("AND l.edited_at >= %s")
+        params.append(edited_from)
+    if edited_to:
+        where.append("AND l.edited_at < %s")
+        params.append(edited_to)
+    if cursor:
+        # Expanded form of (edited_at, log_id) < (%s, %s), which MySQL turns
+        # into an index range
+        last_edited_at, last_log_id = decode_cursor(cursor)
+        where.append("AND (l.edited_at < %s OR (l.edited_at = %s AND l.log_id < %s))")
+        params += [last_edited_at, last_edited_at, last_log_id]
+    params.append(limit + 1)
+
+    value_columns = ",\n        l.old_values,\n        l.new_values" if include_values else ""
+    return EDIT_LOG_QUERY.format(value_columns=value_columns, where='\n    '.join(where)), params
+
+def _json_value(value):
+    if isinstance(value, (bytes, str)):
+        return json.loads(value)
+    return value
+
+def edit_log_page(rows: List[dict], limit: int) -> Tuple[List[dict], Optional[str]]:
+    """Entries for the response and the cursor for the next page (None on the last page)"""
+    page = rows[:limit]
+    next_cursor = encode_cursor(page[-1]['edited_at'], page[-1]['log_id']) if len(rows) > limit else None
+
+    entries = []
+    for row in page:
+        entry = dict(row)
+        entry['edited_at'] = row['edited_at'].strftime('%Y-%m-%dT%H:%M:%SZ')
+        for column in ('old_values', 'new_values'):
+            if column in entry:
+                entry[column] = _json_value(entry[column])
+        entries.append(entry)
+    return entries, next_cursor
@@ -6,7 +6,7 @@ import aiosmtplib
 import ssl
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 from jinja2 import Template
 
@@ -211,45 +211,82 @@ class EmailService:
             bool: True if email sent successfully, False otherwise
         """
         try:
-            # Prepare email data
-            email_data = MagicLinkEmailData(
-                user_name=user_name or "User",
-                magic_link_url=magic_link_url,
-                expiry_minutes=MAGIC_LINK_EXPIRE_MINUTES,
-                user_email=recipient_email,
-                timestamp=datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
-                company_name="Assurly",
-                support_email=self.reply_to
-            )
-            
-            # Create email message
-            message = MIMEMultipart("alternative")
-            message["Subject"] = "Your Assurly Login Link"
-            message["From"] = f"{self.from_name} <{self.smtp_email}>"
-            message["To"] = recipient_email
-            message["Reply-To"] = self.reply_to
-            
-            # Generate email content from templates
-            html_content = self._render_template(MAGIC_LINK_HTML_TEMPLATE, email_data)
-            text_content = self._render_template(MAGIC_LINK_TEXT_TEMPLATE, email_data)
-            
-            # Create text and HTML parts
-            part1 = MIMEText(text_content, "plain")
-            part2 = MIMEText(html_content, "html")
-            
-            # Add parts to message
-            message.attach(part1)
-            message.attach(part2)
-            
-            # Send email
-            await self._send_email(message)
-            
+            await self._send_email(self._magic_link_message(recipient_email, user_name, magic_link_url))
             return True
             
         except Exception as e:
             print(f"Failed to send magic link email to {recipient_email}: {str(e)}")
             return False
 
+    async def send_magic_link_emails(self, invites: List[Tuple[str, str, str]]) -> List[str]:
+        """
+        Send many magic link emails over one SMTP session (one connect,
+        STARTTLS and login for the whole batch).
+        
+        Args:
+            invites: (recipient_email, user_name, magic_link_url) tuples
+            
+        Returns:
+            List[str]: Recipients whose email could not be sent
+        """
+        failed = []
+        attempted = 0
+        try:
+            smtp = aiosmtplib.SMTP(
+                hostname=self.smtp_host,
+                port=self.smtp_port,
+                start_tls=True,
+                validate_certs=True,
+                timeout=30
+            )
+            async with smtp:
+                await smtp.login(self.smtp_email, self.smtp_password)
+                for recipient_email, user_name, magic_link_url in invites:
+                    try:
+                        await smtp.send_message(self._magic_link_message(recipient_email, user_name, magic_link_url))
+                    except aiosmtplib.SMTPRecipientsRefused as e:
+                        print(f"Failed to send magic link email to {recipient_email}: {str(e)}")
+                        failed.append(recipient_email)
+                    attempted += 1
+        except Exception as e:
+            # The session is gone: nothing after this point was sent
+            print(f"SMTP batch send failed: {e}")
+            failed += [invite[0] for invite in invites[attempted:]]
+        return failed
+
+    def _magic_link_message(self, recipient_email: str, user_name: str, magic_link_url: str) -> MIMEMultipart:
+        """Build the magic link email for one recipient"""
+        # Prepare email data
+        email_data = MagicLinkEmailData(
+            user_name=user_name or "User",
+            magic_link_url=magic_link_url,
+            expiry_minutes=MAGIC_LINK_EXPIRE_MINUTES,
+            user_email=recipient_email,
+            timestamp=datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S'),
+            company_name="Assurly",
+            support_email=self.reply_to
+        )
+        
+        # Create email message
+        message = MIMEMultipart("alternative")
+        message["Subject"] = "Your Assurly Login Link"
+        message["From"] = f"{self.from_name} <{self.smtp_email}>"
+        message["To"] = recipient_email
+        message["Reply-To"] = self.reply_to
+        
+        # Generate email content from templates
+        html_content = self._render_template(MAGIC_LINK_HTML_TEMPLATE, email_data)
+        text_content = self._render_template(MAGIC_LINK_TEXT_TEMPLATE, email_data)
+        
+        # Create text and HTML parts
+        part1 = MIMEText(text_content, "plain")
+        part2 = MIMEText(html_content, "html")
+        
+        # Add parts to message
+        message.attach(part1)
+        message.attach(part2)
+        return message
+
     def _render_template(self, template_str: str, data: MagicLinkEmailData) -> str:
         """Render email template with data"""
         template = Template(template_str)
@@ -300,7 +337,7 @@ class EmailService:
 # Initialize global email service instance
 email_service = EmailService()
 
-# Convenience function for sending magic link emails
+# Convenience functions for sending magic link emails
 async def send_magic_link_email(recipient_email: str, user_name: str, magic_link_url: str) -> bool:
     """
     Convenience function to send magic link email.
@@ -313,4 +350,16 @@ async def send_magic_link_email(recipient_email: str, user_name: str, magic_link
     Returns:
         bool: True if email sent successfully, False otherwise
     """
-    return await email_service.send_magic_link_email(recipient_email, user_name, magic_link_url)
\ No newline at end of file
+    return await email_service.send_magic_link_email(recipient_email, user_name, magic_link_url)
+
+async def send_magic_link_emails(invites: List[Tuple[str, str, str]]) -> List[str]:
+    """
+    Convenience function to send many magic link emails over one SMTP session.
+    
+    Args:
+        invites: (recipient_email, user_name, magic_link_url) tuples
+        
+    Returns:
+        List[str]: Recipients whose email could not be sent
+    """
+    return await email_service.send_magic_link_emails(invites)
\ No newline at end of file
@@ -0,0 +1,169 @@
+"""
+Storage backends for evidence files (REQ-003).
+
+An upload is written through a writer - write() a chunk at a time, then
+commit() or abort() - so no backend ever needs the whole file in memory:
+
+- LocalEvidenceStorage writes under EVIDENCE_LOCAL_DIR. Bytes go to a
+  .part file that is hard-linked into place on commit, so a failed or
+  abandoned upload never leaves a visible object. Used for development and
+  tests.
+- GCSEvidenceStorage streams to EVIDENCE_BUCKET with a resumable upload, one
+  request per EVIDENCE_CHUNK_BYTES. Needs google-cloud-storage and the
+  service account's default credentials (Cloud Run).
+
+Writers are create-only: committing to a key that already holds an object
+raises FileExistsError (the link fails locally; on GCS the upload carries
+if_generation_match=0) instead of overwriting it.
+
+EVIDENCE_STORAGE picks the backend for the shared instance ('local' or
+'gcs'). Object keys are {mat_id}/{mat_standard_id}/{filename}-{random}{ext},
+relative to the directory or bucket. Writers and deletes do blocking I/O; the API calls them
+on a worker thread.
+"""
+
+import os
+import tempfile
+import uuid
+from datetime import timedelta
+from typing import Optional
+
+try:
+    from google.cloud import storage as gcs
+    from google.api_core.exceptions import NotFound, PreconditionFailed
+    import google.auth.transport.requests
+except ImportError:  # local storage only
+    gcs = None
+
+EVIDENCE_STORAGE = os.getenv('EVIDENCE_STORAGE', 'local')
+EVIDENCE_LOCAL_DIR = os.getenv('EVIDENCE_LOCAL_DIR', os.path.join(tempfile.gettempdir(), 'assurly-evidence'))
+EVIDENCE_BUCKET = os.getenv('EVIDENCE_BUCKET')
+EVIDENCE_CHUNK_BYTES = int(os.getenv('EVIDENCE_CHUNK_BYTES', str(1024 * 1024)))
+
+SIGNED_URL_EXPIRY = timedelta(minutes=15)
+
+class LocalEvidenceWriter:
+    def __init__(self, path: str):
+        self.path = path
+        self.part_path = f"{path}.{uuid.uuid4().hex[:8]}.part"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._file = open(self.part_path, 'wb')
+
+    def write(self, data: bytes) -> None:
+        self._file.write(data)
+
+    def commit(self) -> None:
+        self._file.close()
+        try:
+            os.link(self.part_path, self.path)
+        finally:
+            os.remove(self.part_path)
+
+    def abort(self) -> None:
+        self._file.close()
+        try:
+            os.remove(self.part_path)
+        except FileNotFoundError:
+            pass
+
+class LocalEvidenceStorage:
+    """Evidence files under a local directory"""
+
+    def __init__(self, root: str = EVIDENCE_LOCAL_DIR):
+        self.root = root
+
+    def path(self, key: str) -> str:
+        path = os.path.realpath(os.path.join(self.root, key))
+        if not path.startswith(os.path.realpath(self.root) + os.sep):
+            raise ValueError(f"Invalid evidence key: {key}")
+        return path
+
+    def open_writer(self, key: str, content_type: str) -> LocalEvidenceWriter:
+        return LocalEvidenceWriter(self.path(key))
+
+    def delete(self, key: str) -> None:
+        """Delete an object; an object that is already gone is not an error"""
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def download_url(self, key: str) -> Optional[str]:
+        # Local files are not served over HTTP
+        return None
+
+class GCSEvidenceWriter:
+    def __init__(self, blob, content_type: str, chunk_size: int):
+        self.blob = blob
+        self._file = blob.open('wb', content_type=content_type, chunk_size=chunk_size, if_generation_match=0)
+        self._closed = False
+
+    def write(self, data: bytes) -> None:
+        self._file.write(data)
+
+    def commit(self) -> None:
+        self._closed = True
+        try:
+            self._file.close()
+        except PreconditionFailed:
+            raise FileExistsError(f"Evidence object already exists: {self.blob.name}")
+
+    def abort(self) -> None:
+        # A BlobWriter can't be cancelled (closing it, even on garbage
+        # collection, finalises the object), so finish it and remove it. After
+        # a failed commit() there is nothing of ours to remove - the key may
+        # hold another upload's object.
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            self._file.close()
+            self.blob.delete()
+        except (NotFound, PreconditionFailed):
+            pass
+
+class GCSEvidenceStorage:
+    """Evidence files in a Cloud Storage bucket"""
+
+    def __init__(self, bucket_name: str = EVIDENCE_BUCKET, chunk_bytes: int = EVIDENCE_CHUNK_BYTES):
+        if gcs is None:
+            raise RuntimeError("EVIDENCE_STORAGE=gcs needs google-cloud-storage")
+        if not bucket_name:
+            raise RuntimeError("EVIDENCE_STORAGE=gcs needs EVIDENCE_BUCKET")
+        self.client = gcs.Client()
+        self.bucket = self.client.bucket(bucket_name)
+        # Resumable upload chunks must be a multiple of 256 KB
+        self.chunk_size = max(1, chunk_bytes // (256 * 1024)) * 256 * 1024
+
+    def open_writer(self, key: str, content_type: str) -> GCSEvidenceWriter:
+        return GCSEvidenceWriter(self.bucket.blob(key), content_type, self.chunk_size)
+
+    def delete(self, key: str) -> None:
+        """Delete an object; an object that is already gone is not an error"""
+        try:
+            self.bucket.blob(key).delete()
+        except NotFound:
+            pass
+
+    def download_url(self, key: str) -> Optional[str]:
+        """V4 signed URL, valid for 15 minutes, signed through IAM with the default credentials"""
+        credentials = self.client._credentials
+        if not credentials.valid:
+            credentials.refresh(google.auth.transport.requests.Request())
+        return self.bucket.blob(key).generate_signed_url(
+            version='v4',
+            expiration=SIGNED_URL_EXPIRY,
+            method='GET',
+            service_account_email=getattr(credentials, 'service_account_email', None),
+            access_token=credentials.token
+        )
+
+def make_evidence_storage(backend: str = EVIDENCE_STORAGE):
+    if backend == 'gcs':
+        return GCSEvidenceStorage()
+    if backend == 'local':
+        return LocalEvidenceStorage()
+    raise ValueError(f"Unknown EVIDENCE_STORAGE: {backend}")
+
+# Shared instance used by the API
+evidence_storage = make_evidence_storage()
@@ -0,0 +1,247 @@
+"""
+Streaming evidence uploads for POST /evidence/upload.
+
+The multipart/form-data body is never held in memory. Request chunks are
+gathered into blocks of EVIDENCE_CHUNK_BYTES and each block is fed to an
+incremental multipart parser (EvidenceUpload), which passes the file's bytes
+straight to a storage writer (evidence_storage.py) and hashes them with
+SHA-256 on the way through.
+
+Limits are enforced as early as possible: the declared Content-Length is
+checked before anything is read, the file type when the file part's headers
+arrive, and the size as bytes are counted - an oversized upload is aborted
+at the first block past EVIDENCE_MAX_BYTES.
+
+The text fields (mat_standard_id, school_id, unique_term_id) must come before
+the file part so they can be checked before any bytes are stored.
+
+Parsing, hashing and storage writes all run on a small dedicated thread pool
+(EVIDENCE_UPLOAD_WORKERS), so concurrent large uploads neither block the
+event loop nor use up the default executor other endpoints rely on.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Callable, Dict, Optional
+
+from multipart.multipart import MultipartParser, parse_options_header
+
+from evidence_storage import EVIDENCE_CHUNK_BYTES
+
+EVIDENCE_MAX_BYTES = int(os.getenv('EVIDENCE_MAX_BYTES', str(25 * 1024 * 1024)))
+EVIDENCE_UPLOAD_WORKERS = int(os.getenv('EVIDENCE_UPLOAD_WORKERS', '4'))
+
+# Allowance for the multipart boundaries, part headers and text fields
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+MAX_FIELD_BYTES = 1024
+
+EVIDENCE_FIELDS = ('mat_standard_id', 'school_id', 'unique_term_id')
+
+EVIDENCE_TYPES = {
+    '.pdf': 'application/pdf',
+    '.doc': 'application/msword',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.xls': 'application/vnd.ms-excel',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+    '.svg': 'image/svg+xml',
+}
+
+UNSAFE_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*\x00-\x1f\x7f]')
+
+evidence_executor = ThreadPoolExecutor(max_workers=EVIDENCE_UPLOAD_WORKERS, thread_name_prefix='evidence')
+
+class EvidenceTooLarge(ValueError):
+    pass
+
+class UnsupportedEvidenceType(ValueError):
+    pass
+
+def multipart_boundary(content_type: str) -> bytes:
+    """The boundary of a multipart/form-data Content-Type; ValueError otherwise"""
+    media_type, params = parse_options_header(content_type or '')
+    if media_type != b'multipart/form-data' or not params.get(b'boundary'):
+        raise ValueError("Expected a multipart/form-data body")
+    return params[b'boundary']
+
+def sanitise_filename(filename: str) -> str:
+    """
+    The uploader's filename made safe for an object key: no directories,
+    control characters or < > : " / \\ | ? *. UTF-8 and the extension are kept.
+    """
+    stem, ext = os.path.splitext(re.split(r'[/\\]', filename)[-1])
+    stem = UNSAFE_FILENAME_CHARS.sub('', stem).strip().lstrip('.')
+    return f"{stem[:200] or 'evidence'}{UNSAFE_FILENAME_CHARS.sub('', ext).lower()}"
+
+class EvidenceUpload:
+    """
+    One evidence upload, parsed a block at a time with feed() and completed
+    with finish(), or abort()ed. check_fields(fields) is called once the text
+    fields are in and before the file is stored; it raises to reject them.
+    """
+
+    def __init__(self, boundary: bytes, storage, mat_id: str, check_fields: Callable[[Dict[str, str]], None],
+                 max_bytes: int = EVIDENCE_MAX_BYTES):
+        self.storage = storage
+        self.mat_id = mat_id
+        self.check_fields = check_fields
+        self.max_bytes = max_bytes
+        self.fields: Dict[str, str] = {}
+        self.key: Optional[str] = None
+        self.original_filename: Optional[str] = None
+        self.content_type: Optional[str] = None
+        self.size_bytes = 0
+        self.sha256 = hashlib.sha256()
+        self.writer = None
+        self.file_complete = False
+        self.ended = False
+        self._headers: Dict[str, bytes] = {}
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+        self._part: Optional[str] = None
+        self._field_value = bytearray()
+        self._parser = MultipartParser(boundary, {
+            'on_part_begin': self._on_part_begin,
+            'on_header_field': self._on_header_field,
+            'on_header_value': self._on_header_value,
+            'on_header_end': self._on_header_end,
+            'on_headers_finished': self._on_headers_finished,
+            'on_part_data': self._on_part_data,
+            'on_part_end': self._on_part_end,
+            'on_end': self._on_end,
+        })
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+        self._part = None
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.decode('latin-1').lower()] = bytes(self._header_value)
+        self._header_field.clear()
+        self._header_value.clear()
+
+    def _on_headers_finished(self) -> None:
+        disposition, params = parse_options_header(self._headers.get('content-disposition', b''))
+        name = params.get(b'name', b'').decode('utf-8', 'replace')
+        if disposition != b'form-data' or not name:
+            raise ValueError("Malformed multipart part")
+
+        if b'filename' not in params:
+            self._part = name
+            self._field_value.clear()
+            return
+        if name != 'file' or self.writer is not None:
+            raise ValueError("Expected one file, in the 'file' field")
+        self._start_file(params[b'filename'].decode('utf-8', 'replace'))
+        self._part = 'file'
+
+    def _start_file(self, filename: str) -> None:
+        missing = [field for field in EVIDENCE_FIELDS if not self.fields.get(field)]
+        if missing:
+            raise ValueError(f"{', '.join(missing)} must be sent before the file")
+
+        ext = os.path.splitext(filename)[1].lower()
+        if ext not in EVIDENCE_TYPES:
+            raise UnsupportedEvidenceType(f"Unsupported file type: {ext or filename}")
+        self.check_fields(self.fields)
+
+        # Every key gets a random suffix, so concurrent uploads of the same
+        # filename never share one; the writer is create-only as a backstop
+        stem, suffix = os.path.splitext(sanitise_filename(filename))
+        key = f"{self.mat_id}/{self.fields['mat_standard_id']}/{stem}-{uuid.uuid4().hex[:12]}{suffix}"
+
+        self.key = key
+        self.original_filename = filename[:500]
+        self.content_type = EVIDENCE_TYPES[ext]
+        self.writer = self.storage.open_writer(key, self.content_type)
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._part == 'file':
+            self.size_bytes += end - start
+            if self.size_bytes > self.max_bytes:
+                raise EvidenceTooLarge(f"File exceeds {self.max_bytes // (1024 * 1024)} MB")
+            chunk = data[start:end]
+            self.sha256.update(chunk)
+            self.writer.write(chunk)
+        elif self._part is not None:
+            self._field_value += data[start:end]
+            if len(self._field_value) > MAX_FIELD_BYTES:
+                raise ValueError(f"Field '{self._part}' is too long")
+
+    def _on_part_end(self) -> None:
+        if self._part == 'file':
+            self.file_complete = True
+        elif self._part is not None:
+            self.fields[self._part] = self._field_value.decode('utf-8').strip()
+        self._part = None
+
+    def _on_end(self) -> None:
+        self.ended = True
+
+    def feed(self, data: bytes) -> None:
+        self._parser.write(data)
+
+    def finish(self) -> dict:
+        """Commit the stored file once the whole body has been parsed"""
+        self._parser.finalize()
+        if not self.ended:
+            raise ValueError("Upload ended before the multipart body was complete")
+        if not self.file_complete:
+            raise ValueError("No file in upload")
+        self.writer.commit()
+        self.writer = None
+        return {
+            **{field: self.fields[field] for field in EVIDENCE_FIELDS},
+            'file_path': self.key,
+            'original_filename': self.original_filename,
+            'content_type': self.content_type,
+            'size_bytes': self.size_bytes,
+            'sha256': self.sha256.hexdigest()
+        }
+
+    def abort(self) -> None:
+        """Discard whatever has been stored of an upload that did not finish"""
+        if self.writer is not None:
+            self.writer.abort()
+            self.writer = None
+
+async def stream_upload(chunks: AsyncIterator[bytes], upload: EvidenceUpload, max_request_bytes: int,
+                        chunk_bytes: int = EVIDENCE_CHUNK_BYTES, executor=evidence_executor) -> dict:
+    """
+    Feed a request body to an upload in blocks of chunk_bytes, each on the
+    evidence thread pool, and finish it. Any failure, including the client
+    going away, aborts the upload before the error is re-raised.
+    """
+    loop = asyncio.get_running_loop()
+    buffer = bytearray()
+    received = 0
+    try:
+        async for chunk in chunks:
+            received += len(chunk)
+            if received > max_request_bytes:
+                raise EvidenceTooLarge(f"File exceeds {upload.max_bytes // (1024 * 1024)} MB")
+            buffer += chunk
+            if len(buffer) >= chunk_bytes:
+                block = bytes(buffer)
+                buffer.clear()
+                await loop.run_in_executor(executor, upload.feed, block)
+        if buffer:
+            await loop.run_in_executor(executor, upload.feed, bytes(buffer))
+        return await loop.run_in_executor(executor, upload.finish)
+    except BaseException:
+        await loop.run_in_executor(executor, upload.abort)
+        raise
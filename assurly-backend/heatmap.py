@@ -0,0 +1,54 @@
+"""
+School x standard rating grid for GET /api/analytics/heatmap.
+
+A MAT's term is a dense grid: one row per school, one column per standard.
+Cells are sent as strings of one digit per cell in row-major order (cell
+[i][j] is character i * len(columns) + j), so a 50 x 200 grid is 10,000
+characters before gzip and a few KB after. Two grids are returned:
+
+- ratings: the raw rating, 0 where the standard is not rated
+- rag: the RAG level with standard_type polarity already applied
+  (RAG_LEVELS), so the client never has to know which standards are risk
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# rag grid digit -> colour (frontend getRagColour palette)
+RAG_LEVELS = {0: 'grey', 1: 'red', 2: 'amber', 3: 'amber-green', 4: 'green'}
+
+def rag_level(rating: Optional[int], standard_type: Optional[str]) -> int:
+    """
+    RAG level for a rating: 4 = green down to 1 = red, 0 = not rated.
+    Risk standards are inverted (a 4 is red).
+    """
+    if not rating:
+        return 0
+    return 5 - rating if standard_type == 'risk' else rating
+
+def encode_rating_grid(school_ids: List[str], standards: List[dict],
+                       assessments: Iterable[dict]) -> Tuple[str, str, int]:
+    """
+    Build the ratings and rag grid strings from one scan of a term's
+    assessments (school_id, mat_standard_id, rating). Assessments for schools
+    or standards not in the grid are ignored.
+
+    Returns (ratings, rag, rated_cell_count).
+    """
+    rows: Dict[str, int] = {school_id: i for i, school_id in enumerate(school_ids)}
+    columns: Dict[str, int] = {standard['mat_standard_id']: j for j, standard in enumerate(standards)}
+    width = len(standards)
+
+    ratings = bytearray(b'0' * (len(school_ids) * width))
+    rag = bytearray(ratings)
+    rated = 0
+    for assessment in assessments:
+        i = rows.get(assessment['school_id'])
+        j = columns.get(assessment['mat_standard_id'])
+        if i is None or j is None or not assessment['rating']:
+            continue
+        cell = i * width + j
+        if ratings[cell] == ord('0'):
+            rated += 1
+        ratings[cell] = ord('0') + assessment['rating']
+        rag[cell] = ord('0') + rag_level(assessment['rating'], standards[j]['standard_type'])
+    return ratings.decode('ascii'), rag.decode('ascii'), rated
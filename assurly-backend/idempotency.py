@@ -0,0 +1,351 @@
+"""
+Idempotency-Key support for retried write requests.
+
+Clients on unreliable networks retry POSTs. When a request carries an
+Idempotency-Key header, the first execution's response is stored (with a
+fingerprint of the request) and any retry with the same key is answered from
+the store without running the handler again. A duplicate that arrives while
+the first execution is still running waits for it instead of racing it.
+
+Keys are claimed and responses stored in the idempotency_keys table, so a
+retry that lands on another worker, or arrives after a restart, is answered
+the same way. A key is claimed with an INSERT; the unique key on (mat_id,
+user_id, handler, idempotency_key) makes exactly one request win. A duplicate
+that loses gets the stored response, or 409 while the winner on another
+worker is still running. Claims left behind by a worker that died expire after
+IDEMPOTENCY_CLAIM_SECONDS.
+
+Each worker keeps completed responses in memory (bounded, with a TTL) in
+front of the table, and coalesces its own concurrent duplicates without a
+round trip.
+"""
+
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import pymysql
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv('IDEMPOTENCY_TTL_SECONDS', str(24 * 60 * 60)))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv('IDEMPOTENCY_MAX_ENTRIES', '10000'))
+IDEMPOTENCY_CLAIM_SECONDS = int(os.getenv('IDEMPOTENCY_CLAIM_SECONDS', '300'))
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS idempotency_keys (
+        id                   BIGINT       NOT NULL AUTO_INCREMENT,
+        mat_id               CHAR(36)     NOT NULL,
+        user_id              CHAR(36)     NOT NULL,
+        handler              VARCHAR(64)  NOT NULL,
+        idempotency_key      VARCHAR(255) NOT NULL,
+        fingerprint          CHAR(64)     NOT NULL,
+        status               ENUM('in_progress', 'completed') NOT NULL DEFAULT 'in_progress',
+        response_status      SMALLINT     NULL,
+        response_media_type  VARCHAR(100) NULL,
+        response_headers     TEXT         NULL,  -- JSON object
+        response_body        MEDIUMBLOB   NULL,
+        created_at           TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        expires_at           TIMESTAMP    NOT NULL,
+        PRIMARY KEY (id),
+        UNIQUE KEY uq_idempotency_key (mat_id, user_id, handler, idempotency_key),
+        KEY idx_idempotency_expires (expires_at)
+    )
+"""
+
+KEY_WHERE_SQL = "mat_id = %s AND user_id = %s AND handler = %s AND idempotency_key = %s"
+
+CLAIM_SQL = """
+    INSERT INTO idempotency_keys
+        (mat_id, user_id, handler, idempotency_key, fingerprint, status, expires_at)
+    VALUES (%s, %s, %s, %s, %s, 'in_progress', NOW() + INTERVAL %s SECOND)
+"""
+
+STORED_SQL = f"""
+    SELECT fingerprint, status, response_status, response_media_type, response_headers, response_body,
+           expires_at <= NOW() as expired
+    FROM idempotency_keys
+    WHERE {KEY_WHERE_SQL}
+"""
+
+COMPLETE_SQL = f"""
+    UPDATE idempotency_keys
+    SET status = 'completed',
+        response_status = %s,
+        response_media_type = %s,
+        response_headers = %s,
+        response_body = %s,
+        expires_at = NOW() + INTERVAL %s SECOND
+    WHERE {KEY_WHERE_SQL} AND fingerprint = %s
+"""
+
+RELEASE_SQL = f"DELETE FROM idempotency_keys WHERE {KEY_WHERE_SQL} AND status = 'in_progress'"
+
+EXPIRED_SQL = f"DELETE FROM idempotency_keys WHERE {KEY_WHERE_SQL} AND expires_at <= NOW()"
+
+PURGE_SQL = "DELETE FROM idempotency_keys WHERE expires_at <= NOW() LIMIT 1000"
+PURGE_INTERVAL_SECONDS = 60 * 60
+
+# Path/body parameters that identify the caller rather than the request
+_CALLER_PARAMS = ('current_mat_id', 'current_user', 'idempotency_key')
+
+class IdempotencyStore:
+    """
+    Stored responses keyed by (mat_id, user_id, handler, Idempotency-Key).
+
+    connect() opens a database connection for the idempotency_keys table;
+    without one the store only covers this worker. The in-memory entries
+    are kept in insertion order so the oldest are evicted first once
+    max_entries is reached; expired entries are dropped lazily. They are only
+    touched from the event loop, so no locking is needed. Table reads and
+    writes run on a worker thread.
+    """
+
+    def __init__(self, max_entries: int = IDEMPOTENCY_MAX_ENTRIES, ttl_seconds: int = IDEMPOTENCY_TTL_SECONDS,
+                 connect: Optional[Callable[[], object]] = None,
+                 claim_seconds: int = IDEMPOTENCY_CLAIM_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.connect = connect
+        self.claim_seconds = claim_seconds
+        self._purged_at = 0.0
+        # key -> (fingerprint, expires_at, (status_code, body, media_type, headers))
+        self._completed: "OrderedDict[tuple, tuple]" = OrderedDict()
+        # key -> (fingerprint, event set when the first execution finishes)
+        self._in_flight: Dict[tuple, Tuple[str, asyncio.Event]] = {}
+
+    def __len__(self) -> int:
+        return len(self._completed)
+
+    def _purge_expired(self) -> None:
+        now = time.time()
+        while self._completed:
+            key, (_, expires_at, _) = next(iter(self._completed.items()))
+            if expires_at > now:
+                break
+            self._completed.popitem(last=False)
+
+    def _cache(self, key: tuple, fingerprint: str, stored: tuple) -> None:
+        self._completed[key] = (fingerprint, time.time() + self.ttl_seconds, stored)
+        self._purge_expired()
+        while len(self._completed) > self.max_entries:
+            self._completed.popitem(last=False)
+
+    @staticmethod
+    def _stored(response: Response) -> tuple:
+        headers = {k: v for k, v in response.headers.items() if k.lower() != 'content-length'}
+        return (response.status_code, response.body, response.media_type, headers)
+
+    # ---------- idempotency_keys table (blocking, run on a worker thread) ----------
+
+    def _claim(self, key: tuple, fingerprint: str) -> Optional[tuple]:
+        """
+        Claim the key for this request. Returns None once claimed, or the
+        stored response when another request with the key has completed.
+
+        Raises:
+            HTTPException: 409 while another request with the key is running,
+                422 if the key was used for a different request
+        """
+        connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            if time.time() - self._purged_at > PURGE_INTERVAL_SECONDS:
+                self._purged_at = time.time()
+                cursor.execute(PURGE_SQL)
+                connection.commit()
+            for _ in range(2):
+                try:
+                    cursor.execute(CLAIM_SQL, key + (fingerprint, self.claim_seconds))
+                    connection.commit()
+                    return None
+                except pymysql.err.IntegrityError as e:
+                    connection.rollback()
+                    if e.args[0] != 1062:  # ER_DUP_ENTRY
+                        raise
+
+                cursor.execute(STORED_SQL, key)
+                row = cursor.fetchone()
+                if row is None or row['expired']:
+                    # Released, or left behind by a worker that died - take it over
+                    cursor.execute(EXPIRED_SQL, key)
+                    connection.commit()
+                    continue
+                if row['fingerprint'] != fingerprint:
+                    raise _key_reused()
+                if row['status'] == 'in_progress':
+                    raise _still_running()
+                return (
+                    row['response_status'],
+                    bytes(row['response_body'] or b''),
+                    row['response_media_type'],
+                    json.loads(row['response_headers'] or '{}')
+                )
+            raise _still_running()
+        finally:
+            connection.close()
+
+    def _complete(self, key: tuple, fingerprint: str, stored: tuple) -> None:
+        status_code, body, media_type, headers = stored
+        connection = self.connect()
+        try:
+            connection.cursor().execute(
+                COMPLETE_SQL,
+                (status_code, media_type, json.dumps(headers), body, self.ttl_seconds) + key + (fingerprint,)
+            )
+            connection.commit()
+        finally:
+            connection.close()
+
+    def _release(self, key: tuple) -> None:
+        connection = self.connect()
+        try:
+            connection.cursor().execute(RELEASE_SQL, key)
+            connection.commit()
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _replay(stored: tuple) -> Response:
+        status_code, body, media_type, headers = stored
+        return Response(
+            content=body,
+            status_code=status_code,
+            media_type=media_type,
+            headers={**headers, 'Idempotent-Replayed': 'true'}
+        )
+
+    async def execute(self, key: tuple, fingerprint: str, run: Callable[[], Awaitable[Response]]) -> Response:
+        """
+        Run the request once per key and replay the stored response for retries.
+
+        Responses with a status below 500 (including HTTPExceptions raised by
+        validation) are stored. Server errors are not, so the client can retry.
+
+        Raises:
+            HTTPException: 409 while the key is being run by another worker,
+                422 if the key was already used for a different request
+        """
+        while True:
+            self._purge_expired()
+
+            completed = self._completed.get(key)
+            if completed:
+                if completed[0] != fingerprint:
+                    raise _key_reused()
+                return self._replay(completed[2])
+
+            in_flight = self._in_flight.get(key)
+            if in_flight is None:
+                break
+            if in_flight[0] != fingerprint:
+                raise _key_reused()
+            # Wait for the first execution, then re-check: it either stored a
+            # response to replay or failed and left the key free to run again
+            await in_flight[1].wait()
+
+        done = asyncio.Event()
+        self._in_flight[key] = (fingerprint, done)
+        try:
+            if self.connect is not None:
+                stored = await asyncio.to_thread(self._claim, key, fingerprint)
+                if stored is not None:
+                    self._cache(key, fingerprint, stored)
+                    return self._replay(stored)
+
+            try:
+                try:
+                    response = await run()
+                except HTTPException as e:
+                    if e.status_code >= 500:
+                        raise
+                    response = JSONResponse(content={"detail": e.detail}, status_code=e.status_code,
+                                            headers=e.headers)
+            except BaseException:
+                if self.connect is not None:
+                    await asyncio.to_thread(self._release, key)
+                raise
+
+            if response.status_code >= 500:
+                if self.connect is not None:
+                    await asyncio.to_thread(self._release, key)
+                return response
+
+            stored = self._stored(response)
+            self._cache(key, fingerprint, stored)
+            if self.connect is not None:
+                try:
+                    await asyncio.to_thread(self._complete, key, fingerprint, stored)
+                except Exception as e:
+                    # The write has happened; the claim expires and this
+                    # worker still replays from memory
+                    print(f"⚠️ Idempotency response not stored: {e}")
+            return response
+        finally:
+            del self._in_flight[key]
+            done.set()
+
+def _key_reused() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail="Idempotency-Key has already been used for a different request"
+    )
+
+def _still_running() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="A request with this Idempotency-Key is still being processed",
+        headers={'Retry-After': '1'}
+    )
+
+def request_fingerprint(handler_name: str, params: dict) -> str:
+    """SHA-256 of the endpoint name and its path/body parameters"""
+    canonical = json.dumps(
+        {'handler': handler_name, 'params': jsonable_encoder(params)},
+        sort_keys=True,
+        separators=(',', ':')
+    )
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+# Shared instance used by the API
+idempotency_store = IdempotencyStore()
+
+def idempotent(handler):
+    """
+    Decorator for write endpoints. The endpoint must declare
+    `idempotency_key: Optional[str] = Header(None)` along with its usual
+    current_mat_id / current_user dependencies. Keys are scoped to the
+    calling user and endpoint, so two users can never collide.
+    """
+    @functools.wraps(handler)
+    async def wrapper(**kwargs):
+        idempotency_key = kwargs.get('idempotency_key')
+        if not idempotency_key:
+            return await handler(**kwargs)
+
+        if len(idempotency_key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Idempotency-Key must be at most {IDEMPOTENCY_KEY_MAX_LENGTH} characters"
+            )
+
+        current_user = kwargs.get('current_user')
+        key = (
+            kwargs.get('current_mat_id'),
+            getattr(current_user, 'user_id', None),
+            handler.__name__,
+            idempotency_key
+        )
+        params = {name: value for name, value in kwargs.items() if name not in _CALLER_PARAMS}
+        fingerprint = request_fingerprint(handler.__name__, params)
+
+        return await idempotency_store.execute(key, fingerprint, lambda: handler(**kwargs))
+
+    return wrapper
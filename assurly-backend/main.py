@@ -1,11 +1,15 @@
-from fastapi import FastAPI, HTTPException, Query, Depends, status, Request
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, Query, Depends, status, Request, Header
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse, RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel, EmailStr, validator
+from pydantic import BaseModel, EmailStr, ValidationError, validator
 from typing import List, Optional
+from contextlib import contextmanager
 import pymysql
 import os
+import asyncio
+import time
 from datetime import datetime, date
 from decimal import Decimal
 import uuid
@@ -30,7 +34,49 @@ from auth_utils import (
     clean_expired_tokens_query,
     get_token_expiry_minutes
 )
-from email_service import send_magic_link_email
+from email_service import send_magic_link_email, send_magic_link_emails
+from draft_buffer import draft_buffer, DRAFT_FLUSH_INTERVAL_SECONDS
+from idempotency import idempotency_store, idempotent
+from school_scores import (
+    assessment_term_id,
+    lock_assessment_rows_where,
+    ScoreDeltas,
+    fetch_cube_cells,
+    fetch_mat_term_ids,
+    rollup_cube_cells,
+    summarise_ratings
+)
+from dashboard_cache import dashboard_cache
+from term_calendar import term_calendar
+from catalogue_cache import catalogue_cache, bump_catalogue_version, as_naive_utc, STANDARD_COUNTS_JOIN
+from heatmap import encode_rating_grid, rag_level, RAG_LEVELS
+from version_diff import version_diff_cache
+from edit_log import edit_log_query, edit_log_page
+from user_directory import user_directory, bump_users_version
+from user_import import user_import_jobs, IMPORT_FORMATS, USER_IMPORT_MAX_BYTES
+from onboarding import onboarding_jobs, plan_catalogue_copy, CatalogueConflict
+from my_work import my_work_cache, load_my_work, read_my_work_token
+from evidence_storage import evidence_storage
+from evidence_upload import (
+    EvidenceUpload,
+    EvidenceTooLarge,
+    UnsupportedEvidenceType,
+    stream_upload,
+    multipart_boundary,
+    evidence_executor,
+    EVIDENCE_MAX_BYTES,
+    MULTIPART_OVERHEAD_BYTES
+)
+from assessment_export import (
+    export_jobs,
+    export_key,
+    export_query,
+    iter_export_batches,
+    csv_chunks,
+    available_formats,
+    EXPORT_FORMATS
+)
+from analytics_engine import analytics_engine, ANALYTICS_ENGINE
 
 # API Metadata and Documentation
 tags_metadata = [
@@ -171,6 +217,9 @@ app.add_middleware(
     max_age=3600,  # Cache preflight requests for 1 hour
 )
 
+# Compress larger JSON responses (heatmap grids, exports) for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 # Exception handler to ensure CORS headers are included in error responses
 # This fixes the issue where 401/403 errors don't include CORS headers
 @app.exception_handler(HTTPException)
@@ -217,7 +266,8 @@ DB_CONFIG = {
     'user': os.getenv('DB_USER'),
     'password': os.getenv('DB_PASSWORD'),
     'database': os.getenv('DB_NAME'),
-    'autocommit': True,
+    # Writes are grouped into explicit transactions via db_transaction()
+    'autocommit': False,
     'charset': 'utf8mb4',
     'cursorclass': pymysql.cursors.DictCursor
 }
@@ -245,6 +295,15 @@ class AssessmentCreateRequest(BaseModel):
     due_date: Optional[str] = None
     assigned_to: Optional[List[str]] = None
 
+class AssessmentExportRequest(BaseModel):
+    format: str = "csv"  # csv, parquet or arrow
+    term_id: Optional[str] = None
+    academic_year: Optional[str] = None
+
+class CatalogueOnboardingRequest(BaseModel):
+    aspect_codes: Optional[List[str]] = None  # whole aspects, with all their standards
+    standard_codes: Optional[List[str]] = None  # single standards, plus their aspects
+
 # ================================
 # ASPECT & STANDARD MODELS (MAT-Specific)
 # ================================
@@ -326,6 +385,21 @@ class StandardVersionResponse(BaseModel):
     created_by_user_id: Optional[str] = None
     change_reason: Optional[str] = None
 
+class StandardVersionAsOfResponse(StandardVersionResponse):
+    mat_standard_id: str
+
+class StandardVersionLookup(BaseModel):
+    mat_standard_id: str
+    at: datetime
+
+class StandardVersionLookupRequest(BaseModel):
+    lookups: List[StandardVersionLookup]
+
+class StandardVersionLookupResult(BaseModel):
+    mat_standard_id: str
+    at: datetime
+    version: Optional[StandardVersionResponse] = None  # None if no version was in force
+
 # User Aspect Assignment Models
 class UserAspectAssignmentCreate(BaseModel):
     mat_aspect_id: str
@@ -553,6 +627,435 @@ def process_row_for_json(row):
 def get_db_connection():
     return pymysql.connect(**DB_CONFIG)
 
+# Idempotency-Key claims and stored responses are shared by every worker
+idempotency_store.connect = get_db_connection
+
+# User import jobs and their state, readable from every worker
+user_import_jobs.connect = get_db_connection
+
+# Export jobs and their state, readable from every worker
+export_jobs.connect = get_db_connection
+
+# Onboarding jobs and their state, readable from every worker
+onboarding_jobs.connect = get_db_connection
+
+@contextmanager
+def db_transaction(connection):
+    """
+    Unit of work for write paths. Every statement executed on the connection
+    inside the block is committed once when the block exits cleanly, and rolled
+    back together if anything raises (including HTTPExceptions from validation).
+    """
+    try:
+        yield connection
+        connection.commit()
+    except Exception:
+        if connection.open:
+            connection.rollback()
+        raise
+
+# ================================
+# OPTIMISTIC CONCURRENCY (assessment writes)
+# ================================
+
+def parse_last_updated_precondition(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parse a last_updated precondition supplied via If-Match or a body field.
+    Accepts the format the API emits ("2025-01-15T10:30:00Z"), optionally quoted
+    as an ETag. Returns None when no precondition was supplied.
+    """
+    if value is None or value == "" or value == "*":
+        return None
+
+    token = value.strip()
+    if token.startswith("W/"):
+        token = token[2:]
+    token = token.strip('"')
+
+    try:
+        return datetime.strptime(token, '%Y-%m-%dT%H:%M:%SZ')
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid last_updated precondition '{value}'. Expected format YYYY-MM-DDTHH:MM:SSZ"
+        )
+
+def fetch_assessment_state(cursor, assessment_id: str, mat_id: str) -> Optional[dict]:
+    """Current server-side state of an assessment, returned with 409 responses"""
+    cursor.execute("""
+        SELECT a.assessment_id, a.rating, a.evidence_comments, a.status,
+               a.last_updated, a.updated_by, u.full_name as updated_by_name
+        FROM assessments a
+        JOIN schools s ON a.school_id = s.school_id
+        LEFT JOIN users u ON a.updated_by = u.user_id
+        WHERE a.assessment_id = %s AND s.mat_id = %s
+    """, (assessment_id, mat_id))
+    row = cursor.fetchone()
+    if not row:
+        return None
+
+    state = dict(row)
+    if isinstance(state['last_updated'], datetime):
+        state['last_updated'] = state['last_updated'].strftime('%Y-%m-%dT%H:%M:%SZ')
+    return state
+
+# ================================
+# DRAFT AUTOSAVE (write-coalescing buffer)
+# ================================
+
+def flush_assessment_drafts(mat_id: Optional[str] = None, user_id: Optional[str] = None) -> dict:
+    """
+    Write buffered drafts to the assessments table in one transaction - every
+    pending draft, or just one user's when mat_id and user_id are given.
+
+    Only the fields present in a draft are written. A draft based on a stale
+    last_updated is dropped and reported as a conflict instead of overwriting
+    someone else's save. A draft whose base has only been superseded by the
+    same user's own later writes (an earlier flush of their drafts - the form
+    keeps sending the token it loaded) is still written. If the transaction
+    fails the drafts are put back in the buffer for the next flush.
+    """
+    entries = draft_buffer.take(mat_id, user_id)
+    if not entries:
+        return {"flushed": 0, "conflicts": []}
+
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    written_at = datetime.utcnow().replace(microsecond=0)
+    flushed = 0
+    conflicts = []
+
+    try:
+        with db_transaction(connection):
+            written_terms = set()
+
+            for entry_mat_id, entry_user_id, assessment_id, draft in entries:
+                changes = draft['changes']
+                expected_last_updated = parse_last_updated_precondition(draft['base_last_updated'])
+
+                set_clauses = []
+                params = []
+                if 'rating' in changes:
+                    set_clauses.append("a.rating = %s")
+                    set_clauses.append("a.status = CASE WHEN %s IS NOT NULL THEN 'completed' ELSE 'in_progress' END")
+                    params.extend([changes['rating'], changes['rating']])
+                if 'evidence_comments' in changes:
+                    set_clauses.append("a.evidence_comments = %s")
+                    params.append(changes['evidence_comments'])
+
+                cursor.execute(f"""
+                    UPDATE assessments a
+                    JOIN schools s ON a.school_id = s.school_id
+                    SET {', '.join(set_clauses)},
+                        a.submitted_by = %s,
+                        a.last_updated = %s,
+                        a.updated_by = %s
+                    WHERE a.assessment_id = %s
+                      AND s.mat_id = %s
+                      AND (%s IS NULL OR a.last_updated = %s
+                           OR (a.updated_by = %s AND a.last_updated > %s))
+                """, params + [
+                    entry_user_id,
+                    written_at,
+                    entry_user_id,
+                    assessment_id,
+                    entry_mat_id,
+                    expected_last_updated,
+                    expected_last_updated,
+                    entry_user_id,
+                    expected_last_updated
+                ])
+
+                if cursor.rowcount:
+                    flushed += 1
+                    written_terms.add((entry_mat_id, assessment_term_id(assessment_id)))
+                elif expected_last_updated is not None:
+                    current_state = fetch_assessment_state(cursor, assessment_id, entry_mat_id)
+                    if current_state and \
+                            current_state['last_updated'] != expected_last_updated.strftime('%Y-%m-%dT%H:%M:%SZ'):
+                        conflicts.append(current_state)
+                        if mat_id is None:
+                            # Background flush - report on the user's next autosave call
+                            draft_buffer.add_conflict(entry_mat_id, entry_user_id, current_state)
+    except Exception:
+        draft_buffer.restore(entries)
+        raise
+    finally:
+        if connection.open:
+            connection.close()
+
+    draft_buffer.settle(entries)
+    dashboard_cache.invalidate(written_terms)
+    my_work_cache.invalidate(written_terms)
+
+    return {
+        "flushed": flushed,
+        "conflicts": conflicts,
+        "last_updated": written_at.strftime('%Y-%m-%dT%H:%M:%SZ')
+    }
+
+async def run_draft_flusher():
+    """Background task: flush all buffered drafts every DRAFT_FLUSH_INTERVAL_SECONDS"""
+    while True:
+        await asyncio.sleep(DRAFT_FLUSH_INTERVAL_SECONDS)
+        try:
+            await asyncio.to_thread(flush_assessment_drafts)
+        except Exception as e:
+            print(f"⚠️ Draft flush failed, will retry: {e}")
+
+# ================================
+# TERM CALENDAR
+# ================================
+
+def get_term_calendar():
+    """
+    The worker's term calendar, reloaded from the terms table when older than
+    TERM_CALENDAR_REFRESH_SECONDS. If a reload fails the previous calendar is
+    kept (terms are static reference data); the first load must succeed.
+    """
+    if term_calendar.is_stale():
+        try:
+            connection = get_db_connection()
+            try:
+                term_calendar.refresh(connection.cursor())
+            finally:
+                connection.close()
+        except Exception as e:
+            if not term_calendar.is_loaded():
+                raise
+            print(f"⚠️ Term calendar refresh failed, keeping previous calendar: {e}")
+    return term_calendar
+
+# ================================
+# STANDARD ARCHIVE (delete paths)
+# ================================
+
+def archive_standards(cursor, mat_id: str, standards: List[dict]) -> dict:
+    """
+    Deactivate standards with a fixed number of set-based statements, however
+    many there are. Run inside the caller's transaction. Each standard dict
+    needs mat_standard_id, standard_code and is_custom.
+
+    - Default standards: is_active = 0 (can be reinstated, IDs kept)
+    - Custom standards: the standard and every one of its versions get a
+      -deleted-<unix_timestamp> suffix, freeing the code for reuse. Rows that
+      reference them follow through ON UPDATE CASCADE foreign keys:
+      assessments and standard_edit_log (version_id and mat_standard_id),
+      standard_versions.mat_standard_id and standard_evidence.mat_standard_id.
+
+    Returns:
+        dict: mat_standard_id -> archived ID (None for default standards)
+    """
+    timestamp = int(time.time())
+    id_suffix = f"-deleted-{timestamp}"
+    code_suffix = str(timestamp)[-6:]
+
+    default_ids = [standard['mat_standard_id'] for standard in standards if not standard['is_custom']]
+    custom_ids = [standard['mat_standard_id'] for standard in standards if standard['is_custom']]
+
+    if default_ids:
+        cursor.execute(f"""
+            UPDATE mat_standards
+            SET is_active = 0, updated_at = NOW()
+            WHERE mat_id = %s AND mat_standard_id IN ({','.join(['%s'] * len(default_ids))})
+        """, [mat_id] + default_ids)
+
+    if custom_ids:
+        placeholders = ','.join(['%s'] * len(custom_ids))
+
+        # InnoDB won't cascade an update into the table being updated, so
+        # fk_versions_parent links between these versions are cleared first
+        cursor.execute(f"""
+            UPDATE standard_versions SET parent_version_id = NULL
+            WHERE mat_standard_id IN ({placeholders})
+        """, custom_ids)
+
+        cursor.execute(f"""
+            UPDATE standard_versions SET version_id = CONCAT(version_id, %s)
+            WHERE mat_standard_id IN ({placeholders})
+        """, [id_suffix] + custom_ids)
+
+        cursor.execute(f"""
+            UPDATE mat_standards
+            SET mat_standard_id = CONCAT(mat_standard_id, %s),
+                standard_code = CONCAT(standard_code, '-', %s),
+                current_version_id = NULL,
+                is_active = 0,
+                updated_at = NOW()
+            WHERE mat_id = %s AND mat_standard_id IN ({placeholders})
+        """, [id_suffix, code_suffix, mat_id] + custom_ids)
+
+    return {
+        standard['mat_standard_id']: f"{standard['mat_standard_id']}{id_suffix}" if standard['is_custom'] else None
+        for standard in standards
+    }
+
+# ================================
+# DASHBOARD QUERIES
+# ================================
+
+def fetch_previous_terms(cursor, mat_id: str, unique_term_id: str, term_count: int = 3) -> List[dict]:
+    """
+    The term_count terms before a term in the term calendar, skipping terms
+    the MAT has no rated assessments in.
+
+    Returns:
+        List[dict]: Term calendar rows, newest first
+    """
+    return get_term_calendar().previous(
+        unique_term_id, term_count, within=fetch_mat_term_ids(cursor, mat_id, rated_only=True)
+    )
+
+def fetch_previous_term_scores(cursor, mat_id: str, unique_term_id: str, term_count: int = 3,
+                               previous_terms: Optional[List[dict]] = None) -> dict:
+    """
+    Average rating per school for the term_count terms before a term.
+
+    The terms come from fetch_previous_terms() (pass previous_terms if already
+    fetched) and the averages are read from school_term_scores - one row per
+    school per term.
+
+    Returns:
+        dict: school_id -> [{term_id, academic_year, avg_score}], newest first
+    """
+    if previous_terms is None:
+        previous_terms = fetch_previous_terms(cursor, mat_id, unique_term_id, term_count)
+    previous_term_ids = [row['unique_term_id'] for row in previous_terms]
+    if not previous_term_ids:
+        return {}
+
+    placeholders = ','.join(['%s'] * len(previous_term_ids))
+    cursor.execute(f"""
+        SELECT school_id, unique_term_id, academic_year, avg_rating as avg_score
+        FROM school_term_scores
+        WHERE mat_id = %s
+          AND unique_term_id IN ({placeholders})
+          AND rated_count > 0
+    """, [mat_id] + previous_term_ids)
+
+    term_position = {unique_term_id: i for i, unique_term_id in enumerate(previous_term_ids)}
+    school_trends = {}
+    for row in sorted(cursor.fetchall(), key=lambda r: term_position[r['unique_term_id']]):
+        school_trends.setdefault(row['school_id'], []).append({
+            'term_id': row['unique_term_id'],
+            'academic_year': row['academic_year'],
+            'avg_score': float(row['avg_score']) if row['avg_score'] is not None else None
+        })
+    return school_trends
+
+def read_dashboard_revision(cursor, mat_id: str, term_ids) -> tuple:
+    """
+    Revision token for a MAT's score rows in the given terms. Any delta applied
+    to one of those rows (revision), a rebuild (last_updated, row count) or a
+    new school/term row (row count) changes it.
+    """
+    term_ids = sorted(term_ids)
+    placeholders = ','.join(['%s'] * len(term_ids))
+    cursor.execute(f"""
+        SELECT COUNT(*) as score_rows,
+               CAST(COALESCE(SUM(revision), 0) AS SIGNED) as revisions,
+               MAX(last_updated) as last_updated
+        FROM school_term_scores
+        WHERE mat_id = %s
+          AND unique_term_id IN ({placeholders})
+    """, [mat_id] + term_ids)
+    row = cursor.fetchone()
+    return (row['score_rows'], row['revisions'], row['last_updated'])
+
+def build_schools_dashboard(mat_id: str, selected_term: dict, term_count: int = 3) -> tuple:
+    """
+    Build the GET /api/dashboard/schools payload for a resolved term.
+
+    Runs on its own connection so the payload, the terms it depends on and the
+    revision token are all read from one snapshot (autocommit is off).
+
+    Returns:
+        tuple: (payload, depends_on, token) as dashboard_cache.compute() expects.
+        depends_on is every term whose scores could change the payload: the
+        selected term and all terms back to the earliest previous term shown
+        (all earlier terms if fewer than term_count were found, since a first
+        assessment in any of them would change which terms are shown).
+    """
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    try:
+        term_id = selected_term['unique_term_id']
+
+        # Current term stats per school from the materialised scores
+        # (intervention_count already follows standard_type polarity)
+        schools_query = """
+            SELECT
+                s.school_id,
+                s.school_name,
+                sc.avg_rating as current_score,
+                CASE
+                    WHEN COALESCE(sc.rated_count, 0) = 0 THEN 'not_started'
+                    WHEN sc.completed_count = sc.total_count THEN 'completed'
+                    ELSE 'in_progress'
+                END as status,
+                sc.intervention_count as intervention_required,
+                sc.rated_count as completed_standards,
+                sc.total_count as total_standards,
+                sc.last_updated
+            FROM schools s
+            LEFT JOIN school_term_scores sc
+                ON sc.school_id = s.school_id AND sc.unique_term_id = %s
+            WHERE s.mat_id = %s
+              AND s.is_active = TRUE
+              AND s.is_central_office = FALSE
+            ORDER BY s.school_name
+        """
+        cursor.execute(schools_query, (term_id, mat_id))
+        schools = cursor.fetchall()
+
+        previous_terms = fetch_previous_terms(cursor, mat_id, term_id, term_count)
+        school_trends = fetch_previous_term_scores(
+            cursor, mat_id, term_id, term_count, previous_terms=previous_terms
+        )
+
+        calendar = get_term_calendar()
+        if len(previous_terms) == term_count:
+            depends_on_terms = calendar.range(previous_terms[-1]['unique_term_id'], term_id)
+        else:
+            depends_on_terms = calendar.previous(term_id)
+        depends_on = {term['unique_term_id'] for term in depends_on_terms} | {term_id}
+        token = read_dashboard_revision(cursor, mat_id, depends_on)
+    finally:
+        connection.close()
+
+    # Build response
+    result = []
+    for school in schools:
+        school_id = school['school_id']
+
+        # Format last_updated
+        last_updated = None
+        if school['last_updated']:
+            if isinstance(school['last_updated'], datetime):
+                last_updated = school['last_updated'].strftime('%Y-%m-%dT%H:%M:%SZ')
+            else:
+                last_updated = str(school['last_updated'])
+
+        result.append({
+            'school_id': school_id,
+            'school_name': school['school_name'],
+            'current_term': term_id,
+            'status': school['status'],
+            'current_score': float(school['current_score']) if school['current_score'] is not None else None,
+            'previous_terms': school_trends.get(school_id, []),
+            'intervention_required': school['intervention_required'] or 0,
+            'completed_standards': school['completed_standards'] or 0,
+            'total_standards': school['total_standards'] or 0,
+            'completion_rate': f"{school['completed_standards'] or 0}/{school['total_standards'] or 0}",
+            'last_updated': last_updated
+        })
+
+    payload = {
+        'current_term': term_id,
+        'schools': result
+    }
+    return payload, depends_on, token
+
 # ================================
 # NEW AUTHENTICATION ENDPOINTS
 # ================================
@@ -598,7 +1101,8 @@ async def request_magic_link(request: MagicLinkRequest):
             SET magic_link_token = %s, token_expires_at = %s
             WHERE user_id = %s
         """
-        cursor.execute(update_query, (token, expires_at, user['user_id']))
+        with db_transaction(connection):
+            cursor.execute(update_query, (token, expires_at, user['user_id']))
         
         # Generate magic link URL
         magic_link_url = generate_magic_link_url(token, request.redirect_url)
@@ -665,7 +1169,8 @@ async def verify_magic_link(token: str):
                 SET magic_link_token = NULL, token_expires_at = NULL 
                 WHERE user_id = %s
             """
-            cursor.execute(cleanup_query, (user['user_id'],))
+            with db_transaction(connection):
+                cursor.execute(cleanup_query, (user['user_id'],))
             connection.close()
             
             raise HTTPException(
@@ -690,10 +1195,13 @@ async def verify_magic_link(token: str):
             SET last_login = NOW(), magic_link_token = NULL, token_expires_at = NULL
             WHERE user_id = %s
         """
-        cursor.execute(update_query, (user['user_id'],))
-        
-        # Clean up any other expired tokens
-        cursor.execute(clean_expired_tokens_query())
+        with db_transaction(connection):
+            cursor.execute(update_query, (user['user_id'],))
+            # last_login is listed by GET /api/users
+            bump_users_version(cursor, user['mat_id'])
+
+            # Clean up any other expired tokens
+            cursor.execute(clean_expired_tokens_query())
         
         connection.close()
         
@@ -735,8 +1243,9 @@ async def cleanup_expired_tokens():
         connection = get_db_connection()
         cursor = connection.cursor()
         
-        cursor.execute(clean_expired_tokens_query())
-        cleaned_count = cursor.rowcount
+        with db_transaction(connection):
+            cursor.execute(clean_expired_tokens_query())
+            cleaned_count = cursor.rowcount
         
         connection.close()
         
@@ -857,9 +1366,60 @@ async def get_assessments(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/assessments/my-work", tags=["Assessments"])
+async def get_my_work(
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(get_current_user),
+    school_id: Optional[str] = Query(None),
+    term_id: Optional[str] = Query(None)
+):
+    """
+    Outstanding assessments (not_started or in_progress) for the aspects and
+    schools the current user is assigned to, earliest due date first. Grouped
+    by school, aspect and term like GET /api/assessments, with the
+    outstanding standards of each group.
+
+    Cached per user (see my_work.py). A cached response is only served after a
+    one-row check confirms the user's assignments, the MAT's catalogue and its
+    assessment scores are unchanged.
+
+    Query Parameters:
+    - school_id: only this school
+    - term_id: only this term (unique_term_id, e.g. T2-2025-26)
+
+    Enforces MAT isolation. Requires authentication.
+    """
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor()
+
+        cached = my_work_cache.get(current_mat_id, current_user.user_id)
+        if cached and read_my_work_token(cursor, current_mat_id, current_user.user_id) == cached['token']:
+            items = cached['items']
+        else:
+            items, token = load_my_work(cursor, current_mat_id, current_user.user_id)
+            my_work_cache.put(current_mat_id, current_user.user_id, items, token)
+        connection.close()
+
+        items = [
+            item for item in items
+            if (not school_id or item['school_id'] == school_id)
+            and (not term_id or item['unique_term_id'] == term_id)
+        ]
+        return JSONResponse(content={
+            "user_id": current_user.user_id,
+            "total": len(items),
+            "assessments": items
+        }, status_code=200)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/assessments", tags=["Assessments"])
+@idempotent
 async def create_assessments(
     assessment_data: dict,
+    idempotency_key: Optional[str] = Header(None),
     current_mat_id: str = Depends(get_current_mat),
     current_user: UserResponse = Depends(get_current_user)
 ):
@@ -876,6 +1436,7 @@ async def create_assessments(
     }
 
     Enforces MAT isolation - can only create assessments for schools in user's MAT.
+    Send an Idempotency-Key header to make retries safe.
     Requires authentication.
     """
     try:
@@ -888,9 +1449,12 @@ async def create_assessments(
         due_date = assessment_data.get('due_date')
         assigned_to = assessment_data.get('assigned_to')
 
-        # Extract academic_year from unique_term_id
-        # T1-2024-25 -> 2024-25
-        academic_year = unique_term_id.split('-', 1)[1] if '-' in unique_term_id else None
+        # academic_year comes from the term calendar rather than parsing the id
+        term = get_term_calendar().get(unique_term_id)
+        if not term:
+            connection.close()
+            raise HTTPException(status_code=404, detail=f"Term not found: {unique_term_id}")
+        academic_year = term['academic_year']
 
         # MAT isolation: Verify all school_ids belong to user's MAT
         if school_ids:
@@ -912,7 +1476,7 @@ async def create_assessments(
 
         # Get all mat_standards for this aspect
         standards_query = """
-            SELECT ms.mat_standard_id, sv.version_id
+            SELECT ms.mat_standard_id, ms.standard_type, ms.mat_aspect_id, ma.aspect_category, sv.version_id
             FROM mat_standards ms
             JOIN mat_aspects ma ON ms.mat_aspect_id = ma.mat_aspect_id
             JOIN standard_versions sv ON ms.current_version_id = sv.version_id
@@ -930,59 +1494,67 @@ async def create_assessments(
                 detail=f"No standards found for aspect: {aspect_code}"
             )
 
-        # Create assessment for each (school, standard, term)
-        created_count = 0
-        created_assessment_ids = []
-
-        for school_id in school_ids:
-            for standard_row in standards:
-                mat_standard_id = standard_row['mat_standard_id']
-                version_id = standard_row['version_id']
-
-                # Check if assessment already exists
-                check_query = """
-                    SELECT assessment_id FROM assessments
-                    WHERE school_id = %s
-                      AND mat_standard_id = %s
-                      AND unique_term_id = %s
-                """
-                cursor.execute(check_query, (school_id, mat_standard_id, unique_term_id))
-                existing = cursor.fetchone()
-
-                if not existing:
-                    # Create new assessment
-                    insert_query = """
-                        INSERT INTO assessments
-                        (id, school_id, mat_standard_id, version_id,
-                         unique_term_id, academic_year, due_date,
-                         assigned_to, status, last_updated, updated_by)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'not_started', NOW(), %s)
+        with db_transaction(connection):
+            # Create assessment for each (school, standard, term)
+            created_count = 0
+            created_assessment_ids = []
+            created_at = datetime.utcnow().replace(microsecond=0)
+
+            for school_id in school_ids:
+                for standard_row in standards:
+                    mat_standard_id = standard_row['mat_standard_id']
+                    version_id = standard_row['version_id']
+
+                    # Check if assessment already exists
+                    check_query = """
+                        SELECT assessment_id FROM assessments
+                        WHERE school_id = %s
+                          AND mat_standard_id = %s
+                          AND unique_term_id = %s
                     """
-                    new_id = str(uuid.uuid4())
-                    cursor.execute(insert_query, (
-                        new_id,
-                        school_id,
-                        mat_standard_id,
-                        version_id,
-                        unique_term_id,
-                        academic_year,
-                        due_date,
-                        assigned_to or current_user.user_id,
-                        current_user.user_id
-                    ))
-                    created_count += 1
-
-                    # Get the generated assessment_id
                     cursor.execute(check_query, (school_id, mat_standard_id, unique_term_id))
-                    result = cursor.fetchone()
-                    if result:
-                        created_assessment_ids.append(result['assessment_id'])
-                elif existing and existing['assessment_id'] not in created_assessment_ids:
-                    # Already exists - add to list if from this aspect
-                    created_assessment_ids.append(existing['assessment_id'])
+                    existing = cursor.fetchone()
+
+                    if not existing:
+                        # Create new assessment
+                        insert_query = """
+                            INSERT INTO assessments
+                            (id, school_id, mat_standard_id, version_id,
+                             unique_term_id, academic_year, due_date,
+                             assigned_to, status, last_updated, updated_by)
+                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 'not_started', %s, %s)
+                        """
+                        new_id = str(uuid.uuid4())
+                        cursor.execute(insert_query, (
+                            new_id,
+                            school_id,
+                            mat_standard_id,
+                            version_id,
+                            unique_term_id,
+                            academic_year,
+                            due_date,
+                            assigned_to or current_user.user_id,
+                            created_at,
+                            current_user.user_id
+                        ))
+                        created_count += 1
+
+                        # Get the generated assessment_id
+                        cursor.execute(check_query, (school_id, mat_standard_id, unique_term_id))
+                        result = cursor.fetchone()
+                        if result:
+                            created_assessment_ids.append(result['assessment_id'])
+                    elif existing and existing['assessment_id'] not in created_assessment_ids:
+                        # Already exists - add to list if from this aspect
+                        created_assessment_ids.append(existing['assessment_id'])
+
+            # school_term_scores and the rating cube are updated by the
+            # assessment triggers (school_scores.TRIGGER_SQL)
+            written_terms = {(current_mat_id, unique_term_id)} if created_count else set()
 
-        connection.commit()
         connection.close()
+        dashboard_cache.invalidate(written_terms)
+        my_work_cache.invalidate(written_terms)
 
         return JSONResponse(content={
             "message": f"Created {created_count} assessments for {len(school_ids)} schools",
@@ -998,6 +1570,137 @@ async def create_assessments(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# Registered before /api/assessments/{assessment_id} so "autosave" is not
+# captured as an assessment_id
+@app.post("/api/assessments/autosave", tags=["Assessments"])
+async def autosave_assessment_drafts(
+    autosave_data: dict,
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Buffer draft edits from the assessment form without writing them immediately.
+
+    Request Body:
+    {
+        "edits": [
+            {
+                "assessment_id": "cedar-park-primary-ES1-T1-2024-25",
+                "rating": 3,
+                "evidence_comments": "Draft notes...",
+                "last_updated": "2024-11-02T09:15:00Z"
+            }
+        ]
+    }
+
+    Only the fields present in an edit are changed. Repeated edits to the same
+    assessment are coalesced and written in one batch every few seconds, or
+    straight away via POST /api/assessments/autosave/flush. last_updated is the
+    optional optimistic-concurrency token the draft is based on; the token the
+    form was loaded with stays valid across flushes of the user's own drafts.
+
+    Drafts are held by the worker that serves the request. Every worker
+    flushes its own drafts on the interval.
+
+    Enforces MAT isolation at flush time - drafts for assessments outside the
+    user's MAT are never written.
+    Requires authentication.
+    """
+    edits = autosave_data.get('edits', [])
+
+    for edit in edits:
+        if not edit.get('assessment_id'):
+            raise HTTPException(status_code=400, detail="Each edit requires an assessment_id")
+        rating = edit.get('rating')
+        if rating is not None and (not isinstance(rating, int) or isinstance(rating, bool) or not 1 <= rating <= 4):
+            raise HTTPException(status_code=400, detail="rating must be an integer between 1 and 4, or null")
+        if edit.get('evidence_comments') is not None and not isinstance(edit['evidence_comments'], str):
+            raise HTTPException(status_code=400, detail="evidence_comments must be a string or null")
+        parse_last_updated_precondition(edit.get('last_updated'))
+
+    await asyncio.to_thread(
+        draft_buffer.record_many,
+        current_mat_id,
+        current_user.user_id,
+        [
+            (
+                edit['assessment_id'],
+                {field: edit[field] for field in ('rating', 'evidence_comments') if field in edit},
+                edit.get('last_updated')
+            )
+            for edit in edits
+        ]
+    )
+
+    return JSONResponse(content={
+        "message": f"Buffered {len(edits)} draft edits",
+        "buffered": len(edits),
+        "pending": len(draft_buffer.pending(current_mat_id, current_user.user_id)),
+        "conflicts": draft_buffer.pop_conflicts(current_mat_id, current_user.user_id)
+    }, status_code=202)
+
+@app.get("/api/assessments/autosave", tags=["Assessments"])
+async def get_assessment_drafts(
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Get the current user's drafts that have not been written yet, so the form
+    can show them after a reload. Also returns any conflicts found by the
+    background flush since the last autosave call.
+
+    Only drafts held by the worker serving this request are returned; drafts
+    held by another worker are written by its own flush within the interval.
+    Requires authentication.
+    """
+    drafts = [
+        {
+            "assessment_id": assessment_id,
+            **draft['changes'],
+            "last_updated": draft['base_last_updated'],
+            "edited_at": datetime.utcfromtimestamp(draft['edited_at']).strftime('%Y-%m-%dT%H:%M:%SZ')
+        }
+        for assessment_id, draft in draft_buffer.pending(current_mat_id, current_user.user_id).items()
+    ]
+
+    return JSONResponse(content={
+        "drafts": drafts,
+        "conflicts": draft_buffer.pop_conflicts(current_mat_id, current_user.user_id)
+    }, status_code=200)
+
+@app.post("/api/assessments/autosave/flush", tags=["Assessments"])
+async def flush_assessment_drafts_now(
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Write the current user's buffered drafts immediately (e.g. when they press
+    Save or Submit on the assessment form).
+
+    Drafts whose last_updated no longer matches the server are not written and
+    are returned under "conflicts" with the current server state.
+
+    Only drafts held by the worker serving this request are written here;
+    drafts held by another worker are written by its own flush within
+    DRAFT_FLUSH_INTERVAL_SECONDS.
+    Requires authentication.
+    """
+    try:
+        result = await asyncio.to_thread(flush_assessment_drafts, current_mat_id, current_user.user_id)
+        conflicts = draft_buffer.pop_conflicts(current_mat_id, current_user.user_id) + result['conflicts']
+
+        return JSONResponse(content={
+            "message": f"Saved {result['flushed']} draft assessments",
+            "flushed": result['flushed'],
+            "conflicts": conflicts,
+            "last_updated": result.get('last_updated')
+        }, status_code=200)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/api/schools", tags=["Schools"])
 async def get_schools(
     include_central: bool = False,
@@ -1045,83 +1748,75 @@ async def get_schools(
 async def get_standards(
     aspect_code: Optional[str] = None,
     standard_type: Optional[str] = None,
+    aspect_category: Optional[str] = None,
     current_mat_id: str = Depends(get_current_mat),
     current_user: UserResponse = Depends(get_current_user)
 ):
     """
     Get list of MAT-specific standards with current versions.
-    Optionally filtered by aspect_code and/or standard_type ('assurance' or 'risk').
+    Optionally filtered by aspect_code, standard_type ('assurance' or 'risk')
+    and/or aspect_category ('ofsted' or 'operational').
+    Served from the MAT's cached catalogue.
     Requires authentication.
     """
     try:
         connection = get_db_connection()
         cursor = connection.cursor()
 
-        query = """
-            SELECT ms.mat_standard_id,
-                   ms.mat_id,
-                   ms.standard_code,
-                   ms.standard_name,
-                   ms.standard_description,
-                   ms.standard_type,
-                   ms.sort_order,
-                   ms.is_custom,
-                   ms.is_modified,
-                   ma.mat_aspect_id,
-                   ma.aspect_code,
-                   ma.aspect_name,
-                   sv.version_id as current_version_id,
-                   sv.version_number as current_version
-            FROM mat_standards ms
-            JOIN mat_aspects ma ON ms.mat_aspect_id = ma.mat_aspect_id
-            LEFT JOIN standard_versions sv ON ms.current_version_id = sv.version_id
-            WHERE ms.mat_id = %s AND ms.is_active = TRUE AND ma.is_active = TRUE
-        """
-        params = [current_mat_id]
+        catalogue = catalogue_cache.get(cursor, current_mat_id)
 
-        # Optional filtering by aspect_code
-        if aspect_code:
-            query += " AND ma.aspect_code = %s"
-            params.append(aspect_code)
+        connection.close()
+        return catalogue.list_standards(aspect_code, standard_type, aspect_category)
 
-        # Optional filtering by standard_type
-        if standard_type:
-            query += " AND ms.standard_type = %s"
-            params.append(standard_type)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch standards: {str(e)}")
 
-        query += " ORDER BY ma.sort_order, ms.sort_order"
+# Registered before /api/standards/{mat_standard_id} so "edit-log" is not
+# captured as a mat_standard_id
+@app.get("/api/standards/edit-log", tags=["Standards"])
+async def get_standard_edit_log(
+    mat_standard_id: Optional[str] = Query(None),
+    user_id: Optional[str] = Query(None, description="Only edits made by this user"),
+    action_type: Optional[str] = Query(None),
+    edited_from: Optional[datetime] = Query(None, description="Inclusive, e.g. 2026-01-01T00:00:00Z"),
+    edited_to: Optional[datetime] = Query(None, description="Exclusive"),
+    include_values: bool = Query(True, description="Include old_values / new_values"),
+    page_cursor: Optional[str] = Query(None, alias="cursor", description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=500),
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(verify_mat_admin)
+):
+    """
+    The MAT's standard edit log, newest first, a page at a time. Pass the
+    returned next_cursor to get the following page; it is null on the last.
+    Enforces MAT isolation.
+    Requires MAT Administrator role.
+    """
+    try:
+        try:
+            query, params = edit_log_query(
+                current_mat_id, limit, cursor=page_cursor, mat_standard_id=mat_standard_id, user_id=user_id,
+                action_type=action_type,
+                edited_from=as_naive_utc(edited_from) if edited_from else None,
+                edited_to=as_naive_utc(edited_to) if edited_to else None,
+                include_values=include_values
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
+        connection = get_db_connection()
+        cursor = connection.cursor()
         cursor.execute(query, params)
-        standards = cursor.fetchall()
-
-        # Map response to ensure version_number is properly set for Pydantic model
-        # and convert current_version to integer if it's a string
-        mapped_standards = []
-        for std in standards:
-            mapped_std = dict(std)
-            # Ensure version_number is set from current_version for Pydantic model compatibility
-            if 'current_version' in mapped_std and mapped_std['current_version'] is not None:
-                # Convert to int if it's a string or Decimal
-                version_val = mapped_std['current_version']
-                if isinstance(version_val, str):
-                    try:
-                        version_val = int(version_val)
-                    except (ValueError, TypeError):
-                        version_val = None
-                elif hasattr(version_val, '__int__'):
-                    version_val = int(version_val)
-                mapped_std['version_number'] = version_val
-                mapped_std['current_version'] = version_val  # Ensure it's an int
-            # Also set version_id from current_version_id for Pydantic model
-            if 'current_version_id' in mapped_std and mapped_std['current_version_id']:
-                mapped_std['version_id'] = mapped_std['current_version_id']
-            mapped_standards.append(mapped_std)
-
+        rows = cursor.fetchall()
         connection.close()
-        return mapped_standards
 
+        entries, next_cursor = edit_log_page(rows, limit)
+        return JSONResponse(content={"entries": entries, "next_cursor": next_cursor}, status_code=200)
+
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to fetch standards: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch edit log: {str(e)}")
 
 @app.get("/api/standards/{mat_standard_id}", tags=["Standards"])
 async def get_standard(
@@ -1139,58 +1834,14 @@ async def get_standard(
         connection = get_db_connection()
         cursor = connection.cursor()
 
-        # Get main standard info
-        standard_query = """
-            SELECT
-                ms.mat_standard_id,
-                ms.standard_code,
-                ms.standard_name,
-                ms.standard_description,
-                ms.standard_type,
-                ms.sort_order,
-                ms.is_custom,
-                ms.is_modified,
-                ms.current_version_id,
-                ma.mat_aspect_id,
-                ma.aspect_code,
-                ma.aspect_name,
-                ms.created_at,
-                ms.updated_at
-            FROM mat_standards ms
-            JOIN mat_aspects ma ON ms.mat_aspect_id = ma.mat_aspect_id
-            WHERE ms.mat_standard_id = %s
-              AND ms.mat_id = %s
-        """
-
-        cursor.execute(standard_query, (mat_standard_id, current_mat_id))
-        standard = cursor.fetchone()
+        catalogue = catalogue_cache.get(cursor, current_mat_id)
+        standard = catalogue.get_standard(mat_standard_id)
 
         if not standard:
             connection.close()
             raise HTTPException(status_code=404, detail="Standard not found or access denied")
 
-        # Get version history
-        versions_query = """
-            SELECT
-                version_id,
-                version_number,
-                standard_code,
-                standard_name,
-                standard_description,
-                standard_type,
-                effective_from,
-                effective_to,
-                change_reason,
-                created_by_user_id,
-                u.full_name as created_by_name
-            FROM standard_versions sv
-            LEFT JOIN users u ON sv.created_by_user_id = u.user_id
-            WHERE mat_standard_id = %s
-            ORDER BY version_number DESC
-        """
-
-        cursor.execute(versions_query, (mat_standard_id,))
-        versions = cursor.fetchall()
+        versions = catalogue.versions(cursor, mat_standard_id)
 
         # Process versions
         version_history = []
@@ -1246,116 +1897,58 @@ async def get_schools_dashboard(
     current_user: UserResponse = Depends(get_current_user),
     term_id: Optional[str] = Query(None)
 ):
+    """
+    Per-school summary for the selected term, with up to 3 previous terms of
+    average scores for trend display.
+
+    Terms are ordered by the term calendar (terms.start_date) and scores come
+    from school_term_scores, so the work done is a handful of indexed rows per
+    school however many years of history the MAT has.
+
+    Responses are cached per MAT and term (see dashboard_cache.py). A cached
+    response is only served after a one-row revision check confirms none of
+    the score rows it was built from have changed.
+
+    Query Parameters:
+    - term_id: unique_term_id, e.g. T2-2025-26 (default: most recent term with assessments)
+
+    Enforces MAT isolation. Requires authentication.
+    """
     try:
         connection = get_db_connection()
         cursor = connection.cursor()
 
-        # If no term specified, get the most recent term
+        # If no term specified, get the most recent term with assessment data
+        calendar = get_term_calendar()
         if not term_id:
-            cursor.execute("""
-                SELECT a.unique_term_id
-                FROM assessments a
-                JOIN schools s ON a.school_id = s.school_id
-                WHERE s.mat_id = %s
-                ORDER BY a.academic_year DESC, 
-                    FIELD(SUBSTRING(a.unique_term_id, 1, 2), 'T3', 'T2', 'T1') DESC
-                LIMIT 1
-            """, (current_mat_id,))
-            row = cursor.fetchone()
-            if row:
-                term_id = row['unique_term_id']
-            else:
-                connection.close()
-                return JSONResponse(content={'current_term': None, 'schools': []}, status_code=200)
-
-        # Parse the selected term to determine chronological position
-        # term_id format: "T2-2025-26" -> term_num=2, academic_year="2025-26"
-        term_parts = term_id.split('-', 1)
-        selected_term_num = int(term_parts[0][1])  # "T2" -> 2
-        selected_academic_year = term_parts[1]      # "2025-26"
-
-        # Main query for current term stats (unchanged)
-        # ... [keep existing current term query] ...
-
-        # FIXED: Get previous 3 terms BEFORE the selected term
-        # Terms are "before" if:
-        #   1. Same academic year but lower term number (T1 < T2 < T3)
-        #   2. Earlier academic year
-        previous_terms_query = """
-            SELECT 
-                a.school_id,
-                a.unique_term_id,
-                a.academic_year,
-                ROUND(AVG(a.rating), 2) as avg_score
-            FROM assessments a
-            JOIN schools s ON a.school_id = s.school_id
-            WHERE s.mat_id = %s
-                AND a.rating IS NOT NULL
-                AND (
-                    -- Earlier academic year (any term)
-                    a.academic_year < %s
-                    OR
-                    -- Same academic year but earlier term
-                    (a.academic_year = %s AND CAST(SUBSTRING(a.unique_term_id, 2, 1) AS UNSIGNED) < %s)
-                )
-            GROUP BY a.school_id, a.unique_term_id, a.academic_year
-            ORDER BY a.academic_year DESC, 
-                FIELD(SUBSTRING(a.unique_term_id, 1, 2), 'T3', 'T2', 'T1') DESC
-        """
-        cursor.execute(previous_terms_query, (
-            current_mat_id, 
-            selected_academic_year,
-            selected_academic_year,
-            selected_term_num
-        ))
-        previous_data = cursor.fetchall()
-
-        # Organize previous terms by school (limit to 3 most recent per school)
-        school_trends = {}
-        for row in previous_data:
-            school_id = row['school_id']
-            if school_id not in school_trends:
-                school_trends[school_id] = []
-            if len(school_trends[school_id]) < 3:
-                school_trends[school_id].append({
-                    'term_id': row['unique_term_id'],
-                    'academic_year': row['academic_year'],
-                    'avg_score': float(row['avg_score']) if row['avg_score'] else None
-                })
-
-        # Build response
-        result = []
-        for school in schools:
-            school_id = school['school_id']
-            
-            # Format last_updated
-            last_updated = None
-            if school['last_updated']:
-                if isinstance(school['last_updated'], datetime):
-                    last_updated = school['last_updated'].strftime('%Y-%m-%dT%H:%M:%SZ')
-                else:
-                    last_updated = str(school['last_updated'])
-
-            result.append({
-                'school_id': school_id,
-                'school_name': school['school_name'],
-                'current_term': term_id,
-                'status': school['status'],
-                'current_score': float(school['current_score']) if school['current_score'] else None,
-                'previous_terms': school_trends.get(school_id, []),
-                'intervention_required': school['intervention_required'] or 0,
-                'completed_standards': school['completed_standards'] or 0,
-                'total_standards': school['total_standards'] or 0,
-                'completion_rate': f"{school['completed_standards'] or 0}/{school['total_standards'] or 0}",
-                'last_updated': last_updated
-            })
+            selected_term = calendar.latest(fetch_mat_term_ids(cursor, current_mat_id))
+        else:
+            selected_term = calendar.get(term_id)
 
+        if not selected_term:
+            connection.close()
+            if term_id:
+                raise HTTPException(status_code=404, detail=f"Term not found: {term_id}")
+            return JSONResponse(content={'current_term': None, 'schools': []}, status_code=200)
+        term_id = selected_term['unique_term_id']
+
+        # Serve from the cache only while no score row the payload was built
+        # from has changed - including writes made through another worker
+        cached = dashboard_cache.get(current_mat_id, term_id)
+        if cached and read_dashboard_revision(cursor, current_mat_id, cached['depends_on']) == cached['token']:
+            connection.close()
+            return JSONResponse(content=cached['payload'], status_code=200)
         connection.close()
-        return JSONResponse(content={
-            'current_term': term_id,
-            'schools': result
-        }, status_code=200)
 
+        payload = await dashboard_cache.compute(
+            current_mat_id,
+            term_id,
+            lambda: asyncio.to_thread(build_schools_dashboard, current_mat_id, selected_term)
+        )
+        return JSONResponse(content=payload, status_code=200)
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1402,54 +1995,55 @@ async def create_standard(
         mat_standard_id = f"{current_mat_id}-{standard.standard_code}"
         version_id = f"{mat_standard_id}-v1"
 
-        # STEP 1: Insert mat_standard record WITHOUT current_version_id
-        insert_standard_query = """
-            INSERT INTO mat_standards
-            (mat_standard_id, mat_id, mat_aspect_id, standard_code, standard_name,
-             standard_description, standard_type, sort_order, source_standard_id, current_version_id,
-             is_custom, is_modified, is_active, created_at, updated_at)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, NULL, 1, 0, 1, NOW(), NOW())
-        """
-        cursor.execute(insert_standard_query, (
-            mat_standard_id,
-            current_mat_id,
-            standard.mat_aspect_id,
-            standard.standard_code,
-            standard.standard_name,
-            standard.standard_description,
-            standard.standard_type,
-            standard.sort_order,
-            standard.source_standard_id
-        ))
-
-        # STEP 2: Insert version 1
-        insert_version_query = """
-            INSERT INTO standard_versions
-            (version_id, mat_standard_id, version_number, standard_code,
-             standard_name, standard_description, standard_type, effective_from, effective_to,
-             created_by_user_id, change_reason, created_at)
-            VALUES (%s, %s, 1, %s, %s, %s, %s, NOW(), NULL, %s, 'Initial version', NOW())
-        """
-        cursor.execute(insert_version_query, (
-            version_id,
-            mat_standard_id,
-            standard.standard_code,
-            standard.standard_name,
-            standard.standard_description,
-            standard.standard_type,
-            current_user.user_id
-        ))
-
-        # STEP 3: Update mat_standards to set current_version_id
-        update_version_query = """
-            UPDATE mat_standards
-            SET current_version_id = %s
-            WHERE mat_standard_id = %s
-        """
-        cursor.execute(update_version_query, (version_id, mat_standard_id))
+        with db_transaction(connection):
+            # STEP 1: Insert mat_standard record WITHOUT current_version_id
+            insert_standard_query = """
+                INSERT INTO mat_standards
+                (mat_standard_id, mat_id, mat_aspect_id, standard_code, standard_name,
+                 standard_description, standard_type, sort_order, source_standard_id, current_version_id,
+                 is_custom, is_modified, is_active, created_at, updated_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, NULL, 1, 0, 1, NOW(), NOW())
+            """
+            cursor.execute(insert_standard_query, (
+                mat_standard_id,
+                current_mat_id,
+                standard.mat_aspect_id,
+                standard.standard_code,
+                standard.standard_name,
+                standard.standard_description,
+                standard.standard_type,
+                standard.sort_order,
+                standard.source_standard_id
+            ))
+
+            # STEP 2: Insert version 1
+            insert_version_query = """
+                INSERT INTO standard_versions
+                (version_id, mat_standard_id, version_number, standard_code,
+                 standard_name, standard_description, standard_type, effective_from, effective_to,
+                 created_by_user_id, change_reason, created_at)
+                VALUES (%s, %s, 1, %s, %s, %s, %s, NOW(), NULL, %s, 'Initial version', NOW())
+            """
+            cursor.execute(insert_version_query, (
+                version_id,
+                mat_standard_id,
+                standard.standard_code,
+                standard.standard_name,
+                standard.standard_description,
+                standard.standard_type,
+                current_user.user_id
+            ))
+
+            # STEP 3: Update mat_standards to set current_version_id
+            update_version_query = """
+                UPDATE mat_standards
+                SET current_version_id = %s
+                WHERE mat_standard_id = %s
+            """
+            cursor.execute(update_version_query, (version_id, mat_standard_id))
+
+            bump_catalogue_version(cursor, current_mat_id)
 
-        # COMMIT THE TRANSACTION
-        connection.commit()
 
         # Fetch the created standard with current version
         select_query = """
@@ -1541,55 +2135,70 @@ async def update_standard(
         new_type = update_data.get('standard_type', old_type)
         change_reason = update_data.get('change_reason', '')
 
-        # Get MAX version number from ALL versions (not just current)
-        cursor.execute("""
-            SELECT COALESCE(MAX(version_number), 0) as max_version
-            FROM standard_versions
-            WHERE mat_standard_id = %s
-        """, (mat_standard_id,))
-        max_version_row = cursor.fetchone()
-        new_version_num = max_version_row['max_version'] + 1
-        new_version_id = f"{mat_standard_id}-v{new_version_num}"
+        with db_transaction(connection):
+            # Get MAX version number from ALL versions (not just current)
+            cursor.execute("""
+                SELECT COALESCE(MAX(version_number), 0) as max_version
+                FROM standard_versions
+                WHERE mat_standard_id = %s
+            """, (mat_standard_id,))
+            max_version_row = cursor.fetchone()
+            new_version_num = max_version_row['max_version'] + 1
+            new_version_id = f"{mat_standard_id}-v{new_version_num}"
+
+            # Close old version if it exists
+            if old_version_id:
+                cursor.execute("""
+                    UPDATE standard_versions SET effective_to = NOW() WHERE version_id = %s
+                """, (old_version_id,))
 
-        # Close old version if it exists
-        if old_version_id:
+            # Create new version
+            cursor.execute("""
+                INSERT INTO standard_versions
+                (version_id, mat_standard_id, version_number, standard_code, standard_name,
+                 standard_description, standard_type, parent_version_id, effective_from, created_at,
+                 created_by_user_id, change_reason)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW(), %s, %s)
+            """, (new_version_id, mat_standard_id, new_version_num, standard_code,
+                  new_name, new_description, new_type, old_version_id, current_user.user_id, change_reason))
+
+            # A standard_type change flips intervention polarity and moves the
+            # standard's assessments to other rating cube cells
+            written_terms = set()
+            if new_type != old_type:
+                score_deltas = ScoreDeltas()
+                for old_row in lock_assessment_rows_where(
+                    cursor, "a.mat_standard_id = %s", [mat_standard_id], current_mat_id
+                ).values():
+                    score_deltas.replace(old_row, standard_type=new_type)
+                written_terms = score_deltas.apply(cursor)
+
+            # Update mat_standards
             cursor.execute("""
-                UPDATE standard_versions SET effective_to = NOW() WHERE version_id = %s
-            """, (old_version_id,))
+                UPDATE mat_standards
+                SET standard_name = %s, standard_description = %s, standard_type = %s,
+                    current_version_id = %s, is_modified = TRUE, updated_at = NOW()
+                WHERE mat_standard_id = %s AND mat_id = %s
+            """, (new_name, new_description, new_type, new_version_id, mat_standard_id, current_mat_id))
 
-        # Create new version
-        cursor.execute("""
-            INSERT INTO standard_versions
-            (version_id, mat_standard_id, version_number, standard_code, standard_name,
-             standard_description, standard_type, parent_version_id, effective_from, created_at,
-             created_by_user_id, change_reason)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW(), %s, %s)
-        """, (new_version_id, mat_standard_id, new_version_num, standard_code,
-              new_name, new_description, new_type, old_version_id, current_user.user_id, change_reason))
-
-        # Update mat_standards
-        cursor.execute("""
-            UPDATE mat_standards
-            SET standard_name = %s, standard_description = %s, standard_type = %s,
-                current_version_id = %s, is_modified = TRUE, updated_at = NOW()
-            WHERE mat_standard_id = %s AND mat_id = %s
-        """, (new_name, new_description, new_type, new_version_id, mat_standard_id, current_mat_id))
+            # Log edit (store old/new as JSON)
+            import json
+            log_id = str(uuid.uuid4())
+            cursor.execute("""
+                INSERT INTO standard_edit_log
+                (log_id, mat_id, mat_standard_id, version_id, action_type, edited_by_user_id,
+                 edited_at, old_values, new_values, change_reason)
+                VALUES (%s, %s, %s, %s, 'edited', %s, NOW(), %s, %s, %s)
+            """, (log_id, current_mat_id, mat_standard_id, new_version_id, current_user.user_id,
+                  json.dumps({"version_id": old_version_id}),
+                  json.dumps({"version_id": new_version_id, "name": new_name}),
+                  change_reason))
 
-        # Log edit (store old/new as JSON)
-        import json
-        log_id = str(uuid.uuid4())
-        cursor.execute("""
-            INSERT INTO standard_edit_log
-            (log_id, mat_standard_id, version_id, action_type, edited_by_user_id,
-             edited_at, old_values, new_values, change_reason)
-            VALUES (%s, %s, %s, 'edited', %s, NOW(), %s, %s, %s)
-        """, (log_id, mat_standard_id, new_version_id, current_user.user_id,
-              json.dumps({"version_id": old_version_id}),
-              json.dumps({"version_id": new_version_id, "name": new_name}),
-              change_reason))
+            bump_catalogue_version(cursor, current_mat_id)
 
-        connection.commit()
         connection.close()
+        dashboard_cache.invalidate(written_terms)
+        my_work_cache.invalidate(written_terms)
 
         return JSONResponse(content={
             "message": "Standard updated successfully",
@@ -1607,6 +2216,183 @@ async def update_standard(
             connection.close()
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/standards/bulk-update", tags=["Standards"])
+async def bulk_update_standards(
+    bulk_data: dict,
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Update many standards' definitions in one transaction. Each edit creates a
+    new version exactly as PUT /api/standards/{mat_standard_id} does.
+
+    Request Body:
+    {
+        "updates": [
+            {
+                "mat_standard_id": "HLT-AC1",
+                "standard_name": "Attendance & Compliance",
+                "standard_description": "...",
+                "standard_type": "assurance",
+                "change_reason": "Annual review"
+            }
+        ]
+    }
+
+    Fields left out keep their current values. The current versions and
+    highest version numbers of all the standards are read in one query, and
+    each write step (close old versions, insert new versions, update
+    mat_standards, log edits) is a single multi-row statement. If any standard
+    is missing or inactive nothing is written.
+
+    Enforces MAT isolation.
+    Requires authentication.
+    """
+    try:
+        updates = bulk_data.get('updates', [])
+        if not updates:
+            raise HTTPException(status_code=400, detail="No updates provided")
+
+        standard_ids = [update.get('mat_standard_id') for update in updates]
+        if not all(standard_ids):
+            raise HTTPException(status_code=400, detail="Each update requires a mat_standard_id")
+        if len(set(standard_ids)) != len(standard_ids):
+            raise HTTPException(status_code=400, detail="Each standard may appear only once per bulk update")
+
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        placeholders = ','.join(['%s'] * len(standard_ids))
+
+        with db_transaction(connection):
+            # Current definitions and MAX version number (from ALL versions) in one read
+            cursor.execute(f"""
+                SELECT ms.mat_standard_id, ms.current_version_id, ms.standard_code,
+                       ms.standard_name, ms.standard_description, ms.standard_type, ms.is_active,
+                       COALESCE(MAX(sv.version_number), 0) as max_version
+                FROM mat_standards ms
+                LEFT JOIN standard_versions sv ON sv.mat_standard_id = ms.mat_standard_id
+                WHERE ms.mat_id = %s AND ms.mat_standard_id IN ({placeholders})
+                GROUP BY ms.mat_standard_id, ms.current_version_id, ms.standard_code,
+                         ms.standard_name, ms.standard_description, ms.standard_type, ms.is_active
+                FOR UPDATE OF ms
+            """, [current_mat_id] + standard_ids)
+            current = {row['mat_standard_id']: row for row in cursor.fetchall()}
+
+            missing = [standard_id for standard_id in standard_ids if standard_id not in current]
+            if missing:
+                connection.close()
+                raise HTTPException(status_code=404, detail=f"Standards not found: {', '.join(missing)}")
+            inactive = [standard_id for standard_id in standard_ids if not current[standard_id]['is_active']]
+            if inactive:
+                connection.close()
+                raise HTTPException(status_code=400, detail=f"Cannot update inactive standards: {', '.join(inactive)}")
+
+            edits = []
+            for update in updates:
+                old = current[update['mat_standard_id']]
+                new_version_num = int(old['max_version']) + 1
+                edits.append({
+                    'mat_standard_id': old['mat_standard_id'],
+                    'standard_code': old['standard_code'],
+                    'old_version_id': old['current_version_id'],
+                    'old_type': old['standard_type'],
+                    'new_version_id': f"{old['mat_standard_id']}-v{new_version_num}",
+                    'new_version_num': new_version_num,
+                    'new_name': update.get('standard_name', old['standard_name']),
+                    'new_description': update.get('standard_description', old['standard_description']),
+                    'new_type': update.get('standard_type', old['standard_type']),
+                    'change_reason': update.get('change_reason', '')
+                })
+
+            # Close old versions
+            old_version_ids = [edit['old_version_id'] for edit in edits if edit['old_version_id']]
+            if old_version_ids:
+                cursor.execute(f"""
+                    UPDATE standard_versions SET effective_to = NOW()
+                    WHERE version_id IN ({','.join(['%s'] * len(old_version_ids))})
+                """, old_version_ids)
+
+            # Create new versions
+            version_params = []
+            for edit in edits:
+                version_params += [edit['new_version_id'], edit['mat_standard_id'], edit['new_version_num'],
+                                   edit['standard_code'], edit['new_name'], edit['new_description'],
+                                   edit['new_type'], edit['old_version_id'], current_user.user_id,
+                                   edit['change_reason']]
+            cursor.execute(f"""
+                INSERT INTO standard_versions
+                (version_id, mat_standard_id, version_number, standard_code, standard_name,
+                 standard_description, standard_type, parent_version_id, effective_from, created_at,
+                 created_by_user_id, change_reason)
+                VALUES {', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s, NOW(), NOW(), %s, %s)'] * len(edits))}
+            """, version_params)
+
+            # A standard_type change flips intervention polarity and moves the
+            # standards' assessments to other rating cube cells
+            written_terms = set()
+            new_types = {edit['mat_standard_id']: edit['new_type'] for edit in edits if edit['new_type'] != edit['old_type']}
+            if new_types:
+                score_deltas = ScoreDeltas()
+                for old_row in lock_assessment_rows_where(
+                    cursor, f"a.mat_standard_id IN ({','.join(['%s'] * len(new_types))})",
+                    list(new_types), current_mat_id
+                ).values():
+                    score_deltas.replace(old_row, standard_type=new_types[old_row['mat_standard_id']])
+                written_terms = score_deltas.apply(cursor)
+
+            # Update mat_standards, one CASE per column
+            set_clauses, update_params = [], []
+            for column, key in (('standard_name', 'new_name'), ('standard_description', 'new_description'),
+                                ('standard_type', 'new_type'), ('current_version_id', 'new_version_id')):
+                set_clauses.append(f"{column} = CASE mat_standard_id {' '.join(['WHEN %s THEN %s'] * len(edits))} END")
+                for edit in edits:
+                    update_params += [edit['mat_standard_id'], edit[key]]
+            cursor.execute(f"""
+                UPDATE mat_standards
+                SET {', '.join(set_clauses)}, is_modified = TRUE, updated_at = NOW()
+                WHERE mat_id = %s AND mat_standard_id IN ({placeholders})
+            """, update_params + [current_mat_id] + standard_ids)
+
+            # Log edits (store old/new as JSON)
+            import json
+            log_params = []
+            for edit in edits:
+                log_params += [str(uuid.uuid4()), current_mat_id, edit['mat_standard_id'], edit['new_version_id'], current_user.user_id,
+                               json.dumps({"version_id": edit['old_version_id']}),
+                               json.dumps({"version_id": edit['new_version_id'], "name": edit['new_name']}),
+                               edit['change_reason']]
+            cursor.execute(f"""
+                INSERT INTO standard_edit_log
+                (log_id, mat_id, mat_standard_id, version_id, action_type, edited_by_user_id,
+                 edited_at, old_values, new_values, change_reason)
+                VALUES {', '.join(["(%s, %s, %s, %s, 'edited', %s, NOW(), %s, %s, %s)"] * len(edits))}
+            """, log_params)
+
+            bump_catalogue_version(cursor, current_mat_id)
+
+        connection.close()
+        dashboard_cache.invalidate(written_terms)
+        my_work_cache.invalidate(written_terms)
+
+        return JSONResponse(content={
+            "message": f"Updated {len(edits)} standards",
+            "updated_count": len(edits),
+            "standards": [
+                {
+                    "mat_standard_id": edit['mat_standard_id'],
+                    "new_version_id": edit['new_version_id'],
+                    "version_number": edit['new_version_num'],
+                    "previous_version_id": edit['old_version_id']
+                }
+                for edit in edits
+            ]
+        }, status_code=200)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.delete("/api/standards/{mat_standard_id}", tags=["Standards"])
 async def delete_standard(
     mat_standard_id: str,
@@ -1636,69 +2422,13 @@ async def delete_standard(
             raise HTTPException(status_code=404, detail="Standard not found")
 
         is_custom = row['is_custom']
-        original_code = row['standard_code']
-
-        if is_custom:
-            # CUSTOM STANDARD: Rename IDs to free them up (existing logic)
-            import time
-            timestamp = int(time.time())
-            short_suffix = str(timestamp)[-6:]
-            deleted_id = f"{mat_standard_id}-deleted-{timestamp}"
-            deleted_code = f"{original_code}-{short_suffix}"
-
-            # Clear current_version_id first
-            cursor.execute("""
-                UPDATE mat_standards SET current_version_id = NULL
-                WHERE mat_standard_id = %s
-            """, (mat_standard_id,))
-
-            # Clear parent_version_id references
-            cursor.execute("""
-                UPDATE standard_versions SET parent_version_id = NULL
-                WHERE mat_standard_id = %s
-            """, (mat_standard_id,))
-
-            # Rename all version_ids
-            cursor.execute("""
-                SELECT version_id FROM standard_versions
-                WHERE mat_standard_id = %s
-            """, (mat_standard_id,))
-            versions = cursor.fetchall()
-
-            for version in versions:
-                old_version_id = version['version_id']
-                new_version_id = f"{old_version_id}-deleted-{timestamp}"
-                cursor.execute("""
-                    UPDATE standard_versions SET version_id = %s
-                    WHERE version_id = %s
-                """, (new_version_id, old_version_id))
 
-            # Rename and deactivate mat_standard
-            cursor.execute("""
-                UPDATE mat_standards
-                SET mat_standard_id = %s,
-                    standard_code = %s,
-                    is_active = 0,
-                    updated_at = NOW()
-                WHERE mat_standard_id = %s AND mat_id = %s
-            """, (deleted_id, deleted_code, mat_standard_id, current_mat_id))
-
-            result_message = "Custom standard archived"
-            archived_as = deleted_id
-
-        else:
-            # DEFAULT STANDARD: Simply deactivate (keep IDs intact for reinstatement)
-            cursor.execute("""
-                UPDATE mat_standards
-                SET is_active = 0,
-                    updated_at = NOW()
-                WHERE mat_standard_id = %s AND mat_id = %s
-            """, (mat_standard_id, current_mat_id))
+        with db_transaction(connection):
+            archived_as = archive_standards(cursor, current_mat_id, [row])[mat_standard_id]
+            result_message = "Custom standard archived" if is_custom else "Default standard deactivated"
 
-            result_message = "Default standard deactivated"
-            archived_as = None
+            bump_catalogue_version(cursor, current_mat_id)
 
-        connection.commit()
         connection.close()
 
         return JSONResponse(content={
@@ -1717,6 +2447,78 @@ async def delete_standard(
             connection.close()
         raise HTTPException(status_code=500, detail=f"Failed to delete standard: {str(e)}")
 
+@app.post("/api/standards/bulk-delete", tags=["Standards"])
+async def bulk_delete_standards(
+    bulk_data: dict,
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Delete (deactivate) many standards in one transaction, as
+    DELETE /api/standards/{mat_standard_id} does for one.
+
+    Request Body:
+    {
+        "mat_standard_ids": ["HLT-AC1", "HLT-CUSTOM1"]
+    }
+
+    All-or-nothing: if any standard is missing or already inactive nothing is
+    written.
+
+    Enforces MAT isolation.
+    Requires authentication.
+    """
+    try:
+        standard_ids = bulk_data.get('mat_standard_ids', [])
+        if not standard_ids:
+            raise HTTPException(status_code=400, detail="No mat_standard_ids provided")
+        if len(set(standard_ids)) != len(standard_ids):
+            raise HTTPException(status_code=400, detail="Each standard may appear only once per bulk delete")
+
+        connection = get_db_connection()
+        cursor = connection.cursor()
+
+        with db_transaction(connection):
+            cursor.execute(f"""
+                SELECT mat_standard_id, standard_code, is_custom
+                FROM mat_standards
+                WHERE mat_id = %s AND is_active = 1
+                  AND mat_standard_id IN ({','.join(['%s'] * len(standard_ids))})
+                FOR UPDATE
+            """, [current_mat_id] + standard_ids)
+            rows = {row['mat_standard_id']: row for row in cursor.fetchall()}
+
+            missing = [standard_id for standard_id in standard_ids if standard_id not in rows]
+            if missing:
+                connection.close()
+                raise HTTPException(status_code=404, detail=f"Standards not found: {', '.join(missing)}")
+
+            standards = [rows[standard_id] for standard_id in standard_ids]
+            archived = archive_standards(cursor, current_mat_id, standards)
+
+            bump_catalogue_version(cursor, current_mat_id)
+
+        connection.close()
+
+        return JSONResponse(content={
+            "message": f"Deleted {len(standards)} standards",
+            "deleted_count": len(standards),
+            "standards": [
+                {
+                    "mat_standard_id": standard['mat_standard_id'],
+                    "is_custom": standard['is_custom'],
+                    "archived_as": archived[standard['mat_standard_id']],
+                    "can_reinstate": not standard['is_custom']
+                }
+                for standard in standards
+            ]
+        }, status_code=200)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to delete standards: {str(e)}")
+
 @app.post("/api/standards/{mat_standard_id}/reinstate", tags=["Standards"])
 async def reinstate_standard(
     mat_standard_id: str,
@@ -1755,15 +2557,17 @@ async def reinstate_standard(
                 detail="Custom standards cannot be reinstated. Create a new standard instead."
             )
 
-        # Reinstate the standard
-        cursor.execute("""
-            UPDATE mat_standards
-            SET is_active = 1,
-                updated_at = NOW()
-            WHERE mat_standard_id = %s AND mat_id = %s
-        """, (mat_standard_id, current_mat_id))
+        with db_transaction(connection):
+            # Reinstate the standard
+            cursor.execute("""
+                UPDATE mat_standards
+                SET is_active = 1,
+                    updated_at = NOW()
+                WHERE mat_standard_id = %s AND mat_id = %s
+            """, (mat_standard_id, current_mat_id))
+
+            bump_catalogue_version(cursor, current_mat_id)
 
-        connection.commit()
         connection.close()
 
         return JSONResponse(content={
@@ -1900,60 +2704,218 @@ async def get_standard_versions(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch version history: {str(e)}")
 
-# ================================
-# ASPECTS ENDPOINTS - FULL CRUD
-# ================================
-
-@app.get("/api/aspects", response_model=List[MatAspectResponse], tags=["Aspects"])
-async def get_aspects(
-    aspect_category: Optional[str] = None,
+@app.get("/api/standards/versions/as-of", response_model=List[StandardVersionAsOfResponse], tags=["Standards"])
+async def get_standard_versions_as_of(
+    at: datetime = Query(..., description="Point in time, e.g. 2025-11-02T09:15:00Z (required)"),
+    aspect_code: Optional[str] = Query(None),
     current_mat_id: str = Depends(get_current_mat),
     current_user: UserResponse = Depends(get_current_user)
 ):
     """
-    Get list of MAT-specific aspects with standard counts.
-    Optionally filtered by aspect_category ('ofsted' or 'operational').
-    Returns aspects for the authenticated user's MAT, including both default and custom aspects.
+    The version of every MAT standard that was in force at a point in time,
+    including standards since deactivated or deleted. Standards that had no
+    version in force at that time are left out.
+    Enforces MAT isolation.
     Requires authentication.
     """
     try:
         connection = get_db_connection()
         cursor = connection.cursor()
 
-        # Get MAT-specific aspects with standard counts
-        query = """
-            SELECT ma.mat_aspect_id,
-                   ma.mat_id,
-                   ma.aspect_code,
-                   ma.aspect_name,
-                   ma.aspect_description,
-                   ma.aspect_category,
-                   ma.sort_order,
-                   ma.is_custom,
-                   CASE WHEN ma.source_aspect_id IS NOT NULL AND
-                        (ma.aspect_name != COALESCE(da.aspect_name, '') OR
-                         ma.aspect_description != COALESCE(da.aspect_description, ''))
-                   THEN 1 ELSE 0 END as is_modified,
-                   (SELECT COUNT(*) FROM mat_standards ms
-                    WHERE ms.mat_aspect_id = ma.mat_aspect_id AND ms.is_active = TRUE) as standards_count
-            FROM mat_aspects ma
-            LEFT JOIN aspects da ON ma.source_aspect_id = da.aspect_id
-            WHERE ma.mat_id = %s AND ma.is_active = TRUE
-        """
-        params = [current_mat_id]
+        catalogue = catalogue_cache.get(cursor, current_mat_id)
+        timeline = catalogue.timeline(cursor)
+        connection.close()
 
-        # Optional filtering by aspect_category
-        if aspect_category:
-            query += " AND ma.aspect_category = %s"
-            params.append(aspect_category)
+        versions = []
+        for standard in catalogue.standards:
+            if aspect_code and standard['aspect_code'] != aspect_code:
+                continue
+            version = timeline.as_of(standard['mat_standard_id'], at)
+            if version:
+                versions.append(version)
 
-        query += " ORDER BY ma.sort_order"
+        return versions
 
-        cursor.execute(query, params)
-        aspects = cursor.fetchall()
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch standard versions: {str(e)}")
+
+@app.post("/api/standards/versions/as-of", response_model=List[StandardVersionLookupResult], tags=["Standards"])
+async def lookup_standard_versions_as_of(
+    request: StandardVersionLookupRequest,
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Resolve many (mat_standard_id, at) pairs in one call, e.g. each assessment
+    in a report against the time it was rated. Results are in request order;
+    version is null for standards outside the MAT or with no version in force.
+    Enforces MAT isolation.
+    Requires authentication.
+    """
+    try:
+        # Each lookup is a binary search, but keep request bodies bounded
+        if len(request.lookups) > 10000:
+            raise HTTPException(status_code=400, detail="At most 10000 lookups per request")
+
+        connection = get_db_connection()
+        cursor = connection.cursor()
 
+        timeline = catalogue_cache.get(cursor, current_mat_id).timeline(cursor)
         connection.close()
-        return aspects
+
+        return [
+            {
+                "mat_standard_id": lookup.mat_standard_id,
+                "at": lookup.at,
+                "version": timeline.as_of(lookup.mat_standard_id, lookup.at)
+            }
+            for lookup in request.lookups
+        ]
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to resolve standard versions: {str(e)}")
+
+@app.get("/api/standards/{mat_standard_id}/versions/as-of", response_model=StandardVersionAsOfResponse, tags=["Standards"])
+async def get_standard_version_as_of(
+    mat_standard_id: str,
+    at: datetime = Query(..., description="Point in time, e.g. 2025-11-02T09:15:00Z (required)"),
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    The version of one MAT standard that was in force at a point in time.
+    Enforces MAT isolation.
+    Requires authentication.
+    """
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor()
+
+        catalogue = catalogue_cache.get(cursor, current_mat_id)
+        if not catalogue.get_standard(mat_standard_id):
+            connection.close()
+            raise HTTPException(status_code=404, detail="Standard not found or access denied")
+
+        version = catalogue.timeline(cursor).as_of(mat_standard_id, at)
+        connection.close()
+
+        if not version:
+            raise HTTPException(status_code=404, detail="No version of this standard was in force at that time")
+
+        return version
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch standard version: {str(e)}")
+
+def _numbered_versions(versions: List[dict]) -> List[dict]:
+    """Versions oldest first, with version_number as an int (older rows hold strings)"""
+    return sorted(({**version, 'version_number': int(version['version_number'])} for version in versions),
+                  key=lambda version: version['version_number'])
+
+@app.get("/api/standards/{mat_standard_id}/versions/diff", tags=["Standards"])
+async def get_standard_version_diff(
+    mat_standard_id: str,
+    from_version: int = Query(..., description="Older version_number (required)"),
+    to_version: int = Query(..., description="Newer version_number (required)"),
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Word-level diff of the versioned fields between two versions of a standard.
+    Versions are immutable, so each pair is diffed once and then served from
+    the version diff cache.
+    Enforces MAT isolation.
+    Requires authentication.
+    """
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor()
+
+        catalogue = catalogue_cache.get(cursor, current_mat_id)
+        if not catalogue.get_standard(mat_standard_id):
+            connection.close()
+            raise HTTPException(status_code=404, detail="Standard not found or access denied")
+
+        versions = {version['version_number']: version
+                    for version in _numbered_versions(catalogue.versions(cursor, mat_standard_id))}
+        connection.close()
+
+        for number in (from_version, to_version):
+            if number not in versions:
+                raise HTTPException(status_code=404, detail=f"Version not found: {number}")
+
+        diff = version_diff_cache.get(versions[from_version], versions[to_version])
+        return JSONResponse(content={"mat_standard_id": mat_standard_id, **diff}, status_code=200)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to diff standard versions: {str(e)}")
+
+@app.get("/api/standards/{mat_standard_id}/versions/diffs", tags=["Standards"])
+async def get_standard_version_diffs(
+    mat_standard_id: str,
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Diffs between every pair of adjacent versions (v1 -> v2, v2 -> v3, ...),
+    oldest first, for a version history view.
+    Enforces MAT isolation.
+    Requires authentication.
+    """
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor()
+
+        catalogue = catalogue_cache.get(cursor, current_mat_id)
+        if not catalogue.get_standard(mat_standard_id):
+            connection.close()
+            raise HTTPException(status_code=404, detail="Standard not found or access denied")
+
+        versions = _numbered_versions(catalogue.versions(cursor, mat_standard_id))
+        connection.close()
+
+        return JSONResponse(content={
+            "mat_standard_id": mat_standard_id,
+            "diffs": [version_diff_cache.get(old, new) for old, new in zip(versions, versions[1:])]
+        }, status_code=200)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to diff standard versions: {str(e)}")
+
+# ================================
+# ASPECTS ENDPOINTS - FULL CRUD
+# ================================
+
+@app.get("/api/aspects", response_model=List[MatAspectResponse], tags=["Aspects"])
+async def get_aspects(
+    aspect_category: Optional[str] = None,
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Get list of MAT-specific aspects with standard counts.
+    Optionally filtered by aspect_category ('ofsted' or 'operational').
+    Returns aspects for the authenticated user's MAT, including both default and custom aspects.
+    Requires authentication.
+    """
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor()
+
+        catalogue = catalogue_cache.get(cursor, current_mat_id)
+
+        connection.close()
+        return catalogue.list_aspects(aspect_category)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch aspects: {str(e)}")
@@ -1973,33 +2935,7 @@ async def get_aspect(
         connection = get_db_connection()
         cursor = connection.cursor()
 
-        query = """
-            SELECT
-                ma.mat_aspect_id,
-                ma.aspect_code,
-                ma.aspect_name,
-                ma.aspect_description,
-                ma.aspect_category,
-                ma.sort_order,
-                ma.mat_id,
-                ma.source_aspect_id,
-                CASE WHEN ma.source_aspect_id IS NULL THEN 1 ELSE 0 END as is_custom,
-                CASE WHEN ma.source_aspect_id IS NOT NULL AND
-                     (ma.aspect_name != COALESCE(da.aspect_name, '') OR
-                      ma.aspect_description != COALESCE(da.aspect_description, ''))
-                THEN 1 ELSE 0 END as is_modified,
-                COUNT(ms.mat_standard_id) as standards_count
-            FROM mat_aspects ma
-            LEFT JOIN mat_standards ms ON ma.mat_aspect_id = ms.mat_aspect_id
-            LEFT JOIN aspects da ON ma.source_aspect_id = da.aspect_id
-            WHERE ma.mat_aspect_id = %s AND ma.mat_id = %s AND ma.is_active = 1
-            GROUP BY ma.mat_aspect_id, ma.aspect_code, ma.aspect_name,
-                     ma.aspect_description, ma.aspect_category, ma.sort_order, ma.mat_id,
-                     ma.source_aspect_id, da.aspect_name, da.aspect_description
-        """
-
-        cursor.execute(query, (mat_aspect_id, current_mat_id))
-        aspect = cursor.fetchone()
+        aspect = catalogue_cache.get(cursor, current_mat_id).get_aspect(mat_aspect_id)
 
         connection.close()
 
@@ -2058,25 +2994,27 @@ async def create_aspect(
                 detail=f"Aspect with code '{aspect_code_upper}' already exists for your MAT"
             )
 
-        # Insert new MAT aspect with uppercase code
-        insert_query = """
-            INSERT INTO mat_aspects
-            (mat_aspect_id, mat_id, aspect_code, aspect_name, aspect_description,
-             aspect_category, sort_order, source_aspect_id, is_custom, is_active, created_at, updated_at)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 1, 1, NOW(), NOW())
-        """
-        cursor.execute(insert_query, (
-            mat_aspect_id,
-            current_mat_id,
-            aspect_code_upper,  # Store uppercase
-            aspect.aspect_name,
-            aspect.aspect_description,
-            aspect.aspect_category,
-            aspect.sort_order,
-            aspect.source_aspect_id
-        ))
+        with db_transaction(connection):
+            # Insert new MAT aspect with uppercase code
+            insert_query = """
+                INSERT INTO mat_aspects
+                (mat_aspect_id, mat_id, aspect_code, aspect_name, aspect_description,
+                 aspect_category, sort_order, source_aspect_id, is_custom, is_active, created_at, updated_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 1, 1, NOW(), NOW())
+            """
+            cursor.execute(insert_query, (
+                mat_aspect_id,
+                current_mat_id,
+                aspect_code_upper,  # Store uppercase
+                aspect.aspect_name,
+                aspect.aspect_description,
+                aspect.aspect_category,
+                aspect.sort_order,
+                aspect.source_aspect_id
+            ))
+
+            bump_catalogue_version(cursor, current_mat_id)
 
-        connection.commit()
 
         # Fetch the created aspect
         fetch_query = """
@@ -2158,12 +3096,26 @@ async def update_aspect(
         update_fields.append("updated_at = NOW()")
         update_values.append(mat_aspect_id)
 
-        update_query = f"""
-            UPDATE mat_aspects
-            SET {', '.join(update_fields)}
-            WHERE mat_aspect_id = %s
-        """
-        cursor.execute(update_query, update_values)
+        with db_transaction(connection):
+            # Move the aspect's assessments to the rating cube cells of the
+            # new category
+            if aspect.aspect_category is not None:
+                score_deltas = ScoreDeltas()
+                for old_row in lock_assessment_rows_where(
+                    cursor, "ms.mat_aspect_id = %s", [mat_aspect_id], current_mat_id
+                ).values():
+                    if old_row['aspect_category'] != aspect.aspect_category:
+                        score_deltas.replace(old_row, aspect_category=aspect.aspect_category)
+                score_deltas.apply(cursor)
+
+            update_query = f"""
+                UPDATE mat_aspects
+                SET {', '.join(update_fields)}
+                WHERE mat_aspect_id = %s
+            """
+            cursor.execute(update_query, update_values)
+
+            bump_catalogue_version(cursor, current_mat_id)
 
         # Fetch updated aspect
         select_query = """
@@ -2210,11 +3162,14 @@ async def delete_aspect(
         connection = get_db_connection()
         cursor = connection.cursor()
 
-        # Get aspect details
+        # Get aspect details and its active standard count in one read
         check_query = """
-            SELECT mat_aspect_id, aspect_code, is_custom
-            FROM mat_aspects
-            WHERE mat_aspect_id = %s AND mat_id = %s AND is_active = 1
+            SELECT ma.mat_aspect_id, ma.aspect_code, ma.is_custom,
+                   COUNT(ms.mat_standard_id) as standards_count
+            FROM mat_aspects ma
+            LEFT JOIN mat_standards ms ON ms.mat_aspect_id = ma.mat_aspect_id AND ms.is_active = 1
+            WHERE ma.mat_aspect_id = %s AND ma.mat_id = %s AND ma.is_active = 1
+            GROUP BY ma.mat_aspect_id, ma.aspect_code, ma.is_custom
         """
         cursor.execute(check_query, (mat_aspect_id, current_mat_id))
         row = cursor.fetchone()
@@ -2226,55 +3181,50 @@ async def delete_aspect(
         is_custom = row['is_custom']
         aspect_code = row['aspect_code']
 
-        # Check if there are active standards using this aspect
-        standards_query = """
-            SELECT COUNT(*) as count FROM mat_standards
-            WHERE mat_aspect_id = %s AND is_active = 1
-        """
-        cursor.execute(standards_query, (mat_aspect_id,))
-        result = cursor.fetchone()
-
-        if result['count'] > 0:
+        # Refuse while active standards still use this aspect
+        if row['standards_count'] > 0:
             connection.close()
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
-                detail=f"Cannot delete aspect because it has {result['count']} active standards. Delete the standards first."
+                detail=f"Cannot delete aspect because it has {row['standards_count']} active standards. Delete the standards first."
             )
 
-        if is_custom:
-            # CUSTOM ASPECT: Rename IDs to free them up
-            import time
-            timestamp = int(time.time())
-            short_suffix = str(timestamp)[-6:]
-            deleted_id = f"{mat_aspect_id}-deleted-{timestamp}"
-            deleted_code = f"{aspect_code}-{short_suffix}"
+        with db_transaction(connection):
+            if is_custom:
+                # CUSTOM ASPECT: Rename IDs to free them up
+                import time
+                timestamp = int(time.time())
+                short_suffix = str(timestamp)[-6:]
+                deleted_id = f"{mat_aspect_id}-deleted-{timestamp}"
+                deleted_code = f"{aspect_code}-{short_suffix}"
 
-            # Rename and deactivate
-            cursor.execute("""
-                UPDATE mat_aspects
-                SET mat_aspect_id = %s,
-                    aspect_code = %s,
-                    is_active = 0,
-                    updated_at = NOW()
-                WHERE mat_aspect_id = %s AND mat_id = %s
-            """, (deleted_id, deleted_code, mat_aspect_id, current_mat_id))
+                # Rename and deactivate
+                cursor.execute("""
+                    UPDATE mat_aspects
+                    SET mat_aspect_id = %s,
+                        aspect_code = %s,
+                        is_active = 0,
+                        updated_at = NOW()
+                    WHERE mat_aspect_id = %s AND mat_id = %s
+                """, (deleted_id, deleted_code, mat_aspect_id, current_mat_id))
 
-            result_message = "Custom aspect archived"
-            archived_as = deleted_id
+                result_message = "Custom aspect archived"
+                archived_as = deleted_id
 
-        else:
-            # DEFAULT ASPECT: Simply deactivate (keep IDs intact for reinstatement)
-            cursor.execute("""
-                UPDATE mat_aspects
-                SET is_active = 0,
-                    updated_at = NOW()
-                WHERE mat_aspect_id = %s AND mat_id = %s
-            """, (mat_aspect_id, current_mat_id))
+            else:
+                # DEFAULT ASPECT: Simply deactivate (keep IDs intact for reinstatement)
+                cursor.execute("""
+                    UPDATE mat_aspects
+                    SET is_active = 0,
+                        updated_at = NOW()
+                    WHERE mat_aspect_id = %s AND mat_id = %s
+                """, (mat_aspect_id, current_mat_id))
 
-            result_message = "Default aspect deactivated"
-            archived_as = None
+                result_message = "Default aspect deactivated"
+                archived_as = None
+
+            bump_catalogue_version(cursor, current_mat_id)
 
-        connection.commit()
         connection.close()
 
         return JSONResponse(content={
@@ -2331,15 +3281,17 @@ async def reinstate_aspect(
                 detail="Custom aspects cannot be reinstated. Create a new aspect instead."
             )
 
-        # Reinstate the aspect
-        cursor.execute("""
-            UPDATE mat_aspects
-            SET is_active = 1,
-                updated_at = NOW()
-            WHERE mat_aspect_id = %s AND mat_id = %s
-        """, (mat_aspect_id, current_mat_id))
+        with db_transaction(connection):
+            # Reinstate the aspect
+            cursor.execute("""
+                UPDATE mat_aspects
+                SET is_active = 1,
+                    updated_at = NOW()
+                WHERE mat_aspect_id = %s AND mat_id = %s
+            """, (mat_aspect_id, current_mat_id))
+
+            bump_catalogue_version(cursor, current_mat_id)
 
-        connection.commit()
         connection.close()
 
         return JSONResponse(content={
@@ -2368,7 +3320,7 @@ async def get_inactive_aspects(
         connection = get_db_connection()
         cursor = connection.cursor()
 
-        query = """
+        query = f"""
             SELECT ma.mat_aspect_id,
                    ma.mat_id,
                    ma.aspect_code,
@@ -2381,16 +3333,16 @@ async def get_inactive_aspects(
                         (ma.aspect_name != COALESCE(da.aspect_name, '') OR
                          ma.aspect_description != COALESCE(da.aspect_description, ''))
                    THEN 1 ELSE 0 END as is_modified,
-                   (SELECT COUNT(*) FROM mat_standards ms
-                    WHERE ms.mat_aspect_id = ma.mat_aspect_id AND ms.is_active = TRUE) as standards_count
+                   COALESCE(sc.standards_count, 0) as standards_count
             FROM mat_aspects ma
             LEFT JOIN aspects da ON ma.source_aspect_id = da.aspect_id
+            {STANDARD_COUNTS_JOIN}
             WHERE ma.mat_id = %s
               AND ma.is_active = FALSE
               AND ma.is_custom = FALSE
             ORDER BY ma.sort_order
         """
-        cursor.execute(query, (current_mat_id,))
+        cursor.execute(query, (current_mat_id, current_mat_id))
         aspects = cursor.fetchall()
 
         connection.close()
@@ -2409,32 +3361,31 @@ async def get_terms(academic_year: Optional[str] = None):
     - academic_year: Filter by specific academic year (e.g., "2024-25")
     """
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-
-        query = """
-            SELECT unique_term_id, term_id, term_name, start_date, end_date, academic_year,
-                   CASE WHEN CURDATE() BETWEEN start_date AND end_date THEN TRUE ELSE FALSE END as is_current
-            FROM terms
-        """
-
-        params = []
-        if academic_year:
-            query += " WHERE academic_year = %s"
-            params.append(academic_year)
-
-        query += " ORDER BY academic_year DESC, FIELD(term_id, 'T1', 'T2', 'T3')"
-
-        cursor.execute(query, params)
-        terms = cursor.fetchall()
+        # Served from the worker's term calendar - no query per request
+        calendar = get_term_calendar()
+        current_term = calendar.current()
+
+        # academic_year descending, then T1 -> T2 -> T3 within a year
+        terms = sorted(
+            calendar.terms(academic_year),
+            key=lambda term: (term['academic_year'], -term['ordinal']),
+            reverse=True
+        )
 
         # Process terms for JSON serialization
         processed_terms = []
         for term in terms:
-            processed_term = process_row_for_json(term)
+            processed_term = process_row_for_json({
+                'unique_term_id': term['unique_term_id'],
+                'term_id': term['term_id'],
+                'term_name': term['term_name'],
+                'start_date': term['start_date'],
+                'end_date': term['end_date'],
+                'academic_year': term['academic_year'],
+                'is_current': term is current_term
+            })
             processed_terms.append(processed_term)
 
-        connection.close()
         return JSONResponse(content=processed_terms, status_code=200)
 
     except Exception as e:
@@ -2446,71 +3397,52 @@ async def get_users(
     current_user: UserResponse = Depends(get_current_user),
     school_id: Optional[str] = Query(None),
     role_title: Optional[str] = Query(None),
-    include_inactive: bool = Query(False, description="Include deleted/inactive users")
+    include_inactive: bool = Query(False, description="Include deleted/inactive users"),
+    q: Optional[str] = Query(None, description="Prefix search on name and email words"),
+    limit: Optional[int] = Query(None, ge=1, le=500, description="Page size; returns {users, next_cursor}"),
+    page_cursor: Optional[str] = Query(None, alias="cursor", description="next_cursor from the previous page")
 ):
     """
     Get list of users within the MAT.
     Enforces MAT isolation - only returns users in the authenticated user's MAT.
     Optionally filtered by school, role, and active status.
     Requires authentication.
+
+    Served from the MAT's in-memory user directory. q matches users where
+    every word is a prefix of a word of their name or of their email, e.g.
+    "jan sm" or "jane.s". Without limit (or cursor) the full list is returned
+    as before; with it, one page {users, next_cursor} in name order.
     """
     try:
         connection = get_db_connection()
         cursor = connection.cursor()
 
-        query = """
-            SELECT
-                u.user_id,
-                u.email,
-                u.full_name,
-                u.role_title,
-                u.school_id,
-                s.school_name,
-                u.mat_id,
-                u.is_active,
-                u.last_login,
-                u.created_at
-            FROM users u
-            LEFT JOIN schools s ON u.school_id = s.school_id
-            WHERE u.mat_id = %s
-        """
-        params = [current_mat_id]
-
-        if not include_inactive:
-            query += " AND u.is_active = 1"
-
-        if school_id:
-            query += " AND u.school_id = %s"
-            params.append(school_id)
-
-        if role_title:
-            query += " AND u.role_title = %s"
-            params.append(role_title)
-
-        query += " ORDER BY u.full_name"
-
-        cursor.execute(query, params)
-        users = cursor.fetchall()
-
-        # Process datetime fields
-        processed_users = []
-        for user in users:
-            processed_user = dict(user)
-            if processed_user.get('last_login'):
-                processed_user['last_login'] = processed_user['last_login'].strftime('%Y-%m-%dT%H:%M:%SZ')
-            if processed_user.get('created_at'):
-                processed_user['created_at'] = processed_user['created_at'].strftime('%Y-%m-%dT%H:%M:%SZ')
-            processed_users.append(processed_user)
+        paged = limit is not None or page_cursor is not None
+        try:
+            users, next_cursor = user_directory.search(
+                cursor, current_mat_id, q=q, school_id=school_id, role_title=role_title,
+                include_inactive=include_inactive, page_cursor=page_cursor,
+                limit=(limit or 50) if paged else None
+            )
+        except ValueError as e:
+            connection.close()
+            raise HTTPException(status_code=400, detail=str(e))
 
         connection.close()
-        return JSONResponse(content=processed_users, status_code=200)
+        if not paged:
+            return JSONResponse(content=users, status_code=200)
+        return JSONResponse(content={"users": users, "next_cursor": next_cursor}, status_code=200)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/users", tags=["Users"], status_code=status.HTTP_201_CREATED)
+@idempotent
 async def create_user(
     user_data: CreateUserRequest,
+    idempotency_key: Optional[str] = Header(None),
     current_mat_id: str = Depends(get_current_mat),
     current_user: UserResponse = Depends(verify_mat_admin)
 ):
@@ -2520,6 +3452,7 @@ async def create_user(
     - Only MAT Administrators can create users
     - Enforces MAT isolation
     - Validates email uniqueness within MAT
+    - Retries with the same Idempotency-Key header replay the first response
     """
     connection = None
     try:
@@ -2560,22 +3493,23 @@ async def create_user(
         # Generate user_id
         user_id = f"user{uuid.uuid4().hex[:8]}"
 
-        # Insert new user
-        insert_query = """
-            INSERT INTO users
-            (user_id, email, full_name, role_title, school_id, mat_id, is_active, created_at)
-            VALUES (%s, %s, %s, %s, %s, %s, 1, NOW())
-        """
-        cursor.execute(insert_query, (
-            user_id,
-            user_data.email,
-            user_data.full_name,
-            user_data.role_title,
-            user_data.school_id,
-            current_mat_id
-        ))
-
-        connection.commit()
+        with db_transaction(connection):
+            # Insert new user
+            insert_query = """
+                INSERT INTO users
+                (user_id, email, full_name, role_title, school_id, mat_id, is_active, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s, 1, NOW())
+            """
+            cursor.execute(insert_query, (
+                user_id,
+                user_data.email,
+                user_data.full_name,
+                user_data.role_title,
+                user_data.school_id,
+                current_mat_id
+            ))
+            users_version = bump_users_version(cursor, current_mat_id)
+        user_directory.refresh_user(cursor, current_mat_id, user_id, users_version)
 
         # Fetch the created user
         fetch_query = """
@@ -2613,7 +3547,91 @@ async def create_user(
             connection.close()
         raise HTTPException(status_code=500, detail=f"Failed to create user: {str(e)}")
 
-@app.delete("/api/users/{user_id}", tags=["Users"])
+def validate_import_row(fields: dict) -> dict:
+    """One import row checked with the POST /api/users rules; ValueError lists the problems"""
+    try:
+        return CreateUserRequest(**fields).dict()
+    except ValidationError as e:
+        raise ValueError('; '.join(f"{error['loc'][0]}: {error['msg']}" for error in e.errors()))
+
+def send_import_invites(invites: list) -> list:
+    """(email, full_name, token) tuples to magic link emails; returns emails not sent"""
+    return asyncio.run(send_magic_link_emails([
+        (email, full_name, generate_magic_link_url(token)) for email, full_name, token in invites
+    ]))
+
+@app.post("/api/users/import", tags=["Users"], status_code=status.HTTP_202_ACCEPTED)
+async def import_users(
+    request: Request,
+    send_invites: bool = Query(False, description="Email each new user a magic link"),
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(verify_mat_admin)
+):
+    """
+    Bulk-create users from a CSV or JSON-lines upload. MAT Administrators only.
+
+    The request body is the file itself, with Content-Type text/csv (header
+    row: email, full_name, role_title, school_id) or application/x-ndjson
+    (one object per line with those keys). Rows are validated like
+    POST /api/users; invalid rows are skipped and reported.
+
+    The upload is streamed to disk and imported by a background job. Poll
+    GET /api/users/import/{job_id} for counts and per-row errors.
+    """
+    job = None
+    try:
+        import_format = IMPORT_FORMATS.get(request.headers.get('content-type', '').split(';')[0].strip().lower())
+        if import_format is None:
+            raise HTTPException(status_code=415, detail="Upload text/csv or application/x-ndjson")
+
+        job = user_import_jobs.new_job(current_mat_id, current_user.user_id, import_format, send_invites)
+        size = 0
+        with open(user_import_jobs.upload_path(job['job_id']), 'wb') as f:
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > USER_IMPORT_MAX_BYTES:
+                    raise HTTPException(status_code=413, detail=f"Upload is larger than {USER_IMPORT_MAX_BYTES} bytes")
+                f.write(chunk)
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Upload is empty")
+
+        await asyncio.to_thread(user_import_jobs.start, job, validate_import_row,
+                                new_token=generate_magic_link_data, send_invites=send_import_invites)
+        return JSONResponse(content={
+            "job_id": job['job_id'],
+            "status": job['status'],
+            "format": job['format'],
+            "status_url": f"/api/users/import/{job['job_id']}"
+        }, status_code=202)
+
+    except HTTPException:
+        if job is not None:
+            user_import_jobs.discard(job)
+        raise
+    except Exception as e:
+        if job is not None:
+            user_import_jobs.discard(job)
+        raise HTTPException(status_code=500, detail=f"Failed to start user import: {str(e)}")
+
+@app.get("/api/users/import/{job_id}", tags=["Users"])
+async def get_user_import(
+    job_id: str,
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(verify_mat_admin)
+):
+    """Status of a bulk user import: queued, running, completed or failed, with per-row errors"""
+    try:
+        job = await asyncio.to_thread(user_import_jobs.get, job_id, current_mat_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Import not found")
+        return JSONResponse(content=job, status_code=200)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch user import: {str(e)}")
+
+@app.delete("/api/users/{user_id}", tags=["Users"])
 async def delete_user(
     user_id: str,
     current_mat_id: str = Depends(get_current_mat),
@@ -2662,15 +3680,17 @@ async def delete_user(
                 detail="User is already deleted"
             )
 
-        # Soft delete: set is_active = false and record deleted_at
-        delete_query = """
-            UPDATE users
-            SET is_active = 0, deleted_at = NOW()
-            WHERE user_id = %s AND mat_id = %s
-        """
-        cursor.execute(delete_query, (user_id, current_mat_id))
+        with db_transaction(connection):
+            # Soft delete: set is_active = false and record deleted_at
+            delete_query = """
+                UPDATE users
+                SET is_active = 0, deleted_at = NOW()
+                WHERE user_id = %s AND mat_id = %s
+            """
+            cursor.execute(delete_query, (user_id, current_mat_id))
+            users_version = bump_users_version(cursor, current_mat_id)
+        user_directory.refresh_user(cursor, current_mat_id, user_id, users_version)
 
-        connection.commit()
         connection.close()
 
         return JSONResponse(content={
@@ -2765,14 +3785,15 @@ async def update_user(
         updates.append("updated_at = NOW()")
         params.extend([user_id, current_mat_id])
 
-        update_query = f"""
-            UPDATE users
-            SET {', '.join(updates)}
-            WHERE user_id = %s AND mat_id = %s
-        """
-        cursor.execute(update_query, params)
-
-        connection.commit()
+        with db_transaction(connection):
+            update_query = f"""
+                UPDATE users
+                SET {', '.join(updates)}
+                WHERE user_id = %s AND mat_id = %s
+            """
+            cursor.execute(update_query, params)
+            users_version = bump_users_version(cursor, current_mat_id)
+        user_directory.refresh_user(cursor, current_mat_id, user_id, users_version)
 
         # Fetch updated user
         fetch_query = """
@@ -2807,6 +3828,195 @@ async def update_user(
             connection.close()
         raise HTTPException(status_code=500, detail=f"Failed to update user: {str(e)}")
 
+ASSIGNMENTS_QUERY = """
+    SELECT
+        uaa.assignment_id,
+        uaa.user_id,
+        uaa.mat_aspect_id,
+        UPPER(ma.aspect_code) as aspect_code,
+        ma.aspect_name,
+        uaa.school_id,
+        s.school_name,
+        uaa.notify_on_term_open,
+        uaa.notify_on_due_date
+    FROM user_aspect_assignments uaa
+    JOIN mat_aspects ma ON uaa.mat_aspect_id = ma.mat_aspect_id
+    LEFT JOIN schools s ON uaa.school_id = s.school_id
+    WHERE uaa.user_id = %s AND ma.mat_id = %s
+"""
+
+def format_assignment(row: dict) -> dict:
+    return UserAspectAssignmentResponse(
+        **{**row,
+           'notify_on_term_open': bool(row['notify_on_term_open']),
+           'notify_on_due_date': bool(row['notify_on_due_date'])}
+    ).dict()
+
+@app.get("/api/users/{user_id}/assignments", tags=["Users"])
+async def get_user_assignments(
+    user_id: str,
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    The aspects (optionally scoped to one school) a user is responsible for.
+
+    - MAT Administrators can view anyone in their MAT; other users only themselves
+    - Enforces MAT isolation
+    """
+    if current_user.role_title != "MAT Administrator" and user_id != current_user.user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only MAT Administrators can view other users' assignments"
+        )
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor()
+
+        cursor.execute(ASSIGNMENTS_QUERY + " ORDER BY ma.sort_order, s.school_name", (user_id, current_mat_id))
+        assignments = [format_assignment(row) for row in cursor.fetchall()]
+
+        connection.close()
+        return JSONResponse(content=assignments, status_code=200)
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/users/{user_id}/assignments", tags=["Users"], status_code=status.HTTP_201_CREATED)
+async def create_user_assignment(
+    user_id: str,
+    assignment: UserAspectAssignmentCreate,
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(verify_mat_admin)
+):
+    """
+    Make a user responsible for a MAT aspect, in one school or (school_id
+    null) across all schools.
+
+    - Only MAT Administrators can assign
+    - The user, aspect and school must all belong to your MAT
+    - Rejects a duplicate (user, aspect, school) assignment, including the
+      all-schools case the unique key does not catch (data model §20.3)
+    """
+    connection = None
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor()
+
+        cursor.execute(
+            "SELECT user_id FROM users WHERE user_id = %s AND mat_id = %s AND is_active = 1",
+            (user_id, current_mat_id)
+        )
+        if not cursor.fetchone():
+            connection.close()
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+        cursor.execute(
+            "SELECT mat_aspect_id FROM mat_aspects WHERE mat_aspect_id = %s AND mat_id = %s AND is_active = 1",
+            (assignment.mat_aspect_id, current_mat_id)
+        )
+        if not cursor.fetchone():
+            connection.close()
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Aspect '{assignment.mat_aspect_id}' not found in your MAT"
+            )
+
+        if assignment.school_id:
+            cursor.execute(
+                "SELECT school_id FROM schools WHERE school_id = %s AND mat_id = %s AND is_active = 1",
+                (assignment.school_id, current_mat_id)
+            )
+            if not cursor.fetchone():
+                connection.close()
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"School '{assignment.school_id}' not found in your MAT"
+                )
+
+        assignment_id = str(uuid.uuid4())
+        with db_transaction(connection):
+            # <=> so a second all-schools assignment is caught too
+            cursor.execute("""
+                SELECT assignment_id FROM user_aspect_assignments
+                WHERE user_id = %s AND mat_aspect_id = %s AND school_id <=> %s
+                FOR UPDATE
+            """, (user_id, assignment.mat_aspect_id, assignment.school_id or None))
+            if cursor.fetchone():
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="User already has this assignment"
+                )
+            cursor.execute("""
+                INSERT INTO user_aspect_assignments
+                (assignment_id, user_id, mat_aspect_id, school_id, notify_on_term_open,
+                 notify_on_due_date, created_at, assigned_by_user_id)
+                VALUES (%s, %s, %s, %s, %s, %s, NOW(), %s)
+            """, (assignment_id, user_id, assignment.mat_aspect_id, assignment.school_id or None,
+                  assignment.notify_on_term_open, assignment.notify_on_due_date, current_user.user_id))
+        my_work_cache.invalidate_user(user_id)
+
+        cursor.execute(ASSIGNMENTS_QUERY + " AND uaa.assignment_id = %s", (user_id, current_mat_id, assignment_id))
+        created = format_assignment(cursor.fetchone())
+
+        connection.close()
+        return JSONResponse(content=created, status_code=201)
+
+    except HTTPException:
+        if connection and connection.open:
+            connection.close()
+        raise
+    except Exception as e:
+        if connection:
+            connection.rollback()
+            connection.close()
+        raise HTTPException(status_code=500, detail=f"Failed to create assignment: {str(e)}")
+
+@app.delete("/api/users/{user_id}/assignments/{assignment_id}", tags=["Users"])
+async def delete_user_assignment(
+    user_id: str,
+    assignment_id: str,
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(verify_mat_admin)
+):
+    """
+    Remove one of a user's assignments.
+
+    - Only MAT Administrators can unassign
+    - Enforces MAT isolation
+    """
+    connection = None
+    try:
+        connection = get_db_connection()
+        cursor = connection.cursor()
+
+        with db_transaction(connection):
+            cursor.execute("""
+                DELETE uaa FROM user_aspect_assignments uaa
+                JOIN mat_aspects ma ON uaa.mat_aspect_id = ma.mat_aspect_id
+                WHERE uaa.assignment_id = %s AND uaa.user_id = %s AND ma.mat_id = %s
+            """, (assignment_id, user_id, current_mat_id))
+            deleted = cursor.rowcount
+        if not deleted:
+            connection.close()
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Assignment not found")
+        my_work_cache.invalidate_user(user_id)
+
+        connection.close()
+        return JSONResponse(content={
+            "message": "Assignment removed",
+            "assignment_id": assignment_id,
+            "user_id": user_id
+        }, status_code=200)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        if connection:
+            connection.rollback()
+            connection.close()
+        raise HTTPException(status_code=500, detail=f"Failed to remove assignment: {str(e)}")
+
 @app.get("/api/users/me", tags=["Users"])
 async def get_current_user_context(
     current_user: UserResponse = Depends(get_current_user)
@@ -2909,7 +4119,10 @@ async def get_assessment_details(
             assessment_data['last_updated'] = row['last_updated'].strftime('%Y-%m-%dT%H:%M:%SZ')
 
         connection.close()
-        return JSONResponse(content=assessment_data, status_code=200)
+
+        # last_updated doubles as the optimistic-concurrency token for PUT
+        headers = {"ETag": f'"{assessment_data["last_updated"]}"'} if assessment_data.get('last_updated') else None
+        return JSONResponse(content=assessment_data, status_code=200, headers=headers)
 
     except HTTPException:
         raise
@@ -3122,21 +4335,21 @@ async def debug_assessment_parsing(assessment_id: str):
         return {"error": str(e)}
 
 @app.post("/api/assessments/{assessment_id}/submit", tags=["Assessments"])
+@idempotent
 async def submit_assessment_ratings(
     assessment_id: str,
     submission: AssessmentSubmission,
+    idempotency_key: Optional[str] = Header(None),
     current_mat_id: str = Depends(get_current_mat),
     current_user: UserResponse = Depends(get_current_user)
 ):
     """
     Submit or update ratings for multiple standards within an assessment.
     Enforces MAT isolation - can only submit for assessments in user's MAT.
+    Send an Idempotency-Key header to make retries safe.
     Requires authentication.
     """
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor()
-
         # Parse assessment_id to get components
         parts = assessment_id.split('-')
         if len(parts) < 4:
@@ -3156,12 +4369,13 @@ async def submit_assessment_ratings(
 
         # Split the parts correctly
         school_parts = parts[:term_index-1]  # Everything before category
-        category = parts[term_index-1]       # The category (education, governance, etc.)
-        term_id = parts[term_index]          # The term (T1, T2, T3)
-        academic_year_parts = parts[term_index+1:]  # Academic year parts (2024, 25)
+        unique_term_id = '-'.join(parts[term_index:])  # The term (T1-2024-25)
+        academic_year = '-'.join(parts[term_index+1:])  # Academic year parts (2024, 25)
 
         school_id = '-'.join(school_parts)
-        academic_year = '-'.join(academic_year_parts)
+
+        connection = get_db_connection()
+        cursor = connection.cursor()
 
         # MAT isolation: Verify school belongs to user's MAT
         mat_check_query = "SELECT school_id FROM schools WHERE school_id = %s AND mat_id = %s"
@@ -3176,69 +4390,108 @@ async def submit_assessment_ratings(
         # Verify assessment exists by checking if any standards exist for this combination
         verify_query = """
             SELECT COUNT(*) as count FROM assessments
-            WHERE school_id = %s AND term_id = %s AND academic_year = %s
+            WHERE school_id = %s AND unique_term_id = %s
         """
-        cursor.execute(verify_query, (school_id, term_id, academic_year))
+        cursor.execute(verify_query, (school_id, unique_term_id))
         result = cursor.fetchone()
 
         if not result or result['count'] == 0:
+            connection.close()
             raise HTTPException(status_code=404, detail="Assessment not found")
-        
-        # Update each standard rating with UPSERT logic
-        updated_standards = []
-        for standard in submission.standards:
-            # Check if record exists using standard_id (the lowest data level)
-            check_query = """
-                SELECT id FROM assessments 
-                WHERE school_id = %s AND standard_id = %s AND term_id = %s AND academic_year = %s
-            """
-            cursor.execute(check_query, (school_id, standard.standard_id, term_id, academic_year))
-            existing_record = cursor.fetchone()
-            
-            if existing_record:
-                # Update existing record
-                update_query = """
-                    UPDATE assessments 
-                    SET rating = %s, evidence_comments = %s, submitted_by = %s, 
-                        last_updated = CONVERT_TZ(NOW(), @@session.time_zone, '+01:00'), 
-                        updated_by = %s
-                    WHERE school_id = %s AND standard_id = %s AND term_id = %s AND academic_year = %s
-                """
-                cursor.execute(update_query, (
-                    standard.rating,
-                    standard.evidence_comments,
-                    standard.submitted_by,
-                    standard.submitted_by,
-                    school_id,
-                    standard.standard_id,
-                    term_id,
-                    academic_year
-                ))
-            else:
-                # Insert new record
-                insert_query = """
-                    INSERT INTO assessments 
-                    (id, school_id, standard_id, term_id, academic_year, rating, evidence_comments, 
-                     submitted_by, last_updated, updated_by)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 
-                            CONVERT_TZ(NOW(), @@session.time_zone, '+01:00'), %s)
+
+        # MAT isolation: every standard rated must be one of the MAT's
+        standards = {}
+        mat_standard_ids = list(dict.fromkeys(standard.mat_standard_id for standard in submission.standards))
+        if mat_standard_ids:
+            placeholders = ','.join(['%s'] * len(mat_standard_ids))
+            cursor.execute(f"""
+                SELECT mat_standard_id, standard_code, current_version_id
+                FROM mat_standards
+                WHERE mat_id = %s AND mat_standard_id IN ({placeholders})
+            """, [current_mat_id] + mat_standard_ids)
+            standards = {row['mat_standard_id']: row for row in cursor.fetchall()}
+
+        unknown_standards = sorted(set(mat_standard_ids) - set(standards))
+        if unknown_standards:
+            connection.close()
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Cannot submit ratings for standards outside your MAT: {', '.join(unknown_standards)}"
+            )
+
+        written_at = datetime.utcnow().replace(microsecond=0)
+
+        with db_transaction(connection):
+            # Update each standard rating with UPSERT logic
+            updated_standards = []
+            for standard in submission.standards:
+                # Check if record exists using mat_standard_id (the lowest data level)
+                check_query = """
+                    SELECT id FROM assessments
+                    WHERE school_id = %s AND mat_standard_id = %s AND unique_term_id = %s
                 """
-                new_uuid = str(uuid.uuid4())
-                cursor.execute(insert_query, (
-                    new_uuid,
-                    school_id,
-                    standard.standard_id,
-                    term_id,
-                    academic_year,
-                    standard.rating,
-                    standard.evidence_comments,
-                    standard.submitted_by,
-                    standard.submitted_by
-                ))
-            
-            updated_standards.append(standard.standard_id)
-        
+                cursor.execute(check_query, (school_id, standard.mat_standard_id, unique_term_id))
+                existing_record = cursor.fetchone()
+
+                if existing_record:
+                    # Update existing record
+                    update_query = """
+                        UPDATE assessments
+                        SET rating = %s, evidence_comments = %s,
+                            status = CASE WHEN %s IS NOT NULL THEN 'completed' ELSE 'in_progress' END,
+                            submitted_by = %s, last_updated = %s, updated_by = %s
+                        WHERE id = %s
+                    """
+                    cursor.execute(update_query, (
+                        standard.rating,
+                        standard.evidence_comments,
+                        standard.rating,
+                        standard.submitted_by,
+                        written_at,
+                        current_user.user_id,
+                        existing_record['id']
+                    ))
+                else:
+                    # Insert new record
+                    insert_query = """
+                        INSERT INTO assessments
+                        (id, school_id, mat_standard_id, version_id, unique_term_id, academic_year,
+                         rating, evidence_comments, status, submitted_by, last_updated, updated_by)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s,
+                                CASE WHEN %s IS NOT NULL THEN 'completed' ELSE 'in_progress' END,
+                                %s, %s, %s)
+                    """
+                    new_uuid = str(uuid.uuid4())
+                    cursor.execute(insert_query, (
+                        new_uuid,
+                        school_id,
+                        standard.mat_standard_id,
+                        standards[standard.mat_standard_id]['current_version_id'],
+                        unique_term_id,
+                        academic_year,
+                        standard.rating,
+                        standard.evidence_comments,
+                        standard.rating,
+                        standard.submitted_by,
+                        written_at,
+                        current_user.user_id
+                    ))
+
+                updated_standards.append(standard.mat_standard_id)
+
+            # school_term_scores and the rating cube are updated by the
+            # assessment triggers (school_scores.TRIGGER_SQL)
+            written_terms = {(current_mat_id, unique_term_id)} if updated_standards else set()
+
         connection.close()
+        dashboard_cache.invalidate(written_terms)
+        my_work_cache.invalidate(written_terms)
+
+        # A direct save supersedes any draft still buffered for these assessments
+        await asyncio.to_thread(draft_buffer.discard_many, current_mat_id, current_user.user_id, [
+            f"{school_id}-{standards[mat_standard_id]['standard_code']}-{unique_term_id}"
+            for mat_standard_id in updated_standards
+        ])
         
         return JSONResponse(content={
             "message": f"Successfully updated {len(updated_standards)} standards",
@@ -3256,6 +4509,7 @@ async def submit_assessment_ratings(
 async def update_assessment(
     assessment_id: str,
     update_data: dict,
+    if_match: Optional[str] = Header(None),
     current_mat_id: str = Depends(get_current_mat),
     current_user: UserResponse = Depends(get_current_user)
 ):
@@ -3269,20 +4523,34 @@ async def update_assessment(
     Request Body:
     {
         "rating": 4,
-        "evidence_comments": "Excellent progress in all areas"
+        "evidence_comments": "Excellent progress in all areas",
+        "last_updated": "2024-11-02T09:15:00Z"
     }
 
+    Optimistic concurrency: pass the last_updated value you read either as an
+    If-Match header or as the "last_updated" body field. If someone else has
+    saved the assessment since, nothing is written and 409 is returned with the
+    current server state. Without a precondition the write is unconditional.
+
     Enforces MAT isolation - can only update assessments in user's MAT.
     Requires authentication.
     """
     try:
+        expected_last_updated = parse_last_updated_precondition(
+            if_match if if_match is not None else update_data.get('last_updated')
+        )
+
         connection = get_db_connection()
         cursor = connection.cursor()
 
         rating = update_data.get('rating')
         evidence_comments = update_data.get('evidence_comments')
+        written_at = datetime.utcnow().replace(microsecond=0)
+        conflict_state = None
 
-        # Update query with MAT isolation via JOIN with schools
+        # Single conditional UPDATE - MAT isolation via JOIN with schools and
+        # the last_updated precondition in the WHERE clause (no row locking).
+        # The assessment triggers update the score summaries in the same statement
         update_query = """
             UPDATE assessments a
             JOIN schools s ON a.school_id = s.school_id
@@ -3294,34 +4562,61 @@ async def update_assessment(
                     ELSE 'in_progress'
                 END,
                 a.submitted_by = %s,
-                a.last_updated = NOW(),
+                a.last_updated = %s,
                 a.updated_by = %s
             WHERE a.assessment_id = %s
               AND s.mat_id = %s
+              AND (%s IS NULL OR a.last_updated = %s)
         """
 
-        cursor.execute(update_query, (
-            rating,
-            evidence_comments,
-            rating,
-            current_user.user_id,
-            current_user.user_id,
-            assessment_id,
-            current_mat_id
-        ))
+        with db_transaction(connection):
+            cursor.execute(update_query, (
+                rating,
+                evidence_comments,
+                rating,
+                current_user.user_id,
+                written_at,
+                current_user.user_id,
+                assessment_id,
+                current_mat_id,
+                expected_last_updated,
+                expected_last_updated
+            ))
 
-        if cursor.rowcount == 0:
-            connection.close()
-            raise HTTPException(status_code=404, detail="Assessment not found")
+            written_terms = set()
+            if cursor.rowcount:
+                written_terms.add((current_mat_id, assessment_term_id(assessment_id)))
+            else:
+                # Only reached on the failure path: find out why nothing changed
+                current_state = fetch_assessment_state(cursor, assessment_id, current_mat_id)
+                if not current_state:
+                    connection.close()
+                    raise HTTPException(status_code=404, detail="Assessment not found")
+
+                if expected_last_updated is not None and \
+                        current_state['last_updated'] != expected_last_updated.strftime('%Y-%m-%dT%H:%M:%SZ'):
+                    conflict_state = current_state
 
-        connection.commit()
         connection.close()
+        dashboard_cache.invalidate(written_terms)
+        my_work_cache.invalidate(written_terms)
 
+        if conflict_state:
+            return JSONResponse(content={
+                "detail": "Assessment was changed by someone else since you loaded it",
+                "current": conflict_state
+            }, status_code=status.HTTP_409_CONFLICT)
+
+        # A direct save supersedes any draft still buffered for this assessment
+        await asyncio.to_thread(draft_buffer.discard, current_mat_id, current_user.user_id, assessment_id)
+
+        last_updated = written_at.strftime('%Y-%m-%dT%H:%M:%SZ')
         return JSONResponse(content={
             "message": "Assessment updated successfully",
             "assessment_id": assessment_id,
-            "status": "completed" if rating else "in_progress"
-        }, status_code=200)
+            "status": "completed" if rating else "in_progress",
+            "last_updated": last_updated
+        }, status_code=200, headers={"ETag": f'"{last_updated}"'})
 
     except HTTPException:
         raise
@@ -3343,7 +4638,8 @@ async def bulk_update_assessments(
             {
                 "assessment_id": "cedar-park-primary-ES1-T1-2024-25",
                 "rating": 4,
-                "evidence_comments": "Excellent"
+                "evidence_comments": "Excellent",
+                "last_updated": "2024-11-02T09:15:00Z"
             },
             {
                 "assessment_id": "cedar-park-primary-ES2-T1-2024-25",
@@ -3353,17 +4649,27 @@ async def bulk_update_assessments(
         ]
     }
 
+    Each update may carry the last_updated value it was based on. If any of
+    those assessments has since been saved by someone else, the whole batch is
+    rolled back and 409 is returned listing the current server state of each
+    conflicting assessment.
+
     Enforces MAT isolation - can only update assessments for schools in user's MAT.
     Requires authentication.
     """
     try:
+        updates = bulk_data.get('updates', [])
+        preconditions = [parse_last_updated_precondition(update.get('last_updated')) for update in updates]
+
         connection = get_db_connection()
         cursor = connection.cursor()
 
-        updates = bulk_data.get('updates', [])
         updated_count = 0
+        conflicts = []
+        written_at = datetime.utcnow().replace(microsecond=0)
 
-        # Update query with MAT isolation via JOIN with schools
+        # Update query with MAT isolation via JOIN with schools and the
+        # optional last_updated precondition
         update_query = """
             UPDATE assessments a
             JOIN schools s ON a.school_id = s.school_id
@@ -3372,37 +4678,70 @@ async def bulk_update_assessments(
                 a.evidence_comments = %s,
                 a.status = CASE WHEN %s IS NOT NULL THEN 'completed' ELSE 'in_progress' END,
                 a.submitted_by = %s,
-                a.last_updated = NOW(),
+                a.last_updated = %s,
                 a.updated_by = %s
             WHERE a.assessment_id = %s
               AND s.mat_id = %s
+              AND (%s IS NULL OR a.last_updated = %s)
         """
 
-        for update in updates:
-            assessment_id = update.get('assessment_id')
-            rating = update.get('rating')
-            evidence_comments = update.get('evidence_comments')
+        with db_transaction(connection):
+            written_terms = set()
 
-            cursor.execute(update_query, (
-                rating,
-                evidence_comments,
-                rating,
-                current_user.user_id,
-                current_user.user_id,
-                assessment_id,
-                current_mat_id
-            ))
-            updated_count += cursor.rowcount
+            for update, expected_last_updated in zip(updates, preconditions):
+                assessment_id = update.get('assessment_id')
+                rating = update.get('rating')
+                evidence_comments = update.get('evidence_comments')
+
+                cursor.execute(update_query, (
+                    rating,
+                    evidence_comments,
+                    rating,
+                    current_user.user_id,
+                    written_at,
+                    current_user.user_id,
+                    assessment_id,
+                    current_mat_id,
+                    expected_last_updated,
+                    expected_last_updated
+                ))
+                updated_count += cursor.rowcount
+
+                if cursor.rowcount:
+                    written_terms.add((current_mat_id, assessment_term_id(assessment_id)))
+                elif expected_last_updated is not None:
+                    current_state = fetch_assessment_state(cursor, assessment_id, current_mat_id)
+                    if current_state and \
+                            current_state['last_updated'] != expected_last_updated.strftime('%Y-%m-%dT%H:%M:%SZ'):
+                        conflicts.append(current_state)
+
+            if conflicts:
+                # All-or-nothing: discard the non-conflicting updates too
+                connection.rollback()
+                written_terms = set()
 
-        connection.commit()
         connection.close()
+        dashboard_cache.invalidate(written_terms)
+        my_work_cache.invalidate(written_terms)
+
+        if conflicts:
+            return JSONResponse(content={
+                "detail": f"{len(conflicts)} assessments were changed by someone else. No updates were applied.",
+                "conflicts": conflicts
+            }, status_code=status.HTTP_409_CONFLICT)
+
+        await asyncio.to_thread(draft_buffer.discard_many, current_mat_id, current_user.user_id,
+                                [update.get('assessment_id') for update in updates])
 
         return JSONResponse(content={
             "message": f"Updated {updated_count} assessments",
             "updated_count": updated_count,
-            "failed_count": len(updates) - updated_count
+            "failed_count": len(updates) - updated_count,
+            "last_updated": written_at.strftime('%Y-%m-%dT%H:%M:%SZ')
         }, status_code=200)
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -3432,85 +4771,66 @@ async def get_trends(
     - standard_type (optional): Filter by 'assurance' or 'risk'
     - from_term (optional): Start term, e.g., T1-2023-24
     - to_term (optional): End term, e.g., T1-2025-26
+
+    The from/to range and the order of the results follow the term calendar,
+    not the unique_term_id strings.
     """
     try:
+        calendar = get_term_calendar()
+        for bound in (from_term, to_term):
+            if bound and calendar.get(bound) is None:
+                raise HTTPException(status_code=404, detail=f"Term not found: {bound}")
+        range_term_ids = None
+        if from_term or to_term:
+            range_term_ids = [term['unique_term_id'] for term in calendar.range(from_term, to_term)]
+
         connection = get_db_connection()
         cursor = connection.cursor()
 
-        query = """
-            SELECT
-                a.unique_term_id,
-                a.academic_year,
-                SUBSTRING(a.unique_term_id, 1, 2) as term_id,
-                COUNT(*) as assessments_count,
-                COUNT(CASE WHEN a.rating IS NOT NULL THEN 1 END) as rated_count,
-                ROUND(AVG(a.rating), 2) as average_rating,
-                MIN(a.rating) as min_rating,
-                MAX(a.rating) as max_rating,
-                COUNT(CASE WHEN a.rating = 1 THEN 1 END) as inadequate_count,
-                COUNT(CASE WHEN a.rating = 2 THEN 1 END) as requires_improvement_count,
-                COUNT(CASE WHEN a.rating = 3 THEN 1 END) as good_count,
-                COUNT(CASE WHEN a.rating = 4 THEN 1 END) as outstanding_count,
-                COUNT(CASE WHEN a.rating = 5 THEN 1 END) as exceptional_count
-            FROM assessments a
-            JOIN schools s ON a.school_id = s.school_id
-            JOIN mat_standards ms ON a.mat_standard_id = ms.mat_standard_id
-            JOIN mat_aspects ma ON ms.mat_aspect_id = ma.mat_aspect_id
-            WHERE s.mat_id = %s
-              AND a.rating IS NOT NULL
-        """
-        params = [current_mat_id]
-
-        if school_id:
-            query += " AND a.school_id = %s"
-            params.append(school_id)
-
-        if aspect_code:
-            query += " AND ma.aspect_code = %s"
-            params.append(aspect_code)
-
-        if aspect_category:
-            query += " AND ma.aspect_category = %s"
-            params.append(aspect_category)
-
-        if standard_type:
-            query += " AND ms.standard_type = %s"
-            params.append(standard_type)
-
-        if from_term:
-            query += " AND a.unique_term_id >= %s"
-            params.append(from_term)
-
-        if to_term:
-            query += " AND a.unique_term_id <= %s"
-            params.append(to_term)
-
-        query += """
-            GROUP BY a.unique_term_id, a.academic_year
-            ORDER BY a.academic_year, FIELD(SUBSTRING(a.unique_term_id, 1, 2), 'T1', 'T2', 'T3')
-        """
-
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
+        filters = dict(
+            school_id=school_id,
+            aspect_code=aspect_code,
+            aspect_category=aspect_category,
+            standard_type=standard_type,
+            term_ids=range_term_ids
+        )
+        if ANALYTICS_ENGINE == 'columnar':
+            # Rolled up from this worker's in-memory columns for the MAT; a load
+            # or refresh reads the database, so it runs off the event loop
+            term_totals = await asyncio.to_thread(
+                analytics_engine.rollup,
+                connection, current_mat_id, calendar.terms(), ('unique_term_id', 'academic_year'), **filters
+            )
+        else:
+            # Any filter combination is a scan of the MAT's cube cells (a few per
+            # school, aspect and term); the rollup to one row per term happens here
+            cells = fetch_cube_cells(cursor, current_mat_id, **filters)
+            term_totals = rollup_cube_cells(cells, ('unique_term_id', 'academic_year'))
 
-        # Build response
+        # Build response, in term order
         trends = []
-        for row in rows:
+        for (unique_term_id, term_academic_year), counts in sorted(
+            term_totals.items(), key=lambda item: calendar.ordinal(item[0][0]) or 0
+        ):
+            ratings = summarise_ratings(counts)
+            if not ratings['rated_count']:
+                continue
+            term = calendar.get(unique_term_id)
             trends.append({
-                "unique_term_id": row['unique_term_id'],
-                "term_id": row['term_id'],
-                "academic_year": row['academic_year'],
-                "assessments_count": row['assessments_count'],
-                "rated_count": row['rated_count'],
-                "average_rating": float(row['average_rating']) if row['average_rating'] else None,
-                "min_rating": row['min_rating'],
-                "max_rating": row['max_rating'],
+                "unique_term_id": unique_term_id,
+                "term_id": term['term_id'] if term else unique_term_id.split('-', 1)[0],
+                "academic_year": term_academic_year,
+                "assessments_count": ratings['rated_count'],
+                "rated_count": ratings['rated_count'],
+                "average_rating": ratings['average_rating'],
+                "min_rating": ratings['min_rating'],
+                "max_rating": ratings['max_rating'],
                 "rating_distribution": {
-                    "inadequate": row['inadequate_count'],
-                    "requires_improvement": row['requires_improvement_count'],
-                    "good": row['good_count'],
-                    "outstanding": row['outstanding_count'],
-                    "exceptional": row['exceptional_count']
+                    "inadequate": counts['rating_1_count'],
+                    "requires_improvement": counts['rating_2_count'],
+                    "good": counts['rating_3_count'],
+                    "outstanding": counts['rating_4_count'],
+                    "exceptional": 0
                 }
             })
 
@@ -3545,9 +4865,574 @@ async def get_trends(
             "trends": trends
         }, status_code=200)
 
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/analytics/heatmap", tags=["Analytics"])
+async def get_heatmap(
+    term_id: str = Query(..., description="Term ID in format T1-2024-25 (required)"),
+    aspect_code: Optional[str] = None,
+    aspect_category: Optional[str] = None,
+    standard_type: Optional[str] = None,
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    School x standard rating grid for one term, for heatmap views.
+    Replaces one /api/assessments/by-aspect call per school and aspect.
+
+    Query Parameters:
+    - term_id: e.g., T1-2024-25 (required)
+    - aspect_code (optional): Filter columns to one aspect
+    - aspect_category (optional): Filter columns by 'ofsted' or 'operational'
+    - standard_type (optional): Filter columns by 'assurance' or 'risk'
+
+    Rows are the MAT's active schools (excluding central office) by name;
+    columns are active standards in aspect then standard order. `ratings`
+    and `rag` hold one digit per cell, row-major. `rag` already applies
+    standard_type polarity; see `rag_levels` for its digits.
+    """
+    try:
+        term = get_term_calendar().get(term_id)
+        if term is None:
+            raise HTTPException(status_code=404, detail=f"Term not found: {term_id}")
+
+        connection = get_db_connection()
+        cursor = connection.cursor()
+
+        cursor.execute("""
+            SELECT school_id, school_name
+            FROM schools
+            WHERE mat_id = %s AND is_active = TRUE AND is_central_office = FALSE
+            ORDER BY school_name, school_id
+        """, (current_mat_id,))
+        schools = cursor.fetchall()
+
+        standards_query = """
+            SELECT ms.mat_standard_id, ms.standard_code, ms.standard_name, ms.standard_type,
+                   ma.mat_aspect_id, ma.aspect_code
+            FROM mat_standards ms
+            JOIN mat_aspects ma ON ms.mat_aspect_id = ma.mat_aspect_id
+            WHERE ms.mat_id = %s AND ms.is_active = TRUE AND ma.is_active = TRUE
+        """
+        params = [current_mat_id]
+        if aspect_code:
+            standards_query += " AND ma.aspect_code = %s"
+            params.append(aspect_code)
+        if aspect_category:
+            standards_query += " AND ma.aspect_category = %s"
+            params.append(aspect_category)
+        if standard_type:
+            standards_query += " AND ms.standard_type = %s"
+            params.append(standard_type)
+        standards_query += " ORDER BY ma.sort_order, ms.sort_order, ms.standard_code"
+        cursor.execute(standards_query, params)
+        standards = cursor.fetchall()
+
+        # One scan of the term's rated assessments; cells outside the grid
+        # (filtered-out standards, inactive schools) are dropped while encoding
+        cursor.execute("""
+            SELECT a.school_id, a.mat_standard_id, a.rating
+            FROM assessments a
+            JOIN schools s ON a.school_id = s.school_id
+            WHERE s.mat_id = %s AND a.unique_term_id = %s AND a.rating IS NOT NULL
+        """, (current_mat_id, term_id))
+        ratings, rag, rated_cells = encode_rating_grid(
+            [school['school_id'] for school in schools], standards, cursor.fetchall()
+        )
+
+        connection.close()
+
+        return JSONResponse(content={
+            "mat_id": current_mat_id,
+            "unique_term_id": term_id,
+            "academic_year": term['academic_year'],
+            "filters": {
+                "aspect_code": aspect_code,
+                "aspect_category": aspect_category,
+                "standard_type": standard_type
+            },
+            "rows": [school['school_id'] for school in schools],
+            "row_names": [school['school_name'] for school in schools],
+            "columns": [standard['mat_standard_id'] for standard in standards],
+            "column_codes": [standard['standard_code'] for standard in standards],
+            "column_names": [standard['standard_name'] for standard in standards],
+            "column_aspects": [standard['aspect_code'] for standard in standards],
+            "column_types": [standard['standard_type'] for standard in standards],
+            "encoding": "row-major digits",
+            "ratings": ratings,
+            "rag": rag,
+            "rag_levels": {str(level): colour for level, colour in RAG_LEVELS.items()},
+            "rated_cells": rated_cells,
+            "total_cells": len(schools) * len(standards)
+        }, status_code=200)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/analytics/changes", tags=["Analytics"])
+async def get_rating_changes(
+    from_term: str = Query(..., description="Earlier term, e.g. T1-2025-26 (required)"),
+    to_term: str = Query(..., description="Later term, e.g. T2-2025-26 (required)"),
+    school_id: Optional[str] = None,
+    aspect_code: Optional[str] = None,
+    standard_type: Optional[str] = None,
+    min_delta: int = Query(1, ge=0, le=3, description="Minimum absolute rating change"),
+    direction: Optional[str] = Query(None, description="'improved' or 'declined'"),
+    limit: int = Query(500, ge=1, le=5000),
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Rating changes between two terms for every (school, standard) pair rated
+    in both, largest change first.
+
+    Query Parameters:
+    - from_term, to_term: the two terms to compare (required)
+    - school_id, aspect_code, standard_type (optional): filters
+    - min_delta: minimum absolute rating change (default 1; 0 includes unchanged pairs)
+    - direction (optional): 'improved' or 'declined'. Follows standard_type
+      polarity - a risk standard going from 2 to 3 has declined.
+    - limit: maximum changes returned (default 500); summary counts cover all matches
+    """
+    try:
+        calendar = get_term_calendar()
+        for bound in (from_term, to_term):
+            if calendar.get(bound) is None:
+                raise HTTPException(status_code=404, detail=f"Term not found: {bound}")
+        if direction not in (None, 'improved', 'declined'):
+            raise HTTPException(status_code=400, detail="direction must be 'improved' or 'declined'")
+
+        connection = get_db_connection()
+        cursor = connection.cursor()
+
+        # One join of the two terms on the (school, standard) cell: each
+        # from-term row probes the to-term row through the cell index
+        query = """
+            SELECT f.school_id, s.school_name, f.mat_standard_id, ms.standard_code, ms.standard_name,
+                   ms.standard_type, ma.aspect_code,
+                   f.rating as from_rating, t.rating as to_rating,
+                   CAST(t.rating AS SIGNED) - CAST(f.rating AS SIGNED) as delta
+            FROM assessments f
+            JOIN assessments t ON t.school_id = f.school_id
+                AND t.mat_standard_id = f.mat_standard_id
+                AND t.unique_term_id = %s
+            JOIN schools s ON f.school_id = s.school_id
+            JOIN mat_standards ms ON f.mat_standard_id = ms.mat_standard_id
+            JOIN mat_aspects ma ON ms.mat_aspect_id = ma.mat_aspect_id
+            WHERE s.mat_id = %s
+              AND f.unique_term_id = %s
+              AND f.rating IS NOT NULL
+              AND t.rating IS NOT NULL
+              AND ABS(CAST(t.rating AS SIGNED) - CAST(f.rating AS SIGNED)) >= %s
+        """
+        params = [to_term, current_mat_id, from_term, min_delta]
+        if school_id:
+            query += " AND f.school_id = %s"
+            params.append(school_id)
+        if aspect_code:
+            query += " AND ma.aspect_code = %s"
+            params.append(aspect_code)
+        if standard_type:
+            query += " AND ms.standard_type = %s"
+            params.append(standard_type)
+        query += " ORDER BY ABS(CAST(t.rating AS SIGNED) - CAST(f.rating AS SIGNED)) DESC, s.school_name, ma.sort_order, ms.sort_order"
+
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        connection.close()
+
+        changes = []
+        summary = {"improved": 0, "declined": 0, "unchanged": 0}
+        for row in rows:
+            movement = rag_level(row['to_rating'], row['standard_type']) - rag_level(row['from_rating'], row['standard_type'])
+            change_direction = 'improved' if movement > 0 else 'declined' if movement < 0 else 'unchanged'
+            if direction and change_direction != direction:
+                continue
+            summary[change_direction] += 1
+            if len(changes) < limit:
+                changes.append({
+                    "school_id": row['school_id'],
+                    "school_name": row['school_name'],
+                    "mat_standard_id": row['mat_standard_id'],
+                    "standard_code": row['standard_code'],
+                    "standard_name": row['standard_name'],
+                    "aspect_code": row['aspect_code'],
+                    "standard_type": row['standard_type'],
+                    "from_rating": row['from_rating'],
+                    "to_rating": row['to_rating'],
+                    "delta": int(row['delta']),
+                    "direction": change_direction
+                })
+
+        return JSONResponse(content={
+            "mat_id": current_mat_id,
+            "from_term": from_term,
+            "to_term": to_term,
+            "filters": {
+                "school_id": school_id,
+                "aspect_code": aspect_code,
+                "standard_type": standard_type,
+                "min_delta": min_delta,
+                "direction": direction
+            },
+            "summary": {
+                "total_changes": sum(summary.values()),
+                **summary,
+                "returned": len(changes)
+            },
+            "changes": changes
+        }, status_code=200)
+
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+# ================================
+# EXPORT ENDPOINTS
+# ================================
+
+def validate_export_filters(term_id: Optional[str]) -> None:
+    if term_id and get_term_calendar().get(term_id) is None:
+        raise HTTPException(status_code=404, detail=f"Term not found: {term_id}")
+
+@app.get("/api/exports/assessments", tags=["Exports"])
+async def stream_assessment_export(
+    term_id: Optional[str] = None,
+    academic_year: Optional[str] = None,
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(verify_mat_admin)
+):
+    """
+    Stream the MAT's assessments as CSV. MAT Administrators only.
+
+    Query Parameters:
+    - term_id (optional): Export one term, e.g. T1-2024-25
+    - academic_year (optional): Export one academic year, e.g. 2024-25
+
+    Rows come from a server-side cursor a batch at a time, so memory use does
+    not grow with the export. For Parquet/Arrow, or to download later, use
+    POST /api/exports/assessments.
+    """
+    try:
+        validate_export_filters(term_id)
+        query, params = export_query(current_mat_id, unique_term_id=term_id, academic_year=academic_year)
+        connection = get_db_connection()
+
+        def stream():
+            try:
+                yield from csv_chunks(iter_export_batches(connection, query, params))
+            finally:
+                connection.close()
+
+        filename = f"assessments-{current_mat_id}-{term_id or academic_year or 'all'}.csv"
+        return StreamingResponse(
+            stream(),
+            media_type=EXPORT_FORMATS['csv'],
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/exports/assessments", tags=["Exports"], status_code=status.HTTP_202_ACCEPTED)
+async def start_assessment_export(
+    export_request: AssessmentExportRequest,
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(verify_mat_admin)
+):
+    """
+    Start a background export of the MAT's assessments. MAT Administrators only.
+
+    Request Body:
+    - format: 'csv' (default), 'parquet' or 'arrow'
+    - term_id, academic_year (optional): filters
+
+    Poll GET /api/exports/{job_id} until status is 'completed', then fetch
+    GET /api/exports/{job_id}/download. Files are kept for EXPORT_RETENTION_SECONDS.
+    """
+    try:
+        if export_request.format not in EXPORT_FORMATS:
+            raise HTTPException(status_code=400, detail=f"Unsupported format: {export_request.format}")
+        if export_request.format not in available_formats():
+            raise HTTPException(status_code=501, detail=f"{export_request.format} export is not available on this server")
+        validate_export_filters(export_request.term_id)
+
+        job = await asyncio.to_thread(
+            export_jobs.start,
+            current_mat_id,
+            current_user.user_id,
+            export_request.format,
+            {"unique_term_id": export_request.term_id, "academic_year": export_request.academic_year}
+        )
+        return JSONResponse(content={
+            "job_id": job['job_id'],
+            "status": job['status'],
+            "format": job['format'],
+            "status_url": f"/api/exports/{job['job_id']}",
+            "download_url": f"/api/exports/{job['job_id']}/download"
+        }, status_code=202)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/exports/{job_id}", tags=["Exports"])
+async def get_export_job(
+    job_id: str,
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(verify_mat_admin)
+):
+    """Status of a background export: queued, running, completed or failed"""
+    try:
+        job = await asyncio.to_thread(export_jobs.get, job_id, current_mat_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Export not found")
+        return JSONResponse(content=job, status_code=200)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch export: {str(e)}")
+
+@app.get("/api/exports/{job_id}/download", tags=["Exports"])
+async def download_export(
+    job_id: str,
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(verify_mat_admin)
+):
+    """
+    Download a completed export file. From Cloud Storage this is a redirect
+    to a short-lived signed URL; local storage is served directly.
+    """
+    try:
+        job = await asyncio.to_thread(export_jobs.get, job_id, current_mat_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Export not found")
+        if job['status'] != 'completed':
+            raise HTTPException(status_code=409, detail=f"Export is {job['status']}")
+
+        url = await asyncio.to_thread(export_jobs.storage.download_url, export_key(job))
+        if url:
+            return RedirectResponse(url, status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+        return FileResponse(
+            export_jobs.storage.path(export_key(job)),
+            media_type=EXPORT_FORMATS[job['format']],
+            filename=f"assessments-{current_mat_id}-{job_id}.{job['format']}"
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to download export: {str(e)}")
+
+# ================================
+# ONBOARDING ENDPOINTS
+# ================================
+
+@app.post("/api/onboarding/catalogue", tags=["Onboarding"], status_code=status.HTTP_202_ACCEPTED)
+async def start_catalogue_onboarding(
+    onboarding_request: CatalogueOnboardingRequest,
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(verify_mat_admin)
+):
+    """
+    Copy the default catalogue into the MAT as a background job. MAT Administrators only.
+
+    Request Body:
+    - aspect_codes (optional): aspects to copy, each with all its standards
+    - standard_codes (optional): standards to copy, each with its aspect
+    With neither, the whole default catalogue is copied.
+
+    Aspects, standards, v1 versions and 'created' edit log entries are written
+    in one transaction. Poll GET /api/onboarding/jobs/{job_id} for the outcome.
+    """
+    try:
+        selection = {
+            "aspect_codes": [code.upper() for code in onboarding_request.aspect_codes or []] or None,
+            "standard_codes": [code.upper() for code in onboarding_request.standard_codes or []] or None
+        }
+
+        # Fail fast on unknown or already adopted codes; the job re-checks
+        # inside its own transaction
+        connection = get_db_connection()
+        cursor = connection.cursor()
+        try:
+            aspects, standards = plan_catalogue_copy(cursor, current_mat_id, **selection)
+        except CatalogueConflict as e:
+            connection.close()
+            raise HTTPException(status_code=409, detail=str(e))
+        except ValueError as e:
+            connection.close()
+            raise HTTPException(status_code=400, detail=str(e))
+        connection.close()
+
+        job = await asyncio.to_thread(onboarding_jobs.start, current_mat_id, current_user.user_id, selection)
+        return JSONResponse(content={
+            "job_id": job['job_id'],
+            "status": job['status'],
+            "aspects_to_create": len(aspects),
+            "standards_to_create": len(standards),
+            "status_url": f"/api/onboarding/jobs/{job['job_id']}"
+        }, status_code=202)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/onboarding/jobs/{job_id}", tags=["Onboarding"])
+async def get_onboarding_job(
+    job_id: str,
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(verify_mat_admin)
+):
+    """Status of a catalogue copy: queued, running, completed or failed"""
+    try:
+        job = await asyncio.to_thread(onboarding_jobs.get, job_id, current_mat_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Onboarding job not found")
+        return JSONResponse(content=job, status_code=200)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch onboarding job: {str(e)}")
+
+# ================================
+# EVIDENCE ENDPOINTS
+# ================================
+
+EVIDENCE_RECORD_QUERY = """
+    SELECT
+        e.id,
+        e.mat_standard_id,
+        e.school_id,
+        e.unique_term_id,
+        e.evidence_type,
+        e.file_path,
+        e.url,
+        e.original_filename,
+        e.size_bytes,
+        e.sha256,
+        e.uploaded_by,
+        u.full_name as uploaded_by_name,
+        e.created_at
+    FROM standard_evidence e
+    LEFT JOIN users u ON e.uploaded_by = u.user_id
+    WHERE e.id = %s AND e.mat_id = %s
+"""
+
+@app.post("/evidence/upload", tags=["Evidence"], status_code=status.HTTP_201_CREATED)
+async def upload_evidence(
+    request: Request,
+    current_mat_id: str = Depends(get_current_mat),
+    current_user: UserResponse = Depends(get_current_user)
+):
+    """
+    Attach a file to an assessment cell (standard, school, term).
+
+    multipart/form-data with mat_standard_id, school_id and unique_term_id,
+    followed by the file in a field named "file". The body is streamed to
+    evidence storage and hashed as it arrives (see evidence_upload.py); it is
+    never held in memory.
+
+    - 413 as soon as the file passes EVIDENCE_MAX_BYTES (25 MB)
+    - 415 for anything but PDF, Word, Excel and image files
+    - Enforces MAT isolation. Requires authentication.
+    """
+    connection = None
+    stored = None
+    try:
+        try:
+            boundary = multipart_boundary(request.headers.get('content-type', ''))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        max_request_bytes = EVIDENCE_MAX_BYTES + MULTIPART_OVERHEAD_BYTES
+        content_length = request.headers.get('content-length', '')
+        if content_length.isdigit() and int(content_length) > max_request_bytes:
+            raise HTTPException(status_code=413, detail=f"File exceeds {EVIDENCE_MAX_BYTES // (1024 * 1024)} MB")
+
+        connection = get_db_connection()
+        cursor = connection.cursor()
+
+        def check_fields(fields: dict) -> None:
+            cursor.execute(
+                "SELECT mat_standard_id FROM mat_standards WHERE mat_standard_id = %s AND mat_id = %s",
+                (fields['mat_standard_id'], current_mat_id)
+            )
+            if not cursor.fetchone():
+                raise HTTPException(status_code=403, detail="mat_standard_id does not belong to your MAT")
+            cursor.execute(
+                "SELECT school_id FROM schools WHERE school_id = %s AND mat_id = %s",
+                (fields['school_id'], current_mat_id)
+            )
+            if not cursor.fetchone() or not get_term_calendar().get(fields['unique_term_id']):
+                raise HTTPException(status_code=400, detail="Invalid school_id or unique_term_id")
+
+        upload = EvidenceUpload(boundary, evidence_storage, current_mat_id, check_fields)
+        try:
+            stored = await stream_upload(request.stream(), upload, max_request_bytes)
+        except EvidenceTooLarge as e:
+            raise HTTPException(status_code=413, detail=str(e))
+        except UnsupportedEvidenceType as e:
+            raise HTTPException(status_code=415, detail=str(e))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        evidence_id = str(uuid.uuid4())
+        with db_transaction(connection):
+            cursor.execute("""
+                INSERT INTO standard_evidence
+                (id, mat_id, mat_standard_id, school_id, unique_term_id, evidence_type,
+                 file_path, url, original_filename, size_bytes, sha256, uploaded_by, created_at)
+                VALUES (%s, %s, %s, %s, %s, 'file', %s, NULL, %s, %s, %s, %s, NOW())
+            """, (evidence_id, current_mat_id, stored['mat_standard_id'], stored['school_id'],
+                  stored['unique_term_id'], stored['file_path'], stored['original_filename'],
+                  stored['size_bytes'], stored['sha256'], current_user.user_id))
+        # Committed: the file now belongs to the row
+        stored = None
+
+        cursor.execute(EVIDENCE_RECORD_QUERY, (evidence_id, current_mat_id))
+        record = cursor.fetchone()
+        connection.close()
+
+        if record['created_at']:
+            record['created_at'] = record['created_at'].strftime('%Y-%m-%dT%H:%M:%SZ')
+        record = process_row_for_json(record)
+        loop = asyncio.get_running_loop()
+        record['download_url'] = await loop.run_in_executor(
+            evidence_executor, evidence_storage.download_url, record['file_path']
+        )
+        return JSONResponse(content=record, status_code=201)
+
+    except HTTPException:
+        if connection and connection.open:
+            connection.close()
+        raise
+    except Exception as e:
+        if connection and connection.open:
+            connection.rollback()
+            connection.close()
+        # The file is stored but has no row: remove it, best effort
+        if stored is not None:
+            try:
+                await asyncio.get_running_loop().run_in_executor(
+                    evidence_executor, evidence_storage.delete, stored['file_path']
+                )
+            except Exception as delete_error:
+                print(f"⚠️ Failed to delete orphaned evidence {stored['file_path']}: {delete_error}")
+        raise HTTPException(status_code=500, detail=f"Failed to upload evidence: {str(e)}")
+
 # ================================
 # STARTUP EVENT
 # ================================
@@ -3558,6 +5443,29 @@ async def startup_event():
     print("🚀 Assurly API starting up...")
     print("📧 Email service configured")
     print("🔐 Authentication system ready")
+
+    # Replay drafts spilled by workers that stopped before flushing, then
+    # start the periodic draft flush
+    recovered = draft_buffer.open_spill()
+    if recovered:
+        print(f"📝 Recovered {recovered} buffered draft edits")
+    asyncio.create_task(run_draft_flusher())
+
+    # Jobs whose worker stopped mid-job would otherwise stay running
+    for label, jobs in (("user imports", user_import_jobs), ("exports", export_jobs),
+                        ("onboarding jobs", onboarding_jobs)):
+        try:
+            stale = await asyncio.to_thread(jobs.fail_stale)
+            if stale:
+                print(f"🧹 Marked {stale} interrupted {label} as failed")
+        except Exception as e:
+            print(f"⚠️ Interrupted {label} not checked: {e}")
+
+    try:
+        get_term_calendar()
+        print(f"📅 Term calendar loaded: {len(term_calendar.terms())} terms")
+    except Exception as e:
+        print(f"⚠️ Term calendar not loaded, will retry on first use: {e}")
     
     # Test email service connection (optional)
     try:
@@ -3568,6 +5476,16 @@ async def startup_event():
     except Exception as e:
         print(f"⚠️ Email service test skipped: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Flush buffered drafts before the worker exits"""
+    try:
+        await asyncio.to_thread(flush_assessment_drafts)
+    except Exception as e:
+        # Drafts stay in the spill file and are replayed by the next worker
+        print(f"⚠️ Draft flush on shutdown failed: {e}")
+    draft_buffer.close_spill()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,221 @@
+"""
+Per-user workload for GET /api/assessments/my-work.
+
+A user's work is every outstanding assessment (status not_started or
+in_progress) covered by their user_aspect_assignments: the assignment's
+aspect, in its school or - when school_id is NULL - in every school of the
+MAT. MY_WORK_SQL starts from the user's assignments (the leading user_id of
+uk_user_aspect_school) and joins out to mat_standards and assessments, so its
+cost follows the size of the user's remit rather than the MAT.
+
+Results are cached per user. Each entry records a token read in the same
+snapshot as the payload (read_my_work_token): the user's assignment set, the
+MAT's catalogue_version and the MAT's school_term_scores revisions, which
+every assessment write bumps. A cached payload is served only while the
+token is unchanged, so writes through another worker are picked up on the
+next request. This worker's own writes also drop entries straight away:
+assignment writes by user (invalidate_user), assessment writes by MAT
+(invalidate).
+"""
+
+import os
+import threading
+import time
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MY_WORK_CACHE_TTL_SECONDS = int(os.getenv('MY_WORK_CACHE_TTL_SECONDS', '300'))
+MY_WORK_CACHE_MAX_ENTRIES = int(os.getenv('MY_WORK_CACHE_MAX_ENTRIES', '2000'))
+
+# One round trip: catalogue version, a fingerprint of the user's assignments
+# and the MAT's score revisions (idx_scores_mat_term)
+MY_WORK_TOKEN_SQL = """
+    SELECT
+        m.catalogue_version,
+        ua.assignment_count,
+        ua.assignment_sum,
+        sts.score_rows,
+        sts.revisions,
+        sts.last_updated
+    FROM mats m
+    CROSS JOIN (
+        SELECT COUNT(*) as assignment_count,
+               CAST(COALESCE(SUM(CRC32(assignment_id)), 0) AS UNSIGNED) as assignment_sum
+        FROM user_aspect_assignments
+        WHERE user_id = %s
+    ) ua
+    CROSS JOIN (
+        SELECT COUNT(*) as score_rows,
+               CAST(COALESCE(SUM(revision), 0) AS SIGNED) as revisions,
+               MAX(last_updated) as last_updated
+        FROM school_term_scores
+        WHERE mat_id = %s
+    ) sts
+    WHERE m.mat_id = %s
+"""
+
+# DISTINCT because an all-schools and a single-school assignment for the same
+# aspect both match that school's assessments
+MY_WORK_SQL = """
+    SELECT DISTINCT
+        a.id,
+        a.assessment_id,
+        a.school_id,
+        s.school_name,
+        ma.mat_aspect_id,
+        UPPER(ma.aspect_code) as aspect_code,
+        ma.aspect_name,
+        ma.sort_order as aspect_sort_order,
+        ms.mat_standard_id,
+        ms.standard_code,
+        ms.standard_name,
+        ms.sort_order as standard_sort_order,
+        a.unique_term_id,
+        a.academic_year,
+        a.status,
+        a.rating,
+        a.due_date,
+        a.last_updated
+    FROM user_aspect_assignments uaa
+    JOIN mat_aspects ma ON ma.mat_aspect_id = uaa.mat_aspect_id AND ma.is_active = 1
+    JOIN mat_standards ms ON ms.mat_aspect_id = uaa.mat_aspect_id AND ms.is_active = 1
+    JOIN assessments a ON a.mat_standard_id = ms.mat_standard_id
+        AND a.status IN ('not_started', 'in_progress')
+        AND (uaa.school_id IS NULL OR a.school_id = uaa.school_id)
+    JOIN schools s ON s.school_id = a.school_id
+    WHERE uaa.user_id = %s
+      AND ma.mat_id = %s
+      AND s.mat_id = %s
+      AND s.is_active = 1
+    ORDER BY a.due_date IS NULL, a.due_date, a.academic_year, a.unique_term_id,
+             s.school_name, ma.sort_order, ms.sort_order
+"""
+
+def read_my_work_token(cursor, mat_id: str, user_id: str) -> tuple:
+    cursor.execute(MY_WORK_TOKEN_SQL, (user_id, mat_id, mat_id))
+    row = cursor.fetchone()
+    if not row:
+        return ()
+    return (row['catalogue_version'], row['assignment_count'], row['assignment_sum'],
+            row['score_rows'], row['revisions'], row['last_updated'])
+
+def _format_date(value) -> Optional[str]:
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%dT%H:%M:%SZ')
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    return value
+
+def group_my_work(rows: Iterable[dict]) -> List[dict]:
+    """
+    Standard-level rows (in MY_WORK_SQL order) grouped into one item per
+    school, aspect and term - the same grouping as GET /api/assessments.
+    Items keep the order of their earliest due date.
+    """
+    items: Dict[str, dict] = {}
+    for row in rows:
+        group_id = f"{row['school_id']}-{row['aspect_code']}-{row['unique_term_id']}"
+        item = items.get(group_id)
+        if item is None:
+            item = items[group_id] = {
+                'group_id': group_id,
+                'school_id': row['school_id'],
+                'school_name': row['school_name'],
+                'mat_aspect_id': row['mat_aspect_id'],
+                'aspect_code': row['aspect_code'],
+                'aspect_name': row['aspect_name'],
+                'term_id': row['unique_term_id'][:2],
+                'unique_term_id': row['unique_term_id'],
+                'academic_year': row['academic_year'],
+                'due_date': _format_date(row['due_date']),
+                'status': 'not_started',
+                'outstanding_standards': 0,
+                'rated_standards': 0,
+                'last_updated': None,
+                'standards': []
+            }
+        item['outstanding_standards'] += 1
+        if row['rating'] is not None:
+            item['rated_standards'] += 1
+        if row['status'] == 'in_progress' or row['rating'] is not None:
+            item['status'] = 'in_progress'
+        last_updated = _format_date(row['last_updated'])
+        if last_updated and (item['last_updated'] is None or last_updated > item['last_updated']):
+            item['last_updated'] = last_updated
+        item['standards'].append({
+            'id': row['id'],
+            'assessment_id': row['assessment_id'],
+            'mat_standard_id': row['mat_standard_id'],
+            'standard_code': row['standard_code'],
+            'standard_name': row['standard_name'],
+            'status': row['status'],
+            'rating': row['rating'],
+            'due_date': _format_date(row['due_date']),
+            'sort_order': row['standard_sort_order']
+        })
+
+    for item in items.values():
+        item['standards'].sort(key=lambda standard: (standard['sort_order'] is None, standard['sort_order']))
+        for standard in item['standards']:
+            del standard['sort_order']
+    return list(items.values())
+
+def load_my_work(cursor, mat_id: str, user_id: str) -> Tuple[List[dict], tuple]:
+    """(items, token), both read on the caller's connection so they come from one snapshot"""
+    token = read_my_work_token(cursor, mat_id, user_id)
+    cursor.execute(MY_WORK_SQL, (user_id, mat_id, mat_id))
+    return group_my_work(cursor.fetchall()), token
+
+class MyWorkCache:
+    """
+    In-memory, per-worker, keyed by (mat_id, user_id). Guarded by a lock
+    because invalidate() is also called from the background draft flush thread.
+    """
+
+    def __init__(self, ttl_seconds: int = MY_WORK_CACHE_TTL_SECONDS, max_entries: int = MY_WORK_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: Dict[Tuple[str, str], dict] = {}
+
+    def get(self, mat_id: str, user_id: str) -> Optional[dict]:
+        """
+        Cached entry ({items, token}) or None. The caller must check
+        entry['token'] against read_my_work_token() before serving it.
+        """
+        with self._lock:
+            entry = self._entries.get((mat_id, user_id))
+            if entry and entry['expires_at'] <= time.time():
+                del self._entries[(mat_id, user_id)]
+                return None
+            return entry
+
+    def put(self, mat_id: str, user_id: str, items: List[dict], token: tuple) -> None:
+        key = (mat_id, user_id)
+        with self._lock:
+            if len(self._entries) >= self.max_entries and key not in self._entries:
+                # Evict whichever entry expires soonest
+                oldest = min(self._entries, key=lambda k: self._entries[k]['expires_at'])
+                del self._entries[oldest]
+            self._entries[key] = {
+                'items': items,
+                'token': token,
+                'expires_at': time.time() + self.ttl_seconds
+            }
+
+    def invalidate(self, written_terms: Iterable[Tuple[str, str]]) -> None:
+        """Drop every entry of the MATs in the (mat_id, unique_term_id) pairs written"""
+        mat_ids = {mat_id for mat_id, _ in written_terms}
+        if not mat_ids:
+            return
+        with self._lock:
+            for key in [k for k in self._entries if k[0] in mat_ids]:
+                del self._entries[key]
+
+    def invalidate_user(self, user_id: str) -> None:
+        with self._lock:
+            for key in [k for k in self._entries if k[1] == user_id]:
+                del self._entries[key]
+
+# Shared instance used by the API
+my_work_cache = MyWorkCache()
@@ -0,0 +1,374 @@
+"""
+MAT onboarding: copy the default catalogue into a MAT.
+
+copy_default_catalogue() clones a chosen subset of aspects / standards into
+mat_aspects and mat_standards, with a v1 standard_versions row and a
+'created' standard_edit_log entry for each standard. Each table is written
+with one multi-row INSERT inside the caller's transaction, so the number of
+statements does not grow with the size of the catalogue.
+
+The API runs the copy as a background job (OnboardingJobs). Job state lives
+in the onboarding_jobs table, so any worker or instance can report on a job.
+A queued or running job whose heartbeat is ONBOARDING_STALE_SECONDS old
+belongs to a worker that stopped, and is marked failed - at startup, and
+whenever it is read. The copy is one transaction, so a failed job created
+nothing.
+"""
+
+import json
+import os
+import threading
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from catalogue_cache import bump_catalogue_version
+
+ONBOARDING_STALE_SECONDS = int(os.getenv('ONBOARDING_STALE_SECONDS', '900'))
+
+# Rows per INSERT statement; the full default catalogue fits in one
+INSERT_BATCH_ROWS = 1000
+
+CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS onboarding_jobs (
+        job_id             CHAR(32)     NOT NULL,
+        mat_id             CHAR(36)     NOT NULL,
+        requested_by       CHAR(36)     NOT NULL,
+        selection          TEXT         NOT NULL,  -- JSON object
+        status             ENUM('queued', 'running', 'completed', 'failed') NOT NULL DEFAULT 'queued',
+        aspects_created    INT          NULL,
+        standards_created  INT          NULL,
+        error              TEXT         NULL,
+        created_at         TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        heartbeat_at       TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        completed_at       TIMESTAMP    NULL,
+        PRIMARY KEY (job_id),
+        KEY idx_onboarding_jobs_mat (mat_id, created_at),
+        KEY idx_onboarding_jobs_stale (status, heartbeat_at)
+    )
+"""
+
+INSERT_JOB_SQL = """
+    INSERT INTO onboarding_jobs (job_id, mat_id, requested_by, selection, status)
+    VALUES (%s, %s, %s, %s, %s)
+"""
+
+# Assignments apply left to right, so completed_at sees the new status
+SAVE_JOB_SQL = """
+    UPDATE onboarding_jobs
+    SET status = %s, aspects_created = %s, standards_created = %s, error = %s, heartbeat_at = NOW(),
+        completed_at = IF(status IN ('completed', 'failed'), NOW(), NULL)
+    WHERE job_id = %s
+"""
+
+GET_JOB_SQL = "SELECT * FROM onboarding_jobs WHERE job_id = %s AND mat_id = %s"
+
+# Queued or running jobs whose worker stopped refreshing the heartbeat
+FAIL_STALE_SQL = """
+    UPDATE onboarding_jobs
+    SET status = 'failed',
+        error = 'The copy stopped responding before it finished, most likely because the server restarted',
+        completed_at = NOW()
+    WHERE status IN ('queued', 'running') AND heartbeat_at < NOW() - INTERVAL %s SECOND
+    {where}
+"""
+
+class CatalogueConflict(ValueError):
+    """The MAT already has some of the codes being copied"""
+
+DEFAULT_ASPECTS_SQL = """
+    SELECT aspect_id, aspect_code, aspect_name, aspect_description, aspect_category, sort_order
+    FROM aspects
+    ORDER BY sort_order, aspect_code
+"""
+
+DEFAULT_STANDARDS_SQL = """
+    SELECT st.standard_id, st.standard_code, st.standard_name, st.standard_description,
+           st.standard_type, st.sort_order, a.aspect_code
+    FROM standards st
+    JOIN aspects a ON st.aspect_id = a.aspect_id
+    ORDER BY a.sort_order, st.sort_order, st.standard_code
+"""
+
+def select_catalogue(aspects: List[dict], standards: List[dict], aspect_codes: Optional[List[str]] = None,
+                     standard_codes: Optional[List[str]] = None) -> Tuple[List[dict], List[dict]]:
+    """
+    The part of the default catalogue to copy. With no codes, all of it.
+    aspect_codes takes those aspects with all their standards; standard_codes
+    takes those standards plus their aspects. Unknown codes raise ValueError.
+    """
+    if not aspect_codes and not standard_codes:
+        return aspects, standards
+
+    known_aspects = {aspect['aspect_code'] for aspect in aspects}
+    known_standards = {standard['standard_code'] for standard in standards}
+    unknown = sorted(set(aspect_codes or []) - known_aspects) + sorted(set(standard_codes or []) - known_standards)
+    if unknown:
+        raise ValueError(f"Unknown catalogue codes: {', '.join(unknown)}")
+
+    chosen_aspects = set(aspect_codes or [])
+    chosen_standards = set(standard_codes or [])
+    selected_standards = [
+        standard for standard in standards
+        if standard['aspect_code'] in chosen_aspects or standard['standard_code'] in chosen_standards
+    ]
+    chosen_aspects |= {standard['aspect_code'] for standard in selected_standards}
+    return [aspect for aspect in aspects if aspect['aspect_code'] in chosen_aspects], selected_standards
+
+def catalogue_rows(mat_id: str, user_id: str, aspects: List[dict], standards: List[dict]) -> Dict[str, List[tuple]]:
+    """Parameter tuples for each table's INSERT, in the column order of INSERT_STATEMENTS"""
+    rows = {'mat_aspects': [], 'mat_standards': [], 'standard_versions': [], 'standard_edit_log': []}
+    for aspect in aspects:
+        rows['mat_aspects'].append((
+            f"{mat_id}-{aspect['aspect_code']}", mat_id, aspect['aspect_id'], aspect['aspect_code'],
+            aspect['aspect_name'], aspect['aspect_description'], aspect['aspect_category'],
+            aspect['sort_order'], user_id
+        ))
+    for standard in standards:
+        mat_standard_id = f"{mat_id}-{standard['standard_code']}"
+        version_id = f"{mat_standard_id}-v1"
+        rows['mat_standards'].append((
+            mat_standard_id, mat_id, f"{mat_id}-{standard['aspect_code']}", standard['standard_id'],
+            standard['standard_code'], standard['standard_name'], standard['standard_description'],
+            standard['standard_type'], standard['sort_order'], user_id
+        ))
+        rows['standard_versions'].append((
+            version_id, mat_standard_id, standard['standard_code'], standard['standard_name'],
+            standard['standard_description'], standard['standard_type'], user_id
+        ))
+        rows['standard_edit_log'].append((
+            str(uuid.uuid4()), mat_id, mat_standard_id, version_id, user_id,
+            json.dumps({"version_id": version_id, "name": standard['standard_name']})
+        ))
+    return rows
+
+# (INSERT prefix, one row's VALUES template) per table, in foreign key order
+INSERT_STATEMENTS = {
+    'mat_aspects': (
+        """INSERT INTO mat_aspects
+           (mat_aspect_id, mat_id, source_aspect_id, aspect_code, aspect_name, aspect_description,
+            aspect_category, sort_order, is_custom, is_modified, is_active, created_at, updated_at,
+            created_by_user_id)""",
+        "(%s, %s, %s, %s, %s, %s, %s, %s, 0, 0, 1, NOW(), NOW(), %s)"
+    ),
+    'mat_standards': (
+        """INSERT INTO mat_standards
+           (mat_standard_id, mat_id, mat_aspect_id, source_standard_id, standard_code, standard_name,
+            standard_description, standard_type, sort_order, current_version_id, is_custom, is_modified,
+            is_active, created_at, updated_at, created_by_user_id)""",
+        "(%s, %s, %s, %s, %s, %s, %s, %s, %s, NULL, 0, 0, 1, NOW(), NOW(), %s)"
+    ),
+    'standard_versions': (
+        """INSERT INTO standard_versions
+           (version_id, mat_standard_id, version_number, standard_code, standard_name,
+            standard_description, standard_type, effective_from, effective_to,
+            created_by_user_id, change_reason, created_at)""",
+        "(%s, %s, 1, %s, %s, %s, %s, NOW(), NULL, %s, 'Initial version', NOW())"
+    ),
+    'standard_edit_log': (
+        """INSERT INTO standard_edit_log
+           (log_id, mat_id, mat_standard_id, version_id, action_type, edited_by_user_id,
+            edited_at, old_values, new_values, change_reason)""",
+        "(%s, %s, %s, %s, 'created', %s, NOW(), NULL, %s, 'Onboarding')"
+    ),
+}
+
+def _insert(cursor, table: str, rows: List[tuple]) -> None:
+    prefix, row_template = INSERT_STATEMENTS[table]
+    for i in range(0, len(rows), INSERT_BATCH_ROWS):
+        batch = rows[i:i + INSERT_BATCH_ROWS]
+        cursor.execute(f"{prefix} VALUES {', '.join([row_template] * len(batch))}",
+                       [value for row in batch for value in row])
+
+def plan_catalogue_copy(cursor, mat_id: str, aspect_codes: Optional[List[str]] = None,
+                        standard_codes: Optional[List[str]] = None) -> Tuple[List[dict], List[dict]]:
+    """
+    Read the defaults and pick the subset to copy. Raises ValueError for
+    unknown codes, or CatalogueConflict if the MAT already has any of the
+    chosen codes.
+    """
+    cursor.execute(DEFAULT_ASPECTS_SQL)
+    all_aspects = cursor.fetchall()
+    cursor.execute(DEFAULT_STANDARDS_SQL)
+    aspects, standards = select_catalogue(all_aspects, cursor.fetchall(), aspect_codes, standard_codes)
+    if not aspects:
+        raise ValueError("Nothing to copy")
+
+    aspect_ids = [f"{mat_id}-{aspect['aspect_code']}" for aspect in aspects]
+    standard_ids = [f"{mat_id}-{standard['standard_code']}" for standard in standards] or [None]
+    cursor.execute(f"""
+        SELECT aspect_code as code FROM mat_aspects
+        WHERE mat_id = %s AND mat_aspect_id IN ({','.join(['%s'] * len(aspect_ids))})
+        UNION ALL
+        SELECT standard_code FROM mat_standards
+        WHERE mat_id = %s AND mat_standard_id IN ({','.join(['%s'] * len(standard_ids))})
+    """, [mat_id] + aspect_ids + [mat_id] + standard_ids)
+    existing = [row['code'] for row in cursor.fetchall()]
+    if existing:
+        raise CatalogueConflict(f"MAT already has: {', '.join(existing)}")
+    return aspects, standards
+
+def copy_default_catalogue(cursor, mat_id: str, user_id: str, aspect_codes: Optional[List[str]] = None,
+                           standard_codes: Optional[List[str]] = None) -> dict:
+    """
+    Clone the chosen defaults into the MAT. Run inside a transaction; nothing
+    is committed here.
+
+    Returns:
+        dict: aspects_created and standards_created
+    """
+    aspects, standards = plan_catalogue_copy(cursor, mat_id, aspect_codes, standard_codes)
+    rows = catalogue_rows(mat_id, user_id, aspects, standards)
+
+    _insert(cursor, 'mat_aspects', rows['mat_aspects'])
+    if standards:
+        _insert(cursor, 'mat_standards', rows['mat_standards'])
+        _insert(cursor, 'standard_versions', rows['standard_versions'])
+        # Only the standards inserted above - their v1 rows exist
+        standard_ids = [row[0] for row in rows['mat_standards']]
+        for i in range(0, len(standard_ids), INSERT_BATCH_ROWS):
+            batch = standard_ids[i:i + INSERT_BATCH_ROWS]
+            cursor.execute(f"""
+                UPDATE mat_standards SET current_version_id = CONCAT(mat_standard_id, '-v1')
+                WHERE mat_id = %s AND mat_standard_id IN ({','.join(['%s'] * len(batch))})
+            """, [mat_id] + batch)
+        _insert(cursor, 'standard_edit_log', rows['standard_edit_log'])
+
+    cursor.execute("""
+        UPDATE mats SET onboarding_status = 'completed', onboarding_completed_at = NOW()
+        WHERE mat_id = %s
+    """, (mat_id,))
+    bump_catalogue_version(cursor, mat_id)
+    return {'aspects_created': len(aspects), 'standards_created': len(standards)}
+
+def _timestamp(value) -> Optional[str]:
+    return value.strftime('%Y-%m-%dT%H:%M:%SZ') if value else None
+
+class OnboardingJobs:
+    """
+    Background catalogue copies; each job is an onboarding_jobs row.
+    connect() opens a database connection for the copy and the job state;
+    it is set by the API.
+    """
+
+    def __init__(self, connect: Optional[Callable[[], object]] = None,
+                 stale_seconds: int = ONBOARDING_STALE_SECONDS):
+        self.connect = connect
+        self.stale_seconds = stale_seconds
+
+    def _save(self, connection, job: dict) -> None:
+        cursor = connection.cursor()
+        cursor.execute(SAVE_JOB_SQL, (job['status'], job.get('aspects_created'), job.get('standards_created'),
+                                      job.get('error'), job['job_id']))
+        connection.commit()
+
+    def fail_stale(self) -> int:
+        """Mark queued or running jobs with an expired heartbeat as failed; returns how many"""
+        connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(FAIL_STALE_SQL.format(where=""), (self.stale_seconds,))
+            connection.commit()
+            return cursor.rowcount
+        finally:
+            connection.close()
+
+    def get(self, job_id: str, mat_id: str) -> Optional[dict]:
+        """Job state, or None if it doesn't exist or belongs to another MAT"""
+        if not job_id.isalnum():
+            return None
+        connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(GET_JOB_SQL, (job_id, mat_id))
+            row = cursor.fetchone()
+            if row and row['status'] in ('queued', 'running'):
+                cursor.execute(FAIL_STALE_SQL.format(where="AND job_id = %s"), (self.stale_seconds, job_id))
+                connection.commit()
+                if cursor.rowcount:
+                    cursor.execute(GET_JOB_SQL, (job_id, mat_id))
+                    row = cursor.fetchone()
+        finally:
+            connection.close()
+        if row is None:
+            return None
+        return {
+            'job_id': row['job_id'],
+            'mat_id': row['mat_id'],
+            'requested_by': row['requested_by'],
+            'selection': json.loads(row['selection']),
+            'status': row['status'],
+            'aspects_created': row['aspects_created'],
+            'standards_created': row['standards_created'],
+            'error': row['error'],
+            'created_at': _timestamp(row['created_at']),
+            'completed_at': _timestamp(row['completed_at'])
+        }
+
+    def start(self, mat_id: str, requested_by: str, selection: dict) -> dict:
+        """Record a queued job and run it on a background thread. Blocking - run off the event loop."""
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'mat_id': mat_id,
+            'requested_by': requested_by,
+            'selection': selection,
+            'status': 'queued',
+            'aspects_created': None,
+            'standards_created': None,
+            'error': None,
+            'created_at': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'completed_at': None
+        }
+        connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(INSERT_JOB_SQL, (job['job_id'], mat_id, requested_by, json.dumps(selection),
+                                            job['status']))
+            connection.commit()
+        finally:
+            connection.close()
+        threading.Thread(target=self.run, args=(dict(job),), daemon=True).start()
+        return job
+
+    def run(self, job: dict) -> dict:
+        """
+        Copy the catalogue in one transaction, recording the outcome. Job
+        state is written on its own connection, so 'running' is visible
+        while the copy's transaction is open.
+        """
+        state = connection = None
+        try:
+            state = self.connect()
+            job['status'] = 'running'
+            self._save(state, job)
+
+            connection = self.connect()
+            try:
+                job.update(copy_default_catalogue(connection.cursor(), job['mat_id'], job['requested_by'],
+                                                  **job['selection']))
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            job['status'] = 'completed'
+        except Exception as e:
+            job['status'] = 'failed'
+            job['error'] = str(e)
+        finally:
+            if connection is not None:
+                connection.close()
+            job['completed_at'] = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+            try:
+                if state is None:
+                    state = self.connect()
+                self._save(state, job)
+            except Exception as e:
+                # Left queued/running, so the heartbeat check fails it later
+                print(f"⚠️ Onboarding {job['job_id']}: job state not saved: {e}")
+            finally:
+                if state is not None:
+                    state.close()
+        return job
+
+# Shared instance used by the API
+onboarding_jobs = OnboardingJobs()
@@ -0,0 +1,747 @@
+#!/usr/bin/env python3
+"""
+Materialised score summaries.
+
+school_term_scores holds one row per school per term with the counts the
+dashboard needs (average rating, rated/total/completed counts, rating
+distribution, intervention count, last_updated), so reads are an indexed
+lookup instead of an AVG() over raw assessments.
+
+assessment_rating_cube holds the count per rating value at (MAT, school,
+mat_aspect, aspect_category, standard_type, term) grain. The trends endpoint
+answers any filter combination by summing the matching cells, so its cost
+depends on the number of cells, not on how many assessments a MAT has.
+
+Both are kept current by AFTER INSERT / UPDATE / DELETE triggers on
+assessments (TRIGGER_SQL), which apply the OLD -> NEW change of each row as
+counter deltas in the same statement. An assessment save is therefore still
+one conditional UPDATE with no locking read before it, and writes made
+outside the API (scripts, data fixes) are counted too. Deltas commute, so
+concurrent writers to the same school/term never overwrite each other's
+counts.
+
+Changing a standard's standard_type or an aspect's aspect_category moves its
+assessments between cells without writing assessments, so those paths lock
+the affected rows with lock_assessment_rows_where(), describe the move with
+ScoreDeltas, then apply(). The triggers read the standard with a shared lock,
+so they always see the committed dimensions.
+
+Usage:
+    python school_scores.py rebuild [--mat HLT]   # install the triggers, recompute both tables
+    python school_scores.py check [--mat HLT]     # report drift, exit 1 if any
+"""
+
+import argparse
+import sys
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS school_term_scores (
+        mat_id              CHAR(36)     NOT NULL,
+        school_id           CHAR(36)     NOT NULL,
+        unique_term_id      VARCHAR(20)  NOT NULL,
+        academic_year       VARCHAR(9)   NOT NULL,
+        total_count         INT          NOT NULL DEFAULT 0,
+        rated_count         INT          NOT NULL DEFAULT 0,
+        completed_count     INT          NOT NULL DEFAULT 0,
+        rating_sum          INT          NOT NULL DEFAULT 0,
+        rating_1_count      INT          NOT NULL DEFAULT 0,
+        rating_2_count      INT          NOT NULL DEFAULT 0,
+        rating_3_count      INT          NOT NULL DEFAULT 0,
+        rating_4_count      INT          NOT NULL DEFAULT 0,
+        intervention_count  INT          NOT NULL DEFAULT 0,
+        avg_rating          DECIMAL(4,2) GENERATED ALWAYS AS
+                                (IF(rated_count = 0, NULL, ROUND(rating_sum / rated_count, 2))) STORED,
+        last_updated        TIMESTAMP    NULL,
+        revision            INT          NOT NULL DEFAULT 0,
+        PRIMARY KEY (school_id, unique_term_id),
+        KEY idx_scores_mat_term (mat_id, unique_term_id),
+        FOREIGN KEY (mat_id)         REFERENCES mats(mat_id),
+        FOREIGN KEY (school_id)      REFERENCES schools(school_id) ON DELETE CASCADE,
+        FOREIGN KEY (unique_term_id) REFERENCES terms(unique_term_id)
+    )
+"""
+
+CREATE_CUBE_SQL = """
+    CREATE TABLE IF NOT EXISTS assessment_rating_cube (
+        mat_id              CHAR(36)     NOT NULL,
+        school_id           CHAR(36)     NOT NULL,
+        mat_aspect_id       CHAR(36)     NOT NULL,
+        aspect_category     VARCHAR(20)  NOT NULL,  -- '' when mat_aspects.aspect_category is NULL
+        standard_type       VARCHAR(20)  NOT NULL,  -- '' when mat_standards.standard_type is NULL
+        unique_term_id      VARCHAR(20)  NOT NULL,
+        academic_year       VARCHAR(9)   NOT NULL,
+        total_count         INT          NOT NULL DEFAULT 0,
+        rating_1_count      INT          NOT NULL DEFAULT 0,
+        rating_2_count      INT          NOT NULL DEFAULT 0,
+        rating_3_count      INT          NOT NULL DEFAULT 0,
+        rating_4_count      INT          NOT NULL DEFAULT 0,
+        PRIMARY KEY (mat_id, unique_term_id, school_id, mat_aspect_id, aspect_category, standard_type),
+        FOREIGN KEY (mat_id)         REFERENCES mats(mat_id),
+        FOREIGN KEY (school_id)      REFERENCES schools(school_id) ON DELETE CASCADE,
+        -- ON UPDATE CASCADE: custom aspects are archived by renaming mat_aspect_id
+        FOREIGN KEY (mat_aspect_id)  REFERENCES mat_aspects(mat_aspect_id) ON DELETE CASCADE ON UPDATE CASCADE,
+        FOREIGN KEY (unique_term_id) REFERENCES terms(unique_term_id)
+    )
+"""
+
+# Dimension and counter columns of the cube, in key order
+CUBE_KEY_COLUMNS = (
+    'mat_id', 'unique_term_id', 'school_id', 'mat_aspect_id', 'aspect_category', 'standard_type'
+)
+CUBE_COUNTER_COLUMNS = (
+    'total_count', 'rating_1_count', 'rating_2_count', 'rating_3_count', 'rating_4_count'
+)
+RATINGS = (1, 2, 3, 4)
+
+# Counter columns maintained by deltas (avg_rating is derived from them)
+COUNTER_COLUMNS = (
+    'total_count', 'rated_count', 'completed_count', 'rating_sum',
+    'rating_1_count', 'rating_2_count', 'rating_3_count', 'rating_4_count',
+    'intervention_count'
+)
+
+# RAG polarity (see data model §2.5): low ratings need intervention on
+# assurance standards, high ratings on risk standards
+INTERVENTION_SQL = """
+    CASE
+        WHEN ms.standard_type = 'risk' THEN a.rating >= 3
+        ELSE a.rating <= 2
+    END
+"""
+
+def needs_intervention(rating: Optional[int], standard_type: Optional[str]) -> bool:
+    if rating is None:
+        return False
+    return rating >= 3 if standard_type == 'risk' else rating <= 2
+
+# Full aggregate from raw assessments - used by rebuild and the drift checker
+AGGREGATE_SQL = f"""
+    SELECT
+        s.mat_id,
+        a.school_id,
+        a.unique_term_id,
+        MAX(a.academic_year) as academic_year,
+        COUNT(*) as total_count,
+        COUNT(a.rating) as rated_count,
+        COUNT(CASE WHEN a.status = 'completed' THEN 1 END) as completed_count,
+        COALESCE(SUM(a.rating), 0) as rating_sum,
+        COUNT(CASE WHEN a.rating = 1 THEN 1 END) as rating_1_count,
+        COUNT(CASE WHEN a.rating = 2 THEN 1 END) as rating_2_count,
+        COUNT(CASE WHEN a.rating = 3 THEN 1 END) as rating_3_count,
+        COUNT(CASE WHEN a.rating = 4 THEN 1 END) as rating_4_count,
+        COUNT(CASE WHEN {INTERVENTION_SQL} THEN 1 END) as intervention_count,
+        MAX(a.last_updated) as last_updated
+    FROM assessments a
+    JOIN schools s ON a.school_id = s.school_id
+    LEFT JOIN mat_standards ms ON a.mat_standard_id = ms.mat_standard_id
+    {{where}}
+    GROUP BY s.mat_id, a.school_id, a.unique_term_id
+"""
+
+CUBE_AGGREGATE_SQL = """
+    SELECT
+        s.mat_id,
+        a.unique_term_id,
+        a.school_id,
+        ms.mat_aspect_id,
+        COALESCE(ma.aspect_category, '') as aspect_category,
+        COALESCE(ms.standard_type, '') as standard_type,
+        MAX(a.academic_year) as academic_year,
+        COUNT(*) as total_count,
+        COUNT(CASE WHEN a.rating = 1 THEN 1 END) as rating_1_count,
+        COUNT(CASE WHEN a.rating = 2 THEN 1 END) as rating_2_count,
+        COUNT(CASE WHEN a.rating = 3 THEN 1 END) as rating_3_count,
+        COUNT(CASE WHEN a.rating = 4 THEN 1 END) as rating_4_count
+    FROM assessments a
+    JOIN schools s ON a.school_id = s.school_id
+    JOIN mat_standards ms ON a.mat_standard_id = ms.mat_standard_id
+    JOIN mat_aspects ma ON ms.mat_aspect_id = ma.mat_aspect_id
+    {where}
+    GROUP BY s.mat_id, a.unique_term_id, a.school_id, ms.mat_aspect_id,
+             COALESCE(ma.aspect_category, ''), COALESCE(ms.standard_type, '')
+"""
+
+# ================================
+# INCREMENTAL MAINTENANCE (assessment triggers)
+# ================================
+
+def _trigger_lookup(image: str) -> str:
+    """Fill the {old|new}_* variables with the MAT and cube dimensions of the OLD or NEW row"""
+    prefix = image.lower()
+    return f"""
+        SELECT s.mat_id INTO {prefix}_mat_id
+        FROM schools s
+        WHERE s.school_id = {image}.school_id;
+        SELECT ms.standard_type, ms.mat_aspect_id, COALESCE(ma.aspect_category, '')
+        FROM mat_standards ms
+        LEFT JOIN mat_aspects ma ON ms.mat_aspect_id = ma.mat_aspect_id
+        WHERE ms.mat_standard_id = {image}.mat_standard_id
+        FOR SHARE
+        INTO {prefix}_standard_type, {prefix}_mat_aspect_id, {prefix}_aspect_category;"""
+
+def _counter_delta(images: Tuple[Tuple[str, int], ...], column: str) -> str:
+    """SQL for one counter's delta from (image, sign) pairs, e.g. (('OLD', -1), ('NEW', 1))"""
+    terms = []
+    for image, sign in images:
+        if column == 'total_count':
+            value = "1"
+        elif column == 'rated_count':
+            value = f"({image}.rating IS NOT NULL)"
+        elif column == 'completed_count':
+            value = f"COALESCE({image}.status = 'completed', 0)"
+        elif column == 'rating_sum':
+            value = f"COALESCE({image}.rating, 0)"
+        elif column == 'intervention_count':
+            value = (f"COALESCE(IF({image.lower()}_standard_type <=> 'risk', "
+                     f"{image}.rating >= 3, {image}.rating <= 2), 0)")
+        else:
+            value = f"COALESCE({image}.rating = {column[len('rating_'):-len('_count')]}, 0)"
+        terms.append(f"{'-' if sign < 0 else '+'} {value}")
+    return ' '.join(terms)
+
+def _score_upsert(images: Tuple[Tuple[str, int], ...]) -> str:
+    """Upsert the school_term_scores row of the first image by the images' combined delta"""
+    key = images[0][0]
+    added = [image for image, sign in images if sign > 0]
+    last_updated = f"{added[0]}.last_updated" if added else "NULL"
+    return f"""
+        IF {key.lower()}_mat_id IS NOT NULL THEN
+            INSERT INTO school_term_scores (
+                mat_id, school_id, unique_term_id, academic_year,
+                {', '.join(COUNTER_COLUMNS)}, last_updated
+            )
+            VALUES (
+                {key.lower()}_mat_id, {key}.school_id, {key}.unique_term_id, {key}.academic_year,
+                {', '.join(_counter_delta(images, column) for column in COUNTER_COLUMNS)}, {last_updated}
+            )
+            ON DUPLICATE KEY UPDATE
+                {', '.join(f'{column} = {column} + VALUES({column})' for column in COUNTER_COLUMNS)},
+                last_updated = GREATEST(
+                    COALESCE(last_updated, VALUES(last_updated)),
+                    COALESCE(VALUES(last_updated), last_updated)
+                ),
+                revision = revision + 1;
+        END IF;"""
+
+def _cube_upsert(images: Tuple[Tuple[str, int], ...]) -> str:
+    """Upsert the assessment_rating_cube cell of the first image by the images' combined delta"""
+    key = images[0][0]
+    prefix = key.lower()
+    return f"""
+        IF {prefix}_mat_id IS NOT NULL AND {prefix}_mat_aspect_id IS NOT NULL THEN
+            INSERT INTO assessment_rating_cube (
+                {', '.join(CUBE_KEY_COLUMNS)}, academic_year, {', '.join(CUBE_COUNTER_COLUMNS)}
+            )
+            VALUES (
+                {prefix}_mat_id, {key}.unique_term_id, {key}.school_id, {prefix}_mat_aspect_id,
+                {prefix}_aspect_category, COALESCE({prefix}_standard_type, ''), {key}.academic_year,
+                {', '.join(_counter_delta(images, column) for column in CUBE_COUNTER_COLUMNS)}
+            )
+            ON DUPLICATE KEY UPDATE
+                {', '.join(f'{column} = {column} + VALUES({column})' for column in CUBE_COUNTER_COLUMNS)};
+        END IF;"""
+
+def _trigger_variables(images: Tuple[str, ...]) -> str:
+    return ''.join(f"""
+        DECLARE {image.lower()}_mat_id CHAR(36);
+        DECLARE {image.lower()}_standard_type VARCHAR(20);
+        DECLARE {image.lower()}_mat_aspect_id CHAR(36);
+        DECLARE {image.lower()}_aspect_category VARCHAR(20);""" for image in images) + """
+        DECLARE CONTINUE HANDLER FOR NOT FOUND BEGIN END;"""
+
+OLD_ROW = (('OLD', -1),)
+NEW_ROW = (('NEW', 1),)
+OLD_TO_NEW = (('OLD', -1), ('NEW', 1))
+
+# Trigger name -> CREATE TRIGGER statement. An UPDATE that stays in the same
+# score row and cube cell (the usual rating save) is one upsert per table;
+# an evidence-only save still bumps the score row's revision and last_updated.
+TRIGGER_SQL = {
+    'trg_assessments_scores_insert': f"""
+        CREATE TRIGGER trg_assessments_scores_insert
+        AFTER INSERT ON assessments
+        FOR EACH ROW
+        BEGIN
+            {_trigger_variables(('NEW',))}
+            {_trigger_lookup('NEW')}
+            {_score_upsert(NEW_ROW)}
+            {_cube_upsert(NEW_ROW)}
+        END
+    """,
+    'trg_assessments_scores_update': f"""
+        CREATE TRIGGER trg_assessments_scores_update
+        AFTER UPDATE ON assessments
+        FOR EACH ROW
+        BEGIN
+            {_trigger_variables(('OLD', 'NEW'))}
+            {_trigger_lookup('OLD')}
+            IF NEW.school_id <=> OLD.school_id AND NEW.mat_standard_id <=> OLD.mat_standard_id THEN
+                SET new_mat_id = old_mat_id,
+                    new_standard_type = old_standard_type,
+                    new_mat_aspect_id = old_mat_aspect_id,
+                    new_aspect_category = old_aspect_category;
+            ELSE
+                {_trigger_lookup('NEW')}
+            END IF;
+
+            IF NEW.school_id <=> OLD.school_id AND NEW.unique_term_id <=> OLD.unique_term_id THEN
+                {_score_upsert(OLD_TO_NEW)}
+            ELSE
+                {_score_upsert(OLD_ROW)}
+                {_score_upsert(NEW_ROW)}
+            END IF;
+
+            IF NEW.school_id <=> OLD.school_id AND NEW.unique_term_id <=> OLD.unique_term_id
+                    AND new_mat_aspect_id <=> old_mat_aspect_id
+                    AND new_aspect_category <=> old_aspect_category
+                    AND new_standard_type <=> old_standard_type THEN
+                IF NOT (NEW.rating <=> OLD.rating) THEN
+                    {_cube_upsert(OLD_TO_NEW)}
+                END IF;
+            ELSE
+                {_cube_upsert(OLD_ROW)}
+                {_cube_upsert(NEW_ROW)}
+            END IF;
+        END
+    """,
+    'trg_assessments_scores_delete': f"""
+        CREATE TRIGGER trg_assessments_scores_delete
+        AFTER DELETE ON assessments
+        FOR EACH ROW
+        BEGIN
+            {_trigger_variables(('OLD',))}
+            {_trigger_lookup('OLD')}
+            {_score_upsert(OLD_ROW)}
+            {_cube_upsert(OLD_ROW)}
+        END
+    """,
+}
+
+def install_triggers(cursor) -> None:
+    """(Re)create the assessment triggers. DDL - commits implicitly."""
+    for name, create_sql in TRIGGER_SQL.items():
+        cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+        cursor.execute(create_sql)
+
+def assessment_term_id(assessment_id: str) -> str:
+    """The unique_term_id at the end of an assessment_id ({school_id}-{standard_code}-T1-2025-26)"""
+    return '-'.join(assessment_id.split('-')[-3:])
+
+# ================================
+# CATALOGUE CHANGES (write paths)
+# ================================
+
+LOCK_ROWS_SQL = """
+    SELECT
+        a.assessment_id,
+        a.mat_standard_id,
+        s.mat_id,
+        a.school_id,
+        a.unique_term_id,
+        a.academic_year,
+        a.rating,
+        a.status,
+        ms.standard_type,
+        ms.mat_aspect_id,
+        ma.aspect_category
+    FROM assessments a
+    JOIN schools s ON a.school_id = s.school_id
+    LEFT JOIN mat_standards ms ON a.mat_standard_id = ms.mat_standard_id
+    LEFT JOIN mat_aspects ma ON ms.mat_aspect_id = ma.mat_aspect_id
+    WHERE {where}
+      AND s.mat_id = %s
+    FOR UPDATE OF a
+"""
+
+def lock_assessment_rows_where(cursor, where: str, params: list, mat_id: str) -> Dict[str, dict]:
+    """
+    Lock the assessments matching a condition on a (assessments), ms
+    (mat_standards) or ma (mat_aspects) - e.g. every assessment of a standard
+    whose standard_type is about to change - and return their current
+    values, keyed by assessment_id. Must run inside the write's transaction.
+    """
+    cursor.execute(LOCK_ROWS_SQL.format(where=where), list(params) + [mat_id])
+    return {row['assessment_id']: row for row in cursor.fetchall()}
+
+class ScoreDeltas:
+    """
+    Accumulates counter changes for one transaction - per (mat_id, school_id,
+    unique_term_id) for school_term_scores and per cube cell for
+    assessment_rating_cube. Rows passed in need mat_id, school_id,
+    unique_term_id, academic_year, rating, status, standard_type,
+    mat_aspect_id and aspect_category.
+    """
+
+    def __init__(self):
+        self._deltas: Dict[tuple, dict] = {}
+        self._cube: Dict[tuple, dict] = {}
+
+    def _bump_cube(self, row: dict, rating: Optional[int], sign: int) -> None:
+        if row.get('mat_aspect_id') is None:
+            return
+        key = (
+            row['mat_id'], row['unique_term_id'], row['school_id'], row['mat_aspect_id'],
+            row.get('aspect_category') or '', row.get('standard_type') or ''
+        )
+        cell = self._cube.get(key)
+        if cell is None:
+            cell = {column: 0 for column in CUBE_COUNTER_COLUMNS}
+            cell['academic_year'] = row['academic_year']
+            self._cube[key] = cell
+
+        cell['total_count'] += sign
+        if rating is not None:
+            cell[f'rating_{rating}_count'] += sign
+
+    def _bump(self, row: dict, sign: int) -> dict:
+        key = (row['mat_id'], row['school_id'], row['unique_term_id'])
+        delta = self._deltas.get(key)
+        if delta is None:
+            delta = {column: 0 for column in COUNTER_COLUMNS}
+            delta['academic_year'] = row['academic_year']
+            delta['last_updated'] = None
+            self._deltas[key] = delta
+
+        rating = int(row['rating']) if row.get('rating') is not None else None
+        delta['total_count'] += sign
+        if rating is not None:
+            delta['rated_count'] += sign
+            delta['rating_sum'] += sign * rating
+            delta[f'rating_{rating}_count'] += sign
+        if row.get('status') == 'completed':
+            delta['completed_count'] += sign
+        if needs_intervention(rating, row.get('standard_type')):
+            delta['intervention_count'] += sign
+        self._bump_cube(row, rating, sign)
+        return delta
+
+    def add(self, row: dict, last_updated=None) -> None:
+        """Count a new assessment row"""
+        delta = self._bump(row, 1)
+        if last_updated is not None:
+            delta['last_updated'] = max(filter(None, [delta['last_updated'], last_updated]))
+
+    def remove(self, row: dict) -> None:
+        """Uncount an assessment row"""
+        self._bump(row, -1)
+
+    def replace(self, old_row: dict, last_updated=None, **changes) -> None:
+        """Count an updated row: remove its old values, add them with changes applied"""
+        self.remove(old_row)
+        self.add({**old_row, **changes}, last_updated)
+
+    def apply(self, cursor) -> Set[Tuple[str, str]]:
+        """
+        Upsert the accumulated deltas. Keys are applied in sorted order so two
+        transactions touching the same score rows always lock them in the same
+        order. Every upsert bumps the row's revision.
+
+        Returns:
+            Set[Tuple[str, str]]: (mat_id, unique_term_id) pairs of
+            school_term_scores written - pass to dashboard_cache.invalidate()
+            once the transaction commits
+        """
+        touched = set()
+        for (mat_id, school_id, unique_term_id), delta in sorted(self._deltas.items()):
+            if not any(delta[column] for column in COUNTER_COLUMNS) and delta['last_updated'] is None:
+                continue
+            touched.add((mat_id, unique_term_id))
+            cursor.execute(f"""
+                INSERT INTO school_term_scores (
+                    mat_id, school_id, unique_term_id, academic_year,
+                    {', '.join(COUNTER_COLUMNS)}, last_updated
+                )
+                VALUES (%s, %s, %s, %s, {', '.join(['%s'] * len(COUNTER_COLUMNS))}, %s)
+                ON DUPLICATE KEY UPDATE
+                    {', '.join(f'{column} = {column} + VALUES({column})' for column in COUNTER_COLUMNS)},
+                    last_updated = GREATEST(
+                        COALESCE(last_updated, VALUES(last_updated)),
+                        COALESCE(VALUES(last_updated), last_updated)
+                    ),
+                    revision = revision + 1
+            """, [mat_id, school_id, unique_term_id, delta['academic_year']]
+                + [delta[column] for column in COUNTER_COLUMNS]
+                + [delta['last_updated']])
+        self._deltas.clear()
+
+        for key, cell in sorted(self._cube.items()):
+            if not any(cell[column] for column in CUBE_COUNTER_COLUMNS):
+                continue
+            cursor.execute(f"""
+                INSERT INTO assessment_rating_cube (
+                    {', '.join(CUBE_KEY_COLUMNS)}, academic_year, {', '.join(CUBE_COUNTER_COLUMNS)}
+                )
+                VALUES ({', '.join(['%s'] * (len(CUBE_KEY_COLUMNS) + 1 + len(CUBE_COUNTER_COLUMNS)))})
+                ON DUPLICATE KEY UPDATE
+                    {', '.join(f'{column} = {column} + VALUES({column})' for column in CUBE_COUNTER_COLUMNS)}
+            """, list(key) + [cell['academic_year']] + [cell[column] for column in CUBE_COUNTER_COLUMNS])
+        self._cube.clear()
+        return touched
+
+# ================================
+# CUBE ROLLUPS (read paths)
+# ================================
+
+def fetch_mat_term_ids(cursor, mat_id: str, rated_only: bool = False) -> set:
+    """
+    Terms the MAT has any assessments in (a range read of idx_scores_mat_term).
+    With rated_only, only terms where some school has a rating - a term whose
+    assessments are all unrated has no average to show.
+    """
+    query = """
+        SELECT DISTINCT unique_term_id
+        FROM school_term_scores
+        WHERE mat_id = %s
+    """
+    if rated_only:
+        query += " AND rated_count > 0"
+    cursor.execute(query, (mat_id,))
+    return {row['unique_term_id'] for row in cursor.fetchall()}
+
+def fetch_cube_cells(cursor, mat_id: str, school_id: Optional[str] = None,
+                     aspect_code: Optional[str] = None, aspect_category: Optional[str] = None,
+                     standard_type: Optional[str] = None,
+                     term_ids: Optional[List[str]] = None) -> List[dict]:
+    """
+    A MAT's cube cells matching the filters (None = no filter). The read is a
+    range scan of the primary key, a few rows per school, aspect and term.
+    """
+    if term_ids is not None and not term_ids:
+        return []
+
+    query = """
+        SELECT c.*
+        FROM assessment_rating_cube c
+        WHERE c.mat_id = %s
+    """
+    params = [mat_id]
+
+    if school_id:
+        query += " AND c.school_id = %s"
+        params.append(school_id)
+
+    if aspect_code:
+        query += """
+            AND c.mat_aspect_id IN (
+                SELECT mat_aspect_id FROM mat_aspects WHERE mat_id = %s AND aspect_code = %s
+            )
+        """
+        params.extend([mat_id, aspect_code])
+
+    if aspect_category:
+        query += " AND c.aspect_category = %s"
+        params.append(aspect_category)
+
+    if standard_type:
+        query += " AND c.standard_type = %s"
+        params.append(standard_type)
+
+    if term_ids:
+        placeholders = ','.join(['%s'] * len(term_ids))
+        query += f" AND c.unique_term_id IN ({placeholders})"
+        params.extend(term_ids)
+
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
+def rollup_cube_cells(cells: Iterable[dict], dimensions: Tuple[str, ...]) -> Dict[tuple, dict]:
+    """
+    Sum cube cells over every dimension not listed, e.g. ('unique_term_id',)
+    for a per-term trend or ('school_id', 'mat_aspect_id') for a heatmap.
+
+    Returns:
+        Dict[tuple, dict]: dimension values -> summed CUBE_COUNTER_COLUMNS
+    """
+    rollup: Dict[tuple, dict] = {}
+    for cell in cells:
+        key = tuple(cell[dimension] for dimension in dimensions)
+        totals = rollup.get(key)
+        if totals is None:
+            totals = rollup[key] = {column: 0 for column in CUBE_COUNTER_COLUMNS}
+        for column in CUBE_COUNTER_COLUMNS:
+            totals[column] += cell[column]
+    return rollup
+
+def summarise_ratings(counts: dict) -> dict:
+    """rated_count, average_rating (2dp), min_rating and max_rating from rating_N_count columns"""
+    by_rating = {rating: counts[f'rating_{rating}_count'] for rating in RATINGS}
+    rated_count = sum(by_rating.values())
+    present = [rating for rating, count in by_rating.items() if count > 0]
+    return {
+        'rated_count': rated_count,
+        # Half-up, like MySQL's ROUND() on the previous AVG() queries
+        'average_rating': float((Decimal(sum(rating * count for rating, count in by_rating.items()))
+                                 / rated_count).quantize(Decimal('0.01'), ROUND_HALF_UP))
+                          if rated_count else None,
+        'min_rating': min(present) if present else None,
+        'max_rating': max(present) if present else None
+    }
+
+# ================================
+# REBUILD AND DRIFT CHECK
+# ================================
+
+def rebuild_school_term_scores(cursor, mat_id: Optional[str] = None) -> int:
+    """
+    Recompute score rows from assessments - for one MAT, or all of them.
+    Run inside a transaction so readers never see a half-rebuilt MAT.
+
+    Returns:
+        int: Number of score rows written
+    """
+    if mat_id:
+        cursor.execute("DELETE FROM school_term_scores WHERE mat_id = %s", (mat_id,))
+        where, params = "WHERE s.mat_id = %s", (mat_id,)
+    else:
+        cursor.execute("DELETE FROM school_term_scores")
+        where, params = "", ()
+
+    cursor.execute(f"""
+        INSERT INTO school_term_scores (
+            mat_id, school_id, unique_term_id, academic_year,
+            {', '.join(COUNTER_COLUMNS)}, last_updated
+        )
+        {AGGREGATE_SQL.format(where=where)}
+    """, params)
+    return cursor.rowcount
+
+def rebuild_rating_cube(cursor, mat_id: Optional[str] = None) -> int:
+    """
+    Recompute cube cells from assessments - for one MAT, or all of them.
+
+    Returns:
+        int: Number of cells written
+    """
+    if mat_id:
+        cursor.execute("DELETE FROM assessment_rating_cube WHERE mat_id = %s", (mat_id,))
+        where, params = "WHERE s.mat_id = %s", (mat_id,)
+    else:
+        cursor.execute("DELETE FROM assessment_rating_cube")
+        where, params = "", ()
+
+    cursor.execute(f"""
+        INSERT INTO assessment_rating_cube (
+            {', '.join(CUBE_KEY_COLUMNS)}, academic_year, {', '.join(CUBE_COUNTER_COLUMNS)}
+        )
+        {CUBE_AGGREGATE_SQL.format(where=where)}
+    """, params)
+    return cursor.rowcount
+
+def find_cube_drift(cursor, mat_id: Optional[str] = None) -> List[dict]:
+    """
+    Compare assessment_rating_cube with a fresh aggregate of assessments.
+    Cells whose counters are all zero count as absent.
+
+    Returns:
+        List[dict]: One entry per drifted cell with its key and the expected
+        and stored counters
+    """
+    where, params = ("WHERE s.mat_id = %s", (mat_id,)) if mat_id else ("", ())
+    cursor.execute(CUBE_AGGREGATE_SQL.format(where=where), params)
+    expected = {tuple(row[column] for column in CUBE_KEY_COLUMNS): row for row in cursor.fetchall()}
+
+    stored_where = "WHERE mat_id = %s" if mat_id else ""
+    cursor.execute(f"""
+        SELECT {', '.join(CUBE_KEY_COLUMNS)}, {', '.join(CUBE_COUNTER_COLUMNS)}
+        FROM assessment_rating_cube
+        {stored_where}
+    """, params)
+    stored = {
+        tuple(row[column] for column in CUBE_KEY_COLUMNS): row
+        for row in cursor.fetchall()
+        if any(row[column] for column in CUBE_COUNTER_COLUMNS)
+    }
+
+    drift = []
+    for key in sorted(set(expected) | set(stored)):
+        want = [expected[key][column] if key in expected else 0 for column in CUBE_COUNTER_COLUMNS]
+        have = [stored[key][column] if key in stored else 0 for column in CUBE_COUNTER_COLUMNS]
+        if want != have:
+            drift.append({
+                'cell': dict(zip(CUBE_KEY_COLUMNS, key)),
+                'expected': dict(zip(CUBE_COUNTER_COLUMNS, want)),
+                'stored': dict(zip(CUBE_COUNTER_COLUMNS, have))
+            })
+    return drift
+
+def find_score_drift(cursor, mat_id: Optional[str] = None) -> List[dict]:
+    """
+    Compare school_term_scores with a fresh aggregate of assessments.
+
+    Returns:
+        List[dict]: One entry per drifted (school_id, unique_term_id) with the
+        expected and stored values of each differing column
+    """
+    where, params = ("WHERE s.mat_id = %s", (mat_id,)) if mat_id else ("", ())
+    cursor.execute(AGGREGATE_SQL.format(where=where), params)
+    expected = {(row['school_id'], row['unique_term_id']): row for row in cursor.fetchall()}
+
+    stored_where = "WHERE mat_id = %s" if mat_id else ""
+    cursor.execute(f"""
+        SELECT mat_id, school_id, unique_term_id, academic_year,
+               {', '.join(COUNTER_COLUMNS)}, last_updated
+        FROM school_term_scores
+        {stored_where}
+    """, params)
+    stored = {(row['school_id'], row['unique_term_id']): row for row in cursor.fetchall()}
+
+    drift = []
+    for key in sorted(set(expected) | set(stored)):
+        want, have = expected.get(key), stored.get(key)
+        if want is None or have is None:
+            drift.append({
+                'school_id': key[0],
+                'unique_term_id': key[1],
+                'problem': 'missing' if have is None else 'orphaned'
+            })
+            continue
+
+        differences = {
+            column: {'expected': want[column], 'stored': have[column]}
+            for column in COUNTER_COLUMNS + ('mat_id', 'last_updated')
+            if want[column] != have[column]
+        }
+        if differences:
+            drift.append({
+                'school_id': key[0],
+                'unique_term_id': key[1],
+                'problem': 'mismatch',
+                'columns': differences
+            })
+    return drift
+
+if __name__ == "__main__":
+    from main import get_db_connection, db_transaction
+
+    parser = argparse.ArgumentParser(description="Maintain the school_term_scores summary table")
+    parser.add_argument("command", choices=["rebuild", "check"])
+    parser.add_argument("--mat", help="Limit to one MAT (default: all MATs)")
+    args = parser.parse_args()
+
+    connection = get_db_connection()
+    cursor = connection.cursor()
+    try:
+        if args.command == "rebuild":
+            cursor.execute(CREATE_TABLE_SQL)
+            cursor.execute(CREATE_CUBE_SQL)
+            install_triggers(cursor)
+            print(f"✅ Installed {len(TRIGGER_SQL)} assessment triggers")
+            with db_transaction(connection):
+                written = rebuild_school_term_scores(cursor, args.mat)
+                cells = rebuild_rating_cube(cursor, args.mat)
+            print(f"✅ Rebuilt school_term_scores: {written} rows")
+            print(f"✅ Rebuilt assessment_rating_cube: {cells} cells")
+        else:
+            drift = find_score_drift(cursor, args.mat)
+            for entry in drift:
+                print(f"❌ {entry['school_id']} {entry['unique_term_id']}: {entry['problem']} {entry.get('columns', '')}")
+            print(f"{'❌' if drift else '✅'} {len(drift)} drifted score rows")
+            cube_drift = find_cube_drift(cursor, args.mat)
+            for entry in cube_drift:
+                print(f"❌ {entry['cell']}: expected {entry['expected']}, stored {entry['stored']}")
+            print(f"{'❌' if cube_drift else '✅'} {len(cube_drift)} drifted cube cells")
+            sys.exit(1 if drift or cube_drift else 0)
+    finally:
+        connection.close()
@@ -0,0 +1,133 @@
+"""
+In-memory calendar of academic terms.
+
+The terms table is static reference data (three terms a year, populated years
+in advance), so each worker loads it once and refreshes it every
+TERM_CALENDAR_REFRESH_SECONDS instead of querying it per request. Terms are
+ordered by start_date; each term's position in that sequence is its ordinal,
+so "previous N terms" and "terms from X to Y" are list slices rather than
+comparisons on unique_term_id strings (where 'T3-2024-25' > 'T1-2025-26').
+"""
+
+import os
+import time
+from datetime import date
+from typing import Iterable, List, Optional
+
+TERM_CALENDAR_REFRESH_SECONDS = int(os.getenv('TERM_CALENDAR_REFRESH_SECONDS', '3600'))
+
+TERMS_QUERY = """
+    SELECT unique_term_id, term_id, term_name, start_date, end_date, academic_year
+    FROM terms
+    ORDER BY start_date, unique_term_id
+"""
+
+class TermCalendar:
+    """
+    Terms in start_date order, indexed by unique_term_id. A refresh builds a
+    new snapshot and swaps it in with one assignment, so readers on other
+    threads always see a complete calendar.
+    """
+
+    def __init__(self, refresh_seconds: int = TERM_CALENDAR_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        # (terms in order, unique_term_id -> ordinal)
+        self._snapshot = ([], {})
+        # (date, snapshot, term) memo for current()
+        self._current = None
+        self._loaded_at: Optional[float] = None
+
+    def load(self, rows: Iterable[dict]) -> None:
+        """Replace the calendar with rows from the terms table"""
+        terms = sorted(
+            ({**row, 'ordinal': 0} for row in rows),
+            key=lambda term: (term['start_date'], term['unique_term_id'])
+        )
+        for ordinal, term in enumerate(terms):
+            term['ordinal'] = ordinal
+        self._snapshot = (terms, {term['unique_term_id']: term['ordinal'] for term in terms})
+        self._current = None
+        self._loaded_at = time.time()
+
+    def refresh(self, cursor) -> None:
+        """Reload from the database"""
+        cursor.execute(TERMS_QUERY)
+        self.load(cursor.fetchall())
+
+    def is_loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or time.time() - self._loaded_at >= self.refresh_seconds
+
+    def get(self, unique_term_id: Optional[str]) -> Optional[dict]:
+        """Term row (with its ordinal), or None if the term does not exist"""
+        terms, ordinals = self._snapshot
+        ordinal = ordinals.get(unique_term_id)
+        return terms[ordinal] if ordinal is not None else None
+
+    def ordinal(self, unique_term_id: str) -> Optional[int]:
+        return self._snapshot[1].get(unique_term_id)
+
+    def current(self, today: Optional[date] = None) -> Optional[dict]:
+        """The term today falls within, or None between terms"""
+        today = today or date.today()
+        snapshot = self._snapshot
+        memo = self._current
+        if memo and memo[0] == today and memo[1] is snapshot:
+            return memo[2]
+
+        current = None
+        for term in reversed(snapshot[0]):
+            if term['start_date'] <= today:
+                current = term if today <= term['end_date'] else None
+                break
+        self._current = (today, snapshot, current)
+        return current
+
+    def terms(self, academic_year: Optional[str] = None) -> List[dict]:
+        """All terms in order, optionally for one academic year"""
+        terms = self._snapshot[0]
+        if academic_year:
+            return [term for term in terms if term['academic_year'] == academic_year]
+        return list(terms)
+
+    def previous(self, unique_term_id: str, count: Optional[int] = None,
+                 within: Optional[Iterable[str]] = None) -> List[dict]:
+        """
+        Up to count terms before a term, newest first. If within is given only
+        those terms are counted (e.g. the terms a MAT has assessments in).
+        count=None returns every earlier term.
+        """
+        terms, ordinals = self._snapshot
+        ordinal = ordinals.get(unique_term_id)
+        if ordinal is None:
+            return []
+        allowed = set(within) if within is not None else None
+
+        previous = []
+        for term in reversed(terms[:ordinal]):
+            if count is not None and len(previous) == count:
+                break
+            if allowed is None or term['unique_term_id'] in allowed:
+                previous.append(term)
+        return previous
+
+    def range(self, from_term: Optional[str] = None, to_term: Optional[str] = None) -> List[dict]:
+        """
+        Terms from from_term to to_term inclusive, in order. Either end may be
+        None (open-ended). Unknown terms raise KeyError.
+        """
+        terms, ordinals = self._snapshot
+        start = ordinals[from_term] if from_term else 0
+        end = ordinals[to_term] if to_term else len(terms) - 1
+        return terms[start:end + 1]
+
+    def latest(self, unique_term_ids: Iterable[str]) -> Optional[dict]:
+        """The last of the given terms in term order (unknown ids are ignored)"""
+        ordinals = self._snapshot[1]
+        known = [ordinals[term_id] for term_id in unique_term_ids if term_id in ordinals]
+        return self._snapshot[0][max(known)] if known else None
+
+# Shared instance used by the API
+term_calendar = TermCalendar()
@@ -0,0 +1,251 @@
+"""
+Analytics Engine Test
+This script verifies that the columnar engine's rollups match the rating cube
+rollups, and that streamed loads, incremental merges and engine refreshes
+stay correct.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+from analytics_engine import AnalyticsEngine, MatColumns
+from school_scores import RATINGS, rollup_cube_cells
+
+TERMS = [
+    {"unique_term_id": f"T{term}-{year}-{str(year + 1)[2:]}", "academic_year": f"{year}-{str(year + 1)[2:]}"}
+    for year in (2023, 2024, 2025) for term in (1, 2, 3)
+]
+
+STANDARDS = [
+    {"mat_standard_id": f"HLT-{aspect}-{n}", "mat_aspect_id": f"HLT-{aspect}", "aspect_code": aspect,
+     "aspect_category": category, "standard_type": standard_type}
+    for aspect, category in (("EDU", "ofsted"), ("SAF", "ofsted"), ("FIN", None))
+    for n, standard_type in ((1, "assurance"), (2, "assurance"), (3, "risk"))
+]
+
+def _assessments(seed=7):
+    rng = random.Random(seed)
+    written_at = datetime(2025, 11, 2, 9, 0, 0)
+    return [
+        {"school_id": school, "mat_standard_id": standard["mat_standard_id"],
+         "unique_term_id": term["unique_term_id"], "rating": rng.choice((None,) + RATINGS),
+         "last_updated": written_at}
+        for school in ("cedar-park-primary", "oak-hill-academy", "willow-high")
+        for standard in STANDARDS
+        for term in TERMS
+    ]
+
+def _cube_cells(assessments):
+    """Reference: the cube cells rebuild_rating_cube would write for these rows"""
+    standards = {standard["mat_standard_id"]: standard for standard in STANDARDS}
+    years = {term["unique_term_id"]: term["academic_year"] for term in TERMS}
+    cells = {}
+    for row in assessments:
+        standard = standards[row["mat_standard_id"]]
+        key = (row["school_id"], standard["mat_aspect_id"], standard["aspect_category"] or '',
+               standard["standard_type"], row["unique_term_id"])
+        cell = cells.setdefault(key, {
+            "school_id": key[0], "mat_aspect_id": key[1], "aspect_category": key[2],
+            "standard_type": key[3], "unique_term_id": key[4], "academic_year": years[key[4]],
+            "total_count": 0, "rating_1_count": 0, "rating_2_count": 0, "rating_3_count": 0, "rating_4_count": 0
+        })
+        cell["total_count"] += 1
+        if row["rating"]:
+            cell[f"rating_{row['rating']}_count"] += 1
+    return list(cells.values())
+
+def _columns(assessments):
+    columns = MatColumns(TERMS)
+    columns.load_standards(STANDARDS)
+    columns.merge(assessments)
+    return columns
+
+def test_rollups_match_cube():
+    """Test that engine rollups equal cube rollups for the same rows"""
+    print("\n=== Testing Rollups Against Cube ===")
+
+    assessments = _assessments()
+    columns = _columns(assessments)
+    cells = _cube_cells(assessments)
+    assert len(columns) == len(assessments)
+
+    for dimensions in (('unique_term_id', 'academic_year'), ('school_id', 'standard_type'), ('aspect_category',), ()):
+        assert columns.rollup(dimensions) == rollup_cube_cells(cells, dimensions)
+    print("✓ Unfiltered rollups match for several groupings")
+
+    term_ids = ["T3-2023-24", "T1-2024-25"]
+    filtered = columns.rollup(('unique_term_id', 'academic_year'), school_id="oak-hill-academy",
+                              aspect_code="SAF", standard_type="risk", term_ids=term_ids)
+    expected = rollup_cube_cells(
+        [cell for cell in cells
+         if cell["school_id"] == "oak-hill-academy" and cell["mat_aspect_id"] == "HLT-SAF"
+         and cell["standard_type"] == "risk" and cell["unique_term_id"] in term_ids],
+        ('unique_term_id', 'academic_year')
+    )
+    assert filtered == expected and len(filtered) == 2
+    assert columns.rollup(('aspect_category',), aspect_category='') == rollup_cube_cells(
+        [cell for cell in cells if cell["aspect_category"] == ''], ('aspect_category',))
+    print("✓ Filtered rollups match, including the '' (NULL) category")
+
+    assert columns.rollup(('unique_term_id',), school_id="unknown-school") == {}
+    assert columns.rollup(('unique_term_id',), term_ids=[]) == {}
+    print("✓ Unknown school and empty term range return no groups")
+
+    return True
+
+def test_incremental_merge():
+    """Test that merging changed and new rows updates ratings in place and keeps key order"""
+    print("\n=== Testing Incremental Merge ===")
+
+    assessments = _assessments()
+    rest, added = assessments[:-20], assessments[-20:]
+    columns = _columns(rest)
+
+    changed_at = datetime(2025, 11, 3, 10, 0, 0)
+    changed = [{**row, "rating": 4, "last_updated": changed_at} for row in rest[:50]]
+    columns.merge(changed + added)
+
+    current = changed + rest[50:] + added
+    assert len(columns) == len(assessments)
+    assert (columns.key[1:] > columns.key[:-1]).all()
+    assert columns.rollup(('school_id', 'unique_term_id')) == rollup_cube_cells(
+        _cube_cells(current), ('school_id', 'unique_term_id'))
+    assert columns.last_seen == changed_at
+    print(f"✓ {len(changed)} updated and {len(added)} new rows merged")
+
+    return True
+
+class FakeCursor:
+    """Serves the engine's queries from in-memory rows; unbuffered cursors return tuples"""
+
+    def __init__(self, connection, streaming=False):
+        self.connection = connection
+        self.streaming = streaming
+        self._result = []
+
+    def execute(self, query, params=None):
+        self.connection.queries.append(query)
+        if 'score_rows' in query:
+            self._result = [{**self.connection.marker, "assessment_rows": len(self.connection.assessments)}]
+        elif 'FROM mat_standards ms' in query:
+            self._result = STANDARDS
+        elif 'last_updated >=' in query:
+            self._result = [row for row in self.connection.assessments if row["last_updated"] >= params[1]]
+        else:
+            self._result = [(row["school_id"], row["mat_standard_id"], row["unique_term_id"], row["rating"],
+                             row["last_updated"]) for row in self.connection.assessments]
+
+    def fetchone(self):
+        return self._result[0]
+
+    def fetchall(self):
+        assert not self.streaming, "full loads must not buffer"
+        return list(self._result)
+
+    def fetchmany(self, size):
+        self.connection.batches += 1
+        batch, self._result = self._result[:size], self._result[size:]
+        return batch
+
+    def close(self):
+        pass
+
+class FakeConnection:
+    def __init__(self, assessments):
+        self.assessments = assessments
+        self.marker = {"score_rows": 27, "revisions": 1, "catalogue_version": 1}
+        self.queries = []
+        self.batches = 0
+
+    def cursor(self, cursor_class=None):
+        return FakeCursor(self, streaming=cursor_class is not None)
+
+def test_streamed_load():
+    """Test that a full load streams batches into the same columns a merge builds"""
+    print("\n=== Testing Streamed Load ===")
+
+    assessments = _assessments()
+    connection = FakeConnection(assessments)
+    columns = AnalyticsEngine(batch_rows=100).columns(connection, "HLT", TERMS)
+    assert connection.batches == len(assessments) // 100 + 2
+    print(f"✓ {len(assessments)} rows read {100} at a time from an unbuffered cursor")
+
+    merged = _columns(assessments)
+    assert (columns.key == merged.key).all() and (columns.rating == merged.rating).all()
+    assert columns.last_seen == merged.last_seen
+    print("✓ Same sorted arrays as merging the rows")
+
+    return True
+
+def test_engine_refresh():
+    """Test that the engine reuses columns until the change marker moves, then reads only recent rows"""
+    print("\n=== Testing Engine Refresh ===")
+
+    assessments = _assessments()
+    connection = FakeConnection(assessments)
+    engine = AnalyticsEngine(change_window_seconds=60)
+
+    first = engine.rollup(connection, "HLT", TERMS, ('unique_term_id',))
+    engine.rollup(connection, "HLT", TERMS, ('unique_term_id',))
+    assert sum('FROM assessments' in query for query in connection.queries) == 1
+    print("✓ Unchanged marker serves from memory")
+
+    written_at = datetime(2025, 11, 4, 8, 0, 0)
+    assessments[0] = {**assessments[0], "rating": 1 if assessments[0]["rating"] != 1 else 2, "last_updated": written_at}
+    connection.marker = {**connection.marker, "revisions": 2}
+    connection.queries.clear()
+    second = engine.rollup(connection, "HLT", TERMS, ('unique_term_id',))
+    assert [query for query in connection.queries if 'FROM assessments' in query] == \
+        [query for query in connection.queries if 'last_updated >=' in query] != []
+    assert second == rollup_cube_cells(_cube_cells(assessments), ('unique_term_id',))
+    assert second != first
+    print("✓ Moved marker merges the recently written rows only")
+
+    del assessments[1:4]
+    connection.marker = {**connection.marker, "revisions": 3}
+    connection.queries.clear()
+    third = engine.rollup(connection, "HLT", TERMS, ('unique_term_id',))
+    assert any('last_updated >=' in query for query in connection.queries)
+    assert any('FROM assessments' in query and 'last_updated >=' not in query for query in connection.queries)
+    assert third == rollup_cube_cells(_cube_cells(assessments), ('unique_term_id',))
+    print("✓ Deleted assessments: merge count falls short of the total, MAT reloaded")
+
+    renamed = {**assessments[0], "mat_standard_id": "HLT-FIN-3"}
+    assessments[:] = [renamed] + [row for row in assessments[1:] if (
+        row["school_id"], row["mat_standard_id"], row["unique_term_id"]) != (
+        renamed["school_id"], "HLT-FIN-3", renamed["unique_term_id"])]
+    connection.marker = {**connection.marker, "catalogue_version": 2}
+    connection.queries.clear()
+    fourth = engine.rollup(connection, "HLT", TERMS, ('standard_type', 'aspect_category'))
+    assert not any('last_updated >=' in query for query in connection.queries)
+    assert fourth == _columns(assessments).rollup(('standard_type', 'aspect_category'))
+    print("✓ catalogue_version change (rename, archive) reloads without a merge")
+
+    newer_terms = TERMS + [{"unique_term_id": "T1-2026-27", "academic_year": "2026-27"}]
+    engine.rollup(connection, "HLT", newer_terms, ('unique_term_id',))
+    assert engine.columns(connection, "HLT", newer_terms).terms.labels[-1] == "T1-2026-27"
+    print("✓ A new term calendar reloads the MAT")
+
+    bounded = AnalyticsEngine(max_mats=1)
+    bounded.rollup(connection, "HLT", TERMS, ())
+    bounded.rollup(connection, "OLT", TERMS, ())
+    assert list(bounded._mats) == ["OLT"]
+    assert bounded._mat_lock("HLT") is not bounded._mat_lock("OLT")
+    print("✓ Least recently used MAT evicted at max_mats; one lock per MAT")
+
+    return True
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Analytics Engine Tests")
+    print("=" * 60)
+
+    all_tests_passed = True
+    all_tests_passed &= test_rollups_match_cube()
+    all_tests_passed &= test_incremental_merge()
+    all_tests_passed &= test_streamed_load()
+    all_tests_passed &= test_engine_refresh()
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if all_tests_passed else "❌ SOME TESTS FAILED")
+    print("=" * 60)
@@ -0,0 +1,228 @@
+"""
+Assessment Export Test
+This script verifies batched CSV/Parquet export writing and background export jobs, with their state
+in the database and their output in shared storage.
+"""
+
+import csv
+import io
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+
+import assessment_export
+from assessment_export import (
+    EXPORT_COLUMNS,
+    ExportJobs,
+    csv_chunks,
+    export_key,
+    iter_export_batches,
+    write_export
+)
+from evidence_storage import LocalEvidenceStorage
+
+def _rows(count):
+    return [
+        {**{column: None for column in EXPORT_COLUMNS},
+         "id": f"id-{i}", "school_id": "cedar-park-primary", "school_name": "Cedar Park, Primary",
+         "unique_term_id": "T1-2025-26", "version_number": 2, "rating": (i % 4) + 1,
+         "evidence_comments": "Line one\nline \"two\"", "due_date": date(2025, 12, 1),
+         "last_updated": datetime(2025, 11, 2, 9, 15, 0)}
+        for i in range(count)
+    ]
+
+class FakeServerCursor:
+    """Unbuffered cursor stand-in: hands rows out only through fetchmany()"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.fetch_sizes = []
+        self.closed = False
+
+    def execute(self, query, params=None):
+        self.position = 0
+
+    def fetchmany(self, size):
+        batch = self.rows[self.position:self.position + size]
+        self.position += size
+        self.fetch_sizes.append(len(batch))
+        return batch
+
+    def close(self):
+        self.closed = True
+
+class FakeJobCursor:
+    """Keeps export_jobs rows in memory"""
+
+    def __init__(self):
+        self.jobs = {}
+        self.heartbeats = 0
+        self.rowcount = 0
+        self._result = []
+
+    def execute(self, query, params=None):
+        now = datetime.utcnow()
+        self._result = []
+        if "INSERT INTO export_jobs" in query:
+            self.jobs[params[0]] = dict(zip(
+                ("job_id", "mat_id", "requested_by", "export_format", "filters", "status"), params),
+                row_count=None, size_bytes=None, error=None, created_at=now, heartbeat_at=now, completed_at=None)
+        elif "SET status = 'failed'" in query:
+            stale = [job for job in self.jobs.values()
+                     if job["status"] in ("queued", "running")
+                     and job["heartbeat_at"] < now - timedelta(seconds=params[0])
+                     and ("job_id = %s" not in query or job["job_id"] == params[1])]
+            for job in stale:
+                job.update(status="failed", error="stopped", completed_at=now)
+            self.rowcount = len(stale)
+        elif "SET status = %s" in query:
+            job = self.jobs[params[-1]]
+            job.update(zip(("status", "row_count", "size_bytes", "error"), params), heartbeat_at=now)
+            job["completed_at"] = now if job["status"] in ("completed", "failed") else None
+        elif "SET heartbeat_at" in query:
+            self.heartbeats += 1
+            self.jobs[params[0]]["heartbeat_at"] = now
+        elif "SELECT *" in query:
+            self._result = [dict(job) for job in self.jobs.values()
+                            if (job["job_id"], job["mat_id"]) == tuple(params)]
+        elif "SELECT job_id" in query:
+            self._result = [dict(job) for job in self.jobs.values()
+                            if job["created_at"] < now - timedelta(seconds=params[0])]
+        elif "DELETE FROM export_jobs" in query:
+            for job_id in params:
+                del self.jobs[job_id]
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def fetchall(self):
+        return self._result
+
+class FakeConnection:
+    def __init__(self, rows, job_cursor=None):
+        self.server_cursor = FakeServerCursor(rows)
+        self.job_cursor = job_cursor or FakeJobCursor()
+        self.open = True
+
+    def cursor(self, cursor_class=None):
+        return self.server_cursor if cursor_class else self.job_cursor
+
+    def commit(self):
+        pass
+
+    def close(self):
+        self.open = False
+
+def test_csv_is_written_per_batch():
+    """Test that CSV output is produced one batch at a time and round-trips"""
+    print("\n=== Testing CSV Batches ===")
+
+    connection = FakeConnection(_rows(25))
+    chunks = list(csv_chunks(iter_export_batches(connection, "SELECT 1", [], batch_rows=10)))
+    assert connection.server_cursor.fetch_sizes == [10, 10, 5, 0]
+    assert connection.server_cursor.closed
+    assert len(chunks) == 3
+    print(f"✓ 25 rows fetched in batches of 10 → {len(chunks)} chunks")
+
+    rows = list(csv.DictReader(io.StringIO(b"".join(chunks).decode("utf-8"))))
+    assert len(rows) == 25 and tuple(rows[0].keys()) == EXPORT_COLUMNS
+    assert rows[0]["school_name"] == "Cedar Park, Primary"
+    assert rows[0]["evidence_comments"] == "Line one\nline \"two\""
+    assert rows[0]["last_updated"] == "2025-11-02T09:15:00Z" and rows[0]["due_date"] == "2025-12-01"
+    assert rows[0]["assigned_to_name"] == ""
+    print("✓ Quoting, dates and NULLs survive the round trip")
+
+    return True
+
+def test_parquet_export():
+    """Test that Parquet output keeps column types (skipped without pyarrow)"""
+    print("\n=== Testing Parquet Export ===")
+
+    if assessment_export.pa is None:
+        print("✓ pyarrow not installed - skipped")
+        return True
+
+    import pyarrow.parquet as pq
+
+    buffer = io.BytesIO()
+    row_count = write_export(iter_export_batches(FakeConnection(_rows(12)), "SELECT 1", [], batch_rows=5), "parquet", buffer)
+    buffer.seek(0)
+    parquet_file = pq.ParquetFile(buffer)
+    table = parquet_file.read()
+    assert row_count == table.num_rows == 12
+    assert parquet_file.metadata.num_row_groups == 3
+    assert table.column_names == list(EXPORT_COLUMNS)
+    assert table.column("rating").to_pylist()[:4] == [1, 2, 3, 4]
+    assert table.column("last_updated").to_pylist()[0] == datetime(2025, 11, 2, 9, 15, 0)
+    print("✓ 12 rows written in 3 row groups with typed columns")
+
+    return True
+
+def _queued(jobs, connection, job_id, export_format="csv"):
+    """A queued job, recorded as start() would, without starting its thread"""
+    job = {"job_id": job_id, "mat_id": "HLT", "requested_by": "user-1", "format": export_format,
+           "filters": {"unique_term_id": "T1-2025-26", "academic_year": None}, "status": "queued",
+           "row_count": None, "size_bytes": None, "error": None, "created_at": None, "completed_at": None}
+    connection.job_cursor.execute(assessment_export.INSERT_JOB_SQL, (
+        job_id, "HLT", "user-1", export_format, '{"unique_term_id": "T1-2025-26", "academic_year": null}', "queued"))
+    return job
+
+def test_background_job():
+    """Test a job's lifecycle, its output in storage and MAT isolation"""
+    print("\n=== Testing Background Job ===")
+
+    with tempfile.TemporaryDirectory() as export_dir, tempfile.TemporaryDirectory() as storage_dir:
+        connection = FakeConnection(_rows(7))
+        storage = LocalEvidenceStorage(storage_dir)
+        jobs = ExportJobs(export_dir=export_dir, connect=lambda: connection, storage=storage)
+        jobs.run(_queued(jobs, connection, "abc123"))
+
+        other_worker = ExportJobs(export_dir=tempfile.gettempdir(), connect=lambda: connection, storage=storage)
+        saved = other_worker.get("abc123", "HLT")
+        assert saved["status"] == "completed" and saved["row_count"] == 7
+        assert saved["filters"]["unique_term_id"] == "T1-2025-26" and saved["completed_at"]
+        assert not connection.open and connection.job_cursor.heartbeats >= 2
+        with open(storage.path(export_key(saved)), "rb") as f:
+            assert f.read().count(b"cedar-park-primary") == 7
+        assert os.listdir(export_dir) == []
+        print("✓ Completed job: state in the table, file copied to storage, local scratch removed")
+
+        assert other_worker.get("abc123", "OLT") is None
+        assert other_worker.get("../abc123", "HLT") is None
+        print("✓ Jobs are visible from any worker, to their own MAT only")
+
+        def broken():
+            raise RuntimeError("database unavailable")
+        failing = ExportJobs(export_dir=export_dir, connect=broken, storage=storage)
+        failed = failing.run(_queued(jobs, connection, "def456"))
+        assert failed["status"] == "failed" and "unavailable" in failed["error"]
+        assert connection.job_cursor.jobs["def456"]["status"] == "queued"
+        print("✓ A job that can't reach the database is failed later by the heartbeat check")
+
+        connection.job_cursor.jobs["def456"]["heartbeat_at"] -= timedelta(hours=1)
+        assert jobs.get("def456", "HLT")["status"] == "failed"
+        _queued(jobs, connection, "ghi789")
+        connection.job_cursor.jobs["ghi789"]["heartbeat_at"] -= timedelta(hours=1)
+        assert jobs.fail_stale() == 1 and connection.job_cursor.jobs["ghi789"]["status"] == "failed"
+        print("✓ Stale queued/running jobs failed when read and at startup")
+
+        connection.job_cursor.jobs["abc123"]["created_at"] -= timedelta(days=2)
+        assert jobs.purge_expired() == 1
+        assert "abc123" not in connection.job_cursor.jobs and not os.path.exists(storage.path(export_key(saved)))
+        print("✓ Expired jobs purged with their stored file")
+
+    return True
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Assessment Export Tests")
+    print("=" * 60)
+
+    all_tests_passed = True
+    all_tests_passed &= test_csv_is_written_per_batch()
+    all_tests_passed &= test_parquet_export()
+    all_tests_passed &= test_background_job()
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if all_tests_passed else "❌ SOME TESTS FAILED")
+    print("=" * 60)
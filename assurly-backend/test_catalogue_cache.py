@@ -0,0 +1,217 @@
+"""
+Catalogue Cache Test
+This script verifies that the per-MAT catalogue cache serves every filter from memory and reloads on a version bump,
+and that the aspect list query has no per-aspect subquery.
+"""
+
+import os
+import re
+from datetime import datetime, timedelta, timezone
+
+import pymysql
+
+from catalogue_cache import ASPECTS_SQL, CatalogueCache, bump_catalogue_version
+
+ASPECTS = [
+    {"mat_aspect_id": "HLT-EDU", "mat_id": "HLT", "aspect_code": "EDU", "aspect_name": "Education",
+     "aspect_description": None, "aspect_category": "ofsted", "sort_order": 1, "is_custom": 0,
+     "source_aspect_id": "EDU", "is_modified": 0, "standards_count": 2},
+    {"mat_aspect_id": "HLT-FIN", "mat_id": "HLT", "aspect_code": "FIN", "aspect_name": "Finance",
+     "aspect_description": None, "aspect_category": "operational", "sort_order": 2, "is_custom": 1,
+     "source_aspect_id": None, "is_modified": 0, "standards_count": 1},
+]
+
+def _standard(code, aspect, standard_type="assurance", is_active=1, version="1"):
+    return {
+        "mat_standard_id": f"HLT-{code}", "mat_id": "HLT", "standard_code": code, "standard_name": code,
+        "standard_description": None, "standard_type": standard_type, "sort_order": 0, "is_custom": 0,
+        "is_modified": 0, "is_active": is_active, "current_version_id": f"HLT-{code}-v{version}",
+        "created_at": None, "updated_at": None, "mat_aspect_id": aspect["mat_aspect_id"],
+        "aspect_code": aspect["aspect_code"], "aspect_name": aspect["aspect_name"],
+        "aspect_category": aspect["aspect_category"], "aspect_is_active": 1, "current_version": version
+    }
+
+STANDARDS = [
+    _standard("EDU1", ASPECTS[0]),
+    _standard("EDU2", ASPECTS[0], standard_type="risk", version="3"),
+    _standard("EDU3", ASPECTS[0], is_active=0),
+    _standard("FIN1", ASPECTS[1]),
+]
+
+def _version(code, number, start, end=None):
+    return {"mat_standard_id": f"HLT-{code}", "version_id": f"HLT-{code}-v{number}", "version_number": str(number),
+            "standard_code": code, "standard_name": f"{code} wording v{number}", "standard_description": None,
+            "standard_type": "assurance", "effective_from": start, "effective_to": end,
+            "created_by_user_id": None, "change_reason": None}
+
+SEP_1 = datetime(2025, 9, 1)
+JAN_1 = datetime(2026, 1, 1)
+MAR_1 = datetime(2026, 3, 1)
+
+VERSIONS = [
+    _version("EDU1", 1, SEP_1, JAN_1),
+    _version("EDU1", 2, JAN_1),
+    _version("EDU3", 1, SEP_1, MAR_1),  # deactivated on 1 March
+    _version("FIN1", 1, JAN_1),
+]
+
+class FakeCursor:
+    """Serves the catalogue queries and counts them"""
+
+    def __init__(self):
+        self.version = 4
+        self.queries = []
+        self._result = []
+
+    def execute(self, query, params=None):
+        if "catalogue_version + 1" in query:
+            self.version += 1
+            return
+        self.queries.append(query)
+        if "catalogue_version" in query:
+            self._result = [{"catalogue_version": self.version}]
+        elif "ORDER BY sv.mat_standard_id" in query:
+            self._result = VERSIONS
+        elif "LEFT JOIN aspects da" in query:
+            self._result = ASPECTS
+        elif "FROM standard_versions" in query:
+            self._result = [{"version_id": f"{params[0]}-v1", "version_number": 1}]
+        else:
+            self._result = STANDARDS
+
+    def fetchone(self):
+        return self._result[0]
+
+    def fetchall(self):
+        return list(self._result)
+
+def test_filters_served_from_memory():
+    """Test that every filter variant is answered from one load"""
+    print("\n=== Testing Filters ===")
+
+    cursor = FakeCursor()
+    cache = CatalogueCache()
+    catalogue = cache.get(cursor, "HLT")
+    assert [s["standard_code"] for s in catalogue.list_standards()] == ["EDU1", "EDU2", "FIN1"]
+    assert [s["standard_code"] for s in catalogue.list_standards(aspect_code="EDU")] == ["EDU1", "EDU2"]
+    assert [s["standard_code"] for s in catalogue.list_standards(standard_type="risk")] == ["EDU2"]
+    assert [s["standard_code"] for s in catalogue.list_standards(aspect_category="operational")] == ["FIN1"]
+    assert [a["aspect_code"] for a in catalogue.list_aspects("ofsted")] == ["EDU"]
+    print("✓ aspect_code, standard_type and aspect_category filters")
+
+    assert catalogue.get_standard("HLT-EDU2")["version_number"] == 3
+    assert catalogue.get_standard("HLT-EDU3") is not None
+    assert catalogue.get_aspect("HLT-EDU")["standards_count"] == 3
+    assert catalogue.get_aspect("HLT-FIN")["is_custom"] == 1
+    assert catalogue.get_aspect("HLT-XXX") is None
+    print("✓ Single standard and aspect lookups (archived standards included)")
+
+    catalogue.versions(cursor, "HLT-EDU1")
+    catalogue.versions(cursor, "HLT-EDU1")
+    cache.get(cursor, "HLT")
+    loads = [q for q in cursor.queries if "catalogue_version" not in q]
+    assert len(loads) == 3  # aspects, standards, one version history
+    print("✓ Repeat reads only check the catalogue version")
+
+    return True
+
+def test_version_bump_reloads():
+    """Test that a bump (from any worker) makes the next read reload"""
+    print("\n=== Testing Version Bump ===")
+
+    cursor = FakeCursor()
+    cache = CatalogueCache()
+    first = cache.get(cursor, "HLT")
+    bump_catalogue_version(cursor, "HLT")
+    second = cache.get(cursor, "HLT")
+    assert second is not first and second.version == 5
+    assert cache.get(cursor, "HLT") is second
+    print("✓ Bumped version reloads once, then serves from memory")
+
+    bounded = CatalogueCache(max_mats=1)
+    bounded.get(cursor, "HLT")
+    bounded.get(cursor, "OLT")
+    assert list(bounded._catalogues) == ["OLT"]
+    print("✓ Least recently used MAT evicted at max_mats")
+
+    return True
+
+def test_version_timeline():
+    """Test point-in-time version lookups against the MAT's interval timeline"""
+    print("\n=== Testing Version Timeline ===")
+
+    cursor = FakeCursor()
+    catalogue = CatalogueCache().get(cursor, "HLT")
+    timeline = catalogue.timeline(cursor)
+
+    assert timeline.as_of("HLT-EDU1", datetime(2025, 12, 31))["version_id"] == "HLT-EDU1-v1"
+    assert timeline.as_of("HLT-EDU1", JAN_1)["version_id"] == "HLT-EDU1-v2"
+    assert timeline.as_of("HLT-EDU1", datetime(2030, 1, 1))["version_number"] == 2
+    print("✓ Interval boundaries: a version is in force from effective_from up to effective_to")
+
+    assert timeline.as_of("HLT-EDU1", datetime(2025, 8, 31)) is None
+    assert timeline.as_of("HLT-EDU3", MAR_1) is None
+    assert timeline.as_of("HLT-EDU3", MAR_1 - timedelta(seconds=1))["version_id"] == "HLT-EDU3-v1"
+    assert timeline.as_of("HLT-XXX", JAN_1) is None
+    print("✓ None before the first version, after the last is closed, and for unknown standards")
+
+    aware = datetime(2026, 1, 1, 0, 30, tzinfo=timezone(timedelta(hours=1)))
+    assert timeline.as_of("HLT-EDU1", aware)["version_id"] == "HLT-EDU1-v1"
+    print("✓ Timezone-aware times are compared in UTC")
+
+    catalogue.timeline(cursor)
+    assert sum("ORDER BY sv.mat_standard_id" in q for q in cursor.queries) == 1
+    print("✓ Timeline loaded once per catalogue")
+
+    return True
+
+def _select_list(query):
+    """The outer SELECT list, with derived tables in FROM left out"""
+    return re.split(r"\bFROM\b", query, maxsplit=1, flags=re.IGNORECASE)[0]
+
+def test_aspect_list_query_plan():
+    """Test that aspect counts come from one grouped join, not a subquery per aspect"""
+    print("\n=== Testing Aspect List Query Plan ===")
+
+    assert "SELECT" not in _select_list(ASPECTS_SQL).upper().split("SELECT", 1)[1]
+    assert "ms.mat_aspect_id = ma.mat_aspect_id" not in ASPECTS_SQL
+    assert ASPECTS_SQL.count("%s") == 2
+    print("✓ No subquery in the select list; counts joined from a grouped derived table")
+
+    if not os.getenv("DB_NAME"):
+        print("✓ No database configured - EXPLAIN skipped")
+        return True
+
+    connection = pymysql.connect(unix_socket=os.getenv("DB_HOST"), user=os.getenv("DB_USER"),
+                                 password=os.getenv("DB_PASSWORD"), database=os.getenv("DB_NAME"),
+                                 cursorclass=pymysql.cursors.DictCursor)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT mat_id FROM mats LIMIT 1")
+            row = cursor.fetchone()
+            mat_id = row["mat_id"] if row else "HLT"
+            cursor.execute("EXPLAIN " + ASPECTS_SQL, (mat_id, mat_id))
+            plan = cursor.fetchall()
+    finally:
+        connection.close()
+
+    select_types = [step["select_type"] for step in plan]
+    assert not any("DEPENDENT" in select_type for select_type in select_types), select_types
+    print(f"✓ EXPLAIN has no dependent subquery: {', '.join(select_types)}")
+
+    return True
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Catalogue Cache Tests")
+    print("=" * 60)
+
+    all_tests_passed = True
+    all_tests_passed &= test_filters_served_from_memory()
+    all_tests_passed &= test_version_bump_reloads()
+    all_tests_passed &= test_version_timeline()
+    all_tests_passed &= test_aspect_list_query_plan()
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if all_tests_passed else "❌ SOME TESTS FAILED")
+    print("=" * 60)
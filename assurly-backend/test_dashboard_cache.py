@@ -0,0 +1,89 @@
+"""
+Dashboard Cache Test
+This script verifies single-flight builds, write invalidation and expiry for the dashboard response cache.
+"""
+
+import asyncio
+
+from dashboard_cache import DashboardCache
+
+def _builder(builds, depends_on=("T1-2025-26", "T2-2025-26"), delay=0):
+    async def build():
+        builds.append(1)
+        await asyncio.sleep(delay)
+        return {"current_term": "T2-2025-26", "schools": []}, set(depends_on), (12, len(builds), None)
+    return build
+
+def test_concurrent_misses_share_one_build():
+    """Test that a burst of misses for one key runs a single build"""
+    print("\n=== Testing Single-Flight ===")
+
+    cache = DashboardCache()
+    builds = []
+
+    async def scenario():
+        build = _builder(builds, delay=0.05)
+        return await asyncio.gather(*[cache.compute("HLT", "T2-2025-26", build) for _ in range(10)])
+
+    payloads = asyncio.run(scenario())
+    assert len(builds) == 1
+    assert all(payload == payloads[0] for payload in payloads)
+    assert cache.get("HLT", "T2-2025-26")['token'] == (12, 1, None)
+    print(f"✓ {len(payloads)} concurrent misses, {len(builds)} build")
+
+    return True
+
+def test_writes_invalidate_dependent_entries():
+    """Test that a write drops only entries of that MAT built from the written term"""
+    print("\n=== Testing Invalidation ===")
+
+    cache = DashboardCache()
+    builds = []
+    asyncio.run(cache.compute("HLT", "T2-2025-26", _builder(builds)))
+    asyncio.run(cache.compute("OLT", "T2-2025-26", _builder(builds)))
+    asyncio.run(cache.compute("HLT", "T3-2025-26", _builder(builds, depends_on=("T2-2025-26", "T3-2025-26"))))
+
+    # A write to an older term the HLT T2 dashboard shows as a previous term
+    cache.invalidate({("HLT", "T1-2025-26")})
+    assert cache.get("HLT", "T2-2025-26") is None
+    assert cache.get("HLT", "T3-2025-26") is not None
+    assert cache.get("OLT", "T2-2025-26") is not None
+    print("✓ Previous-term write drops the dependent entry only")
+
+    cache.invalidate({("OLT", "T3-2025-26")})
+    assert cache.get("OLT", "T2-2025-26") is not None
+    print("✓ Writes to unrelated terms keep entries")
+
+    return True
+
+def test_entries_expire_and_are_bounded():
+    """Test TTL expiry and the max_entries bound"""
+    print("\n=== Testing Bounds ===")
+
+    expiring = DashboardCache(ttl_seconds=0)
+    asyncio.run(expiring.compute("HLT", "T2-2025-26", _builder([])))
+    assert expiring.get("HLT", "T2-2025-26") is None
+    print("✓ Expired entries are not served")
+
+    bounded = DashboardCache(max_entries=2)
+    for term in ("T1-2025-26", "T2-2025-26", "T3-2025-26"):
+        asyncio.run(bounded.compute("HLT", term, _builder([])))
+    assert len([term for term in ("T1-2025-26", "T2-2025-26", "T3-2025-26") if bounded.get("HLT", term)]) == 2
+    assert bounded.get("HLT", "T3-2025-26") is not None
+    print("✓ Cache capped at max_entries")
+
+    return True
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Dashboard Cache Tests")
+    print("=" * 60)
+
+    all_tests_passed = True
+    all_tests_passed &= test_concurrent_misses_share_one_build()
+    all_tests_passed &= test_writes_invalidate_dependent_entries()
+    all_tests_passed &= test_entries_expire_and_are_bounded()
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if all_tests_passed else "❌ SOME TESTS FAILED")
+    print("=" * 60)
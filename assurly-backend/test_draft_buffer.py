@@ -0,0 +1,155 @@
+"""
+Draft Autosave Buffer Test
+This script verifies edit coalescing, spill-file recovery and crash-safe spill rewrites for assessment drafts.
+"""
+
+import os
+import tempfile
+
+import draft_buffer
+from draft_buffer import DraftBuffer
+
+def test_edits_coalesce_per_cell():
+    """Test that repeated edits to one assessment collapse into a single draft"""
+    print("\n=== Testing Draft Coalescing ===")
+
+    buffer = DraftBuffer(spill_dir=None)
+    buffer.record("mat-001", "user-1", "school-A-ES1-T1-2025-26", {"rating": 2}, "2025-01-15T10:30:00Z")
+    buffer.record("mat-001", "user-1", "school-A-ES1-T1-2025-26", {"evidence_comments": "Draft"})
+    buffer.record("mat-001", "user-1", "school-A-ES1-T1-2025-26", {"rating": 3}, "2025-01-15T11:00:00Z")
+    buffer.record("mat-001", "user-1", "school-A-ES2-T1-2025-26", {"rating": 4})
+
+    drafts = buffer.pending("mat-001", "user-1")
+    assert len(drafts) == 2
+    cell = drafts["school-A-ES1-T1-2025-26"]
+    assert cell["changes"] == {"rating": 3, "evidence_comments": "Draft"}
+    # The precondition is the version the user started editing from
+    assert cell["base_last_updated"] == "2025-01-15T10:30:00Z"
+    print(f"✓ 4 edits coalesced into {len(drafts)} drafts")
+
+    entries = buffer.take("mat-001", "user-1")
+    assert len(entries) == 2
+    assert buffer.pending_count() == 0
+    print("✓ take() empties the user's buffer")
+
+    # A failed flush puts drafts back without clobbering newer edits
+    buffer.record("mat-001", "user-1", "school-A-ES1-T1-2025-26", {"rating": 1})
+    buffer.restore(entries)
+    cell = buffer.pending("mat-001", "user-1")["school-A-ES1-T1-2025-26"]
+    assert cell["changes"] == {"rating": 1, "evidence_comments": "Draft"}
+    print("✓ restore() keeps edits made during the failed flush")
+
+    return True
+
+def test_spill_survives_restart():
+    """Test that a new worker replays drafts spilled by one that stopped"""
+    print("\n=== Testing Spill Recovery ===")
+
+    with tempfile.TemporaryDirectory() as spill_dir:
+        crashed = DraftBuffer(spill_dir=spill_dir)
+        crashed.open_spill()
+        fsyncs = []
+        real_fsync = draft_buffer.os.fsync
+        draft_buffer.os.fsync = lambda fd: fsyncs.append(fd) or real_fsync(fd)
+        try:
+            crashed.record_many("mat-001", "user-1", [
+                ("school-A-ES1-T1-2025-26", {"rating": 2}, None),
+                ("school-A-ES1-T1-2025-26", {"rating": 3}, None)
+            ])
+        finally:
+            draft_buffer.os.fsync = real_fsync
+        assert len(fsyncs) == 1
+        print("✓ One fsync for all the edits of a request")
+        crashed.record("mat-001", "user-2", "school-B-ES1-T1-2025-26", {"evidence_comments": "Notes"})
+        # Worker dies without flushing - releases its file lock
+        crashed.close_spill()
+
+        restarted = DraftBuffer(spill_dir=spill_dir)
+        recovered = restarted.open_spill()
+        assert recovered == 3
+        assert restarted.pending("mat-001", "user-1")["school-A-ES1-T1-2025-26"]["changes"] == {"rating": 3}
+        assert restarted.pending("mat-001", "user-2")["school-B-ES1-T1-2025-26"]["changes"] == {"evidence_comments": "Notes"}
+        assert len(os.listdir(spill_dir)) == 1
+        print(f"✓ Recovered {recovered} spilled edits into the new worker's spill file")
+
+        # A live worker's spill file is never claimed by another worker
+        sibling = DraftBuffer(spill_dir=spill_dir)
+        assert sibling.open_spill() == 0
+        print("✓ Live worker's spill file left alone")
+
+        # Once written, drafts are dropped from the spill file
+        entries = restarted.take()
+        restarted.settle(entries)
+        restarted.close_spill()
+        sibling.close_spill()
+        fresh = DraftBuffer(spill_dir=spill_dir)
+        assert fresh.open_spill() == 0
+        fresh.close_spill()
+        print("✓ Settled drafts are not replayed")
+
+    return True
+
+def test_discard_and_compaction():
+    """Test that discarded drafts are not replayed and a failed rewrite keeps the old spill file"""
+    print("\n=== Testing Discard and Compaction ===")
+
+    with tempfile.TemporaryDirectory() as spill_dir:
+        worker = DraftBuffer(spill_dir=spill_dir)
+        worker.open_spill()
+        worker.record("mat-001", "user-1", "school-A-ES1-T1-2025-26", {"rating": 2})
+        worker.record("mat-001", "user-1", "school-A-ES2-T1-2025-26", {"rating": 4})
+        worker.discard("mat-001", "user-1", "school-A-ES1-T1-2025-26")
+        worker.close_spill()
+
+        restarted = DraftBuffer(spill_dir=spill_dir)
+        assert restarted.open_spill() == 1
+        assert list(restarted.pending("mat-001", "user-1")) == ["school-A-ES2-T1-2025-26"]
+        print("✓ A draft discarded by a direct save is not replayed after a restart")
+
+        restarted.discard_many("mat-001", "user-1", ["school-A-ES2-T1-2025-26"])
+        restarted.close_spill()
+        fresh = DraftBuffer(spill_dir=spill_dir)
+        assert fresh.open_spill() == 0
+        fresh.close_spill()
+        print("✓ discard → reopen spill → nothing recovered")
+
+    with tempfile.TemporaryDirectory() as spill_dir:
+        worker = DraftBuffer(spill_dir=spill_dir)
+        worker.open_spill()
+        worker.record("mat-001", "user-1", "school-A-ES1-T1-2025-26", {"rating": 2})
+        worker.record("mat-001", "user-1", "school-A-ES2-T1-2025-26", {"rating": 4})
+
+        def crash(src, dst):
+            raise OSError("crashed before the rename")
+
+        real_replace = draft_buffer.os.replace
+        draft_buffer.os.replace = crash
+        try:
+            worker.settle(worker.take())
+            assert False
+        except OSError:
+            pass
+        finally:
+            draft_buffer.os.replace = real_replace
+        worker.close_spill()
+
+        restarted = DraftBuffer(spill_dir=spill_dir)
+        assert restarted.open_spill() == 2
+        restarted.close_spill()
+        print("✓ A rewrite that dies before the rename leaves every spilled draft in place")
+
+    return True
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Draft Autosave Buffer Tests")
+    print("=" * 60)
+
+    all_tests_passed = True
+    all_tests_passed &= test_edits_coalesce_per_cell()
+    all_tests_passed &= test_spill_survives_restart()
+    all_tests_passed &= test_discard_and_compaction()
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if all_tests_passed else "❌ SOME TESTS FAILED")
+    print("=" * 60)
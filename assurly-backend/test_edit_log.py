@@ -0,0 +1,99 @@
+"""
+Edit Log Feed Test
+This script verifies keyset pagination of the standard edit log feed.
+"""
+
+from datetime import datetime, timedelta
+
+from edit_log import decode_cursor, edit_log_page, edit_log_query, encode_cursor
+
+def _rows(count, start=datetime(2026, 3, 1, 12, 0, 0)):
+    """Newest first, two entries per second so ties on edited_at are covered"""
+    return [
+        {"log_id": f"log-{count - i:04d}", "mat_standard_id": "HLT-AC1", "edited_at": start - timedelta(seconds=i // 2),
+         "old_values": '{"version_id": "HLT-AC1-v1"}', "new_values": '{"version_id": "HLT-AC1-v2", "name": "A"}'}
+        for i in range(count)
+    ]
+
+def test_cursor_round_trip():
+    """Test that cursors carry (edited_at, log_id) and reject garbage"""
+    print("\n=== Testing Cursor ===")
+
+    edited_at = datetime(2026, 3, 1, 12, 0, 5)
+    assert decode_cursor(encode_cursor(edited_at, "log-0007")) == (edited_at, "log-0007")
+    print("✓ Cursor round-trips")
+
+    for token in ("not-a-cursor", encode_cursor(edited_at, "x")[:-4]):
+        try:
+            decode_cursor(token)
+            assert False, token
+        except ValueError:
+            pass
+    print("✓ Malformed cursors raise ValueError")
+
+    return True
+
+def test_keyset_query():
+    """Test that filters and the keyset condition are bound in order"""
+    print("\n=== Testing Keyset Query ===")
+
+    query, params = edit_log_query("HLT", 50)
+    assert params == ["HLT", 51]
+    assert "ORDER BY l.edited_at DESC, l.log_id DESC" in query and "OFFSET" not in query
+    print("✓ First page: MAT filter, newest first, limit + 1")
+
+    edited_at = datetime(2026, 3, 1, 12, 0, 5)
+    query, params = edit_log_query("HLT", 20, cursor=encode_cursor(edited_at, "log-0007"), user_id="user-1",
+                                   edited_from=datetime(2026, 1, 1), include_values=False)
+    assert params == ["HLT", "user-1", datetime(2026, 1, 1), edited_at, edited_at, "log-0007", 21]
+    assert "l.edited_at < %s OR (l.edited_at = %s AND l.log_id < %s)" in query
+    assert "old_values" not in query
+    print("✓ Later page: filters, then keyset on (edited_at, log_id); JSON columns skipped when not wanted")
+
+    return True
+
+def test_paging_through_feed():
+    """Test that following next_cursor visits every row once, ties included"""
+    print("\n=== Testing Paging ===")
+
+    rows = _rows(25)
+
+    def fetch(limit, cursor):
+        if cursor:
+            last_edited_at, last_log_id = decode_cursor(cursor)
+            matching = [row for row in rows
+                        if (row["edited_at"], row["log_id"]) < (last_edited_at, last_log_id)]
+        else:
+            matching = rows
+        return [dict(row) for row in matching[:limit + 1]]
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        entries, cursor = edit_log_page(fetch(10, cursor), 10)
+        seen += [entry["log_id"] for entry in entries]
+        pages += 1
+        if cursor is None:
+            break
+    assert seen == [row["log_id"] for row in rows] and pages == 3
+    print(f"✓ {len(seen)} entries over {pages} pages, none repeated or skipped")
+
+    entries, _ = edit_log_page(fetch(1, None), 1)
+    assert entries[0]["new_values"] == {"version_id": "HLT-AC1-v2", "name": "A"}
+    assert entries[0]["edited_at"] == "2026-03-01T12:00:00Z"
+    print("✓ JSON values decoded for the returned page")
+
+    return True
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Edit Log Feed Tests")
+    print("=" * 60)
+
+    all_tests_passed = True
+    all_tests_passed &= test_cursor_round_trip()
+    all_tests_passed &= test_keyset_query()
+    all_tests_passed &= test_paging_through_feed()
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if all_tests_passed else "❌ SOME TESTS FAILED")
+    print("=" * 60)
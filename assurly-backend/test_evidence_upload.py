@@ -0,0 +1,183 @@
+"""
+Evidence Upload Test
+This script verifies streaming multipart parsing, hashing, limits and local storage of evidence uploads.
+"""
+
+import asyncio
+import hashlib
+import os
+import re
+import tempfile
+import threading
+
+from evidence_storage import LocalEvidenceStorage, LocalEvidenceWriter
+from evidence_upload import (
+    EvidenceTooLarge,
+    EvidenceUpload,
+    UnsupportedEvidenceType,
+    sanitise_filename,
+    stream_upload
+)
+
+BOUNDARY = b"EvidenceBoundary"
+FIELDS = {"mat_standard_id": "HLT-ED1", "school_id": "cedar", "unique_term_id": "T1-2025-26"}
+
+def _body(filename, content, fields=FIELDS, file_first=False):
+    parts = [
+        b"--" + BOUNDARY + b"\r\nContent-Disposition: form-data; name=\"" + name.encode() + b"\"\r\n\r\n"
+        + value.encode() + b"\r\n"
+        for name, value in fields.items()
+    ]
+    file_part = (b"--" + BOUNDARY + b"\r\nContent-Disposition: form-data; name=\"file\"; filename=\""
+                 + filename.encode("utf-8") + b"\"\r\nContent-Type: application/octet-stream\r\n\r\n"
+                 + content + b"\r\n")
+    parts = [file_part] + parts if file_first else parts + [file_part]
+    return b"".join(parts) + b"--" + BOUNDARY + b"--\r\n"
+
+def _files(root):
+    return sorted(os.path.relpath(os.path.join(path, name), root)
+                  for path, _, names in os.walk(root) for name in names)
+
+def _upload(root, checked=None, max_bytes=1024 * 1024):
+    return EvidenceUpload(BOUNDARY, LocalEvidenceStorage(root), "HLT",
+                          checked.append if checked is not None else (lambda fields: None), max_bytes=max_bytes)
+
+def test_streaming_parse():
+    """Test that a body fed in small pieces is stored and hashed without being buffered"""
+    print("\n=== Testing Streaming Parse ===")
+
+    root = tempfile.mkdtemp()
+    content = os.urandom(200_000)
+    body = _body("Q1 Report: Attendance.PDF", content)
+    checked = []
+    upload = _upload(root, checked)
+    for i in range(0, len(body), 4096):
+        upload.feed(body[i:i + 4096])
+    assert checked == [FIELDS] and _files(root)[0].endswith(".part")
+    print("✓ Fields checked before the file; bytes go to a .part file as they arrive")
+
+    stored = upload.finish()
+    assert re.fullmatch(r"HLT/HLT-ED1/Q1 Report Attendance-[0-9a-f]{12}\.pdf", stored["file_path"])
+    assert stored["original_filename"] == "Q1 Report: Attendance.PDF" and stored["content_type"] == "application/pdf"
+    assert stored["size_bytes"] == len(content) and stored["sha256"] == hashlib.sha256(content).hexdigest()
+    assert _files(root) == [stored["file_path"]]
+    with open(os.path.join(root, stored["file_path"]), "rb") as f:
+        assert f.read() == content
+    print("✓ Committed under {mat_id}/{mat_standard_id}/{filename}-{random}{ext} with its SHA-256 and size")
+
+    second = _upload(root)
+    second.feed(_body("Q1 Report: Attendance.PDF", b"second"))
+    assert second.finish()["file_path"] != stored["file_path"] and len(_files(root)) == 2
+    print("✓ Same filename again gets its own key")
+
+    path = os.path.join(root, stored["file_path"])
+    writer = LocalEvidenceWriter(path)
+    writer.write(b"overwrite")
+    try:
+        writer.commit()
+        assert False
+    except FileExistsError:
+        writer.abort()
+    with open(path, "rb") as f:
+        assert f.read() == content
+    assert len(_files(root)) == 2
+    print("✓ Writers are create-only: an existing object is never overwritten")
+
+    assert sanitise_filename("..\\..\\etc/pass<wd>.docx") == "passwd.docx"
+    assert sanitise_filename("Évaluation été.xlsx") == "Évaluation été.xlsx"
+    assert sanitise_filename("???.png") == "evidence.png"
+    print("✓ Filenames lose directories and unsafe characters, keep UTF-8 and extension")
+
+    return True
+
+def test_limits():
+    """Test that bad uploads are rejected before or while storing, leaving nothing behind"""
+    print("\n=== Testing Limits ===")
+
+    root = tempfile.mkdtemp()
+    for filename, body, error in [
+        ("virus.exe", _body("virus.exe", b"MZ"), UnsupportedEvidenceType),
+        ("report.pdf", _body("report.pdf", b"%PDF", file_first=True), ValueError),
+        ("report.pdf", _body("report.pdf", b"x" * 5000), EvidenceTooLarge),
+    ]:
+        upload = _upload(root, max_bytes=4096)
+        try:
+            upload.feed(body)
+            assert False, filename
+        except error:
+            upload.abort()
+    assert _files(root) == []
+    print("✓ Wrong type (415), fields after the file (400), oversized (413); no files left")
+
+    upload = _upload(root)
+    body = _body("report.pdf", b"x" * 100)
+    upload.feed(body[:-40])
+    try:
+        upload.finish()
+        assert False
+    except ValueError:
+        upload.abort()
+    assert _files(root) == []
+    print("✓ Truncated body rejected at finish")
+
+    return True
+
+def test_stream_upload():
+    """Test that blocks are parsed on the evidence pool and failures abort the upload"""
+    print("\n=== Testing Stream Upload ===")
+
+    root = tempfile.mkdtemp()
+    content = os.urandom(300_000)
+    body = _body("plan.docx", content)
+    threads = set()
+
+    def check(fields):
+        threads.add(threading.current_thread().name)
+
+    async def chunks(fail_after=None):
+        for i in range(0, len(body), 65536):
+            if fail_after is not None and i >= fail_after:
+                raise ConnectionError("client disconnected")
+            yield body[i:i + 65536]
+            await asyncio.sleep(0)
+
+    upload = EvidenceUpload(BOUNDARY, LocalEvidenceStorage(root), "HLT", check)
+    stored = asyncio.run(stream_upload(chunks(), upload, len(body), chunk_bytes=128 * 1024))
+    assert _files(root) == [stored["file_path"]]
+    assert stored["sha256"] == hashlib.sha256(content).hexdigest()
+    assert threads and all(name.startswith("evidence") for name in threads)
+    print("✓ Parsed, hashed and written on the evidence thread pool")
+
+    upload = EvidenceUpload(BOUNDARY, LocalEvidenceStorage(root), "HLT", check)
+    try:
+        asyncio.run(stream_upload(chunks(fail_after=200_000), upload, len(body), chunk_bytes=128 * 1024))
+        assert False
+    except ConnectionError:
+        pass
+    assert _files(root) == [stored["file_path"]]
+    print("✓ Client disconnect aborts the partial file")
+
+    upload = EvidenceUpload(BOUNDARY, LocalEvidenceStorage(root), "HLT", check)
+    try:
+        asyncio.run(stream_upload(chunks(), upload, len(body) - 1, chunk_bytes=128 * 1024))
+        assert False
+    except EvidenceTooLarge:
+        pass
+    assert _files(root) == [stored["file_path"]]
+    print("✓ Request size checked as chunks arrive")
+
+    return True
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Evidence Upload Tests")
+    print("=" * 60)
+
+    all_tests_passed = True
+    all_tests_passed &= test_streaming_parse()
+    all_tests_passed &= test_limits()
+    all_tests_passed &= test_stream_upload()
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if all_tests_passed else "❌ SOME TESTS FAILED")
+    print("=" * 60)
@@ -0,0 +1,84 @@
+"""
+Heatmap Grid Test
+This script verifies the dense school x standard grid encoding and server-side RAG polarity.
+"""
+
+import gzip
+import json
+import random
+
+from heatmap import encode_rating_grid, rag_level
+
+def _standards(count, risk_every=4):
+    return [
+        {"mat_standard_id": f"HLT-EDU{j}", "standard_type": "risk" if j % risk_every == 0 else "assurance"}
+        for j in range(count)
+    ]
+
+def test_rag_polarity():
+    """Test that risk standards invert the RAG level"""
+    print("\n=== Testing RAG Polarity ===")
+
+    assert [rag_level(rating, "assurance") for rating in (1, 2, 3, 4)] == [1, 2, 3, 4]
+    assert [rag_level(rating, "risk") for rating in (1, 2, 3, 4)] == [4, 3, 2, 1]
+    assert rag_level(None, "risk") == 0
+    print("✓ Assurance keeps the scale, risk inverts it, unrated is grey")
+
+    return True
+
+def test_grid_layout():
+    """Test row-major placement, unrated cells and cells outside the grid"""
+    print("\n=== Testing Grid Layout ===")
+
+    schools = ["cedar-park-primary", "oak-hill-academy"]
+    standards = _standards(3, risk_every=2)  # EDU0 and EDU2 are risk
+    ratings, rag, rated = encode_rating_grid(schools, standards, [
+        {"school_id": "oak-hill-academy", "mat_standard_id": "HLT-EDU1", "rating": 2},
+        {"school_id": "cedar-park-primary", "mat_standard_id": "HLT-EDU0", "rating": 4},
+        {"school_id": "cedar-park-primary", "mat_standard_id": "HLT-EDU2", "rating": None},
+        {"school_id": "closed-school", "mat_standard_id": "HLT-EDU1", "rating": 3},
+        {"school_id": "oak-hill-academy", "mat_standard_id": "HLT-FIN1", "rating": 3},
+    ])
+    assert ratings == "400" + "020"
+    assert rag == "100" + "020"
+    assert rated == 2
+    print("✓ Cells land at row * columns + column; unknown rows/columns ignored")
+
+    assert encode_rating_grid([], standards, []) == ("", "", 0)
+    print("✓ Empty grid encodes to empty strings")
+
+    return True
+
+def test_grid_size():
+    """Test that a 50 x 200 grid stays a few KB once gzipped"""
+    print("\n=== Testing Grid Size ===")
+
+    rng = random.Random(3)
+    schools = [f"school-{i}" for i in range(50)]
+    standards = _standards(200)
+    assessments = [
+        {"school_id": school, "mat_standard_id": standard["mat_standard_id"], "rating": rng.randint(1, 4)}
+        for school in schools for standard in standards if rng.random() < 0.9
+    ]
+    ratings, rag, rated = encode_rating_grid(schools, standards, assessments)
+    assert len(ratings) == len(rag) == 10000 and rated == len(assessments)
+
+    size = len(gzip.compress(json.dumps({"ratings": ratings, "rag": rag}).encode()))
+    assert size < 8 * 1024
+    print(f"✓ 50 x 200 grid: {size} bytes gzipped")
+
+    return True
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Heatmap Grid Tests")
+    print("=" * 60)
+
+    all_tests_passed = True
+    all_tests_passed &= test_rag_polarity()
+    all_tests_passed &= test_grid_layout()
+    all_tests_passed &= test_grid_size()
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if all_tests_passed else "❌ SOME TESTS FAILED")
+    print("=" * 60)
@@ -0,0 +1,261 @@
+"""
+Idempotency Store Test
+This script verifies replay, fingerprint checks and duplicate coalescing for Idempotency-Key,
+within one worker and across workers sharing the idempotency_keys table.
+"""
+
+import asyncio
+import json
+import time
+
+import pymysql
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+from idempotency import IdempotencyStore
+
+def test_retry_is_replayed():
+    """Test that a retry with the same key returns the stored response without re-running"""
+    print("\n=== Testing Replay ===")
+
+    store = IdempotencyStore()
+    executions = []
+
+    async def handler():
+        executions.append(1)
+        return JSONResponse(content={"assessments_created": 12}, status_code=201)
+
+    async def scenario():
+        first = await store.execute(("mat-001", "user-1", "create_assessments", "key-1"), "fp-a", handler)
+        retry = await store.execute(("mat-001", "user-1", "create_assessments", "key-1"), "fp-a", handler)
+        return first, retry
+
+    first, retry = asyncio.run(scenario())
+    assert len(executions) == 1
+    assert retry.status_code == 201
+    assert json.loads(retry.body) == {"assessments_created": 12}
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    print("✓ Retry answered from the store with the original 201 body")
+
+    # Same key, different request body
+    try:
+        asyncio.run(store.execute(("mat-001", "user-1", "create_assessments", "key-1"), "fp-b", handler))
+        assert False, "expected 422"
+    except HTTPException as e:
+        assert e.status_code == 422
+    print("✓ Reusing a key for a different request is rejected with 422")
+
+    return True
+
+def test_concurrent_duplicates_wait():
+    """Test that duplicates arriving mid-execution wait and share one execution"""
+    print("\n=== Testing Concurrent Duplicates ===")
+
+    store = IdempotencyStore()
+    executions = []
+
+    async def slow_handler():
+        executions.append(1)
+        await asyncio.sleep(0.05)
+        return JSONResponse(content={"user_id": "new-user"}, status_code=201)
+
+    async def scenario():
+        key = ("mat-001", "admin-1", "create_user", "key-2")
+        return await asyncio.gather(*[store.execute(key, "fp", slow_handler) for _ in range(5)])
+
+    responses = asyncio.run(scenario())
+    assert len(executions) == 1
+    assert all(response.status_code == 201 for response in responses)
+    print(f"✓ {len(responses)} concurrent requests, {len(executions)} execution")
+
+    return True
+
+def test_server_errors_not_stored():
+    """Test that 5xx outcomes leave the key free for a real retry, while 4xx are replayed"""
+    print("\n=== Testing Error Outcomes ===")
+
+    store = IdempotencyStore()
+    attempts = []
+
+    async def flaky_handler():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise HTTPException(status_code=500, detail="Database unavailable")
+        raise HTTPException(status_code=403, detail="Cannot create assessments for schools outside your MAT")
+
+    key = ("mat-001", "user-1", "create_assessments", "key-3")
+    try:
+        asyncio.run(store.execute(key, "fp", flaky_handler))
+        assert False, "expected 500"
+    except HTTPException as e:
+        assert e.status_code == 500
+
+    rejected = asyncio.run(store.execute(key, "fp", flaky_handler))
+    replayed = asyncio.run(store.execute(key, "fp", flaky_handler))
+    assert len(attempts) == 2
+    assert rejected.status_code == replayed.status_code == 403
+    print("✓ 500 retried, 403 stored and replayed")
+
+    return True
+
+def test_store_is_bounded():
+    """Test that the oldest entries are evicted past max_entries and expired ones dropped"""
+    print("\n=== Testing Bounds ===")
+
+    async def handler():
+        return JSONResponse(content={}, status_code=200)
+
+    store = IdempotencyStore(max_entries=3)
+    for i in range(10):
+        asyncio.run(store.execute(("mat-001", "user-1", "create_user", f"key-{i}"), "fp", handler))
+    assert len(store) == 3
+    print("✓ Store capped at max_entries")
+
+    expiring = IdempotencyStore(ttl_seconds=0)
+    asyncio.run(expiring.execute(("mat-001", "user-1", "create_user", "key"), "fp", handler))
+    asyncio.run(expiring.execute(("mat-001", "user-1", "create_user", "other"), "fp", handler))
+    assert len(expiring) <= 1
+    print("✓ Expired entries dropped")
+
+    return True
+
+class FakeKeyTable:
+    """idempotency_keys with its unique key, shared by the fake connections of several workers"""
+
+    def __init__(self):
+        self.rows = {}
+
+    def connect(self):
+        return FakeConnection(self)
+
+class FakeConnection:
+    def __init__(self, table):
+        self.table = table
+        self._result = None
+
+    def cursor(self):
+        return self
+
+    def execute(self, query, params=()):
+        rows = self.table.rows
+        now = time.time()
+        if query.strip().startswith("INSERT"):
+            key, (fingerprint, seconds) = params[:4], params[4:]
+            if key in rows:
+                raise pymysql.err.IntegrityError(1062, "Duplicate entry")
+            rows[key] = {"fingerprint": fingerprint, "status": "in_progress", "response_status": None,
+                         "response_media_type": None, "response_headers": None, "response_body": None,
+                         "expires_at": now + seconds}
+        elif query.strip().startswith("SELECT"):
+            row = rows.get(params)
+            self._result = dict(row, expired=row["expires_at"] <= now) if row else None
+        elif "SET status = 'completed'" in query:
+            status_code, media_type, headers, body, seconds = params[:5]
+            row = rows.get(params[5:9])
+            if row and row["fingerprint"] == params[9]:
+                row.update(status="completed", response_status=status_code, response_media_type=media_type,
+                           response_headers=headers, response_body=body, expires_at=now + seconds)
+        elif "status = 'in_progress'" in query:
+            if params in rows and rows[params]["status"] == "in_progress":
+                del rows[params]
+        elif params:
+            if params in rows and rows[params]["expires_at"] <= now:
+                del rows[params]
+        else:
+            for key in [key for key, row in rows.items() if row["expires_at"] <= now]:
+                del rows[key]
+
+    def fetchone(self):
+        return self._result
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+def test_shared_across_workers():
+    """Test that workers sharing the table run a key once and replay it for each other"""
+    print("\n=== Testing Shared Store ===")
+
+    table = FakeKeyTable()
+    worker_a = IdempotencyStore(connect=table.connect)
+    worker_b = IdempotencyStore(connect=table.connect)
+    executions = []
+    key = ("mat-001", "user-1", "create_assessments", "key-4")
+
+    async def handler():
+        executions.append(1)
+        return JSONResponse(content={"assessments_created": 12}, status_code=201)
+
+    first = asyncio.run(worker_a.execute(key, "fp", handler))
+    retry = asyncio.run(worker_b.execute(key, "fp", handler))
+    restarted = asyncio.run(IdempotencyStore(connect=table.connect).execute(key, "fp", handler))
+    assert len(executions) == 1 and first.status_code == retry.status_code == restarted.status_code == 201
+    assert json.loads(retry.body) == {"assessments_created": 12}
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    print("✓ Retry on another worker, or after a restart, replayed from the table")
+
+    try:
+        asyncio.run(worker_b.execute(key, "fp-other", handler))
+        assert False, "expected 422"
+    except HTTPException as e:
+        assert e.status_code == 422
+    print("✓ Different request with the same key rejected on any worker")
+
+    async def concurrent():
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_handler():
+            started.set()
+            await release.wait()
+            raise HTTPException(status_code=500, detail="Database unavailable")
+
+        running = asyncio.ensure_future(worker_a.execute(("mat-001", "user-1", "create_user", "key-5"), "fp",
+                                                         slow_handler))
+        await started.wait()
+        try:
+            await worker_b.execute(("mat-001", "user-1", "create_user", "key-5"), "fp", handler)
+            assert False, "expected 409"
+        except HTTPException as e:
+            assert e.status_code == 409
+        release.set()
+        try:
+            await running
+        except HTTPException:
+            pass
+        return await worker_b.execute(("mat-001", "user-1", "create_user", "key-5"), "fp", handler)
+
+    executions.clear()
+    assert asyncio.run(concurrent()).status_code == 201 and len(executions) == 1
+    print("✓ Duplicate on another worker gets 409 while the first runs; a 500 frees the key")
+
+    stale = IdempotencyStore(connect=table.connect, claim_seconds=0)
+    key = ("mat-001", "user-1", "create_user", "key-6")
+    assert stale._claim(key, "fp") is None  # Claimed, then the worker dies
+    executions.clear()
+    assert asyncio.run(worker_b.execute(key, "fp", handler)).status_code == 201 and len(executions) == 1
+    print("✓ Claim left by a worker that died is taken over once it expires")
+
+    return True
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Idempotency Store Tests")
+    print("=" * 60)
+
+    all_tests_passed = True
+    all_tests_passed &= test_retry_is_replayed()
+    all_tests_passed &= test_concurrent_duplicates_wait()
+    all_tests_passed &= test_server_errors_not_stored()
+    all_tests_passed &= test_store_is_bounded()
+    all_tests_passed &= test_shared_across_workers()
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if all_tests_passed else "❌ SOME TESTS FAILED")
+    print("=" * 60)
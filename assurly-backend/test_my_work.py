@@ -0,0 +1,127 @@
+"""
+My Work Test
+This script verifies grouping and ordering of a user's outstanding assessments and the per-user cache.
+"""
+
+import time
+from datetime import date, datetime
+
+from my_work import MyWorkCache, group_my_work, load_my_work
+
+def _row(assessment_id, school_id, standard_code, term, due_date, status="not_started", rating=None,
+         sort_order=0, aspect_code="EDU"):
+    return {"id": f"id-{assessment_id}", "assessment_id": assessment_id, "school_id": school_id,
+            "school_name": school_id.title(), "mat_aspect_id": f"HLT-{aspect_code}", "aspect_code": aspect_code,
+            "aspect_name": aspect_code, "aspect_sort_order": 0, "mat_standard_id": f"HLT-{standard_code}",
+            "standard_code": standard_code, "standard_name": standard_code, "standard_sort_order": sort_order,
+            "unique_term_id": term, "academic_year": term[3:], "status": status, "rating": rating,
+            "due_date": due_date, "last_updated": datetime(2025, 10, 1) if rating else None}
+
+# In MY_WORK_SQL order: due date (NULLs last), then term, school, aspect, standard
+ROWS = [
+    _row("a1", "cedar", "ED2", "T1-2025-26", date(2025, 11, 1), sort_order=2),
+    _row("a2", "oak", "HR1", "T1-2025-26", date(2025, 11, 15), aspect_code="HR"),
+    _row("a3", "cedar", "ED1", "T1-2025-26", date(2025, 12, 1), status="in_progress", rating=3, sort_order=1),
+    _row("a4", "oak", "ED1", "T2-2025-26", None),
+]
+
+class FakeCursor:
+    """Serves the token and workload queries"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.revision = 1
+        self.loads = 0
+        self._result = []
+
+    def execute(self, query, params=None):
+        if "CROSS JOIN" in query:
+            self._result = [{"catalogue_version": 1, "assignment_count": 2, "assignment_sum": 99,
+                             "score_rows": 4, "revisions": self.revision, "last_updated": None}]
+        else:
+            self.loads += 1
+            self._result = list(self.rows)
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def fetchall(self):
+        return self._result
+
+def test_grouping():
+    """Test that standards are grouped per school, aspect and term in due date order"""
+    print("\n=== Testing Grouping ===")
+
+    items = group_my_work(ROWS)
+    assert [item["group_id"] for item in items] == [
+        "cedar-EDU-T1-2025-26", "oak-HR-T1-2025-26", "oak-EDU-T2-2025-26"
+    ]
+    assert items[0]["due_date"] == "2025-11-01" and items[2]["due_date"] is None
+    print("✓ Earliest due date first, undated work last")
+
+    cedar = items[0]
+    assert [standard["standard_code"] for standard in cedar["standards"]] == ["ED1", "ED2"]
+    assert cedar["outstanding_standards"] == 2 and cedar["rated_standards"] == 1
+    assert cedar["status"] == "in_progress" and cedar["last_updated"] == "2025-10-01T00:00:00Z"
+    assert items[1]["status"] == "not_started" and items[1]["term_id"] == "T1"
+    print("✓ Standards in sort order; group status and counts from its standards")
+
+    return True
+
+def test_cache_token():
+    """Test that a cached entry is reused only while its token is current"""
+    print("\n=== Testing Cache Token ===")
+
+    cursor = FakeCursor(ROWS)
+    cache = MyWorkCache()
+    items, token = load_my_work(cursor, "HLT", "user-1")
+    cache.put("HLT", "user-1", items, token)
+
+    entry = cache.get("HLT", "user-1")
+    assert entry["items"] is items and entry["token"] == load_my_work(cursor, "HLT", "user-1")[1]
+    print("✓ Entry served while the token matches")
+
+    cursor.revision += 1
+    assert load_my_work(cursor, "HLT", "user-1")[1] != entry["token"]
+    print("✓ An assessment write through any worker changes the token")
+
+    assert cache.get("OLT", "user-1") is None
+    expired = MyWorkCache(ttl_seconds=0)
+    expired.put("HLT", "user-1", items, token)
+    time.sleep(0.01)
+    assert expired.get("HLT", "user-1") is None
+    print("✓ Keyed by MAT and user; entries expire")
+
+    return True
+
+def test_invalidation():
+    """Test that this worker's own writes drop entries straight away"""
+    print("\n=== Testing Invalidation ===")
+
+    cache = MyWorkCache()
+    for mat_id, user_id in [("HLT", "user-1"), ("HLT", "user-2"), ("OLT", "user-3")]:
+        cache.put(mat_id, user_id, [], ())
+
+    cache.invalidate_user("user-1")
+    assert cache.get("HLT", "user-1") is None and cache.get("HLT", "user-2") is not None
+    print("✓ Assignment write: only that user's entry dropped")
+
+    cache.invalidate({("HLT", "T1-2025-26")})
+    assert cache.get("HLT", "user-2") is None and cache.get("OLT", "user-3") is not None
+    print("✓ Assessment write: every entry of that MAT dropped")
+
+    return True
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("My Work Tests")
+    print("=" * 60)
+
+    all_tests_passed = True
+    all_tests_passed &= test_grouping()
+    all_tests_passed &= test_cache_token()
+    all_tests_passed &= test_invalidation()
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if all_tests_passed else "❌ SOME TESTS FAILED")
+    print("=" * 60)
@@ -0,0 +1,205 @@
+"""
+Onboarding Test
+This script verifies selection and multi-row copying of the default catalogue into a MAT, and that
+onboarding job state is kept in the database.
+"""
+
+from datetime import datetime, timedelta
+
+from onboarding import INSERT_JOB_SQL, CatalogueConflict, OnboardingJobs, copy_default_catalogue, select_catalogue
+
+ASPECTS = [
+    {"aspect_id": f"asp-{code}", "aspect_code": code, "aspect_name": code, "aspect_description": None,
+     "aspect_category": "ofsted", "sort_order": i}
+    for i, code in enumerate(["EDU", "HR", "FIN"])
+]
+STANDARDS = [
+    {"standard_id": f"std-{code}", "standard_code": code, "standard_name": f"Standard {code}",
+     "standard_description": "", "standard_type": "assurance", "sort_order": i, "aspect_code": aspect_code}
+    for i, (code, aspect_code) in enumerate([("ED1", "EDU"), ("ED2", "EDU"), ("HR1", "HR"), ("FM1", "FIN")])
+]
+
+class FakeCursor:
+    def __init__(self, existing=()):
+        self.existing = list(existing)
+        self.statements = []
+        self.jobs = {}
+        self.rowcount = 0
+        self._rows = []
+
+    def _jobs(self, query, params):
+        now = datetime.utcnow()
+        self._rows = []
+        if "INSERT INTO onboarding_jobs" in query:
+            self.jobs[params[0]] = dict(zip(("job_id", "mat_id", "requested_by", "selection", "status"), params),
+                                        aspects_created=None, standards_created=None, error=None,
+                                        created_at=now, heartbeat_at=now, completed_at=None)
+        elif "SET status = 'failed'" in query:
+            stale = [job for job in self.jobs.values()
+                     if job["status"] in ("queued", "running")
+                     and job["heartbeat_at"] < now - timedelta(seconds=params[0])
+                     and ("job_id = %s" not in query or job["job_id"] == params[1])]
+            for job in stale:
+                job.update(status="failed", error="stopped", completed_at=now)
+            self.rowcount = len(stale)
+        elif "SET status = %s" in query:
+            job = self.jobs[params[-1]]
+            job.update(zip(("status", "aspects_created", "standards_created", "error"), params), heartbeat_at=now)
+            job["completed_at"] = now if job["status"] in ("completed", "failed") else None
+        elif "SELECT *" in query:
+            self._rows = [dict(job) for job in self.jobs.values() if (job["job_id"], job["mat_id"]) == tuple(params)]
+
+    def execute(self, query, params=None):
+        if "onboarding_jobs" in query:
+            self._jobs(query, params)
+            return
+        self.statements.append((" ".join(query.split()), params))
+        if "FROM aspects" in query and "FROM standards" not in query:
+            self._rows = ASPECTS
+        elif "FROM standards" in query:
+            self._rows = STANDARDS
+        elif "UNION ALL" in query:
+            self._rows = [{"code": code} for code in self.existing]
+        else:
+            self._rows = []
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def fetchall(self):
+        return self._rows
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.committed = self.rolled_back = self.closed = False
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        self.rolled_back = True
+
+    def close(self):
+        self.closed = True
+
+def test_selection():
+    """Test that aspect and standard codes pick the right subset"""
+    print("\n=== Testing Selection ===")
+
+    assert select_catalogue(ASPECTS, STANDARDS) == (ASPECTS, STANDARDS)
+    print("✓ No codes: the whole catalogue")
+
+    aspects, standards = select_catalogue(ASPECTS, STANDARDS, aspect_codes=["EDU"], standard_codes=["FM1"])
+    assert [a["aspect_code"] for a in aspects] == ["EDU", "FIN"]
+    assert [s["standard_code"] for s in standards] == ["ED1", "ED2", "FM1"]
+    print("✓ Aspects bring all their standards; standards bring their aspect")
+
+    try:
+        select_catalogue(ASPECTS, STANDARDS, standard_codes=["ED1", "XX9"])
+        assert False
+    except ValueError as e:
+        assert "XX9" in str(e)
+    print("✓ Unknown codes rejected")
+
+    return True
+
+def test_multi_row_copy():
+    """Test that the copy is a fixed number of statements, in foreign key order"""
+    print("\n=== Testing Multi-row Copy ===")
+
+    cursor = FakeCursor()
+    result = copy_default_catalogue(cursor, "HLT", "user-1")
+    assert result == {"aspects_created": 3, "standards_created": 4}
+
+    writes = [q for q, _ in cursor.statements if q.startswith(("INSERT", "UPDATE"))]
+    assert [q.split()[2] if q.startswith("INSERT") else q.split()[1] for q in writes] == [
+        "mat_aspects", "mat_standards", "standard_versions", "mat_standards", "standard_edit_log", "mats", "mats"
+    ]
+    print(f"✓ {len(cursor.statements)} statements for 3 aspects and 4 standards")
+
+    insert, params = next((q, p) for q, p in cursor.statements if q.startswith("INSERT INTO mat_standards"))
+    assert insert.count("(%s") == 4 and len(params) == 4 * 10
+    assert params[:4] == ["HLT-ED1", "HLT", "HLT-EDU", "std-ED1"]
+    print("✓ One INSERT carries every standard, with <MAT>-<CODE> IDs")
+
+    pointer, pointer_params = next((q, p) for q, p in cursor.statements if q.startswith("UPDATE mat_standards"))
+    assert "mat_standard_id IN" in pointer
+    assert pointer_params == ["HLT", "HLT-ED1", "HLT-ED2", "HLT-HR1", "HLT-FM1"]
+    print("✓ current_version_id set only on the standards this copy inserted")
+
+    log_insert, log_params = next((q, p) for q, p in cursor.statements if q.startswith("INSERT INTO standard_edit_log"))
+    assert "'created'" in log_insert and log_params[1:4] == ["HLT", "HLT-ED1", "HLT-ED1-v1"]
+    print("✓ Each standard gets a 'created' edit log entry for its v1")
+
+    try:
+        copy_default_catalogue(FakeCursor(existing=["HR1"]), "HLT", "user-1")
+        assert False
+    except CatalogueConflict as e:
+        assert "HR1" in str(e)
+    print("✓ Codes the MAT already has are a conflict")
+
+    return True
+
+def _queued(cursor, job_id="abc123"):
+    """A queued job, recorded as start() would, without starting its thread"""
+    cursor.execute(INSERT_JOB_SQL, (job_id, "HLT", "user-1", '{"aspect_codes": ["HR"], "standard_codes": null}',
+                                    "queued"))
+    return {"job_id": job_id, "mat_id": "HLT", "requested_by": "user-1",
+            "selection": {"aspect_codes": ["HR"], "standard_codes": None}, "status": "queued"}
+
+def test_job_lifecycle():
+    """Test that a job commits on success, rolls back on failure, and is failed if its worker stops"""
+    print("\n=== Testing Onboarding Jobs ===")
+
+    cursor = FakeCursor()
+    connection = FakeConnection(cursor)
+    jobs = OnboardingJobs(connect=lambda: connection)
+    finished = jobs.run(_queued(cursor))
+    assert finished["status"] == "completed" and finished["standards_created"] == 1
+    assert connection.committed and connection.closed
+    other_worker = OnboardingJobs(connect=lambda: FakeConnection(cursor))
+    stored = other_worker.get("abc123", "HLT")
+    assert stored["status"] == "completed" and stored["standards_created"] == 1 and stored["completed_at"]
+    assert stored["selection"] == {"aspect_codes": ["HR"], "standard_codes": None}
+    assert other_worker.get("abc123", "OTHER") is None
+    print("✓ Completed job committed; state in the table, visible from any worker to its MAT only")
+
+    cursor = FakeCursor(existing=["HR"])
+    connection = FakeConnection(cursor)
+    jobs = OnboardingJobs(connect=lambda: connection)
+    finished = jobs.run(_queued(cursor))
+    assert finished["status"] == "failed" and "HR" in finished["error"]
+    assert connection.rolled_back
+    assert cursor.jobs["abc123"]["status"] == "failed"
+    print("✓ Failed job rolled back with its error recorded")
+
+    cursor = FakeCursor()
+    jobs = OnboardingJobs(connect=lambda: FakeConnection(cursor), stale_seconds=60)
+    for job_id in ("live", "dead", "lost"):
+        _queued(cursor, job_id)
+    cursor.jobs["dead"]["heartbeat_at"] -= timedelta(minutes=5)
+    cursor.jobs["lost"]["heartbeat_at"] -= timedelta(minutes=5)
+    assert jobs.get("live", "HLT")["status"] == "queued"
+    assert jobs.get("dead", "HLT")["status"] == "failed"
+    assert jobs.fail_stale() == 1 and cursor.jobs["lost"]["status"] == "failed"
+    print("✓ Jobs past the heartbeat deadline are failed when read and at startup")
+
+    return True
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Onboarding Tests")
+    print("=" * 60)
+
+    all_tests_passed = True
+    all_tests_passed &= test_selection()
+    all_tests_passed &= test_multi_row_copy()
+    all_tests_passed &= test_job_lifecycle()
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if all_tests_passed else "❌ SOME TESTS FAILED")
+    print("=" * 60)
@@ -0,0 +1,263 @@
+"""
+School Term Scores Test
+This script verifies the delta bookkeeping that keeps school_term_scores and
+assessment_rating_cube in step with assessment and catalogue writes, the cube rollups, and
+which terms count as history for the dashboard.
+"""
+
+from datetime import date, datetime
+
+from school_scores import (
+    ScoreDeltas,
+    TRIGGER_SQL,
+    assessment_term_id,
+    COUNTER_COLUMNS,
+    CUBE_KEY_COLUMNS,
+    CUBE_COUNTER_COLUMNS,
+    fetch_mat_term_ids,
+    needs_intervention,
+    rollup_cube_cells,
+    summarise_ratings
+)
+from term_calendar import TermCalendar
+
+class RecordingCursor:
+    """Captures the upserts ScoreDeltas.apply() issues, per table"""
+
+    def __init__(self):
+        self.upserts = []
+        self.cube_upserts = []
+
+    def execute(self, query, params=None):
+        if 'assessment_rating_cube' in query:
+            self.cube_upserts.append(params)
+        else:
+            self.upserts.append(params)
+
+def _cube_cell(params):
+    """Map a cube upsert's params back to {column: value}"""
+    return dict(zip(CUBE_KEY_COLUMNS + ('academic_year',) + CUBE_COUNTER_COLUMNS, params))
+
+def _delta(params):
+    """Map an upsert's params back to {column: value}"""
+    values = dict(zip(COUNTER_COLUMNS, params[4:4 + len(COUNTER_COLUMNS)]))
+    values['school_id'] = params[1]
+    values['last_updated'] = params[-1]
+    return values
+
+def _row(school_id="cedar-park-primary", rating=None, status="not_started", standard_type="assurance"):
+    return {
+        "mat_id": "HLT",
+        "school_id": school_id,
+        "unique_term_id": "T1-2025-26",
+        "academic_year": "2025-26",
+        "rating": rating,
+        "status": status,
+        "standard_type": standard_type,
+        "mat_aspect_id": "HLT-EDU",
+        "aspect_category": "ofsted"
+    }
+
+def test_rating_update_moves_counts():
+    """Test that re-rating an assessment moves it between distribution buckets"""
+    print("\n=== Testing Rating Update Delta ===")
+
+    written_at = datetime(2025, 11, 2, 9, 15, 0)
+    deltas = ScoreDeltas()
+    deltas.replace(_row(rating=2, status="completed"), written_at, rating=4, status="completed")
+
+    cursor = RecordingCursor()
+    deltas.apply(cursor)
+    delta = _delta(cursor.upserts[0])
+
+    assert delta['total_count'] == 0
+    assert delta['rated_count'] == 0
+    assert delta['rating_sum'] == 2
+    assert delta['rating_2_count'] == -1 and delta['rating_4_count'] == 1
+    assert delta['intervention_count'] == -1
+    assert delta['last_updated'] == written_at
+    print("✓ 2 → 4 on an assurance standard: sum +2, intervention -1")
+
+    return True
+
+def test_risk_polarity_and_new_rows():
+    """Test intervention polarity and counting freshly created assessments"""
+    print("\n=== Testing Polarity and Inserts ===")
+
+    assert needs_intervention(1, "assurance") and not needs_intervention(4, "assurance")
+    assert needs_intervention(4, "risk") and not needs_intervention(1, "risk")
+    assert not needs_intervention(None, "risk")
+    print("✓ Intervention follows standard_type polarity")
+
+    deltas = ScoreDeltas()
+    for _ in range(3):
+        deltas.add(_row(school_id="oak-hill-academy"))
+    deltas.replace(_row(rating=None), None, rating=4, status="completed")
+    deltas.replace(_row(rating=None, standard_type="risk"), None, rating=4, status="completed")
+
+    cursor = RecordingCursor()
+    deltas.apply(cursor)
+    by_school = {_delta(params)['school_id']: _delta(params) for params in cursor.upserts}
+
+    # Keys are applied in sorted order
+    assert [params[1] for params in cursor.upserts] == ["cedar-park-primary", "oak-hill-academy"]
+    assert by_school["oak-hill-academy"]['total_count'] == 3
+    assert by_school["oak-hill-academy"]['rated_count'] == 0
+    assert by_school["cedar-park-primary"]['rated_count'] == 2
+    assert by_school["cedar-park-primary"]['completed_count'] == 2
+    assert by_school["cedar-park-primary"]['intervention_count'] == 1
+    print("✓ Inserts and first ratings counted per school, applied in key order")
+
+    # Evidence-only edits change nothing but last_updated
+    deltas.replace(_row(rating=3, status="completed"), None)
+    cursor = RecordingCursor()
+    deltas.apply(cursor)
+    assert cursor.upserts == []
+    print("✓ No-op deltas are skipped")
+
+    return True
+
+def test_cube_cells_follow_dimension_changes():
+    """Test that cube deltas move counts between rating and dimension cells"""
+    print("\n=== Testing Rating Cube Deltas ===")
+
+    deltas = ScoreDeltas()
+    deltas.replace(_row(rating=2, status="completed"), None, rating=3)
+    cursor = RecordingCursor()
+    deltas.apply(cursor)
+    assert len(cursor.cube_upserts) == 1
+    cell = _cube_cell(cursor.cube_upserts[0])
+    assert cell['mat_aspect_id'] == "HLT-EDU" and cell['standard_type'] == "assurance"
+    assert (cell['total_count'], cell['rating_2_count'], cell['rating_3_count']) == (0, -1, 1)
+    print("✓ Re-rating moves one count between rating columns of the same cell")
+
+    # A standard_type change moves the assessment to another cell and flips
+    # its intervention polarity
+    deltas.replace(_row(rating=4, status="completed"), standard_type="risk")
+    cursor = RecordingCursor()
+    deltas.apply(cursor)
+    cells = {_cube_cell(params)['standard_type']: _cube_cell(params) for params in cursor.cube_upserts}
+    assert cells['assurance']['rating_4_count'] == -1 and cells['assurance']['total_count'] == -1
+    assert cells['risk']['rating_4_count'] == 1 and cells['risk']['total_count'] == 1
+    assert _delta(cursor.upserts[0])['intervention_count'] == 1
+    print("✓ standard_type change re-keys the cell and updates intervention_count")
+
+    return True
+
+def test_rollups():
+    """Test summing cube cells over dropped dimensions"""
+    print("\n=== Testing Cube Rollups ===")
+
+    def cell(school_id, standard_type, term, r1=0, r2=0, r3=0, r4=0):
+        return {
+            'mat_id': 'HLT', 'school_id': school_id, 'mat_aspect_id': 'HLT-EDU',
+            'aspect_category': 'ofsted', 'standard_type': standard_type, 'unique_term_id': term,
+            'total_count': r1 + r2 + r3 + r4 + 1,
+            'rating_1_count': r1, 'rating_2_count': r2, 'rating_3_count': r3, 'rating_4_count': r4
+        }
+
+    cells = [
+        cell('cedar-park-primary', 'assurance', 'T1-2025-26', r2=2, r3=1),
+        cell('oak-hill-academy', 'assurance', 'T1-2025-26', r4=1),
+        cell('oak-hill-academy', 'risk', 'T1-2025-26', r1=3),
+        cell('oak-hill-academy', 'assurance', 'T2-2025-26')
+    ]
+    by_term = rollup_cube_cells(cells, ('unique_term_id',))
+    assert set(by_term) == {('T1-2025-26',), ('T2-2025-26',)}
+    assert by_term[('T1-2025-26',)]['rating_1_count'] == 3
+    assert by_term[('T1-2025-26',)]['total_count'] == 10
+
+    summary = summarise_ratings(by_term[('T1-2025-26',)])
+    assert summary == {'rated_count': 7, 'average_rating': 2.0, 'min_rating': 1, 'max_rating': 4}
+    assert summarise_ratings(by_term[('T2-2025-26',)])['average_rating'] is None
+    print("✓ Per-term rollup sums counts across schools and standard types")
+
+    by_school_type = rollup_cube_cells(cells, ('school_id', 'standard_type'))
+    assert len(by_school_type) == 3
+    print("✓ Rollup keys follow the requested dimensions")
+
+    return True
+
+def test_assessment_triggers():
+    """Test that the triggers apply OLD -> NEW deltas in the write's own statement"""
+    print("\n=== Testing Assessment Triggers ===")
+
+    events = {name: sql.split("ON assessments")[0].split()[-1] for name, sql in TRIGGER_SQL.items()}
+    assert sorted(events.values()) == ["DELETE", "INSERT", "UPDATE"]
+    assert all("AFTER" in sql and "FOR UPDATE" not in sql for sql in TRIGGER_SQL.values())
+    print("✓ AFTER INSERT / UPDATE / DELETE, with no locking read of assessments")
+
+    update = TRIGGER_SQL["trg_assessments_scores_update"]
+    assert "- COALESCE(OLD.rating = 3, 0) + COALESCE(NEW.rating = 3, 0)" in update
+    assert "IF(new_standard_type <=> 'risk', NEW.rating >= 3, NEW.rating <= 2)" in update
+    assert update.count("revision = revision + 1") == 3
+    assert "FOR SHARE" in update
+    print("✓ A re-rating is one combined upsert per table; a move is a remove and an add")
+
+    assert assessment_term_id("cedar-park-primary-ES1-T1-2025-26") == "T1-2025-26"
+    print("✓ Written term taken from the assessment_id")
+
+    return True
+
+class ScoreRowsCursor:
+    """Serves SELECT DISTINCT unique_term_id from in-memory school_term_scores rows"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self._result = []
+
+    def execute(self, query, params=None):
+        rows = [row for row in self.rows if row["mat_id"] == params[0]]
+        if "rated_count > 0" in query:
+            rows = [row for row in rows if row["rated_count"] > 0]
+        self._result = [{"unique_term_id": term_id} for term_id in sorted({row["unique_term_id"] for row in rows})]
+
+    def fetchall(self):
+        return self._result
+
+def test_previous_terms_skip_unrated():
+    """Test that terms whose assessments are all unrated don't take previous-term slots"""
+    print("\n=== Testing Rated Terms ===")
+
+    terms = [(f"T{n}-{year}-{year % 100 + 1}", date(year if n == 1 else year + 1, (9, 1, 4)[n - 1], 1))
+             for year in (2023, 2024) for n in (1, 2, 3)]
+    calendar = TermCalendar()
+    calendar.load([{"unique_term_id": term_id, "term_id": term_id[:2], "term_name": term_id[:2],
+                    "start_date": start, "end_date": start, "academic_year": term_id[3:]}
+                   for term_id, start in terms])
+
+    # T2 and T3 of 2024-25 were set up for every school but nobody has rated yet
+    rated = {"T1-2023-24": 5, "T2-2023-24": 3, "T3-2023-24": 4, "T1-2024-25": 2}
+    rows = [{"mat_id": "HLT", "school_id": school, "unique_term_id": term_id, "rated_count": rated.get(term_id, 0)}
+            for school in ("cedar-park-primary", "oak-hill-academy") for term_id, _ in terms]
+    rows.append({"mat_id": "OLT", "school_id": "elm-grove", "unique_term_id": "T3-2024-25", "rated_count": 7})
+    cursor = ScoreRowsCursor(rows)
+
+    assert fetch_mat_term_ids(cursor, "HLT") == {term_id for term_id, _ in terms}
+    assert fetch_mat_term_ids(cursor, "HLT", rated_only=True) == set(rated)
+    print("✓ rated_only drops terms with no ratings, and other MATs' terms")
+
+    previous = calendar.previous("T3-2024-25", 3, within=fetch_mat_term_ids(cursor, "HLT", rated_only=True))
+    assert [term["unique_term_id"] for term in previous] == ["T1-2024-25", "T3-2023-24", "T2-2023-24"]
+    assert calendar.previous("T3-2024-25", 3, within=fetch_mat_term_ids(cursor, "HLT"))[0]["unique_term_id"] == \
+        "T2-2024-25"
+    print("✓ All 3 previous-term slots go to terms with averages")
+
+    return True
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("School Term Scores Tests")
+    print("=" * 60)
+
+    all_tests_passed = True
+    all_tests_passed &= test_rating_update_moves_counts()
+    all_tests_passed &= test_risk_polarity_and_new_rows()
+    all_tests_passed &= test_cube_cells_follow_dimension_changes()
+    all_tests_passed &= test_rollups()
+    all_tests_passed &= test_assessment_triggers()
+    all_tests_passed &= test_previous_terms_skip_unrated()
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if all_tests_passed else "❌ SOME TESTS FAILED")
+    print("=" * 60)
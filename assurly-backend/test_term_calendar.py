@@ -0,0 +1,97 @@
+"""
+Term Calendar Test
+This script verifies term ordering, previous-term and range lookups of the in-memory term calendar.
+"""
+
+from datetime import date
+
+from term_calendar import TermCalendar
+
+TERM_DATES = {'T1': ((9, 1), (12, 19)), 'T2': ((1, 5), (4, 2)), 'T3': ((4, 20), (7, 22))}
+
+def _calendar():
+    """Three academic years, loaded out of order"""
+    rows = []
+    for start_year in (2025, 2023, 2024):
+        academic_year = f"{start_year}-{str(start_year + 1)[2:]}"
+        for term_id, ((start_month, start_day), (end_month, end_day)) in TERM_DATES.items():
+            year = start_year if term_id == 'T1' else start_year + 1
+            rows.append({
+                'unique_term_id': f"{term_id}-{academic_year}",
+                'term_id': term_id,
+                'term_name': term_id,
+                'start_date': date(year, start_month, start_day),
+                'end_date': date(year, end_month, end_day),
+                'academic_year': academic_year
+            })
+    calendar = TermCalendar()
+    calendar.load(rows)
+    return calendar
+
+def test_order_follows_start_date():
+    """Test ordinals follow start dates, not unique_term_id strings"""
+    print("\n=== Testing Term Order ===")
+
+    calendar = _calendar()
+    # Lexicographically 'T3-2024-25' > 'T1-2025-26'
+    assert calendar.ordinal('T3-2024-25') < calendar.ordinal('T1-2025-26')
+    assert [t['unique_term_id'] for t in calendar.range('T2-2024-25', 'T1-2025-26')] == [
+        'T2-2024-25', 'T3-2024-25', 'T1-2025-26'
+    ]
+    assert calendar.range('T1-2025-26', 'T3-2024-25') == []
+    assert calendar.get('T9-2025-26') is None
+    print("✓ T3-2024-25 sorts before T1-2025-26; ranges are inclusive slices")
+
+    assert calendar.latest(['T1-2024-25', 'T3-2023-24', 'T2-2024-25', 'unknown'])['unique_term_id'] == 'T2-2024-25'
+    assert calendar.latest([]) is None
+    print("✓ latest() picks the last known term")
+
+    return True
+
+def test_previous_terms():
+    """Test previous-N lookups, optionally restricted to a MAT's terms"""
+    print("\n=== Testing Previous Terms ===")
+
+    calendar = _calendar()
+    previous = calendar.previous('T1-2025-26', 3)
+    assert [t['unique_term_id'] for t in previous] == ['T3-2024-25', 'T2-2024-25', 'T1-2024-25']
+    print("✓ Previous 3 terms cross the academic year boundary, newest first")
+
+    with_data = {'T1-2023-24', 'T3-2023-24', 'T2-2024-25'}
+    previous = calendar.previous('T1-2025-26', 3, within=with_data)
+    assert [t['unique_term_id'] for t in previous] == ['T2-2024-25', 'T3-2023-24', 'T1-2023-24']
+    assert calendar.previous('T1-2023-24', 3) == []
+    assert len(calendar.previous('T3-2025-26')) == 8
+    print("✓ Terms without data are skipped; count=None returns every earlier term")
+
+    return True
+
+def test_current_term():
+    """Test the current term lookup, including the gaps between terms"""
+    print("\n=== Testing Current Term ===")
+
+    calendar = _calendar()
+    assert calendar.current(date(2025, 10, 1))['unique_term_id'] == 'T1-2025-26'
+    assert calendar.current(date(2026, 4, 2))['unique_term_id'] == 'T2-2025-26'
+    assert calendar.current(date(2025, 8, 10)) is None
+    print("✓ Current term found by date; holidays have no current term")
+
+    assert calendar.is_loaded() and not calendar.is_stale()
+    assert TermCalendar().is_stale()
+    print("✓ Unloaded calendars are stale")
+
+    return True
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Term Calendar Tests")
+    print("=" * 60)
+
+    all_tests_passed = True
+    all_tests_passed &= test_order_follows_start_date()
+    all_tests_passed &= test_previous_terms()
+    all_tests_passed &= test_current_term()
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if all_tests_passed else "❌ SOME TESTS FAILED")
+    print("=" * 60)
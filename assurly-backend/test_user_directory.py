@@ -0,0 +1,141 @@
+"""
+User Directory Test
+This script verifies prefix search, keyset paging and write-through of the in-memory user directory.
+"""
+
+from datetime import datetime
+
+from user_directory import UserDirectory, UserDirectoryCache
+
+def _user(user_id, full_name, email, school_id="HLT-CEDAR", is_active=1, role_title="School Leader"):
+    return {"user_id": user_id, "email": email, "full_name": full_name, "role_title": role_title,
+            "school_id": school_id, "school_name": None, "mat_id": "HLT", "is_active": is_active,
+            "last_login": None, "created_at": datetime(2025, 9, 1)}
+
+USERS = [
+    _user("u1", "Jane Smith", "jane.smith@hlt.org.uk"),
+    _user("u2", "Janet Smythe", "j.smythe@hlt.org.uk", school_id="HLT-OAK"),
+    _user("u3", "Richard Briggs", "admin@hlt.org.uk", role_title="MAT Administrator"),
+    _user("u4", "Sam Jansen", "sam.jansen@hlt.org.uk", is_active=0),
+    _user("u5", "jane smith", "jane.smith2@hlt.org.uk"),
+]
+
+class FakeCursor:
+    """Serves the users_version and users queries"""
+
+    def __init__(self, users):
+        self.version = 1
+        self.users = users
+        self.queries = []
+        self._result = []
+
+    def execute(self, query, params=None):
+        self.queries.append(query)
+        if "users_version + 1" in query:
+            self.version += 1
+        elif "users_version" in query:
+            self._result = [{"users_version": self.version}]
+        elif "u.user_id = %s" in query:
+            self._result = [user for user in self.users if user["user_id"] == params[1]]
+        else:
+            self._result = list(self.users)
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def fetchall(self):
+        return self._result
+
+def _ids(users):
+    return [user["user_id"] for user in users]
+
+def test_prefix_search():
+    """Test that every query word must prefix a name or email word"""
+    print("\n=== Testing Prefix Search ===")
+
+    directory = UserDirectory("HLT", 1, USERS)
+    assert _ids(directory.search()[0]) == ["u1", "u5", "u2", "u3"]
+    print("✓ Active users in name order, case-insensitive ties broken by user_id")
+
+    assert _ids(directory.search(q="jan")[0]) == ["u1", "u5", "u2"]
+    assert _ids(directory.search(q="Jan", include_inactive=True)[0]) == ["u1", "u5", "u2", "u4"]
+    assert _ids(directory.search(q="jane smi")[0]) == ["u1", "u5"]
+    assert _ids(directory.search(q="j.smy")[0]) == ["u2"]
+    assert _ids(directory.search(q="admin@")[0]) == ["u3"]
+    assert directory.search(q="xyz")[0] == []
+    print("✓ Name words, email and email local part; multi-word queries intersect")
+
+    assert _ids(directory.search(q="jan", school_id="HLT-OAK")[0]) == ["u2"]
+    assert _ids(directory.search(role_title="MAT Administrator")[0]) == ["u3"]
+    print("✓ School and role filters")
+
+    return True
+
+def test_keyset_paging():
+    """Test that following next_cursor visits every user once"""
+    print("\n=== Testing Keyset Paging ===")
+
+    directory = UserDirectory("HLT", 1, [
+        _user(f"u{i:03d}", f"User {i % 7}", f"user{i}@hlt.org.uk") for i in range(23)
+    ])
+    seen, cursor, pages = [], None, 0
+    while True:
+        page, cursor = directory.search(q="us", limit=10, page_cursor=cursor)
+        seen += _ids(page)
+        pages += 1
+        if cursor is None:
+            break
+    assert sorted(seen) == sorted(f"u{i:03d}" for i in range(23)) and len(set(seen)) == 23 and pages == 3
+    print(f"✓ {len(seen)} users over {pages} pages, duplicate names included")
+
+    try:
+        directory.search(limit=10, page_cursor="not-a-cursor")
+        assert False
+    except ValueError:
+        pass
+    print("✓ Malformed cursor raises ValueError")
+
+    return True
+
+def test_write_through():
+    """Test that a worker's own write is applied in place and others' writes reload"""
+    print("\n=== Testing Write-through ===")
+
+    users = list(USERS)
+    cursor = FakeCursor(users)
+    cache = UserDirectoryCache()
+    directory = cache.get(cursor, "HLT")
+    assert _ids(cache.search(cursor, "HLT", q="ali")[0]) == []
+
+    users.append(_user("u6", "Alice Jones", "alice.jones@hlt.org.uk"))
+    cursor.version += 1
+    cache.refresh_user(cursor, "HLT", "u6", cursor.version)
+    loads = sum("WHERE u.mat_id = %s\n" in q for q in cursor.queries)
+    assert _ids(cache.search(cursor, "HLT", q="ali")[0]) == ["u6"]
+    assert cache.get(cursor, "HLT") is directory
+    assert sum("WHERE u.mat_id = %s\n" in q for q in cursor.queries) == loads
+    print("✓ Own write applied in place, no reload")
+
+    users[0] = _user("u1", "Jane Doe", "jane.doe@hlt.org.uk")
+    cursor.version += 2
+    cache.refresh_user(cursor, "HLT", "u1", cursor.version)
+    assert _ids(cache.search(cursor, "HLT", q="doe")[0]) == ["u1"]
+    assert _ids(cache.search(cursor, "HLT", q="smith")[0]) == ["u5"]
+    assert cache.get(cursor, "HLT") is not directory
+    print("✓ Missed a write from another worker: directory reloaded")
+
+    return True
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("User Directory Tests")
+    print("=" * 60)
+
+    all_tests_passed = True
+    all_tests_passed &= test_prefix_search()
+    all_tests_passed &= test_keyset_paging()
+    all_tests_passed &= test_write_through()
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if all_tests_passed else "❌ SOME TESTS FAILED")
+    print("=" * 60)
@@ -0,0 +1,239 @@
+"""
+User Import Test
+This script verifies streaming parsing, batched validation and multi-row inserts of bulk user imports,
+and that job state is kept in the database and interrupted jobs are failed.
+"""
+
+import io
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from user_import import INSERT_JOB_SQL, UserImportJobs, iter_rows
+
+ROLES = ('MAT Administrator', 'Department Head', 'School Leader')
+
+def _validate(fields):
+    """Stands in for the CreateUserRequest rules"""
+    if not fields.get('email') or '@' not in fields['email']:
+        raise ValueError("email: value is not a valid email address")
+    if fields.get('role_title') not in ROLES:
+        raise ValueError("role_title: must be one of the allowed roles")
+    return dict(fields)
+
+class FakeCursor:
+    """Serves the schools and email lookups, records inserts and keeps user_import_jobs rows"""
+
+    def __init__(self, existing_emails=()):
+        self.existing_emails = existing_emails
+        self.inserts = []
+        self.version_bumps = 0
+        self.heartbeats = 0
+        self.jobs = {}
+        self.rowcount = 0
+        self._result = []
+
+    def _jobs(self, query, params):
+        now = datetime.utcnow()
+        if "INSERT INTO user_import_jobs" in query:
+            self.jobs[params[0]] = dict(zip(
+                ("job_id", "mat_id", "requested_by", "import_format", "send_invites", "status"), params),
+                rows_read=None, created_count=None, invited_count=None, error_count=None, errors=None,
+                error=None, created_at=now, heartbeat_at=now, completed_at=None)
+        elif "SET status = 'failed'" in query:
+            stale = [job for job in self.jobs.values()
+                     if job["status"] in ("queued", "running")
+                     and job["heartbeat_at"] < now - timedelta(seconds=params[0])
+                     and ("job_id = %s" not in query or job["job_id"] == params[1])]
+            for job in stale:
+                job.update(status="failed", error="stopped", completed_at=now)
+            self.rowcount = len(stale)
+        elif "SET status = %s" in query:
+            job = self.jobs[params[-1]]
+            job.update(zip(("status", "rows_read", "created_count", "invited_count", "error_count", "errors",
+                            "error"), params), heartbeat_at=now)
+            job["completed_at"] = now if job["status"] in ("completed", "failed") else None
+        elif "SET heartbeat_at" in query:
+            self.heartbeats += 1
+            self.jobs[params[0]]["heartbeat_at"] = now
+        elif "SELECT *" in query:
+            self._result = [dict(job) for job in self.jobs.values()
+                            if (job["job_id"], job["mat_id"]) == tuple(params)]
+
+    def execute(self, query, params=None):
+        self._result = []
+        if "user_import_jobs" in query:
+            self._jobs(query, params)
+        elif "FROM schools" in query:
+            self._result = [{"school_id": "HLT-CEDAR"}, {"school_id": "HLT-OAK"}]
+        elif "SELECT email FROM users" in query:
+            self._result = [{"email": email} for email in params if email.lower() in self.existing_emails]
+        elif "INSERT INTO users" in query:
+            self.inserts.append(params)
+        elif "users_version + 1" in query:
+            self.version_bumps += 1
+        elif "SELECT users_version" in query:
+            self._result = [{"users_version": 2}]
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def fetchall(self):
+        return self._result
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.committed = self.rolled_back = False
+
+    def cursor(self):
+        return self._cursor
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        self.rolled_back = True
+
+    def close(self):
+        pass
+
+CSV_UPLOAD = (
+    "\ufeffemail,full_name,role_title,school_id\n"
+    "ann@hlt.org.uk,Ann Lee,School Leader,HLT-CEDAR\n"
+    "bad-email,Bob,School Leader,\n"
+    "cat@hlt.org.uk,Cat Ng,Head Chef,\n"
+    "dan@hlt.org.uk,Dan Ito,School Leader,HLT-ELM\n"
+    "ANN@hlt.org.uk,Ann Again,School Leader,\n"
+    "taken@hlt.org.uk,Tay Ken,Department Head,\n"
+    "eve@hlt.org.uk,Eve Ray,MAT Administrator,\n"
+)
+
+def _job(jobs, cursor, upload, import_format="csv", send_invites=False):
+    """A queued job, recorded as start() would, without starting its thread"""
+    job = jobs.new_job("HLT", "user-1", import_format, send_invites)
+    with open(jobs.upload_path(job["job_id"]), "wb") as f:
+        f.write(upload.encode("utf-8"))
+    cursor.execute(INSERT_JOB_SQL, (job["job_id"], "HLT", "user-1", import_format, send_invites, "queued"))
+    return job
+
+def test_parsing():
+    """Test that CSV and JSON lines are read a record at a time, with row numbers"""
+    print("\n=== Testing Parsing ===")
+
+    rows = list(iter_rows(io.BytesIO(CSV_UPLOAD.encode("utf-8")), "csv"))
+    assert len(rows) == 7 and rows[0] == (1, {"email": "ann@hlt.org.uk", "full_name": "Ann Lee",
+                                              "role_title": "School Leader", "school_id": "HLT-CEDAR"}, None)
+    assert rows[1][1]["school_id"] is None
+    print("✓ CSV with a byte order mark; blank cells are None")
+
+    try:
+        list(iter_rows(io.BytesIO(b"email,name\n"), "csv"))
+        assert False
+    except ValueError as e:
+        assert "full_name" in str(e)
+    print("✓ CSV header checked")
+
+    upload = b'{"email": "a@b.uk", "full_name": "A B", "role_title": "School Leader"}\n\nnot json\n[1]\n'
+    rows = list(iter_rows(io.BytesIO(upload), "jsonl"))
+    assert [(row[0], row[2]) for row in rows] == [(1, None), (2, "Not valid JSON"), (3, "Expected a JSON object")]
+    print("✓ JSON lines: blank lines skipped, bad lines reported")
+
+    return True
+
+def test_batched_import():
+    """Test that invalid rows are reported and the rest inserted with one statement per batch"""
+    print("\n=== Testing Batched Import ===")
+
+    cursor = FakeCursor(existing_emails={"taken@hlt.org.uk"})
+    connection = FakeConnection(cursor)
+    jobs = UserImportJobs(tempfile.mkdtemp(), batch_rows=4, connect=lambda: connection)
+    job = jobs.run(_job(jobs, cursor, CSV_UPLOAD), _validate)
+
+    assert job["status"] == "completed" and connection.committed
+    assert job["rows_read"] == 7 and job["created"] == 2 and job["error_count"] == 5
+    assert [(error["row"], error["error"].split(":")[0]) for error in job["errors"]] == [
+        (2, "email"), (3, "role_title"), (4, "School 'HLT-ELM' not found in your MAT"),
+        (5, "Duplicate email in this file"), (6, "A user with email 'taken@hlt.org.uk' already exists")
+    ]
+    print("✓ Per-row errors: field rules, unknown school, duplicate in file, existing user")
+
+    assert [params[1] for params in cursor.inserts] == ["ann@hlt.org.uk", "eve@hlt.org.uk"]
+    assert cursor.inserts[0][6:8] == [None, None]
+    assert cursor.version_bumps == 1
+    print("✓ One INSERT per batch with valid rows; users_version bumped once")
+
+    assert not os.path.exists(jobs.upload_path(job["job_id"]))
+    assert cursor.heartbeats == 2
+    other_worker = UserImportJobs(tempfile.mkdtemp(), connect=lambda: FakeConnection(cursor))
+    stored = other_worker.get(job["job_id"], "HLT")
+    assert stored["status"] == "completed" and stored["created"] == 2 and stored["errors"] == job["errors"]
+    assert stored["completed_at"] is not None and other_worker.get(job["job_id"], "OLT") is None
+    print("✓ Upload removed; job state in the table, visible from any worker to its MAT only")
+
+    return True
+
+def test_invites():
+    """Test that invited users get a token in the INSERT and one batched send after commit"""
+    print("\n=== Testing Invites ===")
+
+    cursor = FakeCursor()
+    jobs = UserImportJobs(tempfile.mkdtemp(), connect=lambda: FakeConnection(cursor))
+    sent = []
+
+    def send_invites(invites):
+        sent.append(invites)
+        return ["eve@hlt.org.uk"]
+
+    upload = "email,full_name,role_title\nann@hlt.org.uk,Ann Lee,School Leader\neve@hlt.org.uk,Eve Ray,School Leader\n"
+    job = jobs.run(_job(jobs, cursor, upload, send_invites=True), _validate,
+                   new_token=lambda: ("tok", datetime(2026, 1, 1)), send_invites=send_invites)
+
+    assert cursor.inserts[0][6:8] == ["tok", datetime(2026, 1, 1)]
+    assert sent == [[("ann@hlt.org.uk", "Ann Lee", "tok"), ("eve@hlt.org.uk", "Eve Ray", "tok")]]
+    assert job["created"] == 2 and job["invited"] == 1
+    assert job["errors"] == [{"row": 2, "email": "eve@hlt.org.uk",
+                              "error": "User created but the invite email could not be sent"}]
+    print("✓ Tokens written with the users; one send for the whole import; failed invites reported")
+
+    return True
+
+def test_interrupted_jobs():
+    """Test that jobs whose worker stopped are failed at startup or when read, and live ones are not"""
+    print("\n=== Testing Interrupted Jobs ===")
+
+    cursor = FakeCursor()
+    jobs = UserImportJobs(tempfile.mkdtemp(), connect=lambda: FakeConnection(cursor), stale_seconds=60)
+    running, restarted, queued = (_job(jobs, cursor, CSV_UPLOAD) for _ in range(3))
+    for job in (running, restarted):
+        cursor.jobs[job["job_id"]]["status"] = "running"
+    cursor.jobs[restarted["job_id"]]["heartbeat_at"] -= timedelta(minutes=5)
+    cursor.jobs[queued["job_id"]]["heartbeat_at"] -= timedelta(minutes=5)
+
+    assert jobs.get(running["job_id"], "HLT")["status"] == "running"
+    print("✓ A job with a recent heartbeat is left running")
+
+    failed = jobs.get(restarted["job_id"], "HLT")
+    assert failed["status"] == "failed" and failed["error"] and failed["completed_at"] is not None
+    print("✓ A running job past the heartbeat deadline is failed when read")
+
+    assert jobs.fail_stale() == 1 and cursor.jobs[queued["job_id"]]["status"] == "failed"
+    assert cursor.jobs[running["job_id"]]["status"] == "running"
+    print("✓ Startup check fails the remaining stale job only")
+
+    return True
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("User Import Tests")
+    print("=" * 60)
+
+    all_tests_passed = True
+    all_tests_passed &= test_parsing()
+    all_tests_passed &= test_batched_import()
+    all_tests_passed &= test_invites()
+    all_tests_passed &= test_interrupted_jobs()
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if all_tests_passed else "❌ SOME TESTS FAILED")
+    print("=" * 60)
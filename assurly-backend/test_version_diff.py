@@ -0,0 +1,69 @@
+"""
+Version Diff Test
+This script verifies word-level diffs between standard versions and the version-pair diff cache.
+"""
+
+from version_diff import VersionDiffCache, word_diff
+
+def _version(number, name, description, standard_type="assurance"):
+    return {"version_id": f"HLT-AC1-v{number}", "version_number": number, "standard_code": "AC1",
+            "standard_name": name, "standard_description": description, "standard_type": standard_type}
+
+def _side(runs, op):
+    return "".join(run["text"] for run in runs if run["op"] in ("equal", op))
+
+def test_word_diff():
+    """Test that diffs are word-level and rebuild both texts"""
+    print("\n=== Testing Word Diff ===")
+
+    old = "Attendance is monitored weekly, and absences are followed up."
+    new = "Attendance is monitored daily, and persistent absences are followed up."
+    runs = word_diff(old, new)
+    assert _side(runs, "delete") == old and _side(runs, "insert") == new
+    assert {"op": "delete", "text": "weekly"} in runs
+    assert {"op": "insert", "text": "daily"} in runs
+    assert "persistent" in [run["text"].strip() for run in runs if run["op"] == "insert"]
+    print("✓ Changed words only; both texts rebuild from the runs")
+
+    assert word_diff(None, "New wording") == [{"op": "insert", "text": "New wording"}]
+    assert word_diff("Old wording", "") == [{"op": "delete", "text": "Old wording"}]
+    assert [run["op"] for run in word_diff("Same.", "Same!")] == ["equal", "delete", "insert"]
+    print("✓ Empty sides and punctuation")
+
+    return True
+
+def test_diff_cache():
+    """Test that a version pair is diffed once and the LRU is bounded"""
+    print("\n=== Testing Diff Cache ===")
+
+    v1 = _version(1, "Attendance", "Monitored weekly.")
+    v2 = _version(2, "Attendance & Compliance", "Monitored weekly.", standard_type="risk")
+    v3 = _version(3, "Attendance & Compliance", "Monitored daily.", standard_type="risk")
+
+    cache = VersionDiffCache(max_entries=2)
+    diff = cache.get(v1, v2)
+    assert diff["changed_fields"] == ["standard_name", "standard_type"]
+    assert diff["fields"]["standard_description"] == {"changed": False, "diff": [{"op": "equal", "text": "Monitored weekly."}]}
+    assert cache.get(v1, v2) is diff
+    print("✓ Changed fields listed; repeat request served from the cache")
+
+    cache.get(v2, v3)
+    cache.get(v1, v2)
+    cache.get(v1, v3)
+    assert list(cache._diffs) == [("HLT-AC1-v1", "HLT-AC1-v2"), ("HLT-AC1-v1", "HLT-AC1-v3")]
+    print("✓ Least recently used pair evicted at max_entries")
+
+    return True
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Version Diff Tests")
+    print("=" * 60)
+
+    all_tests_passed = True
+    all_tests_passed &= test_word_diff()
+    all_tests_passed &= test_diff_cache()
+
+    print("\n" + "=" * 60)
+    print("✅ ALL TESTS PASSED" if all_tests_passed else "❌ SOME TESTS FAILED")
+    print("=" * 60)
@@ -0,0 +1,222 @@
+"""
+Per-MAT in-memory user directory: keyset pages and typeahead search for
+GET /api/users.
+
+Each MAT's users are held sorted by (full_name, user_id), with a sorted list
+of search terms - every word of the name, the whole name, the email and its
+local part, casefolded. A prefix search is a binary search into that list
+followed by a scan of the matching run, so typeahead never runs a
+LIKE '%...%' over the users table.
+
+Every write to users bumps mats.users_version in the same transaction
+(bump_users_version). A read checks the MAT's version with one primary-key
+lookup, as the catalogue cache does, so writes through another API worker
+are picked up on the next read. A worker that makes a write applies it to
+its own directory (refresh_user) rather than reloading the MAT.
+"""
+
+import base64
+import os
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+USER_DIRECTORY_MAX_MATS = int(os.getenv('USER_DIRECTORY_MAX_MATS', '50'))
+
+USERS_VERSION_SQL = "SELECT users_version FROM mats WHERE mat_id = %s"
+
+BUMP_USERS_VERSION_SQL = "UPDATE mats SET users_version = users_version + 1 WHERE mat_id = %s"
+
+# Every user in the MAT, active or not
+USERS_SQL = """
+    SELECT
+        u.user_id,
+        u.email,
+        u.full_name,
+        u.role_title,
+        u.school_id,
+        s.school_name,
+        u.mat_id,
+        u.is_active,
+        u.last_login,
+        u.created_at
+    FROM users u
+    LEFT JOIN schools s ON u.school_id = s.school_id
+    WHERE u.mat_id = %s
+"""
+
+USER_SQL = USERS_SQL + " AND u.user_id = %s"
+
+def bump_users_version(cursor, mat_id: str) -> int:
+    """Call inside the transaction of every write to users; returns the new version"""
+    cursor.execute(BUMP_USERS_VERSION_SQL, (mat_id,))
+    cursor.execute(USERS_VERSION_SQL, (mat_id,))
+    row = cursor.fetchone()
+    return row['users_version'] if row else 0
+
+def encode_cursor(sort_key: Tuple[str, str]) -> str:
+    raw = f"{sort_key[0]}|{sort_key[1]}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+def decode_cursor(token: str) -> Tuple[str, str]:
+    """(casefolded full_name, user_id) of the last user already seen; ValueError if malformed"""
+    try:
+        name, user_id = base64.urlsafe_b64decode(token.encode('ascii')).decode('utf-8').rsplit('|', 1)
+        return name, user_id
+    except (UnicodeError, ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {token}") from e
+
+def _sort_key(user: dict) -> Tuple[str, str]:
+    return (user['full_name'] or '').casefold(), user['user_id']
+
+def _search_terms(user: dict) -> set:
+    name = (user['full_name'] or '').casefold()
+    email = (user['email'] or '').casefold()
+    return {term for term in [name, email, email.split('@', 1)[0], *name.split()] if term}
+
+def _format(row: dict) -> dict:
+    user = dict(row)
+    for column in ('last_login', 'created_at'):
+        if user.get(column):
+            user[column] = user[column].strftime('%Y-%m-%dT%H:%M:%SZ')
+    return user
+
+class UserDirectory:
+    """One MAT's users as of one users_version"""
+
+    def __init__(self, mat_id: str, version: int, rows: List[dict]):
+        self.mat_id = mat_id
+        self.version = version
+        self.users: Dict[str, dict] = {row['user_id']: _format(row) for row in rows}
+        self.order: List[Tuple[str, str]] = sorted(_sort_key(user) for user in self.users.values())
+        self.terms: List[Tuple[str, str]] = sorted(
+            (term, user_id) for user_id, user in self.users.items() for term in _search_terms(user)
+        )
+
+    def _remove(self, user_id: str) -> None:
+        user = self.users.pop(user_id, None)
+        if user is None:
+            return
+        self.order.pop(bisect_left(self.order, _sort_key(user)))
+        for term in _search_terms(user):
+            self.terms.pop(bisect_left(self.terms, (term, user_id)))
+
+    def upsert(self, row: dict) -> None:
+        self._remove(row['user_id'])
+        user = self.users[row['user_id']] = _format(row)
+        insort(self.order, _sort_key(user))
+        for term in _search_terms(user):
+            insort(self.terms, (term, user['user_id']))
+
+    def _prefix_matches(self, prefix: str) -> set:
+        matches = set()
+        i = bisect_left(self.terms, (prefix, ''))
+        while i < len(self.terms) and self.terms[i][0].startswith(prefix):
+            matches.add(self.terms[i][1])
+            i += 1
+        return matches
+
+    def search(self, q: Optional[str] = None, school_id: Optional[str] = None, role_title: Optional[str] = None,
+               include_inactive: bool = False, page_cursor: Optional[str] = None,
+               limit: Optional[int] = None) -> Tuple[List[dict], Optional[str]]:
+        """
+        Users in name order, optionally filtered, and with every word of q a
+        prefix of their name or email. With limit, returns one page and the
+        cursor for the next (None on the last page).
+        """
+        if q and q.split():
+            matching = None
+            for word in q.casefold().split():
+                found = self._prefix_matches(word)
+                matching = found if matching is None else matching & found
+            keys = sorted(_sort_key(self.users[user_id]) for user_id in matching)
+        else:
+            keys = self.order
+
+        start = 0
+        if page_cursor:
+            last_key = decode_cursor(page_cursor)
+            start = bisect_left(keys, last_key)
+            if start < len(keys) and keys[start] == last_key:
+                start += 1
+
+        page = []
+        for key in keys[start:]:
+            user = self.users[key[1]]
+            if (not include_inactive and not user['is_active']) \
+                    or (school_id and user['school_id'] != school_id) \
+                    or (role_title and user['role_title'] != role_title):
+                continue
+            if limit is not None and len(page) == limit:
+                return page, encode_cursor(_sort_key(page[-1]))
+            page.append(user)
+        return page, None
+
+class UserDirectoryCache:
+    """Per-worker user directories, least recently used MAT evicted first"""
+
+    def __init__(self, max_mats: int = USER_DIRECTORY_MAX_MATS):
+        self.max_mats = max_mats
+        self._lock = threading.Lock()
+        self._directories: "OrderedDict[str, UserDirectory]" = OrderedDict()
+
+    def _store(self, directory: UserDirectory) -> None:
+        self._directories[directory.mat_id] = directory
+        self._directories.move_to_end(directory.mat_id)
+        while len(self._directories) > self.max_mats:
+            self._directories.popitem(last=False)
+
+    def get(self, cursor, mat_id: str) -> UserDirectory:
+        """The MAT's directory, reloaded if its users_version has moved"""
+        cursor.execute(USERS_VERSION_SQL, (mat_id,))
+        row = cursor.fetchone()
+        version = row['users_version'] if row else 0
+
+        with self._lock:
+            directory = self._directories.get(mat_id)
+            if directory is not None and directory.version == version:
+                self._directories.move_to_end(mat_id)
+                return directory
+
+        cursor.execute(USERS_SQL, (mat_id,))
+        directory = UserDirectory(mat_id, version, cursor.fetchall())
+        with self._lock:
+            self._store(directory)
+        return directory
+
+    def search(self, cursor, mat_id: str, **filters) -> Tuple[List[dict], Optional[str]]:
+        """UserDirectory.search under the cache lock, so pages never see a half-applied write"""
+        directory = self.get(cursor, mat_id)
+        with self._lock:
+            return directory.search(**filters)
+
+    def refresh_user(self, cursor, mat_id: str, user_id: str, version: int) -> None:
+        """
+        Apply this worker's own committed write (which bumped users_version to
+        version). If other writes came in between, drop the directory instead.
+        """
+        with self._lock:
+            directory = self._directories.get(mat_id)
+            if directory is None or directory.version != version - 1:
+                self._directories.pop(mat_id, None)
+                return
+
+        cursor.execute(USER_SQL, (mat_id, user_id))
+        row = cursor.fetchone()
+
+        with self._lock:
+            if self._directories.get(mat_id) is not directory or directory.version != version - 1:
+                return
+            if row is None:
+                self._directories.pop(mat_id, None)
+                return
+            directory.upsert(row)
+            directory.version = version
+
+    def invalidate(self, mat_id: str) -> None:
+        with self._lock:
+            self._directories.pop(mat_id, None)
+
+# Shared instance used by the API
+user_directory = UserDirectoryCache()
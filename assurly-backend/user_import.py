@@ -0,0 +1,409 @@
+"""
+Bulk user import from CSV or JSON lines.
+
+The upload is streamed to a file under USER_IMPORT_DIR, then imported by a
+background job (UserImportJobs) in batches of USER_IMPORT_BATCH_ROWS:
+
+- rows are validated field by field (the same rules as POST /api/users)
+- school_id is checked against the MAT's schools, loaded once per import
+- emails are checked for duplicates within the file, and against users with
+  one IN query per batch
+- the batch's valid rows are written with one multi-row INSERT
+
+The import is one transaction; rows that fail validation are reported with
+their row number and skipped, and do not stop the rest. With invites on,
+each new user is written with a magic link token and the emails go out after
+commit over one SMTP session.
+
+Job state lives in the user_import_jobs table, so any worker or instance can
+answer GET /api/users/import/{job_id}. The upload file stays local to the
+worker that received it, which is the one that runs the job. A running job
+refreshes heartbeat_at after every batch; a job whose worker died stops
+doing so, and once the heartbeat is USER_IMPORT_STALE_SECONDS old the job is
+marked failed - at startup, and whenever it is read.
+"""
+
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+import uuid
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional, Tuple
+
+from user_directory import bump_users_version
+
+USER_IMPORT_DIR = os.getenv('USER_IMPORT_DIR', os.path.join(tempfile.gettempdir(), 'assurly-user-imports'))
+USER_IMPORT_BATCH_ROWS = int(os.getenv('USER_IMPORT_BATCH_ROWS', '500'))
+USER_IMPORT_MAX_BYTES = int(os.getenv('USER_IMPORT_MAX_BYTES', str(10 * 1024 * 1024)))
+USER_IMPORT_STALE_SECONDS = int(os.getenv('USER_IMPORT_STALE_SECONDS', '900'))
+
+# Per-row errors kept in the job state; the count is always exact
+MAX_REPORTED_ERRORS = 1000
+
+IMPORT_FORMATS = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'jsonl',
+    'application/jsonl': 'jsonl',
+}
+
+IMPORT_COLUMNS = ('email', 'full_name', 'role_title', 'school_id')
+
+CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS user_import_jobs (
+        job_id          CHAR(32)     NOT NULL,
+        mat_id          CHAR(36)     NOT NULL,
+        requested_by    CHAR(36)     NOT NULL,
+        import_format   VARCHAR(10)  NOT NULL,
+        send_invites    TINYINT(1)   NOT NULL DEFAULT 0,
+        status          ENUM('queued', 'running', 'completed', 'failed') NOT NULL DEFAULT 'queued',
+        rows_read       INT          NULL,
+        created_count   INT          NULL,
+        invited_count   INT          NULL,
+        error_count     INT          NULL,
+        errors          MEDIUMTEXT   NULL,  -- JSON array, at most MAX_REPORTED_ERRORS
+        error           TEXT         NULL,
+        created_at      TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        heartbeat_at    TIMESTAMP    NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        completed_at    TIMESTAMP    NULL,
+        PRIMARY KEY (job_id),
+        KEY idx_user_import_jobs_mat (mat_id, created_at),
+        KEY idx_user_import_jobs_stale (status, heartbeat_at)
+    )
+"""
+
+INSERT_JOB_SQL = """
+    INSERT INTO user_import_jobs (job_id, mat_id, requested_by, import_format, send_invites, status)
+    VALUES (%s, %s, %s, %s, %s, %s)
+"""
+
+# Assignments apply left to right, so completed_at sees the new status
+SAVE_JOB_SQL = """
+    UPDATE user_import_jobs
+    SET status = %s, rows_read = %s, created_count = %s, invited_count = %s, error_count = %s,
+        errors = %s, error = %s, heartbeat_at = NOW(),
+        completed_at = IF(status IN ('completed', 'failed'), NOW(), NULL)
+    WHERE job_id = %s
+"""
+
+HEARTBEAT_SQL = "UPDATE user_import_jobs SET heartbeat_at = NOW() WHERE job_id = %s"
+
+GET_JOB_SQL = "SELECT * FROM user_import_jobs WHERE job_id = %s AND mat_id = %s"
+
+# Queued or running jobs whose worker stopped refreshing the heartbeat
+FAIL_STALE_SQL = """
+    UPDATE user_import_jobs
+    SET status = 'failed',
+        error = 'The import stopped responding before it finished, most likely because the server restarted',
+        completed_at = NOW()
+    WHERE status IN ('queued', 'running') AND heartbeat_at < NOW() - INTERVAL %s SECOND
+    {where}
+"""
+
+INSERT_USERS_SQL = """
+    INSERT INTO users
+    (user_id, email, full_name, role_title, school_id, mat_id, is_active, magic_link_token,
+     token_expires_at, created_at)
+    VALUES {values}
+"""
+
+def iter_rows(fileobj, import_format: str) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """(row number, fields, parse error) for each record, read a line at a time"""
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    if import_format == 'csv':
+        reader = csv.DictReader(text)
+        missing = [column for column in ('email', 'full_name', 'role_title') if column not in (reader.fieldnames or [])]
+        if missing:
+            raise ValueError(f"CSV header is missing: {', '.join(missing)}")
+        for row_number, row in enumerate(reader, start=1):
+            yield row_number, {column: (row.get(column) or '').strip() or None for column in IMPORT_COLUMNS}, None
+    else:
+        row_number = 0
+        for line in text:
+            if not line.strip():
+                continue
+            row_number += 1
+            try:
+                record = json.loads(line)
+            except ValueError:
+                yield row_number, None, "Not valid JSON"
+                continue
+            if not isinstance(record, dict):
+                yield row_number, None, "Expected a JSON object"
+                continue
+            yield row_number, {column: record.get(column) for column in IMPORT_COLUMNS}, None
+
+def _batches(rows: Iterator, size: int) -> Iterator[list]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+class UserImport:
+    """One import's state while it runs: preloaded schools, emails seen and results"""
+
+    def __init__(self, mat_id: str, school_ids: set, validate: Callable[[dict], dict],
+                 new_token: Optional[Callable[[], Tuple[str, datetime]]] = None):
+        self.mat_id = mat_id
+        self.school_ids = school_ids
+        self.validate = validate
+        self.new_token = new_token
+        self.seen_emails = set()
+        self.rows_read = 0
+        self.created: List[dict] = []
+        self.error_count = 0
+        self.errors: List[dict] = []
+
+    def error(self, row_number: int, email: Optional[str], message: str) -> None:
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'row': row_number, 'email': email, 'error': message})
+
+    def import_batch(self, cursor, batch: List[Tuple[int, Optional[dict], Optional[str]]]) -> int:
+        """Validate a batch and insert its valid rows; returns the number inserted"""
+        self.rows_read += len(batch)
+        valid = []
+        for row_number, fields, parse_error in batch:
+            if parse_error:
+                self.error(row_number, None, parse_error)
+                continue
+            try:
+                user = self.validate(fields)
+            except ValueError as e:
+                self.error(row_number, fields.get('email'), str(e))
+                continue
+            if user['school_id'] and user['school_id'] not in self.school_ids:
+                self.error(row_number, user['email'], f"School '{user['school_id']}' not found in your MAT")
+                continue
+            email_key = user['email'].casefold()
+            if email_key in self.seen_emails:
+                self.error(row_number, user['email'], "Duplicate email in this file")
+                continue
+            self.seen_emails.add(email_key)
+            valid.append((row_number, user))
+
+        if valid:
+            cursor.execute(
+                f"SELECT email FROM users WHERE email IN ({','.join(['%s'] * len(valid))})",
+                [user['email'] for _, user in valid]
+            )
+            taken = {row['email'].casefold() for row in cursor.fetchall()}
+            for row_number, user in valid:
+                if user['email'].casefold() in taken:
+                    self.error(row_number, user['email'], f"A user with email '{user['email']}' already exists")
+            valid = [(row_number, user) for row_number, user in valid if user['email'].casefold() not in taken]
+
+        if not valid:
+            return 0
+
+        params = []
+        for row_number, user in valid:
+            user['row'] = row_number
+            user['user_id'] = f"user{uuid.uuid4().hex[:8]}"
+            user['token'], expires_at = self.new_token() if self.new_token else (None, None)
+            params += [user['user_id'], user['email'], user['full_name'], user['role_title'],
+                       user['school_id'], self.mat_id, user['token'], expires_at]
+            self.created.append(user)
+        cursor.execute(
+            INSERT_USERS_SQL.format(values=', '.join(['(%s, %s, %s, %s, %s, %s, 1, %s, %s, NOW())'] * len(valid))),
+            params
+        )
+        return len(valid)
+
+def _timestamp(value) -> Optional[str]:
+    return value.strftime('%Y-%m-%dT%H:%M:%SZ') if value else None
+
+class UserImportJobs:
+    """
+    Background imports. Each job is a user_import_jobs row plus
+    <job_id>.upload under import_dir (the uploaded file, deleted when the job
+    finishes). connect() opens a database connection for the import and the
+    job state; it is set by the API.
+    """
+
+    def __init__(self, import_dir: str = USER_IMPORT_DIR, batch_rows: int = USER_IMPORT_BATCH_ROWS,
+                 connect: Optional[Callable[[], object]] = None, stale_seconds: int = USER_IMPORT_STALE_SECONDS):
+        self.import_dir = import_dir
+        self.batch_rows = batch_rows
+        self.connect = connect
+        self.stale_seconds = stale_seconds
+
+    def upload_path(self, job_id: str) -> str:
+        return os.path.join(self.import_dir, f"{job_id}.upload")
+
+    def _save(self, connection, job: dict) -> None:
+        cursor = connection.cursor()
+        cursor.execute(SAVE_JOB_SQL, (
+            job['status'], job['rows_read'], job['created'], job['invited'], job['error_count'],
+            json.dumps(job['errors']), job['error'], job['job_id']
+        ))
+        connection.commit()
+
+    def fail_stale(self, mat_id: Optional[str] = None) -> int:
+        """Mark queued or running jobs with an expired heartbeat as failed; returns how many"""
+        connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(FAIL_STALE_SQL.format(where="AND mat_id = %s" if mat_id else ""),
+                           (self.stale_seconds, mat_id) if mat_id else (self.stale_seconds,))
+            connection.commit()
+            return cursor.rowcount
+        finally:
+            connection.close()
+
+    def get(self, job_id: str, mat_id: str) -> Optional[dict]:
+        """Job state, or None if it doesn't exist or belongs to another MAT"""
+        if not job_id.isalnum():
+            return None
+        connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(GET_JOB_SQL, (job_id, mat_id))
+            row = cursor.fetchone()
+            if row and row['status'] in ('queued', 'running'):
+                cursor.execute(FAIL_STALE_SQL.format(where="AND job_id = %s"), (self.stale_seconds, job_id))
+                connection.commit()
+                if cursor.rowcount:
+                    cursor.execute(GET_JOB_SQL, (job_id, mat_id))
+                    row = cursor.fetchone()
+        finally:
+            connection.close()
+        if row is None:
+            return None
+        return {
+            'job_id': row['job_id'],
+            'mat_id': row['mat_id'],
+            'requested_by': row['requested_by'],
+            'format': row['import_format'],
+            'send_invites': bool(row['send_invites']),
+            'status': row['status'],
+            'rows_read': row['rows_read'],
+            'created': row['created_count'],
+            'invited': row['invited_count'],
+            'error_count': row['error_count'],
+            'errors': json.loads(row['errors']) if row['errors'] else [],
+            'error': row['error'],
+            'created_at': _timestamp(row['created_at']),
+            'completed_at': _timestamp(row['completed_at'])
+        }
+
+    def new_job(self, mat_id: str, requested_by: str, import_format: str, send_invites: bool) -> dict:
+        """A job record; the caller streams the upload to upload_path(job_id) and then calls start()"""
+        os.makedirs(self.import_dir, exist_ok=True)
+        return {
+            'job_id': uuid.uuid4().hex,
+            'mat_id': mat_id,
+            'requested_by': requested_by,
+            'format': import_format,
+            'send_invites': send_invites,
+            'status': 'queued',
+            'rows_read': None,
+            'created': None,
+            'invited': None,
+            'error_count': None,
+            'errors': [],
+            'error': None,
+            'created_at': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'completed_at': None
+        }
+
+    def discard(self, job: dict) -> None:
+        """Remove the upload of a job that was never started"""
+        try:
+            os.remove(self.upload_path(job['job_id']))
+        except FileNotFoundError:
+            pass
+
+    def start(self, job: dict, validate: Callable[[dict], dict],
+              new_token: Optional[Callable[[], Tuple[str, datetime]]] = None,
+              send_invites: Optional[Callable[[List[Tuple[str, str, str]]], List[str]]] = None) -> dict:
+        """Record the queued job and run it on a background thread. Blocking - run off the event loop."""
+        connection = self.connect()
+        try:
+            cursor = connection.cursor()
+            cursor.execute(INSERT_JOB_SQL, (job['job_id'], job['mat_id'], job['requested_by'], job['format'],
+                                            job['send_invites'], job['status']))
+            connection.commit()
+        finally:
+            connection.close()
+        threading.Thread(target=self.run, args=(dict(job), validate, new_token, send_invites),
+                         daemon=True).start()
+        return job
+
+    def run(self, job: dict, validate: Callable[[dict], dict],
+            new_token: Optional[Callable[[], Tuple[str, datetime]]] = None,
+            send_invites: Optional[Callable[[List[Tuple[str, str, str]]], List[str]]] = None) -> dict:
+        """
+        Import the upload in one transaction, then send invites if asked.
+        send_invites takes (email, full_name, token) tuples and returns the
+        emails that could not be sent. Job state is written on its own
+        connection, so it commits while the import's transaction is open.
+        """
+        state = connection = None
+        try:
+            state = self.connect()
+            job['status'] = 'running'
+            self._save(state, job)
+            state_cursor = state.cursor()
+
+            connection = self.connect()
+            cursor = connection.cursor()
+            cursor.execute("SELECT school_id FROM schools WHERE mat_id = %s AND is_active = 1", (job['mat_id'],))
+            user_import = UserImport(job['mat_id'], {row['school_id'] for row in cursor.fetchall()}, validate,
+                                     new_token if job['send_invites'] else None)
+            try:
+                with open(self.upload_path(job['job_id']), 'rb') as f:
+                    for batch in _batches(iter_rows(f, job['format']), self.batch_rows):
+                        user_import.import_batch(cursor, batch)
+                        state_cursor.execute(HEARTBEAT_SQL, (job['job_id'],))
+                        state.commit()
+                if user_import.created:
+                    bump_users_version(cursor, job['mat_id'])
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+
+            job['rows_read'] = user_import.rows_read
+            job['created'] = len(user_import.created)
+            if job['send_invites'] and send_invites and user_import.created:
+                state_cursor.execute(HEARTBEAT_SQL, (job['job_id'],))
+                state.commit()
+                not_sent = set(send_invites([(user['email'], user['full_name'], user['token'])
+                                             for user in user_import.created]))
+                job['invited'] = len(user_import.created) - len(not_sent)
+                for user in user_import.created:
+                    if user['email'] in not_sent:
+                        user_import.error(user['row'], user['email'],
+                                          "User created but the invite email could not be sent")
+            job['error_count'] = user_import.error_count
+            job['errors'] = user_import.errors
+            job['status'] = 'completed'
+        except Exception as e:
+            job['status'] = 'failed'
+            job['error'] = str(e)
+        finally:
+            if connection is not None:
+                connection.close()
+            self.discard(job)
+            job['completed_at'] = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ')
+            try:
+                if state is None:
+                    state = self.connect()
+                self._save(state, job)
+            except Exception as e:
+                # Left queued/running, so the heartbeat check fails it later
+                print(f"⚠️ User import {job['job_id']}: job state not saved: {e}")
+            finally:
+                if state is not None:
+                    state.close()
+        return job
+
+# Shared instance used by the API
+user_import_jobs = UserImportJobs()
@@ -0,0 +1,98 @@
+"""
+Word-level diffs between two versions of a standard.
+
+Versions are immutable - editing a standard writes a new version - so the
+diff between two version_ids never changes. Diffs are computed once and kept
+in a per-worker LRU keyed by the version pair, with no expiry. An
+archive-rename gives the versions new IDs, which only means new keys.
+
+A diff is a list of runs, each {"op": "equal" | "delete" | "insert", "text"}.
+Joining the equal and delete runs gives the old text back; joining the equal
+and insert runs gives the new text.
+"""
+
+import difflib
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
+
+VERSION_DIFF_CACHE_SIZE = int(os.getenv('VERSION_DIFF_CACHE_SIZE', '5000'))
+
+DIFF_FIELDS = ('standard_code', 'standard_name', 'standard_description', 'standard_type')
+
+# Words, runs of whitespace and single punctuation marks
+TOKEN_PATTERN = re.compile(r"\w+|\s+|[^\w\s]")
+
+def tokenize(text) -> List[str]:
+    return TOKEN_PATTERN.findall(text or '')
+
+def word_diff(old_text, new_text) -> List[dict]:
+    """Runs of unchanged, removed and added text, in reading order"""
+    old_tokens, new_tokens = tokenize(old_text), tokenize(new_text)
+    runs: List[dict] = []
+
+    def emit(op: str, tokens: List[str]) -> None:
+        if not tokens:
+            return
+        if runs and runs[-1]['op'] == op:
+            runs[-1]['text'] += ''.join(tokens)
+        else:
+            runs.append({'op': op, 'text': ''.join(tokens)})
+
+    matcher = difflib.SequenceMatcher(None, old_tokens, new_tokens, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            emit('equal', old_tokens[i1:i2])
+        else:
+            emit('delete', old_tokens[i1:i2])
+            emit('insert', new_tokens[j1:j2])
+    return runs
+
+def diff_versions(old: dict, new: dict) -> dict:
+    """Diff of every versioned field between two standard_versions rows"""
+    fields = {}
+    for field in DIFF_FIELDS:
+        changed = (old.get(field) or '') != (new.get(field) or '')
+        fields[field] = {
+            'changed': changed,
+            'diff': word_diff(old.get(field), new.get(field)) if changed
+            else [{'op': 'equal', 'text': old.get(field) or ''}]
+        }
+    return {
+        'from_version_id': old['version_id'],
+        'from_version_number': old['version_number'],
+        'to_version_id': new['version_id'],
+        'to_version_number': new['version_number'],
+        'changed_fields': [field for field in DIFF_FIELDS if fields[field]['changed']],
+        'fields': fields
+    }
+
+class VersionDiffCache:
+    """Per-worker, least recently used pair evicted first"""
+
+    def __init__(self, max_entries: int = VERSION_DIFF_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._diffs: "OrderedDict[Tuple[str, str], dict]" = OrderedDict()
+
+    def get(self, old: dict, new: dict) -> dict:
+        key = (old['version_id'], new['version_id'])
+        with self._lock:
+            diff = self._diffs.get(key)
+            if diff is not None:
+                self._diffs.move_to_end(key)
+                return diff
+
+        diff = diff_versions(old, new)
+
+        with self._lock:
+            self._diffs[key] = diff
+            self._diffs.move_to_end(key)
+            while len(self._diffs) > self.max_entries:
+                self._diffs.popitem(last=False)
+        return diff
+
+# Shared instance used by the API
+version_diff_cache = VersionDiffCache()